@@ -0,0 +1,15 @@
+"""Performance benchmarks for the order processing Lambdas."""
+
+import os
+import sys
+from pathlib import Path
+
+# Mirror the Lambda runtime, where the shared layer is on sys.path (/opt/python).
+# Done at package import so benchmark modules can import shared.* directly.
+sys.path.insert(0, str(Path(__file__).parent.parent / "lambdas" / "shared" / "python"))
+
+# Environment the handlers read at import time
+os.environ.setdefault("AWS_DEFAULT_REGION", "us-east-1")
+os.environ.setdefault("EVENT_BUS_NAME", "benchmark-bus")
+os.environ.setdefault("QUEUE_URL", "https://sqs.us-east-1.amazonaws.com/123456789012/benchmark")
+os.environ.setdefault("CLAIM_CHECK_BUCKET", "benchmark-claim-check")
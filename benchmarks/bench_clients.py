@@ -0,0 +1,138 @@
+"""
+Benchmark first-request latency of on-demand vs pre-warmed AWS clients.
+
+Runs PutEvents against a local HTTP endpoint that delays every new connection
+by a simulated TCP+TLS handshake, and compares:
+
+- default: boto3-style default client created on the first request
+- on demand: client with the shared.clients profile created on the first request
+- pre-warmed: client and connection created during init (AWS_CLIENT_PREWARM),
+  so the first request only pays the round trip
+
+Each round uses a fresh botocore session, like a new execution environment
+(botocore itself is imported once up front and not counted).
+
+Usage:
+    python -m benchmarks.bench_clients
+    python -m benchmarks.bench_clients --handshake-ms 40 --rounds 20
+"""
+
+import argparse
+import json
+import os
+import socket
+import statistics
+import threading
+import time
+from collections.abc import Callable
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any
+
+from botocore.session import get_session
+from shared import clients
+
+ENTRY = {
+    "Source": "public.api",
+    "DetailType": "order.received.v1",
+    "Detail": json.dumps({"orderId": "ORD-BENCH"}),
+    "EventBusName": "benchmark-bus",
+}
+
+
+def make_endpoint(handshake_ms: float) -> ThreadingHTTPServer:
+    """Start a keep-alive PutEvents endpoint that delays each new connection."""
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def setup(self) -> None:
+            time.sleep(handshake_ms / 1000)
+            # Headers and body are separate writes; avoid Nagle/delayed-ACK stalls
+            self.request.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+            super().setup()
+
+        def _reply(self) -> None:
+            length = int(self.headers.get("Content-Length") or 0)
+            self.rfile.read(length)
+            body = b'{"FailedEntryCount": 0, "Entries": [{"EventId": "bench"}]}'
+            self.send_response(200)
+            self.send_header("Content-Type", "application/x-amz-json-1.1")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            if self.command != "HEAD":
+                self.wfile.write(body)
+
+        do_POST = _reply
+        do_HEAD = _reply
+
+        def log_message(self, format: str, *args: Any) -> None:
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def first_request_ms(create: Callable[[], Any], prewarm: bool, rounds: int) -> tuple[float, float]:
+    """
+    Median latency of the first and second PutEvents call of a new client.
+
+    Args:
+        create: Creates the client (with a fresh session)
+        prewarm: Create the client and open its connection before timing
+        rounds: Fresh clients measured
+
+    Returns:
+        (first request ms, second request ms)
+    """
+    first, second = [], []
+    for _ in range(rounds):
+        client = None
+        if prewarm:
+            client = create()
+            clients.open_connection(client)
+        start = time.perf_counter()
+        if client is None:
+            client = create()
+        client.put_events(Entries=[ENTRY])
+        first.append((time.perf_counter() - start) * 1000)
+        start = time.perf_counter()
+        client.put_events(Entries=[ENTRY])
+        second.append((time.perf_counter() - start) * 1000)
+    return statistics.median(first), statistics.median(second)
+
+
+def main() -> None:
+    """Run the benchmark and print a table of results."""
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0].strip())
+    parser.add_argument("--handshake-ms", type=float, default=30.0)
+    parser.add_argument("--rounds", type=int, default=10)
+    args = parser.parse_args()
+
+    server = make_endpoint(args.handshake_ms)
+    endpoint = f"http://127.0.0.1:{server.server_address[1]}"
+
+    def default() -> Any:
+        return get_session().create_client("events", endpoint_url=endpoint)
+
+    def profiled() -> Any:
+        clients._session = None
+        return clients.create_client("events", endpoint_url=endpoint)
+
+    print(f"simulated handshake: {args.handshake_ms:.0f} ms, {args.rounds} rounds")
+    print(f"{'client':<12} {'first request ms':>17} {'second request ms':>18}")
+    for label, create, prewarm in (
+        ("default", default, False),
+        ("on demand", profiled, False),
+        ("pre-warmed", profiled, True),
+    ):
+        first, second = first_request_ms(create, prewarm, args.rounds)
+        print(f"{label:<12} {first:>17.1f} {second:>18.1f}")
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    os.environ.setdefault("AWS_ACCESS_KEY_ID", "benchmark")
+    os.environ.setdefault("AWS_SECRET_ACCESS_KEY", "benchmark")
+    main()
@@ -0,0 +1,218 @@
+"""
+Profile the cold start of every Lambda package.
+
+Each handler is loaded in a fresh interpreter started with -X importtime, the
+way the Lambda runtime loads it: shared layer on sys.path, environment set,
+then the index module executed. Two phases are timed separately:
+
+- init: loading the index module (what the Lambda INIT phase pays)
+- first use: creating every AWS client the handler uses (get_*_client), which
+  is paid by the first invocation that reaches AWS
+
+For each phase the report lists the wall time, the total import time and the
+slowest top-level imports in -X importtime format (microseconds).
+
+Usage:
+    python -m benchmarks.bench_cold_start
+    python -m benchmarks.bench_cold_start --lambda order_receiver --top 20 --runs 5
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+from dataclasses import dataclass, replace
+
+from benchmarks.common import LAMBDAS_DIR
+
+LAMBDAS = ["order_receiver", "notifier", "inventory", "document", "document_processor"]
+
+# Delimit the phases in the importtime output; interpreter startup imports
+# (site, encodings) come before INIT_MARKER and are not counted
+INIT_MARKER = "--- init"
+FIRST_USE_MARKER = "--- first use"
+
+PROBE = """
+import importlib.util, json, sys, time
+sys.stderr.write({init_marker!r} + "\\n")
+start = time.perf_counter()
+spec = importlib.util.spec_from_file_location("index", {path!r})
+module = importlib.util.module_from_spec(spec)
+spec.loader.exec_module(module)
+init = time.perf_counter() - start
+sys.stderr.write({first_use_marker!r} + "\\n")
+getters = sorted(n for n in dir(module) if n.startswith("get_") and n.endswith("_client"))
+start = time.perf_counter()
+for name in getters:
+    getattr(module, name)()
+first_use = time.perf_counter() - start
+print(json.dumps({{"init_ms": init * 1000, "first_use_ms": first_use * 1000, "clients": getters}}))
+"""
+
+ENVIRONMENT = {
+    "AWS_DEFAULT_REGION": "us-east-1",
+    "AWS_ACCESS_KEY_ID": "testing",
+    "AWS_SECRET_ACCESS_KEY": "testing",
+    # Profile on-demand client creation; pre-warming would move it into init
+    "AWS_CLIENT_PREWARM": "false",
+    "EVENT_BUS_NAME": "benchmark-bus",
+    "QUEUE_URL": "https://sqs.us-east-1.amazonaws.com/123456789012/benchmark",
+}
+
+
+@dataclass
+class ImportRecord:
+    """One line of -X importtime output."""
+
+    self_us: int
+    cumulative_us: int
+    depth: int
+    name: str
+
+    def format(self) -> str:
+        """Render the record the way -X importtime prints it."""
+        return (
+            f"import time: {self.self_us:>9} | {self.cumulative_us:>10} | "
+            f"{'  ' * self.depth}{self.name}"
+        )
+
+
+@dataclass
+class Profile:
+    """Cold-start profile of one Lambda package."""
+
+    name: str
+    init_ms: float
+    first_use_ms: float
+    clients: list[str]
+    init_imports: list[ImportRecord]
+    first_use_imports: list[ImportRecord]
+
+
+def parse_importtime(lines: list[str]) -> list[ImportRecord]:
+    """
+    Parse -X importtime output.
+
+    Args:
+        lines: stderr lines; lines that are not import records are skipped
+
+    Returns:
+        One record per imported module, in the order they were printed
+    """
+    records = []
+    for line in lines:
+        if not line.startswith("import time:"):
+            continue
+        fields = line[len("import time:") :].split("|")
+        if len(fields) != 3 or not fields[0].strip().isdigit():
+            continue  # the header line
+        raw_name = fields[2][1:]
+        name = raw_name.lstrip(" ")
+        records.append(
+            ImportRecord(
+                self_us=int(fields[0]),
+                cumulative_us=int(fields[1]),
+                depth=(len(raw_name) - len(name)) // 2,
+                name=name,
+            )
+        )
+    return records
+
+
+def total_import_us(records: list[ImportRecord]) -> int:
+    """Total import time of a phase: the sum of its top-level imports."""
+    return sum(record.cumulative_us for record in records if record.depth == 0)
+
+
+def profile_lambda(name: str) -> Profile:
+    """
+    Load one Lambda package in a fresh interpreter and profile its imports.
+
+    Args:
+        name: Directory name under lambdas/
+
+    Returns:
+        The cold-start profile
+    """
+    probe = PROBE.format(
+        path=str(LAMBDAS_DIR / name / "index.py"),
+        init_marker=INIT_MARKER,
+        first_use_marker=FIRST_USE_MARKER,
+    )
+    env = {
+        **os.environ,
+        **ENVIRONMENT,
+        "PYTHONPATH": str(LAMBDAS_DIR / "shared" / "python"),
+    }
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", probe],
+        capture_output=True,
+        text=True,
+        env=env,
+        check=True,
+    )
+    stderr = result.stderr.splitlines()
+    init_at = stderr.index(INIT_MARKER)
+    first_use_at = stderr.index(FIRST_USE_MARKER)
+    timings = json.loads(result.stdout.strip().splitlines()[-1])
+    return Profile(
+        name=name,
+        init_ms=timings["init_ms"],
+        first_use_ms=timings["first_use_ms"],
+        clients=timings["clients"],
+        init_imports=parse_importtime(stderr[init_at + 1 : first_use_at]),
+        first_use_imports=parse_importtime(stderr[first_use_at + 1 :]),
+    )
+
+
+def print_phase(title: str, wall_ms: float, records: list[ImportRecord], top: int) -> None:
+    """Print the wall time, import total and slowest top-level imports of a phase."""
+    print(f"  {title}: {wall_ms:.1f} ms, imports {total_import_us(records) / 1000:.1f} ms")
+    slowest = sorted(
+        (record for record in records if record.depth == 0),
+        key=lambda record: record.cumulative_us,
+        reverse=True,
+    )[:top]
+    if slowest:
+        print("    import time: self [us] | cumulative | imported package")
+        for record in slowest:
+            print(f"    {record.format()}")
+
+
+def main(argv: list[str] | None = None) -> None:
+    """Profile the selected Lambdas and print a report per package."""
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0].strip())
+    parser.add_argument("--lambda", dest="lambdas", action="append", choices=LAMBDAS)
+    parser.add_argument("--top", type=int, default=8, help="Imports listed per phase")
+    parser.add_argument("--runs", type=int, default=3, help="Fresh interpreters per Lambda")
+    args = parser.parse_args(argv)
+
+    summary = []
+    for name in args.lambdas or LAMBDAS:
+        # The median run by init time is reported in full
+        runs = sorted((profile_lambda(name) for _ in range(args.runs)), key=lambda p: p.init_ms)
+        profile = replace(
+            runs[len(runs) // 2], first_use_ms=statistics.median(p.first_use_ms for p in runs)
+        )
+        print(f"{name}")
+        print_phase("init", profile.init_ms, profile.init_imports, args.top)
+        if profile.clients:
+            print_phase(
+                f"first use ({', '.join(profile.clients)})",
+                profile.first_use_ms,
+                profile.first_use_imports,
+                args.top,
+            )
+        print()
+        summary.append(profile)
+
+    print(f"{'lambda':<20} {'init ms':>9} {'first use ms':>13}")
+    for profile in summary:
+        first_use = f"{profile.first_use_ms:.1f}" if profile.clients else "-"
+        print(f"{profile.name:<20} {profile.init_ms:>9.1f} {first_use:>13}")
+
+
+if __name__ == "__main__":
+    main()
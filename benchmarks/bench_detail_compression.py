@@ -0,0 +1,98 @@
+"""
+Benchmark the CPU cost of compressed Details against the bytes they save.
+
+Encodes loadgen orders of 4-192 KB with shared.detail_codec at zlib levels
+1, 6 and 9, and reports per order:
+
+- encode us: compression in order_receiver (zlib + base64 + plain fields)
+- decode us: decompression in each consumer
+- bytes / compressed bytes: PutEvents entry size before and after
+- us/KB saved: encode + decode CPU per KB taken off the entry
+- chunks: 64 KB PutEvents billing chunks before and after
+
+Usage:
+    python -m benchmarks.bench_detail_compression
+    python -m benchmarks.bench_detail_compression --levels 1 --iterations 200
+"""
+
+import argparse
+import json
+from typing import Any
+
+from shared import detail_codec
+from shared.publisher import entry_size
+
+from benchmarks.common import cpu_time_us
+from localbus.loadgen import WorkloadGenerator
+
+SIZES_KB = [4, 16, 64, 128, 192]
+LEVELS = [1, 6, 9]
+
+# PutEvents is billed per 64 KB chunk of each entry
+BILLING_CHUNK_BYTES = 64 * 1024
+
+
+def order_entry(detail: Any) -> dict[str, Any]:
+    """PutEvents entry as order_receiver builds it (bus name is not counted)."""
+    return {"Source": "public.api", "DetailType": "order.received.v1", "Detail": json.dumps(detail)}
+
+
+def chunks(size: int) -> int:
+    """Number of 64 KB billing chunks for an entry of this size."""
+    return -(-size // BILLING_CHUNK_BYTES)
+
+
+def measure(order: dict[str, Any], level: int, iterations: int) -> dict[str, float]:
+    """
+    Measure encoding one order at a zlib level.
+
+    Args:
+        order: Order payload
+        level: zlib compression level
+        iterations: Calls per timing round
+
+    Returns:
+        encode_us, decode_us, bytes and compressed_bytes
+    """
+    detail_codec.DETAIL_COMPRESSION_LEVEL = level
+    raw = json.dumps(order)
+    encoded = detail_codec.encode_detail(order, raw)
+    assert detail_codec.decode_detail(encoded) == order
+    return {
+        "encode_us": cpu_time_us(lambda: detail_codec.encode_detail(order, raw), iterations),
+        "decode_us": cpu_time_us(lambda: detail_codec.decode_detail(encoded), iterations),
+        "bytes": entry_size(order_entry(order)),
+        "compressed_bytes": entry_size(order_entry(encoded)),
+    }
+
+
+def main() -> None:
+    """Run the benchmark and print a table of results."""
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0].strip())
+    parser.add_argument("--levels", type=int, nargs="+", default=LEVELS)
+    parser.add_argument("--iterations", type=int, default=50)
+    args = parser.parse_args()
+
+    generator = WorkloadGenerator(seed=1)
+    orders = {size_kb: generator.order(size_kb * 1024) for size_kb in SIZES_KB}
+    print(
+        f"{'size KB':>7} {'level':>5} {'encode us':>10} {'decode us':>10} {'bytes':>8} "
+        f"{'compressed':>10} {'ratio':>6} {'us/KB saved':>11} {'chunks':>7}"
+    )
+    for size_kb, order in orders.items():
+        for level in args.levels:
+            result = measure(order, level, args.iterations)
+            saved_kb = (result["bytes"] - result["compressed_bytes"]) / 1024
+            cpu_us = result["encode_us"] + result["decode_us"]
+            per_kb = f"{cpu_us / saved_kb:.1f}" if saved_kb > 0 else "-"
+            chunk_change = f"{chunks(result['bytes'])}->{chunks(result['compressed_bytes'])}"
+            ratio = result["compressed_bytes"] / result["bytes"]
+            print(
+                f"{size_kb:>7} {level:>5} {result['encode_us']:>10.1f} "
+                f"{result['decode_us']:>10.1f} {result['bytes']:>8} "
+                f"{result['compressed_bytes']:>10} {ratio:>6.2f} {per_kb:>11} {chunk_change:>7}"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,147 @@
+"""
+Benchmark streaming record extraction against loading the whole document.
+
+Generates synthetic CSV, JSON and XML order documents of 1-10 MB lazily, in
+64 KB chunks, and extracts their records two ways:
+
+- streaming: shared.document_records.extract_records, as document_processor
+  runs it, feeding encode_chunks as when record events are enabled
+- loaded: the body joined in memory, then parsed whole (csv over the text,
+  json.loads, ElementTree.fromstring) and normalized with normalize_record
+
+and reports throughput (MB/s of CPU time, generation excluded) and the
+tracemalloc peak of each. Streaming peak memory should not grow with the
+document; loaded peak memory is a multiple of it.
+
+Usage:
+    python -m benchmarks.bench_document_records
+    python -m benchmarks.bench_document_records --sizes 1 25 --formats CSV
+"""
+
+import argparse
+import csv
+import io
+import json
+import time
+import tracemalloc
+from collections.abc import Callable, Iterator
+from typing import Any
+from xml.etree import ElementTree
+
+from shared.document_records import encode_chunks, extract_records, normalize_record
+
+SIZES_MB = [1, 10]
+FORMATS = ["CSV", "JSON", "XML"]
+CHUNK_BYTES = 64 * 1024
+
+# (header, row template) per format; {n} is the line number
+_TEMPLATES = {
+    "CSV": ("orderId,line,sku,description,quantity,price\n", "ORD-1,{n},W-{n},widget,10,9.99\n"),
+    "JSON": ('{"orderId": "ORD-1", "lines": [', '{{"line": {n}, "sku": "W-{n}", "qty": 10}}, '),
+    "XML": ("<order id='ORD-1'>", "<line no='{n}'><sku>W-{n}</sku><qty>10</qty></line>"),
+}
+_FOOTERS = {"CSV": "", "JSON": '{"sku": "W-0"}]}', "XML": "</order>"}
+
+
+def synthetic_document(doc_type: str, size_bytes: int) -> Iterator[bytes]:
+    """
+    Generate an order document of about size_bytes in CHUNK_BYTES chunks.
+
+    Args:
+        doc_type: "CSV", "JSON" or "XML"
+        size_bytes: Approximate document size
+
+    Yields:
+        Consecutive chunks of the document
+    """
+    header, row = _TEMPLATES[doc_type]
+    pending = header.encode()
+    written = 0
+    line = 0
+    while written + len(pending) < size_bytes:
+        line += 1
+        pending += row.format(n=line).encode()
+        if len(pending) >= CHUNK_BYTES:
+            yield pending[:CHUNK_BYTES]
+            pending = pending[CHUNK_BYTES:]
+            written += CHUNK_BYTES
+    yield pending + _FOOTERS[doc_type].encode()
+
+
+def streaming(doc_type: str, size_bytes: int) -> int:
+    """Extract and encode records as document_processor does; returns the record count."""
+    records = extract_records(doc_type, synthetic_document(doc_type, size_bytes))
+    return sum(len(chunk) for chunk in encode_chunks(records, 64 * 1024))
+
+
+def loaded(doc_type: str, size_bytes: int) -> int:
+    """Extract records from the whole document in memory; returns the record count."""
+    data = b"".join(synthetic_document(doc_type, size_bytes))
+    raw: list[dict[str, Any]]
+    if doc_type == "CSV":
+        raw = list(csv.DictReader(io.StringIO(data.decode())))
+    elif doc_type == "JSON":
+        raw = json.loads(data)["lines"]
+    else:
+        root = ElementTree.fromstring(data)
+        raw = [{**line.attrib, **{child.tag: child.text for child in line}} for line in root]
+    records = [record for record in map(normalize_record, raw) if "sku" in record]
+    return len([json.dumps(record) for record in records])
+
+
+def measure(fn: Callable[[str, int], int], doc_type: str, size_mb: int) -> dict[str, float]:
+    """
+    Measure one extraction.
+
+    Throughput and memory are measured in separate passes, since tracing
+    allocations slows parsing down many times over.
+
+    Args:
+        fn: streaming or loaded
+        doc_type: "CSV", "JSON" or "XML"
+        size_mb: Document size in MB
+
+    Returns:
+        mb_per_s, peak_kb and records
+    """
+    size = size_mb * 1024 * 1024
+    start = time.process_time()
+    count = fn(doc_type, size)
+    elapsed = time.process_time() - start
+    start = time.process_time()
+    for _ in synthetic_document(doc_type, size):
+        pass
+    elapsed -= time.process_time() - start
+
+    tracemalloc.start()
+    fn(doc_type, size)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return {"mb_per_s": size_mb / elapsed, "peak_kb": peak / 1024, "records": count}
+
+
+def main() -> None:
+    """Run the benchmark and print a table of results."""
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0].strip())
+    parser.add_argument("--sizes", type=int, nargs="+", default=SIZES_MB, help="Sizes in MB")
+    parser.add_argument("--formats", nargs="+", default=FORMATS, choices=FORMATS)
+    args = parser.parse_args()
+
+    print(
+        f"{'format':>6} {'size MB':>7} {'records':>8} {'stream MB/s':>11} {'stream KB':>9} "
+        f"{'loaded MB/s':>11} {'loaded KB':>9}"
+    )
+    for doc_type in args.formats:
+        for size_mb in args.sizes:
+            stream = measure(streaming, doc_type, size_mb)
+            whole = measure(loaded, doc_type, size_mb)
+            assert stream["records"] == whole["records"]
+            print(
+                f"{doc_type:>6} {size_mb:>7} {stream['records']:>8} "
+                f"{stream['mb_per_s']:>11.1f} {stream['peak_kb']:>9.0f} "
+                f"{whole['mb_per_s']:>11.1f} {whole['peak_kb']:>9.0f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,160 @@
+"""
+Benchmark streaming X12 parsing throughput and memory.
+
+Generates synthetic 850 purchase order interchanges of 1-25 MB lazily, in
+chunks, and parses them with shared.edi exactly as document_processor does
+(iter_segments over the chunked body, then summarize_edi). Reports per file:
+
+- MB/s: parse throughput (CPU time)
+- peak KB: tracemalloc peak while parsing (including the generator's current
+  functional group); it should not grow with the file
+- orders / lines / segments: what the summary found, checked against the generator
+
+Usage:
+    python -m benchmarks.bench_edi
+    python -m benchmarks.bench_edi --sizes 10 100 --chunk-kb 16 64 256
+"""
+
+import argparse
+import time
+import tracemalloc
+from collections.abc import Iterator
+
+from shared.edi import EDI_CHUNK_BYTES, EdiSummary, iter_segments, summarize_edi
+
+SIZES_MB = [1, 10, 25]
+
+# Purchase orders per functional group, and line items per order
+ORDERS_PER_GROUP = 500
+LINES_PER_ORDER = 20
+
+_ISA = (
+    "ISA*00*          *00*          *ZZ*SENDER         *ZZ*RECEIVER       "
+    "*260318*1430*U*00401*000000001*0*P*>~\n"
+)
+
+
+def _transaction_set(control: int) -> str:
+    lines = "".join(
+        f"PO1*{line}*10*EA*9.99**VP*W-{line:04d}~\n" for line in range(1, LINES_PER_ORDER + 1)
+    )
+    return (
+        f"ST*850*{control:04d}~\nBEG*00*SA*PO-{control:08d}**20260318~\n{lines}"
+        f"CTT*{LINES_PER_ORDER}~\nSE*{LINES_PER_ORDER + 4}*{control:04d}~\n"
+    )
+
+
+def synthetic_edi(size_bytes: int, chunk_bytes: int) -> Iterator[bytes]:
+    """
+    Generate an X12 interchange of about size_bytes, in chunks.
+
+    Functional groups of ORDERS_PER_GROUP transaction sets are emitted until
+    the size is reached; only one group is held in memory at a time.
+
+    Args:
+        size_bytes: Approximate interchange size
+        chunk_bytes: Size of each yielded chunk
+
+    Yields:
+        Consecutive chunks of the interchange
+    """
+    pending = _ISA.encode()
+    written = groups = 0
+    while written + len(pending) < size_bytes:
+        groups += 1
+        sets = "".join(_transaction_set(control) for control in range(1, ORDERS_PER_GROUP + 1))
+        group = (
+            f"GS*PO*SENDER*RECEIVER*20260318*1430*{groups}*X*004010~\n{sets}"
+            f"GE*{ORDERS_PER_GROUP}*{groups}~\n"
+        )
+        pending += group.encode()
+        while len(pending) >= chunk_bytes:
+            yield pending[:chunk_bytes]
+            pending = pending[chunk_bytes:]
+            written += chunk_bytes
+    pending += f"IEA*{groups}*000000001~\n".encode()
+    for start in range(0, len(pending), chunk_bytes):
+        yield pending[start : start + chunk_bytes]
+
+
+def _parse(size_mb: int, chunk_bytes: int) -> tuple[EdiSummary, int]:
+    """Parse one synthetic interchange, returning the summary and the bytes read."""
+    size = 0
+
+    def counted() -> Iterator[bytes]:
+        nonlocal size
+        for chunk in synthetic_edi(size_mb * 1024 * 1024, chunk_bytes):
+            size += len(chunk)
+            yield chunk
+
+    return summarize_edi(iter_segments(counted())), size
+
+
+def measure(size_mb: int, chunk_bytes: int) -> dict[str, float]:
+    """
+    Parse one synthetic interchange.
+
+    Throughput and memory are measured in separate passes, since tracing
+    allocations slows parsing down many times over.
+
+    Args:
+        size_mb: Interchange size in MB
+        chunk_bytes: Bytes per read from the body
+
+    Returns:
+        mb_per_s, peak_kb, mb, orders, lines and segments
+    """
+    start = time.process_time()
+    summary, size = _parse(size_mb, chunk_bytes)
+    elapsed = time.process_time() - start
+    # Generation runs inside the timed loop; time it alone and take it off
+    start = time.process_time()
+    for _ in synthetic_edi(size_mb * 1024 * 1024, chunk_bytes):
+        pass
+    elapsed -= time.process_time() - start
+
+    assert summary.error_count == 0, summary.errors
+    assert summary.order_count == summary.group_count * ORDERS_PER_GROUP
+    assert summary.line_count == summary.order_count * LINES_PER_ORDER
+
+    tracemalloc.start()
+    _parse(size_mb, chunk_bytes)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    mb = size / 1024 / 1024
+    return {
+        "mb_per_s": mb / elapsed,
+        "peak_kb": peak / 1024,
+        "mb": mb,
+        "orders": summary.order_count,
+        "lines": summary.line_count,
+        "segments": summary.segment_count,
+    }
+
+
+def main() -> None:
+    """Run the benchmark and print a table of results."""
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0].strip())
+    parser.add_argument("--sizes", type=int, nargs="+", default=SIZES_MB, help="File sizes in MB")
+    parser.add_argument(
+        "--chunk-kb", type=int, nargs="+", default=[EDI_CHUNK_BYTES // 1024], help="Read sizes"
+    )
+    args = parser.parse_args()
+
+    print(
+        f"{'size MB':>7} {'chunk KB':>8} {'MB/s':>7} {'peak KB':>8} "
+        f"{'orders':>7} {'lines':>8} {'segments':>9}"
+    )
+    for size_mb in args.sizes:
+        for chunk_kb in args.chunk_kb:
+            result = measure(size_mb, chunk_kb * 1024)
+            print(
+                f"{result['mb']:>7.1f} {chunk_kb:>8} {result['mb_per_s']:>7.1f} "
+                f"{result['peak_kb']:>8.0f} {result['orders']:>7} {result['lines']:>8} "
+                f"{result['segments']:>9}"
+            )
+
+
+if __name__ == "__main__":
+    main()
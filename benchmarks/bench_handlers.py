@@ -0,0 +1,404 @@
+"""
+Micro-benchmark every Lambda handler with stubbed AWS clients.
+
+Each case invokes a handler in-process with its AWS clients replaced by stubs
+that return canned responses, and records per-invocation:
+
+- cpu_us: median CPU time (time.process_time) per invocation
+- peak_alloc_kb: peak memory traced by tracemalloc during one invocation
+- log_bytes: bytes written to the Lambda log (logging records plus EMF lines
+  printed to stdout), i.e. what CloudWatch Logs would ingest
+
+Cases cover API payloads from 1 KB to 256 KB, SQS batches of 1 to 10
+records, and single and batched (100) S3 upload events. Results can be
+saved as a JSON baseline and later compared against it; the comparison
+exits non-zero when any case regresses past its threshold.
+
+Usage:
+    python -m benchmarks.bench_handlers
+    python -m benchmarks.bench_handlers --save benchmarks/baselines/handlers.json
+    python -m benchmarks.bench_handlers --compare benchmarks/baselines/handlers.json
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import logging
+import platform
+import sys
+import time
+import tracemalloc
+from collections.abc import Callable
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any
+
+from shared.idempotency import IdempotencyCache
+
+from benchmarks.common import REPO_ROOT, cpu_time_us, load_lambda, make_order
+
+SIZES_KB = [1, 4, 16, 64, 256]
+BATCH_SIZES = [1, 5, 10]
+BATCH_PAYLOAD_KB = [1, 16, 64]
+# Upload events per document_processor batch (the event source mapping's batch size)
+UPLOAD_BATCH_SIZE = 100
+
+DEFAULT_BASELINE = REPO_ROOT / "benchmarks" / "baselines" / "handlers.json"
+
+# A metric regresses when current > baseline * ratio AND current - baseline > floor.
+# The floors keep timer noise on sub-millisecond cases from failing the gate.
+THRESHOLDS: dict[str, tuple[float, float]] = {
+    "cpu_us": (1.5, 50.0),
+    "peak_alloc_kb": (1.25, 16.0),
+    "log_bytes": (1.10, 64.0),
+}
+
+# CPU time spent per timing round; iterations are calibrated to reach it
+ROUND_SECONDS = 0.05
+
+
+class StubEventsClient:
+    """EventBridge client stub that accepts every entry."""
+
+    def put_events(self, Entries: list[dict[str, Any]]) -> dict[str, Any]:
+        return {
+            "FailedEntryCount": 0,
+            "Entries": [{"EventId": f"bench-{i}"} for i in range(len(Entries))],
+        }
+
+
+class StubSqsClient:
+    """SQS client stub that accepts every message."""
+
+    def send_message(self, QueueUrl: str, MessageBody: str) -> dict[str, Any]:
+        return {"MessageId": "bench-0"}
+
+    def send_message_batch(self, QueueUrl: str, Entries: list[dict[str, Any]]) -> dict[str, Any]:
+        return {
+            "Successful": [{"Id": e["Id"], "MessageId": f"bench-{e['Id']}"} for e in Entries],
+            "Failed": [],
+        }
+
+
+class StubS3Client:
+    """S3 client stub that returns a fixed object (a PDF scan) and accepts every write."""
+
+    def head_object(self, Bucket: str, Key: str) -> dict[str, Any]:
+        return {
+            "ContentType": "application/pdf",
+            "ContentLength": 48213,
+            "Metadata": {"uploaded-by": "benchmark", "source": "portal"},
+        }
+
+    def get_object(self, Bucket: str, Key: str, Range: str, **_: Any) -> dict[str, Any]:
+        return {
+            **self.head_object(Bucket, Key),
+            "Body": io.BytesIO(b"%PDF-1.7\n" + b"0" * 4087),
+        }
+
+    def put_object(self, Bucket: str, Key: str, Body: bytes, **_: Any) -> dict[str, Any]:
+        return {"ETag": '"bench"'}
+
+
+class _LambdaContext:
+    """Minimal Lambda context for in-process invocations."""
+
+    request_id = "bench-request"
+    aws_request_id = "bench-request"
+    function_name = "benchmark"
+
+    def get_remaining_time_in_millis(self) -> int:
+        return 900_000
+
+
+class _LogByteCounter(logging.Handler):
+    """Logging handler that counts the bytes of every emitted record."""
+
+    def __init__(self) -> None:
+        super().__init__(logging.DEBUG)
+        self.bytes = 0
+
+    def emit(self, record: logging.LogRecord) -> None:
+        self.bytes += len(record.getMessage().encode()) + 1
+
+
+@dataclass
+class Case:
+    """A single benchmark case: a handler and the event it is invoked with."""
+
+    name: str
+    handler: Callable[[Any, Any], Any]
+    event: Any
+
+
+def _install_stubs() -> dict[str, Any]:
+    """Load every handler module with its AWS clients replaced by stubs."""
+    modules = {
+        name: load_lambda(name)
+        for name in ("order_receiver", "notifier", "inventory", "document", "document_processor")
+    }
+    modules["order_receiver"]._eventbridge_client = StubEventsClient()
+    modules["order_receiver"]._s3_client = StubS3Client()
+    # Nothing is retained, so every repeat is measured as a first submission
+    modules["order_receiver"].IDEMPOTENCY_CACHE = IdempotencyCache(capacity=0)
+    modules["notifier"]._sqs_client = StubSqsClient()
+    modules["document_processor"]._s3_client = StubS3Client()
+    modules["document_processor"]._events_client = StubEventsClient()
+    return modules
+
+
+def _eventbridge_event(detail: dict[str, Any]) -> dict[str, Any]:
+    return {
+        "version": "0",
+        "id": "bench-event",
+        "source": "public.api",
+        "detail-type": "order.received.v1",
+        "detail": detail,
+    }
+
+
+def _sqs_batch(count: int, size_kb: int) -> dict[str, Any]:
+    records = []
+    for i in range(count):
+        order = make_order(size_kb * 1024)
+        order["orderId"] = f"ORD-BENCH-{i}"
+        records.append(
+            {
+                "messageId": f"msg-{i}",
+                "body": json.dumps(_eventbridge_event(order)),
+                "attributes": {"ApproximateReceiveCount": "1"},
+            }
+        )
+    return {"Records": records}
+
+
+def build_cases() -> list[Case]:
+    """Build the benchmark cases for every handler."""
+    modules = _install_stubs()
+    cases = []
+    for size_kb in SIZES_KB:
+        order = make_order(size_kb * 1024)
+        cases.append(
+            Case(
+                f"order_receiver/single/{size_kb}KB",
+                modules["order_receiver"].handler,
+                {"resource": "/orders", "httpMethod": "POST", "body": json.dumps(order)},
+            )
+        )
+        cases.append(
+            Case(
+                f"notifier/event/{size_kb}KB",
+                modules["notifier"].handler,
+                _eventbridge_event(order),
+            )
+        )
+        cases.append(
+            Case(
+                f"document/event/{size_kb}KB",
+                modules["document"].handler,
+                _eventbridge_event(order),
+            )
+        )
+    for batch_size in BATCH_SIZES:
+        for size_kb in BATCH_PAYLOAD_KB:
+            batch = _sqs_batch(batch_size, size_kb)
+            cases.append(
+                Case(f"notifier/sqs/{batch_size}x{size_kb}KB", modules["notifier"].handler, batch)
+            )
+            cases.append(
+                Case(f"inventory/sqs/{batch_size}x{size_kb}KB", modules["inventory"].handler, batch)
+            )
+    upload_event = {
+        "source": "aws.s3",
+        "detail-type": "Object Created",
+        "detail": {
+            "bucket": {"name": "order-documents-bench"},
+            "object": {"key": "inbound/ORD-BENCH/invoice.pdf", "size": 48213},
+        },
+    }
+    cases.append(
+        Case("document_processor/s3-event", modules["document_processor"].handler, upload_event)
+    )
+    cases.append(
+        Case(
+            f"document_processor/sqs/{UPLOAD_BATCH_SIZE}",
+            modules["document_processor"].handler,
+            {
+                "Records": [
+                    {"messageId": f"msg-{i}", "body": json.dumps(upload_event)}
+                    for i in range(UPLOAD_BATCH_SIZE)
+                ]
+            },
+        )
+    )
+    return cases
+
+
+def measure(case: Case) -> dict[str, float]:
+    """
+    Measure CPU time, peak allocation and log bytes for one case.
+
+    Args:
+        case: The case to measure
+
+    Returns:
+        Metrics keyed by name (see THRESHOLDS)
+    """
+    context = _LambdaContext()
+    root = logging.getLogger()
+    counter = _LogByteCounter()
+    saved_handlers = root.handlers[:]
+    root.handlers = [counter]
+    stdout = io.StringIO()
+    try:
+        with contextlib.redirect_stdout(stdout):
+            # Warm-up call: loads lazily imported modules and fills caches, and
+            # is the invocation whose log output is counted
+            case.handler(case.event, context)
+            log_bytes = counter.bytes + len(stdout.getvalue().encode())
+
+            tracemalloc.start()
+            try:
+                baseline, _ = tracemalloc.get_traced_memory()
+                case.handler(case.event, context)
+                _, peak = tracemalloc.get_traced_memory()
+            finally:
+                tracemalloc.stop()
+
+            start = time.process_time()
+            case.handler(case.event, context)
+            single = max(time.process_time() - start, 1e-6)
+            iterations = max(int(ROUND_SECONDS / single), 1)
+            cpu_us = cpu_time_us(lambda: case.handler(case.event, context), iterations)
+    finally:
+        root.handlers = saved_handlers
+    return {
+        "cpu_us": round(cpu_us, 1),
+        "peak_alloc_kb": round((peak - baseline) / 1024, 1),
+        "log_bytes": log_bytes,
+    }
+
+
+def run(name_filter: str | None = None) -> dict[str, dict[str, float]]:
+    """
+    Run every case (optionally only those whose name contains name_filter).
+
+    Returns:
+        Metrics per case name
+    """
+    results = {}
+    for case in build_cases():
+        if name_filter and name_filter not in case.name:
+            continue
+        results[case.name] = measure(case)
+    return results
+
+
+def compare(
+    baseline: dict[str, dict[str, float]], current: dict[str, dict[str, float]]
+) -> list[str]:
+    """
+    Compare current results against a baseline.
+
+    Args:
+        baseline: Metrics per case from the baseline file
+        current: Metrics per case from this run
+
+    Returns:
+        One message per regressed metric; empty when nothing regressed
+    """
+    regressions = []
+    for name, metrics in current.items():
+        previous = baseline.get(name)
+        if previous is None:
+            continue
+        for metric, (ratio, floor) in THRESHOLDS.items():
+            if metric not in metrics or metric not in previous:
+                continue
+            before, after = previous[metric], metrics[metric]
+            if after > before * ratio and after - before > floor:
+                regressions.append(
+                    f"{name} {metric}: {before:g} -> {after:g} " f"(limit x{ratio:g}, +{floor:g})"
+                )
+    return regressions
+
+
+def save(results: dict[str, dict[str, float]], path: Path) -> None:
+    """Write results to a JSON baseline file."""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    document = {
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "cases": results,
+    }
+    path.write_text(json.dumps(document, indent=2, sort_keys=True) + "\n")
+
+
+def load(path: Path) -> dict[str, dict[str, float]]:
+    """Read the per-case results from a JSON baseline file."""
+    return json.loads(path.read_text())["cases"]
+
+
+def print_table(
+    results: dict[str, dict[str, float]], baseline: dict[str, dict[str, float]] | None = None
+) -> None:
+    """Print results, with the change against the baseline CPU time when given."""
+    header = f"{'case':<36} {'cpu us':>10} {'peak KB':>9} {'log B':>8}"
+    print(header + (f" {'cpu vs base':>12}" if baseline else ""))
+    for name, metrics in results.items():
+        line = (
+            f"{name:<36} {metrics['cpu_us']:>10.1f} "
+            f"{metrics['peak_alloc_kb']:>9.1f} {metrics['log_bytes']:>8.0f}"
+        )
+        if baseline:
+            previous = baseline.get(name)
+            if previous and previous.get("cpu_us"):
+                line += f" {(metrics['cpu_us'] / previous['cpu_us'] - 1) * 100:>+11.0f}%"
+            else:
+                line += f" {'new':>12}"
+        print(line)
+
+
+def main(argv: list[str] | None = None) -> int:
+    """Run the benchmarks; save or compare against a baseline."""
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0].strip())
+    parser.add_argument("--filter", help="Only run cases whose name contains this text")
+    parser.add_argument("--save", type=Path, metavar="PATH", help="Write results as a baseline")
+    parser.add_argument(
+        "--compare",
+        type=Path,
+        metavar="PATH",
+        nargs="?",
+        const=DEFAULT_BASELINE,
+        help=f"Fail if any case regressed against a baseline (default {DEFAULT_BASELINE.name})",
+    )
+    parser.add_argument(
+        "--current",
+        type=Path,
+        metavar="PATH",
+        help="Compare previously saved results instead of running the benchmarks",
+    )
+    args = parser.parse_args(argv)
+
+    results = load(args.current) if args.current else run(args.filter)
+    baseline = load(args.compare) if args.compare else None
+    print_table(results, baseline)
+
+    if args.save:
+        save(results, args.save)
+        print(f"\nSaved {len(results)} cases to {args.save}")
+
+    if baseline is not None:
+        regressions = compare(baseline, results)
+        if regressions:
+            print(f"\n{len(regressions)} regression(s) against {args.compare}:")
+            for message in regressions:
+                print(f"  {message}")
+            return 1
+        print(f"\nNo regressions against {args.compare}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,166 @@
+"""
+Benchmark serial vs bounded-concurrency metadata reads in document_processor.
+
+Reads the metadata and sniffed content of a batch of uploads with the
+handler's read_object_head against an in-memory S3 stand-in that injects
+latency:
+
+- every call takes --latency-ms, plus up to --jitter-ms
+- one call in --slow-every hangs for --slow-ms (a straggler)
+- calls beyond --max-in-flight at once fail with SlowDown (throttling)
+
+and compares reading the objects one at a time, as describe_document does
+for a single event, with shared.concurrent_fetch.fetch_all at several
+concurrency limits, as handle_batch does (stragglers are abandoned after
+--timeout-ms and retried). Every run must return the same heads as the
+serial run.
+
+Usage:
+    python -m benchmarks.bench_metadata_fetch
+    python -m benchmarks.bench_metadata_fetch --objects 500 --concurrency 8 32
+"""
+
+import argparse
+import io
+import random
+import re
+import threading
+import time
+from typing import Any
+
+from botocore.exceptions import ClientError
+from shared.concurrent_fetch import fetch_all
+
+from benchmarks.common import load_lambda
+
+CONCURRENCY = [1, 4, 16, 64]
+BUCKET = "bench-documents"
+_RANGE = re.compile(r"bytes=(\d+)-(\d+)")
+
+
+class LatencyS3:
+    """In-memory stand-in for the S3 reads of read_object_head, with injected latency."""
+
+    def __init__(
+        self,
+        objects: dict[str, bytes],
+        latency_ms: float,
+        jitter_ms: float,
+        slow_every: int,
+        slow_ms: float,
+        max_in_flight: int,
+    ) -> None:
+        self.objects = objects
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.slow_every = slow_every
+        self.slow_ms = slow_ms
+        self.max_in_flight = max_in_flight
+        self.calls = 0
+        self.throttled = 0
+        self._in_flight = 0
+        self._lock = threading.Lock()
+
+    def _request(self) -> None:
+        with self._lock:
+            self.calls += 1
+            slow = self.slow_every > 0 and self.calls % self.slow_every == 0
+            if self._in_flight >= self.max_in_flight:
+                self.throttled += 1
+                raise ClientError({"Error": {"Code": "SlowDown"}}, "GetObject")
+            self._in_flight += 1
+        try:
+            delay_ms = self.slow_ms if slow else self.latency_ms
+            time.sleep((delay_ms + random.uniform(0, self.jitter_ms)) / 1000)
+        finally:
+            with self._lock:
+                self._in_flight -= 1
+
+    def get_object(self, Bucket: str, Key: str, Range: str | None = None) -> dict[str, Any]:
+        self._request()
+        data = self.objects[Key]
+        if Range:
+            match = _RANGE.fullmatch(Range)
+            assert match
+            data = data[int(match[1]) : int(match[2]) + 1]
+        return {
+            "ContentType": "text/csv",
+            "Metadata": {"uploader": "bench"},
+            "Body": io.BytesIO(data),
+        }
+
+    def head_object(self, Bucket: str, Key: str) -> dict[str, Any]:
+        self._request()
+        return {"ContentType": "text/csv", "Metadata": {"uploader": "bench"}}
+
+
+def make_objects(count: int) -> dict[str, bytes]:
+    """Build count small CSV uploads keyed like inbound/<orderId>/<file>."""
+    return {
+        f"inbound/ORD-{i:05d}/lines.csv": f"orderId,sku,qty\nORD-{i:05d},W-{i},1\n".encode()
+        for i in range(count)
+    }
+
+
+def main() -> None:
+    """Run the benchmark and print a table of results."""
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0].strip())
+    parser.add_argument("--objects", type=int, default=100, help="Objects per batch")
+    parser.add_argument("--concurrency", type=int, nargs="+", default=CONCURRENCY)
+    parser.add_argument("--latency-ms", type=float, default=20)
+    parser.add_argument("--jitter-ms", type=float, default=10)
+    parser.add_argument("--slow-every", type=int, default=25, help="0 disables stragglers")
+    parser.add_argument("--slow-ms", type=float, default=500)
+    parser.add_argument("--max-in-flight", type=int, default=32)
+    parser.add_argument("--timeout-ms", type=float, default=200)
+    args = parser.parse_args()
+
+    processor = load_lambda("document_processor")
+    objects = make_objects(args.objects)
+    locations = [(BUCKET, key, len(data)) for key, data in objects.items()]
+
+    def stand_in() -> LatencyS3:
+        return LatencyS3(
+            objects,
+            args.latency_ms,
+            args.jitter_ms,
+            args.slow_every,
+            args.slow_ms,
+            args.max_in_flight,
+        )
+
+    print(
+        f"{'mode':>10} {'workers':>7} {'wall ms':>8} {'objects/s':>9} {'speedup':>7} "
+        f"{'calls':>6} {'throttled':>9} {'retries':>7} {'timeouts':>8}"
+    )
+
+    s3 = stand_in()
+    start = time.perf_counter()
+    serial = [processor.read_object_head(s3, *location) for location in locations]
+    serial_s = time.perf_counter() - start
+    print(
+        f"{'serial':>10} {1:>7} {serial_s * 1000:>8.0f} {len(locations) / serial_s:>9.0f} "
+        f"{1:>7.1f} {s3.calls:>6} {s3.throttled:>9} {0:>7} {0:>8}"
+    )
+
+    for workers in args.concurrency:
+        s3 = stand_in()
+        start = time.perf_counter()
+        result = fetch_all(
+            lambda location: processor.read_object_head(s3, *location),  # noqa: B023
+            locations,
+            max_workers=workers,
+            timeout=args.timeout_ms / 1000,
+            max_attempts=5,
+        )
+        elapsed = time.perf_counter() - start
+        assert result.values == serial, f"{workers} workers: {result.failed_indexes}"
+        print(
+            f"{'concurrent':>10} {workers:>7} {elapsed * 1000:>8.0f} "
+            f"{len(locations) / elapsed:>9.0f} {serial_s / elapsed:>7.1f} {s3.calls:>6} "
+            f"{s3.throttled:>9} {result.retries:>7} {result.timeouts:>8}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,48 @@
+"""
+Benchmark the order_receiver Detail passthrough against parse-and-reserialize.
+
+Compares the CPU cost of building the EventBridge Detail the old way
+(json.loads, json.dumps for the Detail, json.dumps again for the log line)
+with the passthrough (json.loads to validate, forward the original body).
+
+Usage:
+    python -m benchmarks.bench_order_passthrough
+"""
+
+import json
+
+from benchmarks.common import cpu_time_us, make_order
+
+SIZES_KB = [1, 4, 16, 64, 256]
+
+
+def reserialize(body: str) -> str:
+    """Parse the body, log it and re-serialize it for the Detail (previous behavior)."""
+    payload = json.loads(body)
+    json.dumps({"level": "info", "message": "Processing order", "order_data": payload})
+    return json.dumps(payload)
+
+
+def passthrough(body: str) -> str:
+    """Parse the body once to validate it and forward the original text."""
+    json.loads(body)
+    return body
+
+
+def main() -> None:
+    """Run the benchmark and print a table of results."""
+    print(f"{'size':>8} {'reserialize us':>15} {'passthrough us':>15} {'saved us/KB':>12}")
+    for size_kb in SIZES_KB:
+        body = json.dumps(make_order(size_kb * 1024))
+        actual_kb = len(body) / 1024
+        iterations = max(2000 // size_kb, 10)
+        before = cpu_time_us(lambda body=body: reserialize(body), iterations)
+        after = cpu_time_us(lambda body=body: passthrough(body), iterations)
+        print(
+            f"{actual_kb:>6.0f}KB {before:>15.1f} {after:>15.1f} "
+            f"{(before - after) / actual_kb:>12.2f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
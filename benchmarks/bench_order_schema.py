@@ -0,0 +1,91 @@
+"""
+Benchmark the compiled order schema validator against a naive one.
+
+The naive validator interprets ORDER_SCHEMA on every call: it looks up each
+keyword in the schema dicts, builds the path of every value it visits, and
+tries anyOf options in turn. The compiled validator (shared.order_schema)
+does that work once at import. Both run on loadgen orders of 1-256 KB (the
+size is almost all line items) and on an order that fails on its last item.
+
+Usage:
+    python -m benchmarks.bench_order_schema
+"""
+
+import json
+from typing import Any
+
+from shared.order_schema import ORDER_SCHEMA, validate_order
+
+from benchmarks.common import cpu_time_us
+from localbus.loadgen import WorkloadGenerator
+
+SIZES_KB = [1, 4, 16, 64, 256]
+
+_TYPES: dict[str, Any] = {
+    "object": dict,
+    "array": list,
+    "string": str,
+    "integer": int,
+    "number": (int, float),
+    "boolean": bool,
+}
+
+
+def naive_errors(schema: dict[str, Any] | bool, value: Any, path: str = "order") -> list[str]:
+    """Return every violation of schema by value, interpreting the schema as it goes."""
+    if schema is True:
+        return []
+    if schema is False:
+        return [f"{path}: is not allowed"]
+    if "anyOf" in schema:
+        for option in schema["anyOf"]:
+            if not naive_errors(option, value, path):
+                return []
+        return [f"{path}: does not match any option"]
+    kind = schema["type"]
+    if not isinstance(value, _TYPES[kind]) or (kind != "boolean" and isinstance(value, bool)):
+        return [f"{path}: must be {kind}"]
+    errors = []
+    if "enum" in schema and value not in schema["enum"]:
+        errors.append(f"{path}: must be one of {schema['enum']}")
+    if "minLength" in schema and len(value) < schema["minLength"]:
+        errors.append(f"{path}: too short")
+    if "minimum" in schema and value < schema["minimum"]:
+        errors.append(f"{path}: must be at least {schema['minimum']}")
+    if kind == "object":
+        for key in schema.get("required", []):
+            if key not in value:
+                errors.append(f"{path}.{key}: is required")
+        properties = schema.get("properties", {})
+        for key, item in value.items():
+            if key in properties:
+                errors.extend(naive_errors(properties[key], item, f"{path}.{key}"))
+            elif "additionalProperties" in schema:
+                errors.extend(naive_errors(schema["additionalProperties"], item, f"{path}.{key}"))
+    if kind == "array" and "items" in schema:
+        for index, item in enumerate(value):
+            errors.extend(naive_errors(schema["items"], item, f"{path}[{index}]"))
+    return errors
+
+
+def main() -> None:
+    """Run the benchmark and print a table of results."""
+    generator = WorkloadGenerator(seed=2)
+    print(f"{'order':>12} {'items':>6} {'naive us':>10} {'compiled us':>12} {'speedup':>8}")
+    for size_kb in SIZES_KB:
+        order = generator.order(size_kb * 1024)
+        invalid = json.loads(json.dumps(order))
+        invalid["items"][-1]["quantity"] = "1"
+        for label, payload in ((f"{size_kb}KB", order), (f"{size_kb}KB bad", invalid)):
+            assert (validate_order(payload) is None) == (not naive_errors(ORDER_SCHEMA, payload))
+            iterations = max(2000 // size_kb, 10)
+            naive = cpu_time_us(lambda p=payload: naive_errors(ORDER_SCHEMA, p), iterations)
+            compiled = cpu_time_us(lambda p=payload: validate_order(p), iterations)
+            print(
+                f"{label:>12} {len(payload['items']):>6} {naive:>10.1f} {compiled:>12.1f} "
+                f"{naive / compiled:>7.1f}x"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,86 @@
+"""
+Benchmark the memory footprint and read cost of the inventory stock ledger.
+
+Compares StockLedger (array-backed slots with an intrusive LRU list) with a
+straightforward OrderedDict of per-SKU dicts holding the same levels and
+versions, at 100k cached SKUs.
+
+Usage:
+    python -m benchmarks.bench_stock_ledger
+"""
+
+import tracemalloc
+from collections import OrderedDict
+from collections.abc import Callable, Mapping
+from typing import Any
+
+from shared.stock_ledger import StockLedger
+
+from benchmarks.common import cpu_time_us
+
+SKU_COUNT = 100_000
+
+
+class FixedStore:
+    """Backing store that allocates nothing, so only the cache is measured."""
+
+    def get_stock(self, sku: str) -> tuple[int, int]:
+        return 100, 1
+
+    def apply_change(self, sku: str, delta: int) -> tuple[int, int]:
+        return 100 + delta, 2
+
+    def apply_changes(self, sku: str, changes: Mapping[str, int]) -> tuple[int, int]:
+        return 100 + sum(changes.values()), 2
+
+
+def fill_ledger(skus: list[str]) -> StockLedger:
+    """Cache every SKU in a StockLedger."""
+    ledger = StockLedger(FixedStore(), capacity=len(skus))
+    for sku in skus:
+        ledger.get(sku)
+    return ledger
+
+
+def fill_naive(skus: list[str]) -> OrderedDict[str, dict[str, int]]:
+    """Cache every SKU in an OrderedDict of {"level", "version"} dicts."""
+    cache: OrderedDict[str, dict[str, int]] = OrderedDict()
+    for sku in skus:
+        cache[sku] = {"level": 100, "version": 1}
+    return cache
+
+
+def measure(build: Callable[[], Any]) -> tuple[int, Any]:
+    """Return the bytes still allocated by build() and its result."""
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    result = build()
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return after - before, result
+
+
+def main() -> None:
+    """Run the benchmark and print a table of results."""
+    skus = [f"SKU-{i:08d}" for i in range(SKU_COUNT)]
+    # The SKU strings are shared by both caches, so they are not counted
+    ledger_bytes, ledger = measure(lambda: fill_ledger(skus))
+    naive_bytes, naive = measure(lambda: fill_naive(skus))
+
+    def naive_get(sku: str = skus[SKU_COUNT // 2]) -> int:
+        naive.move_to_end(sku)
+        return naive[sku]["level"]
+
+    ledger_get_us = cpu_time_us(lambda: ledger.get(skus[SKU_COUNT // 2]), 100_000)
+    naive_get_us = cpu_time_us(naive_get, 100_000)
+
+    print(f"{'cache':>14} {'MB':>8} {'bytes/SKU':>10} {'get us':>8}")
+    for name, size, get_us in [
+        ("StockLedger", ledger_bytes, ledger_get_us),
+        ("OrderedDict", naive_bytes, naive_get_us),
+    ]:
+        print(f"{name:>14} {size / 1e6:>8.2f} {size / SKU_COUNT:>10.1f} {get_us:>8.3f}")
+
+
+if __name__ == "__main__":
+    main()
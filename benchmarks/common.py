@@ -0,0 +1,84 @@
+"""Helpers shared by the benchmark scripts."""
+
+import importlib.util
+import statistics
+import sys
+import time
+from collections.abc import Callable
+from pathlib import Path
+from types import ModuleType
+from typing import Any
+
+REPO_ROOT = Path(__file__).parent.parent
+LAMBDAS_DIR = REPO_ROOT / "lambdas"
+
+
+def load_lambda(name: str) -> ModuleType:
+    """
+    Load a Lambda handler module the same way the unit tests do.
+
+    Args:
+        name: Directory name under lambdas/ (e.g. "order_receiver")
+
+    Returns:
+        The loaded index module
+    """
+    module_name = f"{name}_index"
+    if module_name in sys.modules:
+        return sys.modules[module_name]
+    spec = importlib.util.spec_from_file_location(module_name, LAMBDAS_DIR / name / "index.py")
+    assert spec is not None and spec.loader is not None
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[module_name] = module
+    spec.loader.exec_module(module)
+    return module
+
+
+def cpu_time_us(fn: Callable[[], Any], iterations: int, rounds: int = 5) -> float:
+    """
+    Measure the CPU time of a callable.
+
+    Args:
+        fn: Callable to measure
+        iterations: Calls per round
+        rounds: Number of rounds; the median round is reported
+
+    Returns:
+        Median CPU time per call in microseconds
+    """
+    samples = []
+    for _ in range(rounds):
+        start = time.process_time()
+        for _ in range(iterations):
+            fn()
+        samples.append((time.process_time() - start) / iterations * 1_000_000)
+    return statistics.median(samples)
+
+
+def make_order(size_bytes: int) -> dict[str, Any]:
+    """
+    Build an order payload whose JSON encoding is roughly size_bytes long.
+
+    Args:
+        size_bytes: Target encoded size
+
+    Returns:
+        Order payload with enough line items to reach the target size
+    """
+    line_item = {
+        "sku": "SKU-000000",
+        "description": "Widget, blue, 10 pack",
+        "qty": 3,
+        "price": 9.99,
+    }
+    item_bytes = 90
+    return {
+        "orderId": "ORD-BENCH",
+        "purpose": "create",
+        "price": 100,
+        "priority": "high",
+        "region": "us-east-1",
+        "items": [
+            {**line_item, "sku": f"SKU-{i:06d}"} for i in range(max(size_bytes // item_bytes, 1))
+        ],
+    }
@@ -37,6 +37,7 @@ class OrderProcessingStack(Stack):
     - SNS topic for direct EventBridge-to-SNS notifications (no Lambda needed)
     - S3 bucket for order documents with EventBridge notifications
     - Lambda to process S3 document uploads and publish downstream events
+    - Lambda layer with code shared between the Lambda functions
     """
 
     def __init__(self, scope: Construct, construct_id: str, **kwargs: Any) -> None:
@@ -78,6 +79,26 @@ class OrderProcessingStack(Stack):
             ),
         )
 
+        # Create SQS buffer queue (and DLQ) for S3 upload events to document-processor,
+        # so bulk uploads are processed in batches instead of one invocation per object
+        document_upload_dlq = sqs.Queue(
+            self,
+            "DocumentUploadDLQ",
+            queue_name="document-upload-dlq",
+            retention_period=Duration.days(14),
+        )
+
+        document_upload_queue = sqs.Queue(
+            self,
+            "DocumentUploadQueue",
+            queue_name="document-upload-queue",
+            visibility_timeout=Duration.seconds(180),
+            dead_letter_queue=sqs.DeadLetterQueue(
+                max_receive_count=3,
+                queue=document_upload_dlq,
+            ),
+        )
+
         # Create SNS topic for direct customer order notifications
         # This demonstrates the "new pattern": EventBridge → SNS directly,
         # skipping Lambda when no message transformation is needed.
@@ -115,6 +136,41 @@ class OrderProcessingStack(Stack):
             ],
         )
 
+        # Claim-check store for orders too large for the event bus: order-receiver
+        # writes the payload here and the event carries a summary and a pointer
+        # (see lambdas/shared/python/shared/claim_check.py). Consumers read it within
+        # the retry window, so objects expire after the longest queue retention.
+        claim_check_bucket = s3.Bucket(
+            self,
+            "OrderClaimCheckBucket",
+            bucket_name=f"order-claim-check-{Stack.of(self).account}",
+            lifecycle_rules=[
+                s3.LifecycleRule(id="expire-claim-checks", expiration=Duration.days(14)),
+            ],
+        )
+
+        # Shared Lambda layer (logging, publisher, metrics) mounted at /opt/python
+        shared_layer = lambda_.LayerVersion(
+            self,
+            "SharedLayer",
+            layer_version_name="order-processing-shared",
+            code=lambda_.Code.from_asset("lambdas/shared"),
+            compatible_runtimes=[lambda_.Runtime.PYTHON_3_13],
+            description="Shared code for the order processing Lambdas",
+        )
+
+        # Logging settings applied to every Lambda; override per environment with
+        # e.g. `cdk deploy -c log_sample_rate=0.05 -c log_level=WARNING`
+        logging_environment = {
+            "LOG_LEVEL": str(self.node.try_get_context("log_level") or "INFO"),
+            "LOG_SAMPLE_RATE": str(self.node.try_get_context("log_sample_rate") or "1.0"),
+        }
+
+        # AWS SDK client settings for the Lambdas that call AWS: clients (and, except
+        # for S3, their first connection) are created during init instead of on the
+        # first request. Timeouts, retries and pool size: see shared/clients.py
+        client_environment = {"AWS_CLIENT_PREWARM": "true"}
+
         # Create Lambda function: order-receiver
         order_receiver_fn = lambda_.Function(
             self,
@@ -123,8 +179,15 @@ class OrderProcessingStack(Stack):
             runtime=lambda_.Runtime.PYTHON_3_13,
             handler="index.handler",
             code=lambda_.Code.from_asset("lambdas/order_receiver"),
+            layers=[shared_layer],
             environment={
                 "EVENT_BUS_NAME": event_bus.event_bus_name,
+                "CLAIM_CHECK_BUCKET": claim_check_bucket.bucket_name,
+                # Compress orders from one 64 KB PutEvents billing chunk up
+                # (see benchmarks/bench_detail_compression.py)
+                "DETAIL_COMPRESSION_MIN_BYTES": str(64 * 1024),
+                **client_environment,
+                **logging_environment,
             },
             timeout=Duration.seconds(30),
         )
@@ -132,6 +195,9 @@ class OrderProcessingStack(Stack):
         # Grant permission to publish events to the custom bus
         event_bus.grant_put_events_to(order_receiver_fn)
 
+        # Grant permission to store claim-checked orders
+        claim_check_bucket.grant_put(order_receiver_fn)
+
         # Create Lambda function: notifier
         notifier_fn = lambda_.Function(
             self,
@@ -140,8 +206,11 @@ class OrderProcessingStack(Stack):
             runtime=lambda_.Runtime.PYTHON_3_13,
             handler="index.handler",
             code=lambda_.Code.from_asset("lambdas/notifier"),
+            layers=[shared_layer],
             environment={
                 "QUEUE_URL": email_queue.queue_url,
+                **client_environment,
+                **logging_environment,
             },
             timeout=Duration.seconds(30),
         )
@@ -157,14 +226,25 @@ class OrderProcessingStack(Stack):
             runtime=lambda_.Runtime.PYTHON_3_13,
             handler="index.handler",
             code=lambda_.Code.from_asset("lambdas/inventory"),
+            layers=[shared_layer],
+            environment={
+                "INVENTORY_MAX_WORKERS": "4",
+                "INVENTORY_LEDGER_CAPACITY": "10000",
+                **logging_environment,
+            },
             timeout=Duration.seconds(30),
         )
 
+        # Grant inventory read access to claim-checked orders
+        claim_check_bucket.grant_read(inventory_fn)
+
         # Wire inventory Lambda to poll from the SQS buffer queue
         inventory_fn.add_event_source(
             lambda_event_sources.SqsEventSource(
                 inventory_queue,
                 batch_size=10,
+                # Only failed messages return to the queue (see batchItemFailures)
+                report_batch_item_failures=True,
             )
         )
 
@@ -176,9 +256,14 @@ class OrderProcessingStack(Stack):
             runtime=lambda_.Runtime.PYTHON_3_13,
             handler="index.handler",
             code=lambda_.Code.from_asset("lambdas/document"),
+            layers=[shared_layer],
+            environment=logging_environment,
             timeout=Duration.seconds(30),
         )
 
+        # Grant document read access to claim-checked orders
+        claim_check_bucket.grant_read(document_fn)
+
         # Create Lambda function: document-processor (S3 upload handler)
         document_processor_fn = lambda_.Function(
             self,
@@ -187,12 +272,32 @@ class OrderProcessingStack(Stack):
             runtime=lambda_.Runtime.PYTHON_3_13,
             handler="index.handler",
             code=lambda_.Code.from_asset("lambdas/document_processor"),
+            layers=[shared_layer],
             environment={
                 "EVENT_BUS_NAME": event_bus.event_bus_name,
+                "DOCUMENT_MAX_WORKERS": "8",
+                # Metadata reads in flight per batch; one pooled connection each
+                "DOCUMENT_FETCH_CONCURRENCY": "16",
+                "DOCUMENT_FETCH_TIMEOUT_SECONDS": "3",
+                **client_environment,
+                "AWS_CLIENT_MAX_POOL_CONNECTIONS": "16",
+                **logging_environment,
             },
             timeout=Duration.seconds(30),
         )
 
+        # Consume buffered upload events in batches of up to 100, waiting up to
+        # 5 seconds to fill a batch during bulk uploads
+        document_processor_fn.add_event_source(
+            lambda_event_sources.SqsEventSource(
+                document_upload_queue,
+                batch_size=100,
+                max_batching_window=Duration.seconds(5),
+                # Only failed messages return to the queue (see batchItemFailures)
+                report_batch_item_failures=True,
+            )
+        )
+
         # Grant document-processor read access to the S3 bucket
         documents_bucket.grant_read(document_processor_fn)
 
@@ -333,7 +438,7 @@ class OrderProcessingStack(Stack):
         webhook_rule.add_target(targets.ApiDestination(webhook_destination))
         webhook_rule.add_target(targets.CloudWatchLogGroup(webhook_rule_log_group))
 
-        # S3 → default EventBridge bus → document-processor Lambda
+        # S3 → default EventBridge bus → SQS buffer → document-processor Lambda
         # S3 EventBridge notifications always go to the default bus, not custom buses.
         s3_processor_rule = events.Rule(
             self,
@@ -347,7 +452,7 @@ class OrderProcessingStack(Stack):
             ),
             rule_name="route-s3-to-processor",
         )
-        s3_processor_rule.add_target(targets.LambdaFunction(document_processor_fn))
+        s3_processor_rule.add_target(targets.SqsQueue(document_upload_queue))
         s3_processor_rule.add_target(
             targets.CloudWatchLogGroup(s3_processor_rule_log_group)
         )
@@ -446,6 +551,10 @@ class OrderProcessingStack(Stack):
 
         orders_resource.add_method("POST", integration)
 
+        # Create /orders/bulk resource for JSON array / NDJSON submissions
+        bulk_orders_resource = orders_resource.add_resource("bulk")
+        bulk_orders_resource.add_method("POST", integration)
+
         # Create SNS topic for alarm notifications
         alarm_topic = sns.Topic(
             self,
@@ -560,6 +669,21 @@ class OrderProcessingStack(Stack):
         )
         inventory_dlq_alarm.add_alarm_action(cw_actions.SnsAction(alarm_topic))
 
+        # CloudWatch Alarm for document upload DLQ
+        document_upload_dlq_alarm = cloudwatch.Alarm(
+            self,
+            "DocumentUploadDLQAlarm",
+            alarm_name="document-upload-dlq-messages",
+            alarm_description="Alert when upload events land in document-upload dead-letter queue",
+            metric=document_upload_dlq.metric_approximate_number_of_messages_visible(
+                period=Duration.minutes(5)
+            ),
+            threshold=1,
+            evaluation_periods=1,
+            comparison_operator=cloudwatch.ComparisonOperator.GREATER_THAN_OR_EQUAL_TO_THRESHOLD,
+        )
+        document_upload_dlq_alarm.add_alarm_action(cw_actions.SnsAction(alarm_topic))
+
         # Add cost allocation tags
         Tags.of(self).add("Project", "OrderProcessing")
         Tags.of(self).add("Environment", "Demo")
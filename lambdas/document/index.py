@@ -1,22 +1,30 @@
 import json
-import logging
 from typing import Any
 
-# Configure structured logging
-logger = logging.getLogger()
-logger.setLevel(logging.INFO)
+from shared.claim_check import check_out, is_claim_check
+from shared.clients import create_client
+from shared.detail_codec import decode_detail
+from shared.structured_log import buffered_logs, log_sampled, log_structured
 
+# Only needed for claim-checked orders (created on first use)
+_s3_client = None
 
-def log_structured(level: str, message: str, **kwargs: Any) -> None:
-    """Log structured JSON messages for better CloudWatch querying."""
-    log_entry = {"level": level, "message": message, **kwargs}
-    logger.log(getattr(logging, level.upper()), json.dumps(log_entry))
 
+def get_s3_client():  # type: ignore[no-untyped-def]
+    """Get or create S3 client (lazy initialization for better testability)."""
+    global _s3_client
+    if _s3_client is None:
+        _s3_client = create_client("s3")
+    return _s3_client
 
+
+@buffered_logs
 def handler(event: dict[str, Any], context: Any) -> dict[str, Any]:
     """
     Receives order event from EventBridge and logs it.
-    This function processes orders for document generation.
+    This function processes orders for document generation, which needs the
+    full order: claim-checked orders are fetched from S3 and compressed ones
+    are decoded.
 
     Args:
         event: EventBridge event containing the order detail
@@ -28,7 +36,7 @@ def handler(event: dict[str, Any], context: Any) -> dict[str, Any]:
     request_id = context.request_id if hasattr(context, "request_id") else "unknown"
 
     # Log the event received from EventBridge
-    log_structured("info", "Document received event", request_id=request_id, event=event)
+    log_sampled("info", "Document received event", request_id=request_id, event=event)
 
     # Extract the detail from the EventBridge event
     detail = event.get("detail", {})
@@ -41,6 +49,18 @@ def handler(event: dict[str, Any], context: Any) -> dict[str, Any]:
         detail=detail,
     )
 
+    if is_claim_check(detail):
+        order_bytes = detail["claimCheck"]["size"]
+        detail = check_out(get_s3_client(), detail)
+        log_structured(
+            "info",
+            "Fetched claim-checked order",
+            request_id=request_id,
+            order_id=order_id,
+            order_bytes=order_bytes,
+        )
+    detail = decode_detail(detail)
+
     # Simulate document generation processing
     log_structured(
         "info",
@@ -1,26 +1,49 @@
 import json
-import logging
 import os
 from typing import Any
+from urllib.parse import unquote_plus
 
-import boto3
+from shared.batching import deadline_from_context
+from shared.clients import create_client, prewarm_client
+from shared.concurrent_fetch import fetch_all
+from shared.document_records import RECORD_FORMATS, RecordSummary, encode_chunks, extract_records
+from shared.document_sniff import SNIFF_BYTES, UNKNOWN, Sniffed, resolve_document_type, sniff
+from shared.edi import iter_body, iter_segments, summarize_edi
+from shared.publisher import PUT_EVENTS_MAX_BYTES, PUT_EVENTS_MAX_ENTRIES, publish_entries
+from shared.structured_log import buffered_logs, log_sampled, log_structured
 
-# Configure structured logging
-logger = logging.getLogger()
-logger.setLevel(logging.INFO)
-
-# Lazy-initialized clients for testability
-_s3_client = None
-_events_client = None
+# Created during init when AWS_CLIENT_PREWARM is enabled, otherwise on first use
+_s3_client = prewarm_client("s3")
+_events_client = prewarm_client("events")
 
 SUPPORTED_EXTENSIONS = {".edi", ".bol", ".pod", ".csv", ".json", ".xml"}
 
+# Upper bound on documents read from S3 concurrently within one batch
+DOCUMENT_MAX_WORKERS = int(os.environ.get("DOCUMENT_MAX_WORKERS", "8"))
+
+# Metadata reads within one batch: how many are in flight at once, how long
+# each may take before it is abandoned, and how many attempts each object gets
+# when S3 throttles or a read times out
+DOCUMENT_FETCH_CONCURRENCY = int(os.environ.get("DOCUMENT_FETCH_CONCURRENCY", "16"))
+DOCUMENT_FETCH_TIMEOUT_SECONDS = float(os.environ.get("DOCUMENT_FETCH_TIMEOUT_SECONDS", "3"))
+DOCUMENT_FETCH_MAX_ATTEMPTS = int(os.environ.get("DOCUMENT_FETCH_MAX_ATTEMPTS", "3"))
+
+# Content type, user metadata and sniffed content of an unreadable object
+DEFAULT_HEAD: tuple[str, dict[str, str], Sniffed] = ("application/octet-stream", {}, UNKNOWN)
+
+# Budget for the records in each order.document-records.v1 event; 0 publishes
+# only the record summary in the document-uploaded event. Capped so the
+# records and the rest of the Detail fit in one PutEvents entry
+DOCUMENT_RECORD_EVENT_BYTES = min(
+    int(os.environ.get("DOCUMENT_RECORD_EVENT_BYTES", "0")), PUT_EVENTS_MAX_BYTES - 4096
+)
+
 
 def get_s3_client():  # type: ignore[no-untyped-def]
     """Lazy-initialize S3 client."""
     global _s3_client
     if _s3_client is None:
-        _s3_client = boto3.client("s3")
+        _s3_client = create_client("s3")
     return _s3_client
 
 
@@ -28,41 +51,214 @@ def get_events_client():  # type: ignore[no-untyped-def]
     """Lazy-initialize EventBridge client."""
     global _events_client
     if _events_client is None:
-        _events_client = boto3.client("events")
+        _events_client = create_client("events")
     return _events_client
 
 
-def log_structured(level: str, message: str, **kwargs: Any) -> None:
-    """Log structured JSON messages for better CloudWatch querying."""
-    log_entry = {"level": level, "message": message, **kwargs}
-    logger.log(getattr(logging, level.upper()), json.dumps(log_entry))
+def object_location(detail: dict[str, Any]) -> tuple[str, str, int]:
+    """Bucket name, object key and size of an Object Created event detail."""
+    return (
+        detail.get("bucket", {}).get("name", "unknown"),
+        detail.get("object", {}).get("key", "unknown"),
+        detail.get("object", {}).get("size", 0),
+    )
+
+
+def document_extension_type(object_key: str) -> str:
+    """Document type given by an object key's file extension ("UNKNOWN" if unsupported)."""
+    extension = ""
+    if "." in object_key:
+        extension = "." + object_key.rsplit(".", 1)[-1].lower()
+    return extension.lstrip(".").upper() if extension in SUPPORTED_EXTENSIONS else "UNKNOWN"
+
 
+def reads_body(object_key: str, object_size: int, sniffed: Sniffed) -> bool:
+    """Whether describe_document reads the whole object (EDI or record documents)."""
+    doc_type = resolve_document_type(document_extension_type(object_key), sniffed)
+    return bool(object_size) and (doc_type == "EDI" or doc_type in RECORD_FORMATS)
 
-def handler(event: dict[str, Any], context: Any) -> dict[str, Any]:
+
+def read_object_head(
+    s3: Any, bucket: str, key: str, size: int
+) -> tuple[str, dict[str, str], Sniffed]:
     """
-    Process S3 document upload events received via EventBridge.
+    Read an object's metadata and detect its content format.
 
-    S3 sends ObjectCreated events to the default EventBridge bus when
-    documents (EDI, BOL, POD, etc.) are uploaded. This Lambda reads
-    the document metadata from S3 and publishes a downstream
-    "order.document-uploaded.v1" event to the custom bus.
+    Metadata and the first SNIFF_BYTES come from a single ranged GET, so the
+    cost is bounded however large the object is. Empty objects have no range
+    to read, so only their metadata is fetched (HEAD).
 
     Args:
-        event: EventBridge event with S3 object details in "detail"
-        context: Lambda context object
+        s3: S3 client
+        bucket: Bucket name
+        key: Object key
+        size: Object size in bytes
 
     Returns:
-        Response dictionary with status code and body
+        Content type, user metadata and sniffed content
+
+    Raises:
+        botocore.exceptions.ClientError: If the object cannot be read
     """
-    request_id = context.request_id if hasattr(context, "request_id") else "unknown"
-    event_bus_name = os.environ.get("EVENT_BUS_NAME", "order-processing-bus")
+    sniffed = UNKNOWN
+    if size:
+        head = s3.get_object(Bucket=bucket, Key=key, Range=f"bytes=0-{SNIFF_BYTES - 1}")
+        sniffed = sniff(head["Body"].read(SNIFF_BYTES))
+    else:
+        head = s3.head_object(Bucket=bucket, Key=key)
+    return head.get("ContentType", "application/octet-stream"), head.get("Metadata", {}), sniffed
+
+
+def summarize_edi_object(s3: Any, bucket: str, key: str) -> dict[str, Any]:
+    """
+    Stream-parse an X12 document from S3 and summarize it.
+
+    The body is read in EDI_CHUNK_BYTES chunks and parsed segment by segment
+    (see shared.edi), so memory stays flat however large the document is.
+
+    Args:
+        s3: S3 client
+        bucket: Bucket name
+        key: Object key
+
+    Returns:
+        Summary fields for the event Detail (control numbers, order IDs, counts)
+
+    Raises:
+        ValueError: If the object is not a well-formed X12 interchange
+    """
+    body = s3.get_object(Bucket=bucket, Key=key)["Body"]
+    try:
+        return summarize_edi(iter_segments(iter_body(body))).as_detail()
+    finally:
+        body.close()
+
+
+def _default_head(
+    request_id: str, bucket: str, key: str, error: BaseException
+) -> tuple[str, dict[str, str], Sniffed]:
+    """Log an unreadable object and describe it with DEFAULT_HEAD."""
+    log_structured(
+        "warning",
+        "Failed to read object metadata, continuing with defaults",
+        request_id=request_id,
+        bucket=bucket,
+        key=key,
+        error=str(error),
+    )
+    return DEFAULT_HEAD
+
+
+def _publish(eb: Any, entries: list[dict[str, Any]], deadline: float | None) -> int:
+    """Publish entries, raising if any could not be delivered; returns the retries."""
+    publish_result = publish_entries(eb, entries, deadline=deadline)
+    if publish_result.failed_count:
+        failed = publish_result.results[publish_result.failed_indexes[0]]
+        raise RuntimeError(f"PutEvents entry failed: {failed.get('ErrorCode')}")
+    return publish_result.retries
+
+
+def extract_document_records(
+    body: Any,
+    eb: Any,
+    document: dict[str, Any],
+    event_bus_name: str,
+    deadline: float | None,
+) -> dict[str, Any]:
+    """
+    Stream normalized records out of a CSV, JSON or XML document.
+
+    The body is read in chunks and flows through a chain of generators
+    (shared.document_records: decode, parse, normalize, summarize), so only
+    the current record is held in memory, plus, when DOCUMENT_RECORD_EVENT_BYTES
+    is set, the records of the PutEvents batch being filled. Records are then
+    published as "order.document-records.v1" events of up to that many bytes
+    of records each, PUT_EVENTS_MAX_ENTRIES events per batch.
+
+    Args:
+        body: The document's S3 StreamingBody; closed when done
+        eb: EventBridge client
+        document: Detail fields identifying the document (orderId, documentType,
+            bucket, key); repeated in every record event
+        event_bus_name: Bus to publish record events to
+        deadline: time.monotonic() value after which publishing stops retrying
+
+    Returns:
+        Record summary for the document-uploaded event; "error" says why
+        extraction stopped early if the document could not be read to the end
+
+    Raises:
+        RuntimeError: If record events could not be published
+    """
+    summary = RecordSummary()
+    # Spliced into each event rather than re-encoded with its records
+    prefix = json.dumps(document)[:-1]
+    pending: list[dict[str, Any]] = []
+    try:
+        records = summary.track(extract_records(document["documentType"], iter_body(body)))
+        if DOCUMENT_RECORD_EVENT_BYTES <= 0:
+            # Summary only: run the records through the pipeline and drop them
+            for _ in records:
+                pass
+        else:
+            for encoded in encode_chunks(records, DOCUMENT_RECORD_EVENT_BYTES):
+                pending.append(
+                    {
+                        "Source": "document.processor",
+                        "DetailType": "order.document-records.v1",
+                        "Detail": (
+                            f'{prefix}, "chunk": {summary.event_count}, '
+                            f'"records": [{", ".join(encoded)}]}}'
+                        ),
+                        "EventBusName": event_bus_name,
+                    }
+                )
+                summary.event_count += 1
+                if len(pending) == PUT_EVENTS_MAX_ENTRIES:
+                    _publish(eb, pending, deadline)
+                    pending = []
+    except ValueError as e:
+        summary.error = str(e)
+    finally:
+        body.close()
+    if pending:
+        _publish(eb, pending, deadline)
+    return summary.as_detail()
 
-    log_structured("info", "Document processor received event", request_id=request_id, event=event)
 
-    detail = event.get("detail", {})
-    bucket_name = detail.get("bucket", {}).get("name", "unknown")
-    object_key = detail.get("object", {}).get("key", "unknown")
-    object_size = detail.get("object", {}).get("size", 0)
+def describe_document(
+    detail: dict[str, Any],
+    request_id: str,
+    event_bus_name: str,
+    deadline: float | None,
+    head: tuple[str, dict[str, str], Sniffed] | None = None,
+) -> dict[str, Any]:
+    """
+    Work out what an uploaded document is, for its document-uploaded event.
+
+    Reads the document metadata and first SNIFF_BYTES of content from S3
+    (read_object_head) and detects the content format (see
+    shared.document_sniff). EDI documents are also stream-parsed
+    (summarize_edi_object) and their order IDs, line counts and control
+    numbers added; CSV, JSON and XML documents have their records extracted
+    and summarized (extract_document_records), and optionally published in
+    record events. Unreadable objects are described from their key alone.
+
+    Args:
+        detail: Object Created event detail (bucket name, object key and size)
+        request_id: Invocation request ID, for logging
+        event_bus_name: Bus to publish record events to
+        deadline: time.monotonic() value after which publishing stops retrying
+        head: Result of read_object_head when already read (see handle_batch);
+            read here when None
+
+    Returns:
+        Detail of the "order.document-uploaded.v1" event
+
+    Raises:
+        RuntimeError: If record events could not be published
+    """
+    bucket_name, object_key, object_size = object_location(detail)
 
     log_structured(
         "info",
@@ -73,71 +269,329 @@ def handler(event: dict[str, Any], context: Any) -> dict[str, Any]:
         size=object_size,
     )
 
-    # Determine document type from file extension
-    extension = ""
-    if "." in object_key:
-        extension = "." + object_key.rsplit(".", 1)[-1].lower()
-    doc_type = extension.lstrip(".").upper() if extension in SUPPORTED_EXTENSIONS else "UNKNOWN"
+    extension_type = document_extension_type(object_key)
 
     # Extract order ID from key convention: <prefix>/<orderId>/<filename>
     key_parts = object_key.split("/")
     order_id = key_parts[1] if len(key_parts) >= 3 else "unknown"
 
-    # Read object metadata from S3 (HEAD, not full GET — saves cost/time)
     s3 = get_s3_client()
-    try:
-        head = s3.head_object(Bucket=bucket_name, Key=object_key)
-        content_type = head.get("ContentType", "application/octet-stream")
-        metadata = head.get("Metadata", {})
-    except Exception:
+    if head is None:
+        try:
+            head = read_object_head(s3, bucket_name, object_key, object_size)
+        except Exception as e:
+            head = _default_head(request_id, bucket_name, object_key, e)
+    content_type, metadata, sniffed = head
+
+    doc_type = resolve_document_type(extension_type, sniffed)
+    if doc_type != extension_type:
         log_structured(
             "warning",
-            "Failed to read object metadata, continuing with defaults",
+            "Document content does not match its extension",
             request_id=request_id,
-            bucket=bucket_name,
             key=object_key,
+            extension_type=extension_type,
+            detected_type=sniffed.format,
         )
-        content_type = "application/octet-stream"
-        metadata = {}
 
     log_structured(
         "info",
         "Document metadata retrieved",
         request_id=request_id,
         doc_type=doc_type,
+        detected_type=sniffed.format,
         content_type=content_type,
         order_id=order_id,
         user_metadata=metadata,
     )
 
-    # Publish downstream event to custom bus
     downstream_detail = {
         "orderId": order_id,
         "documentType": doc_type,
+        "detectedType": sniffed.format,
         "bucket": bucket_name,
         "key": object_key,
         "size": object_size,
         "contentType": content_type,
     }
+    if sniffed.root is not None:
+        downstream_detail["xmlRoot"] = sniffed.root
+    if doc_type == "EDI" and object_size:
+        try:
+            downstream_detail["edi"] = summarize_edi_object(s3, bucket_name, object_key)
+            log_structured(
+                "info",
+                "EDI document parsed",
+                request_id=request_id,
+                order_id=order_id,
+                order_count=downstream_detail["edi"]["orderCount"],
+                line_count=downstream_detail["edi"]["lineCount"],
+                control_errors=downstream_detail["edi"]["controlErrorCount"],
+            )
+        except Exception as e:
+            log_structured(
+                "warning",
+                "Failed to parse EDI document",
+                request_id=request_id,
+                key=object_key,
+                error=str(e),
+            )
+            downstream_detail["ediError"] = str(e)
 
-    eb = get_events_client()
-    try:
-        eb.put_events(
-            Entries=[
+    if doc_type in RECORD_FORMATS and object_size:
+        try:
+            body = s3.get_object(Bucket=bucket_name, Key=object_key)["Body"]
+        except Exception as e:
+            records = RecordSummary(error=str(e)).as_detail()
+        else:
+            records = extract_document_records(
+                body,
+                get_events_client(),
                 {
-                    "Source": "document.processor",
-                    "DetailType": "order.document-uploaded.v1",
-                    "Detail": json.dumps(downstream_detail),
-                    "EventBusName": event_bus_name,
-                }
-            ]
+                    key: downstream_detail[key]
+                    for key in ("orderId", "documentType", "bucket", "key")
+                },
+                event_bus_name,
+                deadline,
+            )
+        downstream_detail["records"] = records
+        log_structured(
+            "warning" if "error" in records else "info",
+            "Document records extracted",
+            request_id=request_id,
+            order_id=order_id,
+            record_count=records["recordCount"],
+            event_count=records["eventCount"],
+            error=records.get("error"),
+        )
+
+    return downstream_detail
+
+
+def document_entry(downstream_detail: dict[str, Any], event_bus_name: str) -> dict[str, Any]:
+    """Build the PutEvents entry of a document-uploaded event."""
+    return {
+        "Source": "document.processor",
+        "DetailType": "order.document-uploaded.v1",
+        "Detail": json.dumps(downstream_detail),
+        "EventBusName": event_bus_name,
+    }
+
+
+def object_details(message: Any) -> list[dict[str, Any]]:
+    """
+    Extract the Object Created details carried by a queued message body.
+
+    Accepts the EventBridge event the S3 rule buffers into the queue, and S3
+    event notifications sent to the queue directly (several records per
+    message, keys URL-encoded); S3's test event carries no objects.
+
+    Args:
+        message: Message body, as JSON text or already parsed (EventBridge Pipes)
+
+    Returns:
+        Details in the EventBridge Object Created form (bucket name, object key and size)
+
+    Raises:
+        ValueError: If the body is neither
+    """
+    body = json.loads(message) if isinstance(message, str | bytes) else message
+    if not isinstance(body, dict):
+        raise ValueError("Message body is not a JSON object")
+    if "detail" in body:
+        return [body["detail"]]
+    if body.get("Event") == "s3:TestEvent":
+        return []
+    if "Records" in body:
+        return [
+            {
+                "bucket": {"name": record["s3"]["bucket"]["name"]},
+                "object": {
+                    "key": unquote_plus(record["s3"]["object"]["key"]),
+                    "size": record["s3"]["object"].get("size", 0),
+                },
+            }
+            for record in body["Records"]
+            if record.get("eventName", "").startswith("ObjectCreated")
+        ]
+    raise ValueError("Message body is neither an EventBridge event nor an S3 notification")
+
+
+def handle_batch(
+    records: list[dict[str, Any]], request_id: str, event_bus_name: str, deadline: float | None
+) -> dict[str, Any]:
+    """
+    Process a batch of queued upload events.
+
+    The metadata of all documents is read first (read_object_head), up to
+    DOCUMENT_FETCH_CONCURRENCY reads at a time (shared.concurrent_fetch), each
+    abandoned after DOCUMENT_FETCH_TIMEOUT_SECONDS and retried with backoff
+    when S3 throttles. Documents whose body is read too (reads_body) are then
+    described on up to DOCUMENT_MAX_WORKERS threads, so those reads overlap as
+    well, and all document-uploaded events are published together, packed
+    into PutEvents calls of up to 10 entries. The events are the same as
+    describing each document on its own would give. A message fails if its
+    body cannot be read, any of its documents cannot be described, or any of
+    their events could not be published.
+
+    Args:
+        records: SQS records (from an event source mapping or EventBridge Pipes)
+        request_id: Invocation request ID, for logging
+        event_bus_name: Bus to publish to
+        deadline: time.monotonic() value after which publishing stops retrying
+
+    Returns:
+        Response with batchItemFailures listing the failed message IDs
+    """
+    failed_ids: set[str] = set()
+    jobs: list[tuple[str, dict[str, Any]]] = []
+    for record in records:
+        message_id = record.get("messageId", "")
+        try:
+            jobs.extend((message_id, detail) for detail in object_details(record["body"]))
+        except Exception as e:
+            log_structured(
+                "error",
+                "Invalid document upload message",
+                request_id=request_id,
+                message_id=message_id,
+                error=str(e),
+                error_type=type(e).__name__,
+            )
+            failed_ids.add(message_id)
+
+    # Create the clients before the workers share them
+    s3 = get_s3_client()
+    get_events_client()
+    locations = [object_location(detail) for _, detail in jobs]
+    heads = fetch_all(
+        lambda location: read_object_head(s3, *location),
+        locations,
+        max_workers=DOCUMENT_FETCH_CONCURRENCY,
+        timeout=DOCUMENT_FETCH_TIMEOUT_SECONDS,
+        max_attempts=DOCUMENT_FETCH_MAX_ATTEMPTS,
+        deadline=deadline,
+    )
+    for index in heads.failed_indexes:
+        bucket, key, _ = locations[index]
+        heads.values[index] = _default_head(request_id, bucket, key, heads.errors[index])
+
+    def describe(index: int) -> dict[str, Any]:
+        return describe_document(
+            jobs[index][1], request_id, event_bus_name, deadline, heads.values[index]
         )
+
+    # Only documents whose body is read wait on S3 again; the rest are described
+    # from their metadata on this thread, without a hand-off to a worker
+    body_reads = [
+        index
+        for index, (_, key, size) in enumerate(locations)
+        if reads_body(key, size, heads.values[index][2])
+    ]
+    read = fetch_all(describe, body_reads, max_workers=DOCUMENT_MAX_WORKERS, max_attempts=1)
+    described = dict(zip(body_reads, zip(read.values, read.errors, strict=True), strict=True))
+
+    entries: list[dict[str, Any]] = []
+    entry_ids: list[str] = []
+    for index, (message_id, _) in enumerate(jobs):
+        if index in described:
+            downstream_detail, error = described[index]
+        else:
+            try:
+                downstream_detail, error = describe(index), None
+            except Exception as e:
+                downstream_detail, error = None, e
+        if error is not None:
+            log_structured(
+                "error",
+                "Error processing document",
+                request_id=request_id,
+                message_id=message_id,
+                error=str(error),
+                error_type=type(error).__name__,
+            )
+            failed_ids.add(message_id)
+        else:
+            entries.append(document_entry(downstream_detail, event_bus_name))
+            entry_ids.append(message_id)
+    publish_result = publish_entries(get_events_client(), entries, deadline=deadline)
+    for index in publish_result.failed_indexes:
+        failed_ids.add(entry_ids[index])
+
+    failures = [
+        {"itemIdentifier": record.get("messageId", "")}
+        for record in records
+        if record.get("messageId", "") in failed_ids
+    ]
+    log_structured(
+        "info",
+        "Document batch complete",
+        request_id=request_id,
+        message_count=len(records),
+        document_count=len(jobs),
+        published_count=len(entries) - publish_result.failed_count,
+        failed_count=len(failures),
+        put_events_calls=publish_result.requests,
+        retries=publish_result.retries,
+        metadata_retries=heads.retries,
+        metadata_timeouts=heads.timeouts,
+    )
+    return {
+        "statusCode": 200,
+        "body": json.dumps({"message": f"Processed {len(jobs)} documents"}),
+        "batchItemFailures": failures,
+    }
+
+
+@buffered_logs
+def handler(event: Any, context: Any) -> dict[str, Any]:
+    """
+    Process S3 document upload events.
+
+    S3 sends ObjectCreated events to the default EventBridge bus when
+    documents (EDI, BOL, POD, etc.) are uploaded. The event is either
+    delivered on its own (EventBridge rule target) or buffered through SQS
+    and delivered in batches ({"Records": [...]} from an event source
+    mapping, or a list of records from EventBridge Pipes), which turns a bulk
+    upload into a few invocations. Each document is described
+    (describe_document) and published as a downstream
+    "order.document-uploaded.v1" event to the custom bus.
+
+    Args:
+        event: EventBridge event with S3 object details in "detail", or a batch
+            of SQS records whose bodies are such events or S3 notifications
+        context: Lambda context object
+
+    Returns:
+        Response dictionary with status code and body; for batches, also
+        batchItemFailures (ReportBatchItemFailures)
+    """
+    request_id = context.request_id if hasattr(context, "request_id") else "unknown"
+    event_bus_name = os.environ.get("EVENT_BUS_NAME", "order-processing-bus")
+
+    log_sampled("info", "Document processor received event", request_id=request_id, event=event)
+
+    deadline = deadline_from_context(context)
+    if isinstance(event, list):
+        return handle_batch(event, request_id, event_bus_name, deadline)
+    if "Records" in event:
+        return handle_batch(event["Records"], request_id, event_bus_name, deadline)
+
+    downstream_detail = describe_document(
+        event.get("detail", {}), request_id, event_bus_name, deadline
+    )
+    order_id = downstream_detail["orderId"]
+    doc_type = downstream_detail["documentType"]
+    eb = get_events_client()
+    try:
+        retries = _publish(eb, [document_entry(downstream_detail, event_bus_name)], deadline)
         log_structured(
             "info",
             "Published document-uploaded event",
             request_id=request_id,
             order_id=order_id,
             doc_type=doc_type,
+            retries=retries,
         )
     except Exception:
         log_structured(
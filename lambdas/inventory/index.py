@@ -1,25 +1,108 @@
 import json
-import logging
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
 from typing import Any
 
-# Configure structured logging
-logger = logging.getLogger()
-logger.setLevel(logging.INFO)
+from shared.batching import deadline_from_context
+from shared.claim_check import check_out, is_claim_check
+from shared.clients import create_client
+from shared.detail_codec import decode_detail
+from shared.stock_ledger import InMemoryStockStore, StockLedger, StockStore
+from shared.structured_log import buffered_logs, log_structured
 
+# Upper bound on records processed concurrently within one invocation
+INVENTORY_MAX_WORKERS = int(os.environ.get("INVENTORY_MAX_WORKERS", "4"))
 
-def log_structured(level: str, message: str, **kwargs: Any) -> None:
-    """Log structured JSON messages for better CloudWatch querying."""
-    log_entry = {"level": level, "message": message, **kwargs}
-    logger.log(getattr(logging, level.upper()), json.dumps(log_entry))
+# Stop starting new records once less than this much invocation time remains
+INVENTORY_TIME_RESERVE_MS = int(os.environ.get("INVENTORY_TIME_RESERVE_MS", "5000"))
 
+# Maximum number of SKUs whose stock level is cached in a warm container
+INVENTORY_LEDGER_CAPACITY = int(os.environ.get("INVENTORY_LEDGER_CAPACITY", "10000"))
 
-def process_order(detail: dict[str, Any], request_id: str) -> None:
+# Most SKUs listed in an order's "Insufficient stock for order" entry
+MAX_LOGGED_SKUS = 20
+
+# Stock levels cached across invocations. Until an inventory backend is set
+# (set_stock_store), an in-memory store stands in for it; its levels start at
+# zero, so stock availability is not checked against it
+STOCK_LEDGER = StockLedger(InMemoryStockStore(), capacity=INVENTORY_LEDGER_CAPACITY)
+STOCK_STORE_CONFIGURED = False
+
+# Only needed for claim-checked orders (created on first use)
+_s3_client = None
+
+
+def get_s3_client():  # type: ignore[no-untyped-def]
+    """Get or create S3 client (lazy initialization for better testability)."""
+    global _s3_client
+    if _s3_client is None:
+        _s3_client = create_client("s3")
+    return _s3_client
+
+
+def set_stock_store(store: StockStore) -> StockLedger:
+    """
+    Use an inventory backend for stock levels, with availability checks.
+
+    Args:
+        store: Backend the stock ledger reads on a miss and writes through to
+
+    Returns:
+        The new STOCK_LEDGER
+    """
+    global STOCK_LEDGER, STOCK_STORE_CONFIGURED
+    STOCK_LEDGER = StockLedger(store, capacity=INVENTORY_LEDGER_CAPACITY)
+    STOCK_STORE_CONFIGURED = True
+    return STOCK_LEDGER
+
+
+def order_line_deltas(detail: dict[str, Any]) -> dict[str, int]:
+    """
+    Compute the stock quantity change per SKU for an order.
+
+    Line items are either SKU strings (quantity 1) or objects with "sku" and
+    "quantity". Cancelled orders ("purpose": "cancel") release stock, so their
+    quantities count negatively.
+
+    Args:
+        detail: The order detail from the EventBridge event
+
+    Returns:
+        Mapping of SKU to quantity delta
+
+    Raises:
+        ValueError: If a line item has no SKU or a non-integer quantity
+    """
+    sign = -1 if detail.get("purpose") == "cancel" else 1
+    deltas: dict[str, int] = {}
+    for item in detail.get("items", []):
+        if isinstance(item, str):
+            sku, quantity = item, 1
+        elif isinstance(item, dict):
+            sku, quantity = item.get("sku"), item.get("quantity", 1)
+        else:
+            raise ValueError(f"Invalid line item: {item!r}")
+        if not sku or not isinstance(quantity, int) or isinstance(quantity, bool):
+            raise ValueError(f"Invalid line item: {item!r}")
+        deltas[sku] = deltas.get(sku, 0) + sign * quantity
+    return deltas
+
+
+def process_order(detail: dict[str, Any], request_id: str) -> dict[str, int]:
     """
     Process a single order for inventory integration.
 
+    A claim-checked order (see shared.claim_check) is fetched from S3 here,
+    since its line items are not in the event, and a compressed one (see
+    shared.detail_codec) is decoded.
+
     Args:
         detail: The order detail from the EventBridge event
         request_id: Lambda request ID for tracing
+
+    Returns:
+        Stock quantity delta per SKU for the order
     """
     order_id = detail.get("orderId", "unknown")
     log_structured(
@@ -29,16 +112,152 @@ def process_order(detail: dict[str, Any], request_id: str) -> None:
         order_id=order_id,
         detail=detail,
     )
-
-    # Simulate inventory processing
+    if is_claim_check(detail):
+        order_bytes = detail["claimCheck"]["size"]
+        detail = check_out(get_s3_client(), detail)
+        log_structured(
+            "info",
+            "Fetched claim-checked order",
+            request_id=request_id,
+            order_id=order_id,
+            order_bytes=order_bytes,
+        )
+    detail = decode_detail(detail)
+    deltas = order_line_deltas(detail)
     log_structured(
         "info",
         "Order processed for inventory integration",
         request_id=request_id,
         order_id=order_id,
+        sku_count=len(deltas),
+    )
+    return deltas
+
+
+def apply_inventory_change(sku: str, changes: dict[str, int]) -> tuple[int, bool]:
+    """
+    Write one net stock change to the inventory backend.
+
+    When a backend is configured (set_stock_store), the current level is
+    first read from STOCK_LEDGER (the backend is only read on a cache miss)
+    to check that the stock is available. The change is written through to
+    the backend, which applies each message's change at most once, so a
+    redelivered message does not reserve its stock again.
+
+    Args:
+        sku: SKU whose stock changes
+        changes: Quantity reserved per SQS message ID (negative when stock is released)
+
+    Returns:
+        New stock level, and whether there was not enough stock for the change
+    """
+    delta = sum(changes.values())
+    insufficient = STOCK_STORE_CONFIGURED and delta > 0 and STOCK_LEDGER.get(sku) < delta
+    level = STOCK_LEDGER.apply_changes(
+        sku, {message_id: -quantity for message_id, quantity in changes.items()}
     )
+    return level, insufficient
+
 
+def process_lane(
+    lane: list[tuple[str, dict[str, Any]]], request_id: str, deadline: float | None
+) -> list[str]:
+    """
+    Process the records of one lane (all records for one order) in order.
 
+    The quantity changes of the lane's records are coalesced into one net
+    change per SKU, so the backend is written once per (order, SKU) however
+    many events arrived for the order. If a record fails, or the deadline is
+    reached, the rest of the lane is not processed so that the records are
+    redelivered in their original order. If a write fails, every processed
+    record is redelivered; the backend records which message IDs it applied
+    to each SKU, so SKUs written before the failure are not changed again.
+
+    Args:
+        lane: (message ID, order detail) pairs in delivery order
+        request_id: Lambda request ID for tracing
+        deadline: time.monotonic() value after which no new record is started
+
+    Returns:
+        Message IDs of the records that failed or were not processed
+    """
+    order_id = str(lane[0][1].get("orderId", "unknown"))
+    # Quantity per SKU, per message, so the backend can skip replayed messages
+    net: dict[str, dict[str, int]] = {}
+    failed: list[str] = []
+    for position, (message_id, detail) in enumerate(lane):
+        if deadline is not None and time.monotonic() >= deadline:
+            log_structured(
+                "warning",
+                "Low remaining time, leaving records for redelivery",
+                request_id=request_id,
+                message_id=message_id,
+                skipped_count=len(lane) - position,
+            )
+            failed = [skipped_id for skipped_id, _ in lane[position:]]
+            break
+        try:
+            deltas = process_order(detail, request_id)
+        except Exception as e:
+            log_structured(
+                "error",
+                "Error processing inventory record",
+                request_id=request_id,
+                message_id=message_id,
+                error=str(e),
+                error_type=type(e).__name__,
+            )
+            failed = [failed_id for failed_id, _ in lane[position:]]
+            break
+        for sku, delta in deltas.items():
+            net.setdefault(sku, {})[message_id] = delta
+
+    written: dict[str, int] = {}
+    insufficient: list[str] = []
+    try:
+        for sku, changes in net.items():
+            delta = sum(changes.values())
+            if delta:
+                _, short = apply_inventory_change(sku, changes)
+                written[sku] = delta
+                if short:
+                    insufficient.append(sku)
+    except Exception as e:
+        log_structured(
+            "error",
+            "Error writing inventory change",
+            request_id=request_id,
+            order_id=order_id,
+            error=str(e),
+            error_type=type(e).__name__,
+        )
+        # The coalesced changes cover every processed record, so all of them retry;
+        # the SKUs already written skip them on redelivery
+        return [message_id for message_id, _ in lane]
+    finally:
+        # One entry per order, however many SKUs it has
+        if insufficient:
+            log_structured(
+                "warning",
+                "Insufficient stock for order",
+                request_id=request_id,
+                order_id=order_id,
+                sku_count=len(insufficient),
+                skus=insufficient[:MAX_LOGGED_SKUS],
+            )
+        if written:
+            log_structured(
+                "info",
+                "Inventory updated",
+                request_id=request_id,
+                order_id=order_id,
+                sku_count=len(written),
+                quantity=sum(written.values()),
+            )
+    return failed
+
+
+@buffered_logs
 def handler(event: dict[str, Any], context: Any) -> dict[str, Any]:
     """
     Receives order events from SQS (buffered from EventBridge) and processes them.
@@ -47,12 +266,21 @@ def handler(event: dict[str, Any], context: Any) -> dict[str, Any]:
     the inventory service from being overwhelmed by order spikes. Each SQS
     message body contains the full EventBridge event JSON.
 
+    Records are grouped into lanes by orderId. Lanes run concurrently on up
+    to INVENTORY_MAX_WORKERS threads while the records within a lane run in
+    order. Within a lane, quantity changes are coalesced into one backend
+    write per SKU. No new record is started once less than
+    INVENTORY_TIME_RESERVE_MS of invocation time remains.
+
+    Records that fail are returned in batchItemFailures (ReportBatchItemFailures)
+    so only they return to the queue; the rest of the batch is not reprocessed.
+
     Args:
         event: SQS event containing one or more records
         context: Lambda context object
 
     Returns:
-        Response dictionary with status code and body
+        Response dictionary with status code, body and batchItemFailures
     """
     request_id = context.request_id if hasattr(context, "request_id") else "unknown"
 
@@ -64,22 +292,66 @@ def handler(event: dict[str, Any], context: Any) -> dict[str, Any]:
         record_count=len(records),
     )
 
-    processed = 0
-    for record in records:
-        # Each SQS message body is the full EventBridge event JSON
-        eb_event = json.loads(record["body"])
-        detail = eb_event.get("detail", {})
-        process_order(detail, request_id)
-        processed += 1
+    failed_ids: set[str] = set()
+    lanes: dict[str, list[tuple[str, dict[str, Any]]]] = {}
+    for position, record in enumerate(records):
+        message_id = record.get("messageId", "")
+        # Each record is parsed in isolation so one poison message only
+        # fails itself; successful messages are not redelivered
+        try:
+            # Each SQS message body is the full EventBridge event JSON
+            eb_event = json.loads(record["body"])
+            detail = eb_event.get("detail", {})
+            if not isinstance(detail, dict):
+                raise ValueError(f"Event detail is a {type(detail).__name__}, not an object")
+        except Exception as e:
+            log_structured(
+                "error",
+                "Error processing inventory record",
+                request_id=request_id,
+                message_id=message_id,
+                error=str(e),
+                error_type=type(e).__name__,
+            )
+            failed_ids.add(message_id)
+            continue
+        # Records without an orderId have no ordering constraint: give each its own lane
+        lane_key = str(detail.get("orderId") or f"#{position}")
+        lanes.setdefault(lane_key, []).append((message_id, detail))
+
+    deadline = deadline_from_context(context, reserve_ms=INVENTORY_TIME_RESERVE_MS)
+    workers = min(INVENTORY_MAX_WORKERS, len(lanes))
+    if workers <= 1:
+        lane_failures = [process_lane(lane, request_id, deadline) for lane in lanes.values()]
+    else:
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            lane_failures = list(
+                executor.map(lambda lane: process_lane(lane, request_id, deadline), lanes.values())
+            )
+    for lane_failed_ids in lane_failures:
+        failed_ids.update(lane_failed_ids)
+
+    failures = [
+        {"itemIdentifier": record.get("messageId", "")}
+        for record in records
+        if record.get("messageId", "") in failed_ids
+    ]
+    processed = len(records) - len(failures)
 
     log_structured(
         "info",
         "Batch processing complete",
         request_id=request_id,
         processed_count=processed,
+        failed_count=len(failures),
+        lane_count=len(lanes),
+        workers=workers,
+        ledger_hits=STOCK_LEDGER.hits,
+        ledger_misses=STOCK_LEDGER.misses,
     )
 
     return {
         "statusCode": 200,
         "body": json.dumps({"message": f"Processed {processed} orders for inventory"}),
+        "batchItemFailures": failures,
     }
@@ -1,40 +1,150 @@
 import json
-import logging
 import os
 from typing import Any
 
-import boto3
+from shared.batching import deadline_from_context
+from shared.clients import create_client, prewarm_client
+from shared.detail_codec import decode_detail, is_compressed
+from shared.sqs_sender import SEND_MESSAGE_BATCH_MAX_BYTES, message_size, send_messages
+from shared.structured_log import buffered_logs, log_sampled, log_structured
 
-# Configure structured logging
-logger = logging.getLogger()
-logger.setLevel(logging.INFO)
-
-# Lazy initialization for boto3 client (created on first use)
-_sqs_client = None
-QUEUE_URL = os.environ["QUEUE_URL"]
+# Created during init when AWS_CLIENT_PREWARM is enabled, otherwise on first use
+_sqs_client = prewarm_client("sqs")
 
 
 def get_sqs_client():
     """Get or create SQS client (lazy initialization for better testability)."""
     global _sqs_client
     if _sqs_client is None:
-        _sqs_client = boto3.client("sqs")
+        _sqs_client = create_client("sqs")
     return _sqs_client
 
 
-def log_structured(level: str, message: str, **kwargs: Any) -> None:
-    """Log structured JSON messages for better CloudWatch querying."""
-    log_entry = {"level": level, "message": message, **kwargs}
-    logger.log(getattr(logging, level.upper()), json.dumps(log_entry))
+def build_email_message(detail: dict[str, Any]) -> dict[str, Any]:
+    """
+    Build the email notification message for an order detail.
+
+    A compressed detail (see shared.detail_codec) is decoded, unless the
+    decoded order would make the message larger than SQS accepts; then the
+    email carries the detail as-is, i.e. the order summary and the compressed
+    order. A claim-checked detail (see shared.claim_check) is used as-is too:
+    the email carries the order summary and the pointer to the full order.
+
+    Raises:
+        ValueError: If a compressed detail cannot be decoded
+    """
+    message = {
+        "recipient": "sales@example.com",
+        "subject": f"New Order Received: {detail.get('orderId', 'unknown')}",
+        "orderData": decode_detail(detail),
+    }
+    if is_compressed(detail) and message_size(json.dumps(message)) > SEND_MESSAGE_BATCH_MAX_BYTES:
+        message["orderData"] = detail
+    return message
+
+
+def is_batch_event(event: Any) -> bool:
+    """Return True for SQS batches ({"Records": [...]}) and Pipes batches (a list)."""
+    return isinstance(event, list) or (isinstance(event, dict) and "Records" in event)
+
+
+def handle_batch(
+    records: list[dict[str, Any]], request_id: str, deadline: float | None = None
+) -> dict[str, Any]:
+    """
+    Queue email notifications for a batch of EventBridge events.
+
+    Records are either SQS messages whose body is an EventBridge event, or
+    EventBridge events delivered directly by a pipe. The outgoing messages are
+    coalesced into SendMessageBatch calls and failed entries are retried.
+    Records that cannot be parsed or queued are reported in batchItemFailures
+    so only they are redelivered.
+
+    Args:
+        records: Batch records
+        request_id: Lambda request ID for tracing
+        deadline: time.monotonic() deadline for SendMessageBatch retries
+
+    Returns:
+        Response dictionary with status code, body and batchItemFailures
+    """
+    log_structured(
+        "info",
+        "Notifier received batch",
+        request_id=request_id,
+        record_count=len(records),
+    )
+
+    failures: list[str] = []
+    identifiers: list[str] = []
+    bodies: list[str] = []
+    for position, record in enumerate(records):
+        identifier = str(record.get("messageId") or record.get("id") or position)
+        try:
+            eb_event = json.loads(record["body"]) if "body" in record else record
+            body = json.dumps(build_email_message(eb_event.get("detail", {})))
+        except (ValueError, TypeError, AttributeError) as e:
+            log_structured(
+                "error",
+                "Invalid record in notifier batch",
+                request_id=request_id,
+                item_identifier=identifier,
+                error=str(e),
+            )
+            failures.append(identifier)
+            continue
+        if message_size(body) > SEND_MESSAGE_BATCH_MAX_BYTES:
+            log_structured(
+                "error",
+                "Notification exceeds SQS message size limit",
+                request_id=request_id,
+                item_identifier=identifier,
+            )
+            failures.append(identifier)
+            continue
+        identifiers.append(identifier)
+        bodies.append(body)
+
+    send_result = send_messages(
+        get_sqs_client(), os.environ["QUEUE_URL"], bodies, deadline=deadline
+    )
+    for index in send_result.failed_indexes:
+        log_structured(
+            "error",
+            "Error sending message to SQS",
+            request_id=request_id,
+            item_identifier=identifiers[index],
+            error=send_result.results[index].get("ErrorCode"),
+        )
+        failures.append(identifiers[index])
+
+    queued = len(bodies) - send_result.failed_count
+    log_structured(
+        "info",
+        "Notification batch queued",
+        request_id=request_id,
+        queued_count=queued,
+        failed_count=len(failures),
+        send_message_batch_requests=send_result.requests,
+        retries=send_result.retries,
+    )
+    return {
+        "statusCode": 200,
+        "body": json.dumps({"message": f"Queued {queued} notifications"}),
+        "batchItemFailures": [{"itemIdentifier": identifier} for identifier in failures],
+    }
 
 
-def handler(event: dict[str, Any], context: Any) -> dict[str, Any]:
+@buffered_logs
+def handler(event: dict[str, Any] | list[dict[str, Any]], context: Any) -> dict[str, Any]:
     """
     Receives order event from EventBridge and queues it for email notification.
     This simulates notifying the Sales team via email by placing the event in an SQS queue.
 
+    Batches (SQS- or Pipes-delivered) are handled by handle_batch.
+
     Args:
-        event: EventBridge event containing the order detail
+        event: EventBridge event containing the order detail, or a batch of events
         context: Lambda context object
 
     Returns:
@@ -42,8 +152,12 @@ def handler(event: dict[str, Any], context: Any) -> dict[str, Any]:
     """
     request_id = context.request_id if hasattr(context, "request_id") else "unknown"
 
+    if is_batch_event(event):
+        records = event if isinstance(event, list) else event["Records"]
+        return handle_batch(records, request_id, deadline_from_context(context))
+
     # Log the event received from EventBridge
-    log_structured("info", "Notifier received event", request_id=request_id, event=event)
+    log_sampled("info", "Notifier received event", request_id=request_id, event=event)
 
     # Extract the detail from the EventBridge event
     detail = event.get("detail", {})
@@ -58,13 +172,11 @@ def handler(event: dict[str, Any], context: Any) -> dict[str, Any]:
 
     # Send message to SQS queue for email processing
     try:
-        email_message = {
-            "recipient": "sales@example.com",
-            "subject": f"New Order Received: {order_id}",
-            "orderData": detail,
-        }
+        email_message = build_email_message(detail)
         sqs = get_sqs_client()
-        response = sqs.send_message(QueueUrl=QUEUE_URL, MessageBody=json.dumps(email_message))
+        response = sqs.send_message(
+            QueueUrl=os.environ["QUEUE_URL"], MessageBody=json.dumps(email_message)
+        )
         message_id = response["MessageId"]
         log_structured(
             "info",
@@ -1,65 +1,292 @@
 import json
-import logging
 import os
 from typing import Any
 
-import boto3
+from shared.batching import deadline_from_context
+from shared.claim_check import CLAIM_CHECK_THRESHOLD_BYTES, check_in
+from shared.clients import create_client, prewarm_client
+from shared.detail_codec import encode_detail
+from shared.idempotency import (
+    IdempotencyCache,
+    IdempotencyKeyReusedError,
+    idempotency_key,
+    replayed,
+    request_hash,
+)
+from shared.order_schema import validate_order
+from shared.publisher import PUT_EVENTS_MAX_BYTES, entry_size, publish_entries
+from shared.structured_log import buffered_logs, log_sampled, log_structured
 
-# Configure structured logging
-logger = logging.getLogger()
-logger.setLevel(logging.INFO)
+# Orders whose entry is at least this large are published compressed (see
+# shared.detail_codec); 0 disables compression. Below one 64 KB billing chunk
+# the CPU on both ends buys little (benchmarks/bench_detail_compression.py)
+DETAIL_COMPRESSION_MIN_BYTES = int(os.environ.get("DETAIL_COMPRESSION_MIN_BYTES", "0"))
 
-# Lazy initialization for boto3 client (created on first use)
-_eventbridge_client = None
-EVENT_BUS_NAME = os.environ["EVENT_BUS_NAME"]
+# Responses to completed submissions, replayed for client retries. Only the
+# warm-container tier: no shared store is wired up yet
+IDEMPOTENCY_CACHE = IdempotencyCache()
+
+# Created during init when AWS_CLIENT_PREWARM is enabled, otherwise on first use
+_eventbridge_client = prewarm_client("events")
+# Only needed for claim-checked orders, so never pre-warmed
+_s3_client = None
 
 
 def get_eventbridge_client():
     """Get or create EventBridge client (lazy initialization for better testability)."""
     global _eventbridge_client
     if _eventbridge_client is None:
-        _eventbridge_client = boto3.client("events")
+        _eventbridge_client = create_client("events")
     return _eventbridge_client
 
 
-def log_structured(level: str, message: str, **kwargs: Any) -> None:
-    """Log structured JSON messages for better CloudWatch querying."""
-    log_entry = {"level": level, "message": message, **kwargs}
-    logger.log(getattr(logging, level.upper()), json.dumps(log_entry))
+def get_s3_client():
+    """Get or create S3 client (lazy initialization for better testability)."""
+    global _s3_client
+    if _s3_client is None:
+        _s3_client = create_client("s3")
+    return _s3_client
 
 
-def handler(event: dict[str, Any], context: Any) -> dict[str, Any]:
+def build_order_entry(payload: Any, raw_detail: str | None = None) -> dict[str, Any]:
     """
-    Receives order from API Gateway, logs it, and publishes to EventBridge.
+    Build the PutEvents entry for a single order payload.
 
-    Accepts any valid JSON payload and passes it through to EventBridge.
-    Returns 400 if request body is missing or contains invalid JSON.
+    Args:
+        payload: Parsed order payload
+        raw_detail: Original JSON text of the payload; when given it is forwarded
+            as the Detail unchanged instead of re-serializing the payload
+
+    Returns:
+        PutEvents request entry
+    """
+    return {
+        "Source": "public.api",
+        "DetailType": "order.received.v1",
+        "Detail": raw_detail if raw_detail is not None else json.dumps(payload),
+        "EventBusName": os.environ["EVENT_BUS_NAME"],
+    }
+
+
+def build_publishable_entry(
+    payload: Any, raw_detail: str | None, request_id: str
+) -> dict[str, Any] | None:
+    """
+    Build the PutEvents entry for an order, compressing or claim-checking it when large.
+
+    Orders of at least DETAIL_COMPRESSION_MIN_BYTES (when set) are published
+    compressed (see shared.detail_codec) if that makes the entry smaller and
+    brings it within CLAIM_CHECK_THRESHOLD_BYTES. Orders whose entry still
+    exceeds the threshold are stored in the CLAIM_CHECK_BUCKET and published
+    as a summary with a pointer to the stored payload (see shared.claim_check).
+    Without a claim-check bucket they are published as-is up to the PutEvents
+    limit.
 
     Args:
-        event: API Gateway event containing the order payload
-        context: Lambda context object
+        payload: Parsed order payload
+        raw_detail: Original JSON text of the payload, if available
+        request_id: Lambda request ID for tracing
 
     Returns:
-        API Gateway response with status code and body
+        PutEvents request entry, or None when the order is too large to publish
+
+    Raises:
+        Exception: If storing a claim-checked payload in S3 fails
     """
-    request_id = context.request_id if hasattr(context, "request_id") else "unknown"
+    entry = build_order_entry(payload, raw_detail)
+    size = entry_size(entry)
+    if 0 < DETAIL_COMPRESSION_MIN_BYTES <= size:
+        compressed = build_order_entry(encode_detail(payload, raw_detail))
+        compressed_size = entry_size(compressed)
+        if compressed_size < size and compressed_size <= CLAIM_CHECK_THRESHOLD_BYTES:
+            return compressed
+    if size <= CLAIM_CHECK_THRESHOLD_BYTES:
+        return entry
+    bucket = os.environ.get("CLAIM_CHECK_BUCKET")
+    if not bucket:
+        return entry if size <= PUT_EVENTS_MAX_BYTES else None
 
-    # Log the incoming payload
-    log_structured("info", "Received order", request_id=request_id, event=event)
+    detail = check_in(get_s3_client(), bucket, payload, raw_detail)
+    log_structured(
+        "info",
+        "Order payload claim-checked",
+        request_id=request_id,
+        order_id=detail.get("orderId", "unknown"),
+        order_bytes=size,
+        key=detail["claimCheck"]["key"],
+    )
+    return build_order_entry(detail)
 
-    # Extract the body from API Gateway event
-    body = event.get("body")
 
-    # Return 400 if no request body provided
-    if not body:
-        log_structured("error", "Missing request body", request_id=request_id)
-        return {
-            "statusCode": 400,
-            "headers": {"Content-Type": "application/json"},
-            "body": json.dumps({"message": "Request body is required"}),
-        }
+def parse_bulk_body(body: str) -> list[tuple[Any, str | None]]:
+    """
+    Parse a bulk request body into a list of per-order parse results.
+
+    A body starting with "[" is treated as a JSON array of orders; anything
+    else is treated as NDJSON with one order per non-blank line.
+
+    Args:
+        body: Raw request body
+
+    Returns:
+        One (order, raw) pair per order. The order is the parsed value, or a
+        json.JSONDecodeError for NDJSON lines that could not be parsed. The raw
+        text is the NDJSON line (forwarded as the Detail), or None for JSON arrays.
+
+    Raises:
+        json.JSONDecodeError: If a JSON array body is not valid JSON
+        ValueError: If a JSON array body is not a list
+    """
+    if body.lstrip().startswith("["):
+        orders = json.loads(body)
+        if not isinstance(orders, list):
+            raise ValueError("Bulk body must be a JSON array")
+        return [(order, None) for order in orders]
+
+    results: list[tuple[Any, str | None]] = []
+    for line in body.splitlines():
+        if not line.strip():
+            continue
+        try:
+            results.append((json.loads(line), line))
+        except json.JSONDecodeError as e:
+            results.append((e, None))
+    return results
+
+
+def _json_response(status_code: int, body: dict[str, Any]) -> dict[str, Any]:
+    """Build an API Gateway proxy response with a JSON body."""
+    return {
+        "statusCode": status_code,
+        "headers": {"Content-Type": "application/json"},
+        "body": json.dumps(body),
+    }
+
+
+def handle_bulk(body: Any, request_id: str, deadline: float | None = None) -> dict[str, Any]:
+    """
+    Publish a bulk submission of orders, packing them into as few PutEvents calls as possible.
+
+    Every order gets a result in the response: "accepted" with the EventBridge
+    event ID, or "rejected" with the reason. Returns 202 when all orders were
+    accepted and 207 when at least one was rejected.
+
+    Args:
+        body: Request body (JSON array or NDJSON string, or an already-parsed list)
+        request_id: Lambda request ID for tracing
+        deadline: time.monotonic() deadline for PutEvents retries
+
+    Returns:
+        API Gateway response with per-order results
+    """
+    if isinstance(body, list):
+        orders: list[tuple[Any, str | None]] = [(order, None) for order in body]
+    else:
+        try:
+            orders = parse_bulk_body(body)
+        except ValueError as e:
+            log_structured(
+                "error", "Invalid bulk request body", request_id=request_id, error=str(e)
+            )
+            return _json_response(400, {"message": "Bulk body must be a JSON array or NDJSON"})
 
-    # Parse JSON body
+    if not orders:
+        log_structured("error", "Empty bulk request", request_id=request_id)
+        return _json_response(400, {"message": "Bulk request contains no orders"})
+
+    results: list[dict[str, Any]] = [{"index": i} for i in range(len(orders))]
+    entries: list[tuple[int, dict[str, Any]]] = []
+    for index, (order, raw_detail) in enumerate(orders):
+        if isinstance(order, json.JSONDecodeError):
+            results[index].update(status="rejected", error="Invalid JSON")
+        elif not isinstance(order, dict):
+            results[index].update(status="rejected", error="Order must be a JSON object")
+        elif (error := validate_order(order)) is not None:
+            results[index].update(status="rejected", error=f"Invalid order: {error}")
+        else:
+            try:
+                entry = build_publishable_entry(order, raw_detail, request_id)
+            except Exception as e:
+                log_structured(
+                    "error",
+                    "Error storing claim-checked order",
+                    request_id=request_id,
+                    index=index,
+                    error=str(e),
+                )
+                results[index].update(status="rejected", error="Claim check failed")
+                continue
+            if entry is None:
+                results[index].update(status="rejected", error="Order exceeds 256 KB")
+            else:
+                entries.append((index, entry))
+
+    log_structured(
+        "info",
+        "Processing bulk orders",
+        request_id=request_id,
+        order_count=len(orders),
+        publishable_count=len(entries),
+    )
+
+    publish_result = publish_entries(
+        get_eventbridge_client(), [entry for _, entry in entries], deadline=deadline
+    )
+    for (index, _), entry_result in zip(entries, publish_result.results, strict=True):
+        if entry_result.get("ErrorCode"):
+            results[index].update(status="rejected", error=entry_result["ErrorCode"])
+        else:
+            results[index].update(status="accepted", eventId=entry_result.get("EventId"))
+
+    accepted = sum(1 for result in results if result["status"] == "accepted")
+    rejected = len(results) - accepted
+
+    log_structured(
+        "info",
+        "Bulk orders processed",
+        request_id=request_id,
+        accepted_count=accepted,
+        rejected_count=rejected,
+        put_events_requests=publish_result.requests,
+        put_events_retries=publish_result.retries,
+    )
+    return _json_response(
+        202 if rejected == 0 else 207,
+        {
+            "message": "Bulk orders received and processing",
+            "accepted": accepted,
+            "rejected": rejected,
+            "results": results,
+        },
+    )
+
+
+def is_bulk_request(event: dict[str, Any]) -> bool:
+    """Return True if the API Gateway event targets the bulk endpoint."""
+    route = event.get("resource") or event.get("path") or ""
+    return bool(route.rstrip("/").endswith("/bulk"))
+
+
+def handle_order(body: Any, request_id: str, deadline: float | None = None) -> dict[str, Any]:
+    """
+    Publish a single order.
+
+    Returns 400 if the body contains invalid JSON or the order does not match
+    the order.received.v1 schema (see shared.order_schema), 413 if the order
+    is too large to publish and no claim-check bucket is set, and 202 once
+    the order is on the event bus.
+
+    Args:
+        body: Request body (JSON string, or an already-parsed payload)
+        request_id: Lambda request ID for tracing
+        deadline: time.monotonic() deadline for PutEvents retries
+
+    Returns:
+        API Gateway response with status code and body
+    """
+    # Parse the JSON body once to validate it; the original text is then
+    # forwarded as the Detail so the payload is never re-serialized
+    raw_detail: str | None = None
     if isinstance(body, str):
         try:
             payload = json.loads(body)
@@ -72,29 +299,42 @@ def handler(event: dict[str, Any], context: Any) -> dict[str, Any]:
                 "headers": {"Content-Type": "application/json"},
                 "body": json.dumps({"message": "Invalid JSON in request body"}),
             }
+        raw_detail = body
     else:
         payload = body
 
-    log_structured("info", "Processing order", request_id=request_id, order_data=payload)
+    error = validate_order(payload)
+    if error is not None:
+        log_structured("error", "Invalid order", request_id=request_id, error=error)
+        return _json_response(400, {"message": f"Invalid order: {error}"})
 
-    # Publish event to EventBridge
+    order_id = payload.get("orderId", "unknown")
+    log_structured(
+        "info",
+        "Processing order",
+        request_id=request_id,
+        order_id=order_id,
+        order_bytes=len(raw_detail) if raw_detail is not None else None,
+    )
+
+    # Publish event to EventBridge, retrying throttled or failed entries
     try:
+        entry = build_publishable_entry(payload, raw_detail, request_id)
+        if entry is None:
+            log_structured("error", "Order exceeds 256 KB", request_id=request_id)
+            return _json_response(413, {"message": "Order exceeds 256 KB"})
         eventbridge = get_eventbridge_client()
-        response = eventbridge.put_events(
-            Entries=[
-                {
-                    "Source": "public.api",
-                    "DetailType": "order.received.v1",
-                    "Detail": json.dumps(payload),
-                    "EventBusName": EVENT_BUS_NAME,
-                }
-            ]
-        )
+        publish_result = publish_entries(eventbridge, [entry], deadline=deadline)
+        if publish_result.failed_count:
+            raise RuntimeError(
+                f"PutEvents entry failed: {publish_result.results[0].get('ErrorCode')}"
+            )
         log_structured(
             "info",
             "Published event to EventBridge",
             request_id=request_id,
-            eventbridge_response=response,
+            event_id=publish_result.results[0].get("EventId"),
+            retries=publish_result.retries,
         )
     except Exception as e:
         log_structured(
@@ -117,3 +357,74 @@ def handler(event: dict[str, Any], context: Any) -> dict[str, Any]:
         "headers": {"Content-Type": "application/json"},
         "body": json.dumps({"message": "Order received and processing"}),
     }
+
+
+@buffered_logs
+def handler(event: dict[str, Any], context: Any) -> dict[str, Any]:
+    """
+    Receives order from API Gateway, logs it, and publishes to EventBridge.
+
+    Accepts any JSON object matching the order.received.v1 schema and passes
+    it through to EventBridge. Returns 400 if request body is missing, contains
+    invalid JSON or fails validation, and 413 if the order is too large to
+    publish and no claim-check bucket is set.
+    Requests to POST /orders/bulk are handled by handle_bulk.
+
+    Retries are deduplicated through IDEMPOTENCY_CACHE, keyed by the
+    Idempotency-Key header or a hash of the body: a request whose original
+    was accepted (202) gets the original response back, with an
+    Idempotent-Replayed header, and nothing is published again. An
+    Idempotency-Key reused with a different body gets 422 and is neither
+    replayed nor published.
+
+    Args:
+        event: API Gateway event containing the order payload
+        context: Lambda context object
+
+    Returns:
+        API Gateway response with status code and body
+    """
+    request_id = context.request_id if hasattr(context, "request_id") else "unknown"
+
+    # Log the incoming payload
+    log_sampled("info", "Received order", request_id=request_id, event=event)
+
+    # Extract the body from API Gateway event
+    body = event.get("body")
+
+    # Return 400 if no request body provided
+    if not body:
+        log_structured("error", "Missing request body", request_id=request_id)
+        return {
+            "statusCode": 400,
+            "headers": {"Content-Type": "application/json"},
+            "body": json.dumps({"message": "Request body is required"}),
+        }
+
+    bulk = is_bulk_request(event)
+    key = idempotency_key(event, "bulk" if bulk else "order") if IDEMPOTENCY_CACHE.enabled else None
+    body_hash = request_hash(event) if key is not None else None
+    if key is not None:
+        try:
+            cached = IDEMPOTENCY_CACHE.get(key, body_hash)
+        except IdempotencyKeyReusedError as e:
+            log_structured("warning", "Idempotency key reused", request_id=request_id, error=str(e))
+            return {
+                "statusCode": 422,
+                "headers": {"Content-Type": "application/json"},
+                "body": json.dumps(
+                    {"message": "Idempotency-Key was already used with a different request body"}
+                ),
+            }
+        if cached is not None:
+            log_structured("info", "Replaying response to duplicate request", request_id=request_id)
+            return replayed(cached)
+
+    deadline = deadline_from_context(context)
+    if bulk:
+        response = handle_bulk(body, request_id, deadline)
+    else:
+        response = handle_order(body, request_id, deadline)
+    if key is not None and response["statusCode"] == 202:
+        IDEMPOTENCY_CACHE.put(key, response, body_hash)
+    return response
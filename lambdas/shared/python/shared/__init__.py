@@ -0,0 +1 @@
+"""Shared code for the order processing Lambdas, deployed as a Lambda layer."""
@@ -0,0 +1,166 @@
+"""Size-aware request batching with partial-failure retries for AWS batch APIs."""
+
+import random
+import time
+from collections.abc import Callable, Iterator
+from dataclasses import dataclass, field
+from typing import Any
+
+# Time kept back from the Lambda deadline so the handler can still respond
+DEADLINE_RESERVE_MS = 1000
+
+
+@dataclass
+class BatchResult:
+    """
+    Outcome of sending a list of items through a batch API.
+
+    Attributes:
+        results: One result per input item, in input order (the service's
+            per-entry result; failures carry an "ErrorCode")
+        retries: Number of item-level retries performed
+        requests: Number of batch API calls made
+        failed_indexes: Input indexes of the items that could not be sent
+    """
+
+    results: list[dict[str, Any]]
+    retries: int = 0
+    requests: int = 0
+    failed_indexes: list[int] = field(default_factory=list)
+
+    @property
+    def failed_count(self) -> int:
+        """Number of items that could not be sent."""
+        return len(self.failed_indexes)
+
+
+def chunk_by_size(
+    items: list[tuple[int, Any]],
+    size_of: Callable[[Any], int],
+    max_entries: int,
+    max_bytes: int,
+) -> Iterator[list[tuple[int, Any]]]:
+    """
+    Pack indexed items into requests that respect a batch API's limits.
+
+    Items are kept in order; a new request is started whenever adding the
+    next item would exceed max_entries or max_bytes.
+
+    Args:
+        items: (index, item) pairs, each item no larger than max_bytes
+        size_of: Function returning an item's size as the service counts it
+        max_entries: Maximum items per request
+        max_bytes: Maximum total item size per request
+
+    Yields:
+        Lists of (index, item) pairs, one list per request
+    """
+    chunk: list[tuple[int, Any]] = []
+    chunk_bytes = 0
+    for index, item in items:
+        size = size_of(item)
+        if chunk and (len(chunk) >= max_entries or chunk_bytes + size > max_bytes):
+            yield chunk
+            chunk, chunk_bytes = [], 0
+        chunk.append((index, item))
+        chunk_bytes += size
+    if chunk:
+        yield chunk
+
+
+def deadline_from_context(context: Any, reserve_ms: int = DEADLINE_RESERVE_MS) -> float | None:
+    """
+    Derive a time.monotonic() deadline from the Lambda context.
+
+    Args:
+        context: Lambda context object
+        reserve_ms: Milliseconds to keep back for the rest of the handler
+
+    Returns:
+        Monotonic deadline in seconds, or None if the context has no remaining time
+    """
+    get_remaining = getattr(context, "get_remaining_time_in_millis", None)
+    remaining = get_remaining() if callable(get_remaining) else None
+    if not isinstance(remaining, int | float):
+        return None
+    return time.monotonic() + max(remaining - reserve_ms, 0) / 1000
+
+
+def error_code(error: Exception) -> str:
+    """Extract the AWS error code from a botocore ClientError, or the exception type name."""
+    response = getattr(error, "response", None)
+    if isinstance(response, dict):
+        code = response.get("Error", {}).get("Code")
+        if code:
+            return str(code)
+    return type(error).__name__
+
+
+def send_with_retries(
+    items: list[Any],
+    chunker: Callable[[list[tuple[int, Any]]], Iterator[list[tuple[int, Any]]]],
+    send_chunk: Callable[[list[tuple[int, Any]]], list[tuple[int, dict[str, Any], bool]]],
+    retryable_codes: set[str],
+    *,
+    deadline: float | None = None,
+    max_attempts: int = 5,
+    base_delay: float = 0.05,
+    max_delay: float = 2.0,
+    sleep: Callable[[float], None] = time.sleep,
+) -> BatchResult:
+    """
+    Send items in batches, retrying only the items that failed.
+
+    After each round, items whose per-entry result was marked retryable (or
+    whose whole request failed with a code in retryable_codes) are re-sent
+    after an exponential backoff with full jitter. Retrying stops after
+    max_attempts rounds, or earlier if the next backoff would run past the
+    deadline.
+
+    Args:
+        items: Items to send
+        chunker: Packs (index, item) pairs into per-request chunks
+        send_chunk: Sends one chunk and returns (index, result, retryable) per item;
+            items missing from its return value are treated as sent
+        retryable_codes: Error codes of whole-request failures worth retrying
+        deadline: time.monotonic() value after which no more retries are attempted
+        max_attempts: Maximum number of send rounds per item
+        base_delay: Backoff base in seconds
+        max_delay: Backoff cap in seconds
+        sleep: Sleep function (injectable for tests)
+
+    Returns:
+        BatchResult with per-item results aligned with the input items
+    """
+    result = BatchResult(results=[{} for _ in items])
+    pending = list(range(len(items)))
+
+    for attempt in range(max_attempts):
+        retryable: list[int] = []
+        for chunk in chunker([(i, items[i]) for i in pending]):
+            result.requests += 1
+            try:
+                outcomes = send_chunk(chunk)
+            except Exception as e:
+                code = error_code(e)
+                outcomes = [
+                    (index, {"ErrorCode": code, "ErrorMessage": str(e)}, code in retryable_codes)
+                    for index, _ in chunk
+                ]
+            for index, item_result, should_retry in outcomes:
+                result.results[index] = item_result
+                if should_retry:
+                    retryable.append(index)
+
+        pending = retryable
+        if not pending or attempt == max_attempts - 1:
+            break
+
+        delay = random.uniform(0, min(max_delay, base_delay * 2**attempt))
+        if deadline is not None and time.monotonic() + delay >= deadline:
+            break
+        sleep(delay)
+        result.retries += len(pending)
+
+    result.failed_indexes = [i for i, r in enumerate(result.results) if r.get("ErrorCode")]
+    return result
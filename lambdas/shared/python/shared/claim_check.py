@@ -0,0 +1,123 @@
+"""Claim check for order payloads too large to travel on the event bus."""
+
+import json
+import os
+import uuid
+from typing import Any
+
+# Payloads whose PutEvents entry is larger than this are stored in S3 and the
+# event carries a pointer instead; below the 256 KB PutEvents limit so the
+# summary and envelope always fit
+CLAIM_CHECK_THRESHOLD_BYTES = int(os.environ.get("CLAIM_CHECK_THRESHOLD_BYTES", str(192 * 1024)))
+
+# Top-level scalar fields are copied into the summary (strings up to this many
+# characters), so rules matching orderId, purpose, price, priority, region, ...
+# still route a claim-checked order. Lists and objects are left out.
+SUMMARY_STRING_MAX_CHARS = 256
+
+# The summary keeps at most this many fields and this many bytes of encoded
+# fields, in payload order, so a payload with thousands of small top-level
+# fields still yields a Detail far below the 256 KB PutEvents limit
+SUMMARY_MAX_FIELDS = 64
+SUMMARY_MAX_BYTES = 16 * 1024
+
+# Fields the stack's rules match order events on (see the event patterns in
+# infrastructure/order_processing_stack.py). They are copied into the summary
+# first and do not count against the caps, so a payload with many other
+# fields before them is still routed
+ROUTING_FIELDS = ("orderId", "purpose", "price", "priority", "region")
+
+_SCALAR_TYPES = (str, int, float, bool, type(None))
+
+# Key of the pointer in a claim-checked Detail
+CLAIM_CHECK_FIELD = "claimCheck"
+
+
+def summarize(payload: Any) -> dict[str, Any]:
+    """
+    Build the compact summary carried in place of a claim-checked payload.
+
+    Args:
+        payload: Parsed order payload
+
+    Returns:
+        The payload's ROUTING_FIELDS, then its other top-level scalar fields
+        up to SUMMARY_MAX_FIELDS fields and SUMMARY_MAX_BYTES, plus itemCount
+        when it has an items list
+    """
+    if not isinstance(payload, dict):
+        return {}
+
+    def summarizable(key: str, value: Any) -> bool:
+        if not isinstance(value, _SCALAR_TYPES) or len(key) > SUMMARY_STRING_MAX_CHARS:
+            return False
+        return not (isinstance(value, str) and len(value) > SUMMARY_STRING_MAX_CHARS)
+
+    summary = {
+        key: payload[key]
+        for key in ROUTING_FIELDS
+        if key in payload and summarizable(key, payload[key])
+    }
+    fields = 0
+    budget = SUMMARY_MAX_BYTES
+    for key, value in payload.items():
+        if fields >= SUMMARY_MAX_FIELDS:
+            break
+        if key in summary or not summarizable(key, value):
+            continue
+        # "key": value, as it will be encoded in the Detail
+        size = len(json.dumps(key)) + len(json.dumps(value)) + 4
+        if size > budget:
+            continue
+        summary[key] = value
+        fields += 1
+        budget -= size
+    if isinstance(payload.get("items"), list):
+        summary["itemCount"] = len(payload["items"])
+    return summary
+
+
+def check_in(s3_client: Any, bucket: str, payload: Any, raw: str | None = None) -> dict[str, Any]:
+    """
+    Store a payload in S3 and return the Detail that points to it.
+
+    Args:
+        s3_client: boto3/botocore S3 client
+        bucket: Claim-check bucket
+        payload: Parsed order payload
+        raw: Original JSON text of the payload; stored as-is when given
+
+    Returns:
+        The summary (see summarize) with a claimCheck pointer:
+        {"bucket", "key", "size"}
+    """
+    body = (raw if raw is not None else json.dumps(payload)).encode()
+    key = f"orders/{uuid.uuid4()}.json"
+    s3_client.put_object(Bucket=bucket, Key=key, Body=body, ContentType="application/json")
+    return {
+        **summarize(payload),
+        CLAIM_CHECK_FIELD: {"bucket": bucket, "key": key, "size": len(body)},
+    }
+
+
+def is_claim_check(detail: Any) -> bool:
+    """Return True if an event Detail is a claim check rather than the full payload."""
+    return isinstance(detail, dict) and isinstance(detail.get(CLAIM_CHECK_FIELD), dict)
+
+
+def check_out(s3_client: Any, detail: Any) -> Any:
+    """
+    Return the full payload for an event Detail, fetching it from S3 if claim-checked.
+
+    Args:
+        s3_client: boto3/botocore S3 client (not used for ordinary Details)
+        detail: Event Detail
+
+    Returns:
+        The Detail itself, or the stored payload it points to
+    """
+    if not is_claim_check(detail):
+        return detail
+    pointer = detail[CLAIM_CHECK_FIELD]
+    response = s3_client.get_object(Bucket=pointer["bucket"], Key=pointer["key"])
+    return json.loads(response["Body"].read())
@@ -0,0 +1,139 @@
+"""AWS clients with a tuned configuration profile, created without importing boto3."""
+
+import os
+import threading
+import time
+from typing import Any
+
+from shared.metrics import emit_metrics
+from shared.structured_log import log_structured
+
+# Client configuration profile, overridable per function through the environment.
+# Timeouts are far below botocore's 60 s defaults so a stalled connection is
+# retried well within the Lambda timeout instead of consuming it.
+CLIENT_CONNECT_TIMEOUT = float(os.environ.get("AWS_CLIENT_CONNECT_TIMEOUT", "2"))
+CLIENT_READ_TIMEOUT = float(os.environ.get("AWS_CLIENT_READ_TIMEOUT", "5"))
+CLIENT_MAX_ATTEMPTS = int(os.environ.get("AWS_CLIENT_MAX_ATTEMPTS", "3"))
+CLIENT_RETRY_MODE = os.environ.get("AWS_CLIENT_RETRY_MODE", "adaptive")
+CLIENT_MAX_POOL_CONNECTIONS = int(os.environ.get("AWS_CLIENT_MAX_POOL_CONNECTIONS", "10"))
+
+# S3 requests go to per-bucket virtual hosts, not the client's endpoint, so
+# opening a connection to the endpoint up front would not be reused
+_NO_CONNECTION_PREWARM = {"s3"}
+
+# botocore session shared by every client in the process; importing botocore
+# is most of a cold start, so it is deferred until the first client is needed
+_session: Any = None
+# botocore sessions are not thread-safe; clients may be created from worker threads
+_session_lock = threading.Lock()
+
+
+def client_config() -> Any:
+    """Build the botocore Config for the client configuration profile."""
+    from botocore.config import Config
+
+    return Config(
+        connect_timeout=CLIENT_CONNECT_TIMEOUT,
+        read_timeout=CLIENT_READ_TIMEOUT,
+        retries={"mode": CLIENT_RETRY_MODE, "max_attempts": CLIENT_MAX_ATTEMPTS},
+        max_pool_connections=CLIENT_MAX_POOL_CONNECTIONS,
+        tcp_keepalive=True,
+    )
+
+
+def create_client(service_name: str, **kwargs: Any) -> Any:
+    """
+    Create a botocore client for an AWS service.
+
+    The first call imports botocore.session and creates the process-wide
+    session; later calls reuse it, so the service models, endpoint data and
+    credentials are loaded once. Region and credentials come from the usual
+    environment (AWS_REGION / AWS_DEFAULT_REGION and the Lambda role).
+
+    Args:
+        service_name: Service name as used by boto3 (e.g. "events", "sqs", "s3")
+        **kwargs: Further arguments for botocore's create_client (e.g. endpoint_url)
+
+    Returns:
+        botocore client for the service, using the client configuration profile
+    """
+    global _session
+    with _session_lock:
+        if _session is None:
+            from botocore.session import get_session
+
+            _session = get_session()
+        return _session.create_client(service_name, config=client_config(), **kwargs)
+
+
+def open_connection(client: Any) -> bool:
+    """
+    Open a keep-alive connection from the client's pool to its endpoint.
+
+    Sends an unsigned HEAD request to the endpoint through the client's own
+    HTTP session, so the TCP and TLS handshakes are done and the connection
+    is back in the pool for the first real request. The response status is
+    irrelevant. botocore has no public handle on a client's connection pool
+    (a real API call would need IAM permissions and a signed request just to
+    connect), so the session is looked up on the client's endpoint; a botocore
+    version that no longer has it is reported rather than raised.
+
+    Returns:
+        True if the connection was opened, False if the client's HTTP session
+        could not be found
+    """
+    from botocore.awsrequest import AWSRequest
+
+    http_session = getattr(getattr(client, "_endpoint", None), "http_session", None)
+    if http_session is None:
+        return False
+    request = AWSRequest(method="HEAD", url=client.meta.endpoint_url).prepare()
+    response = http_session.send(request)
+    # Reading the (empty) body returns the connection to the pool
+    _ = response.content
+    return True
+
+
+def prewarm_client(service_name: str) -> Any:
+    """
+    Create a client during init when AWS_CLIENT_PREWARM is enabled.
+
+    Creating the client and its first connection during the INIT phase takes
+    that work off the first invocation. The time spent is emitted as the
+    ClientCreateTime and ConnectionSetupTime metrics (milliseconds), with the
+    service as a dimension. A connection that cannot be opened, or a client
+    whose connection pool cannot be reached, is logged and left to the first
+    request.
+
+    Args:
+        service_name: Service name as used by boto3 (e.g. "events", "sqs", "s3")
+
+    Returns:
+        The client, or None when pre-warming is disabled
+    """
+    if os.environ.get("AWS_CLIENT_PREWARM", "false").lower() != "true":
+        return None
+
+    start = time.perf_counter()
+    client = create_client(service_name)
+    created = time.perf_counter()
+    metrics = {"ClientCreateTime": (created - start) * 1000}
+    if service_name not in _NO_CONNECTION_PREWARM:
+        try:
+            if open_connection(client):
+                metrics["ConnectionSetupTime"] = (time.perf_counter() - created) * 1000
+            else:
+                log_structured(
+                    "info",
+                    "Skipped pre-opening client connection: no HTTP session on the client",
+                    service=service_name,
+                )
+        except Exception as e:
+            log_structured(
+                "warning",
+                "Failed to pre-open client connection",
+                service=service_name,
+                error=str(e),
+            )
+    emit_metrics(metrics, unit="Milliseconds", Service=service_name)
+    return client
@@ -0,0 +1,197 @@
+"""Bounded-concurrency calls with per-call timeouts and backoff on throttling."""
+
+import heapq
+import random
+import threading
+import time
+from collections import deque
+from collections.abc import Callable, Sequence
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from dataclasses import dataclass, field
+from typing import Any
+
+from shared.batching import error_code
+
+# Error codes that mean "slow down": the call is retried after a backoff.
+# A HEAD request has no error body, so S3 throttling surfaces as the bare status.
+THROTTLING_ERROR_CODES = {
+    "SlowDown",
+    "503",
+    "Throttling",
+    "ThrottlingException",
+    "ThrottledException",
+    "RequestThrottled",
+    "RequestLimitExceeded",
+    "TooManyRequestsException",
+    "ServiceUnavailable",
+}
+
+
+class CallTimeoutError(TimeoutError):
+    """A call did not return within the per-call timeout."""
+
+
+@dataclass
+class FetchResult:
+    """
+    Outcome of fetch_all.
+
+    Attributes:
+        values: One value per input item, in input order (None where the call failed)
+        errors: The error of each failed item (None where the call succeeded)
+        retries: Calls repeated after throttling or a timeout
+        timeouts: Calls abandoned after the per-call timeout
+    """
+
+    values: list[Any]
+    errors: list[Exception | None]
+    retries: int = 0
+    timeouts: int = 0
+
+    @property
+    def failed_indexes(self) -> list[int]:
+        """Input indexes of the items whose call failed."""
+        return [index for index, error in enumerate(self.errors) if error is not None]
+
+
+@dataclass(order=True)
+class _Retry:
+    ready_at: float
+    index: int = field(compare=False)
+    attempt: int = field(compare=False)
+
+
+def fetch_all(
+    fn: Callable[[Any], Any],
+    items: Sequence[Any],
+    *,
+    max_workers: int = 8,
+    timeout: float | None = None,
+    max_attempts: int = 3,
+    base_delay: float = 0.05,
+    max_delay: float = 2.0,
+    retryable_codes: set[str] = THROTTLING_ERROR_CODES,
+    deadline: float | None = None,
+    clock: Callable[[], float] = time.monotonic,
+) -> FetchResult:
+    """
+    Call fn on every item, at most max_workers calls at a time.
+
+    Results are the same as [fn(item) for item in items] would give, in the
+    same order; only the calls overlap. A call that fails with a code in
+    retryable_codes (see shared.batching.error_code) is retried after an
+    exponential backoff with full jitter, without holding a worker while it
+    waits. A call still running timeout seconds after it started is
+    abandoned: it is recorded as a CallTimeoutError (and retried like a
+    throttled call) while its thread finishes in the background, still
+    counting against max_workers until it does. Retries stop after
+    max_attempts calls per item, or earlier if the backoff would run past
+    the deadline. Items still waiting for a worker held by abandoned calls
+    at the deadline fail with CallTimeoutError.
+
+    Args:
+        fn: Function to call, e.g. a HEAD request; must be thread-safe
+        items: Arguments, one call each
+        max_workers: Maximum calls in flight (including abandoned ones)
+        timeout: Seconds a call may run before it is abandoned; None waits forever
+        max_attempts: Maximum calls per item
+        base_delay: Backoff base in seconds
+        max_delay: Backoff cap in seconds
+        retryable_codes: Error codes worth retrying
+        deadline: time.monotonic() value after which no more retries are attempted
+        clock: Monotonic time source
+
+    Returns:
+        FetchResult with values and errors aligned with the input items
+    """
+    result = FetchResult(values=[None] * len(items), errors=[None] * len(items))
+    if not items:
+        return result
+
+    ready: deque[tuple[int, int]] = deque((index, 1) for index in range(len(items)))
+    delayed: list[_Retry] = []
+    running: dict[Future[Any], tuple[int, int, list[float]]] = {}
+    abandoned: set[Future[Any]] = set()
+    lock = threading.Lock()
+
+    def call(index: int, started: list[float]) -> Any:
+        with lock:
+            started.append(clock())
+        return fn(items[index])
+
+    def retry_or_fail(index: int, attempt: int, error: Exception) -> None:
+        retryable = isinstance(error, CallTimeoutError) or error_code(error) in retryable_codes
+        if retryable and attempt < max_attempts:
+            delay = random.uniform(0, min(max_delay, base_delay * 2 ** (attempt - 1)))
+            ready_at = clock() + delay
+            if deadline is None or ready_at < deadline:
+                heapq.heappush(delayed, _Retry(ready_at, index, attempt + 1))
+                result.retries += 1
+                return
+        result.errors[index] = error
+
+    # Sized for max_workers rather than the items, so an abandoned call never
+    # holds up the next one; threads are only started as calls are submitted
+    executor = ThreadPoolExecutor(max_workers=max_workers)
+    try:
+        while ready or delayed or running:
+            now = clock()
+            while delayed and delayed[0].ready_at <= now:
+                retry = heapq.heappop(delayed)
+                ready.append((retry.index, retry.attempt))
+            abandoned = {future for future in abandoned if not future.done()}
+            while ready and len(running) + len(abandoned) < max_workers:
+                index, attempt = ready.popleft()
+                started: list[float] = []
+                running[executor.submit(call, index, started)] = (index, attempt, started)
+
+            if ready and not running and deadline is not None and now >= deadline:
+                # Every worker is held by an abandoned call and time is up
+                while ready:
+                    index, _ = ready.popleft()
+                    result.errors[index] = CallTimeoutError("No worker free before the deadline")
+                continue
+
+            # Block until a call completes (abandoned ones free a worker), the
+            # next call times out, a retry is due or the deadline passes
+            wake_at = [retry.ready_at for retry in delayed[:1]]
+            if timeout is not None:
+                with lock:
+                    wake_at.extend(s[0] + timeout for _, _, s in running.values() if s)
+            if ready and deadline is not None:
+                wake_at.append(deadline)
+            wait_for = max(min(wake_at) - now, 0) if wake_at else None
+            waiting = running.keys() | abandoned if ready else running.keys()
+            if waiting:
+                done, _ = wait(waiting, timeout=wait_for, return_when=FIRST_COMPLETED)
+            else:
+                # Only backoffs pending: the next retry is due in wait_for seconds
+                time.sleep(wait_for or 0)
+                done = set()
+
+            for future in done & running.keys():
+                index, attempt, _ = running.pop(future)
+                error = future.exception()
+                if error is None:
+                    result.values[index] = future.result()
+                else:
+                    retry_or_fail(index, attempt, error)  # type: ignore[arg-type]
+            if timeout is not None:
+                now = clock()
+                with lock:
+                    expired = [
+                        future
+                        for future, (_, _, started) in running.items()
+                        if started and now - started[0] >= timeout
+                    ]
+                for future in expired:
+                    index, attempt, _ = running.pop(future)
+                    abandoned.add(future)
+                    result.timeouts += 1
+                    retry_or_fail(
+                        index, attempt, CallTimeoutError(f"Call timed out after {timeout}s")
+                    )
+    finally:
+        # Abandoned calls finish on their own; do not wait for them
+        executor.shutdown(wait=False, cancel_futures=True)
+    return result
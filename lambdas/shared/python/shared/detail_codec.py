@@ -0,0 +1,69 @@
+"""Compressed encoding of order payloads inside the event Detail."""
+
+import base64
+import json
+import os
+import zlib
+from typing import Any
+
+from shared.claim_check import summarize
+
+# zlib level: 1 gets most of the size reduction of level 6 at a fraction of the CPU
+DETAIL_COMPRESSION_LEVEL = int(os.environ.get("DETAIL_COMPRESSION_LEVEL", "1"))
+
+# Key of the compressed payload in an encoded Detail
+COMPRESSED_FIELD = "compressed"
+ENCODING = "zlib+base64"
+
+
+def encode_detail(payload: Any, raw: str | None = None) -> dict[str, Any]:
+    """
+    Encode a payload as a compressed Detail.
+
+    The payload's top-level scalar fields (see shared.claim_check.summarize)
+    stay in plain form next to the compressed payload, so rules matching on
+    purpose, price, priority or region still route the event.
+
+    Args:
+        payload: Parsed order payload
+        raw: Original JSON text of the payload; compressed as-is when given
+
+    Returns:
+        {<plain fields>, "compressed": {"encoding": "zlib+base64", "data": ...}}
+    """
+    text = raw if raw is not None else json.dumps(payload)
+    data = zlib.compress(text.encode(), DETAIL_COMPRESSION_LEVEL)
+    return {
+        **summarize(payload),
+        COMPRESSED_FIELD: {"encoding": ENCODING, "data": base64.b64encode(data).decode("ascii")},
+    }
+
+
+def is_compressed(detail: Any) -> bool:
+    """Return True if an event Detail carries a compressed payload."""
+    return isinstance(detail, dict) and isinstance(detail.get(COMPRESSED_FIELD), dict)
+
+
+def decode_detail(detail: Any) -> Any:
+    """
+    Return the full payload of an event Detail, decompressing it if encoded.
+
+    Args:
+        detail: Event Detail
+
+    Returns:
+        The Detail itself, or the payload it carries in compressed form
+
+    Raises:
+        ValueError: If the encoding is unknown or the payload cannot be decoded
+    """
+    if not is_compressed(detail):
+        return detail
+    compressed = detail[COMPRESSED_FIELD]
+    if compressed.get("encoding") != ENCODING:
+        raise ValueError(f"Unsupported Detail encoding: {compressed.get('encoding')!r}")
+    try:
+        text = zlib.decompress(base64.b64decode(compressed["data"]))
+    except (KeyError, TypeError, ValueError, zlib.error) as e:
+        raise ValueError(f"Invalid compressed Detail: {e}") from e
+    return json.loads(text)
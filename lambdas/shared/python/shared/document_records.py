@@ -0,0 +1,518 @@
+"""Streaming extraction of normalized records from CSV, JSON and XML documents."""
+
+import codecs
+import csv
+import functools
+import itertools
+import json
+import math
+import re
+from collections.abc import Iterable, Iterator
+from dataclasses import dataclass, field
+from typing import Any
+from xml.etree.ElementTree import ParseError, XMLPullParser
+
+# Document types records are extracted from
+RECORD_FORMATS = {"CSV", "JSON", "XML"}
+
+# A line, JSON value or XML record longer than this is rejected instead of
+# buffering the rest of the document looking for its end
+MAX_RECORD_BYTES = 64 * 1024
+
+# Order IDs listed in the summary
+MAX_LISTED = 100
+
+# Canonical field -> source field names it is read from, compared in lower
+# case without punctuation ("Qty", "quantity_ordered", "PO Number", ...)
+FIELD_ALIASES = {
+    "orderId": ("orderid", "order", "ordernumber", "po", "ponumber", "purchaseorder"),
+    "lineNumber": ("line", "linenumber", "lineno"),
+    "sku": ("sku", "item", "itemid", "itemnumber", "productid", "partnumber"),
+    "description": ("description", "desc", "itemdescription"),
+    "quantity": ("quantity", "qty", "quantityordered", "quantityshipped", "shippedquantity"),
+    "unit": ("unit", "uom", "unitofmeasure"),
+    "price": ("price", "unitprice"),
+    "trackingNumber": ("trackingnumber", "tracking", "trackingid"),
+    "carrier": ("carrier", "scac"),
+    "shipDate": ("shipdate", "shippeddate"),
+}
+
+# A record with one of these is an order line or shipment row; without them
+# its fields (e.g. an orderId in a header) apply to the records that follow
+LINE_FIELDS = ("sku", "trackingNumber")
+
+_CSV_DELIMITERS = (",", ";", "\t", "|")
+_NUMERIC_FIELDS: dict[str, type] = {"quantity": int, "lineNumber": int, "price": float}
+_ALIASES = {alias: name for name, aliases in FIELD_ALIASES.items() for alias in aliases}
+_PUNCTUATION = re.compile(r"[^a-z0-9]")
+_WHITESPACE = re.compile(r"[ \t\r\n]*")
+_DECODER = json.JSONDecoder()
+
+
+def iter_text(chunks: Iterable[bytes]) -> Iterator[str]:
+    """Decode UTF-8 chunks (with or without a BOM), including characters split across chunks."""
+    decoder = codecs.getincrementaldecoder("utf-8-sig")(errors="replace")
+    for chunk in chunks:
+        text = decoder.decode(chunk)
+        if text:
+            yield text
+    text = decoder.decode(b"", final=True)
+    if text:
+        yield text
+
+
+def iter_lines(chunks: Iterable[bytes]) -> Iterator[str]:
+    """
+    Split UTF-8 chunks into lines, keeping their line endings.
+
+    Raises:
+        ValueError: If a line exceeds MAX_RECORD_BYTES
+    """
+    pending = ""
+    for text in iter_text(chunks):
+        lines = (pending + text).split("\n")
+        pending = lines.pop()
+        if len(pending) > MAX_RECORD_BYTES:
+            raise ValueError(f"Line exceeds {MAX_RECORD_BYTES} bytes")
+        for line in lines:
+            yield line + "\n"
+    if pending:
+        yield pending
+
+
+def iter_csv_rows(chunks: Iterable[bytes]) -> Iterator[dict[str, str]]:
+    """
+    Read delimited text row by row.
+
+    The first line is the header; the delimiter is whichever of , ; tab and |
+    it contains most often.
+
+    Args:
+        chunks: The document in chunks of any size
+
+    Yields:
+        Each non-empty row as {header: value}
+
+    Raises:
+        ValueError: If the text is not valid delimited text
+    """
+    lines = iter_lines(chunks)
+    header = next(lines, None)
+    if header is None:
+        return
+    delimiter = max(_CSV_DELIMITERS, key=header.count)
+    reader = csv.reader(itertools.chain([header], lines), delimiter=delimiter)
+    try:
+        names = [name.strip() for name in next(reader)]
+        for row in reader:
+            if any(row):
+                yield dict(zip(names, row, strict=False))
+    except csv.Error as e:
+        raise ValueError(f"Invalid CSV at line {reader.line_num}: {e}") from e
+
+
+class _JsonStream:
+    """Cursor over JSON text that reads more chunks as values need them."""
+
+    __slots__ = ("_texts", "buffer", "position", "eof")
+
+    def __init__(self, chunks: Iterable[bytes]) -> None:
+        self._texts = iter_text(chunks)
+        self.buffer = ""
+        self.position = 0
+        self.eof = False
+
+    def _fill(self) -> None:
+        text = next(self._texts, None)
+        if text is None:
+            self.eof = True
+        else:
+            self.buffer = self.buffer[self.position :] + text
+            self.position = 0
+
+    def peek(self) -> str:
+        """Skip whitespace and return the next character ("" at the end)."""
+        while True:
+            self.position = _WHITESPACE.match(self.buffer, self.position).end()
+            if self.position < len(self.buffer) or self.eof:
+                return self.buffer[self.position : self.position + 1]
+            self._fill()
+
+    def take(self, expected: str) -> str:
+        """Consume the next character, which must be one of expected."""
+        char = self.peek()
+        if not char or char not in expected:
+            raise ValueError(f"Invalid JSON: expected one of {expected!r}, found {char!r}")
+        self.position += 1
+        return char
+
+    def value(self) -> Any:
+        """Decode the next complete JSON value."""
+        self.peek()
+        while True:
+            try:
+                value, end = _DECODER.raw_decode(self.buffer, self.position)
+                # A number at the end of the buffer may continue in the next chunk
+                if end < len(self.buffer) or self.eof:
+                    self.position = end
+                    return value
+            except json.JSONDecodeError as e:
+                if self.eof:
+                    raise ValueError(f"Invalid JSON: {e}") from e
+            if len(self.buffer) - self.position > MAX_RECORD_BYTES:
+                raise ValueError(f"JSON value exceeds {MAX_RECORD_BYTES} bytes")
+            self._fill()
+
+
+def _json_array(stream: _JsonStream) -> Iterator[dict[str, Any]]:
+    """Yield the objects of the array at the cursor, one at a time."""
+    stream.take("[")
+    if stream.peek() == "]":
+        stream.position += 1
+        return
+    while True:
+        value = stream.value()
+        if isinstance(value, dict):
+            yield value
+        if stream.take(",]") == "]":
+            return
+
+
+def iter_json_objects(chunks: Iterable[bytes]) -> Iterator[dict[str, Any]]:
+    """
+    Read a JSON document object by object.
+
+    A top-level array yields its objects. A top-level object yields the
+    objects of each of its array members, one at a time, and its other
+    members as they come: objects as they are, scalars as {name: value}.
+    Arrays nested deeper are decoded with the object that holds them, so
+    only top-level arrays can be longer than MAX_RECORD_BYTES.
+
+    Args:
+        chunks: The document in chunks of any size
+
+    Yields:
+        Objects in document order
+
+    Raises:
+        ValueError: If the text is not valid JSON or a value exceeds MAX_RECORD_BYTES
+    """
+    stream = _JsonStream(chunks)
+    first = stream.peek()
+    if first == "[":
+        yield from _json_array(stream)
+        return
+    stream.take("{")
+    if stream.peek() == "}":
+        return
+    while True:
+        name = stream.value()
+        if not isinstance(name, str):
+            raise ValueError("Invalid JSON: object member name is not a string")
+        stream.take(":")
+        if stream.peek() == "[":
+            yield from _json_array(stream)
+        else:
+            value = stream.value()
+            yield value if isinstance(value, dict) else {name: value}
+        if stream.take(",}") == "}":
+            return
+
+
+def _local_name(tag: str) -> str:
+    return tag.rpartition("}")[2]
+
+
+def _fields_size(fields: dict[str, str]) -> int:
+    return sum(len(name) + len(value) for name, value in fields.items())
+
+
+class _XmlFrame:
+    """An open XML element: its fields so far and the child elements it has closed."""
+
+    __slots__ = ("element", "fields", "pending", "repeating", "has_children", "size")
+
+    def __init__(self, element: Any, fields: dict[str, str]) -> None:
+        self.element = element
+        self.fields = fields
+        # Fields of the first child with each name, held until a sibling with
+        # the same name shows it is a record or this element closes
+        self.pending: dict[str, dict[str, str]] = {}
+        # Child names seen more than once (or already merged into the fields)
+        self.repeating: set[str] = set()
+        self.has_children = False
+        self.size = _fields_size(fields)
+
+    def grow(self, size: int) -> None:
+        self.size += size
+        if self.size > MAX_RECORD_BYTES:
+            raise ValueError(f"XML record exceeds {MAX_RECORD_BYTES} bytes")
+
+    def add(self, name: str, value: str) -> None:
+        """Add a field unless the element already has one with that name."""
+        if name not in self.fields:
+            self.fields[name] = value
+            self.grow(len(name) + len(value))
+
+    def merge_pending(self) -> None:
+        """Fold the children that turned out not to repeat into the element's fields."""
+        for name, fields in self.pending.items():
+            self.size -= _fields_size(fields)
+            for field_name, value in fields.items():
+                self.add(field_name, value)
+            self.repeating.add(name)
+        self.pending.clear()
+
+    def take_fields(self) -> dict[str, str]:
+        fields, self.fields = self.fields, {}
+        self.size -= _fields_size(fields)
+        return fields
+
+
+def iter_xml_elements(chunks: Iterable[bytes]) -> Iterator[dict[str, str]]:
+    """
+    Read an XML document record by record.
+
+    Records are the children of the root element and, at any depth below
+    them, elements that repeat under the same parent (the Line elements of
+    <Order><Lines><Line/><Line/></Lines></Order>). A record holds its
+    attributes and, by local name (namespaces dropped), the text of the
+    leaf elements and the fields of the non-repeating elements within it.
+    The first element with a name is held back, as fields, until a second
+    one shows it repeats; the fields gathered so far by the elements that
+    contain the repeating ones are then yielded first, as context. The
+    root's own attributes come first, as a record of their own.
+
+    Elements are discarded as soon as they close, so memory holds the open
+    elements' fields only, each capped at MAX_RECORD_BYTES.
+
+    Args:
+        chunks: The document in chunks of any size
+
+    Yields:
+        Fields of the root, then of each record in document order
+
+    Raises:
+        ValueError: If the document is not well-formed XML or a record exceeds MAX_RECORD_BYTES
+    """
+    parser = XMLPullParser(events=("start", "end"))
+    stack: list[_XmlFrame] = []
+
+    def close(frame: _XmlFrame, name: str) -> Iterator[dict[str, str]]:
+        parent = stack[-1]
+        if len(stack) == 1:
+            # Children of the root are records
+            yield frame.fields
+        elif name in parent.repeating:
+            yield frame.fields
+        elif name in parent.pending:
+            # A repeated element: yield the context of the elements holding it first
+            first = parent.pending.pop(name)
+            parent.size -= _fields_size(first)
+            parent.repeating.add(name)
+            for holder in stack[1:]:
+                holder.merge_pending()
+                context = holder.take_fields()
+                if context:
+                    yield context
+            yield first
+            yield frame.fields
+        else:
+            parent.pending[name] = frame.fields
+            parent.grow(frame.size)
+
+    try:
+        for chunk in itertools.chain(chunks, [None]):
+            if chunk is None:
+                parser.close()
+            else:
+                parser.feed(chunk)
+            for event, element in parser.read_events():
+                if event == "start":
+                    fields = {_local_name(k): v for k, v in element.attrib.items()}
+                    if not stack:
+                        yield fields
+                        fields = {}
+                    stack.append(_XmlFrame(element, fields))
+                    continue
+                frame = stack.pop()
+                if not stack:
+                    continue
+                parent = stack[-1]
+                parent.element.remove(element)
+                parent.has_children = True
+                name = _local_name(element.tag)
+                if not frame.has_children and not element.attrib and len(stack) > 1:
+                    # A leaf element is a field of the element holding it
+                    text = (element.text or "").strip()
+                    if text:
+                        parent.add(name, text)
+                    continue
+                if not frame.has_children:
+                    text = (element.text or "").strip()
+                    if text:
+                        frame.add(name, text)
+                frame.merge_pending()
+                yield from close(frame, name)
+    except ParseError as e:
+        raise ValueError(f"Invalid XML: {e}") from e
+
+
+def _number(value: Any, kind: type) -> Any:
+    """Convert a numeric field, leaving values that are not numbers as they are."""
+    if isinstance(value, bool) or isinstance(value, kind):
+        return value
+    if kind is int and isinstance(value, str) and value.isdigit():
+        return int(value)
+    try:
+        number = float(value)
+    except (TypeError, ValueError):
+        return value
+    if not math.isfinite(number):
+        return value
+    if kind is int:
+        return int(number) if number.is_integer() else value
+    return number
+
+
+@functools.lru_cache(maxsize=1024)
+def _canonical_name(name: str) -> str | None:
+    return _ALIASES.get(_PUNCTUATION.sub("", name.lower()))
+
+
+def normalize_record(raw: dict[str, Any]) -> dict[str, Any]:
+    """
+    Map a source record's fields onto the canonical ones (see FIELD_ALIASES).
+
+    Unrecognized fields and nested values are dropped, strings are stripped,
+    quantity and lineNumber become integers and price a float where they can.
+
+    Args:
+        raw: Record as read from the document
+
+    Returns:
+        The canonical fields present in the record
+    """
+    record: dict[str, Any] = {}
+    for name, value in raw.items():
+        canonical = _canonical_name(name)
+        if canonical is None or canonical in record:
+            continue
+        if isinstance(value, str):
+            value = value.strip()
+            if not value:
+                continue
+        elif value is None or isinstance(value, dict | list):
+            continue
+        kind = _NUMERIC_FIELDS.get(canonical)
+        if kind is not None:
+            value = _number(value, kind)
+        record[canonical] = value
+    return record
+
+
+_READERS = {"CSV": iter_csv_rows, "JSON": iter_json_objects, "XML": iter_xml_elements}
+
+
+def extract_records(doc_type: str, chunks: Iterable[bytes]) -> Iterator[dict[str, Any]]:
+    """
+    Extract normalized order lines and shipment rows from a document.
+
+    Records without a LINE_FIELDS field carry document context instead (an
+    orderId in a header row, member or element); their fields are added to
+    every record that follows unless the record has its own.
+
+    Args:
+        doc_type: "CSV", "JSON" or "XML" (see RECORD_FORMATS)
+        chunks: The document in chunks of any size (e.g. from shared.edi.iter_body)
+
+    Yields:
+        Normalized records, in document order
+
+    Raises:
+        ValueError: If the document cannot be read as doc_type
+    """
+    context: dict[str, Any] = {}
+    for raw in _READERS[doc_type](chunks):
+        record = normalize_record(raw)
+        if any(name in record for name in LINE_FIELDS):
+            yield {**context, **record} if context else record
+        else:
+            context.update(record)
+
+
+def encode_chunks(records: Iterable[dict[str, Any]], max_bytes: int) -> Iterator[list[str]]:
+    """
+    JSON-encode records and group them into chunks of at most max_bytes.
+
+    Args:
+        records: Records to encode
+        max_bytes: Budget per chunk for the encoded records and their ", "
+            separators; a record larger than this gets a chunk of its own
+
+    Yields:
+        Lists of encoded records
+    """
+    chunk: list[str] = []
+    size = 0
+    for record in records:
+        encoded = json.dumps(record)
+        if chunk and size + len(encoded) + 2 > max_bytes:
+            yield chunk
+            chunk, size = [], 0
+        chunk.append(encoded)
+        size += len(encoded) + 2
+    if chunk:
+        yield chunk
+
+
+@dataclass
+class RecordSummary:
+    """
+    What was extracted from a document, accumulated record by record.
+
+    Attributes:
+        record_count: Records extracted
+        order_ids: Distinct order IDs, up to MAX_LISTED
+        total_quantity: Sum of the integer quantities
+        fields: Canonical fields seen
+        event_count: Record events published
+        error: Why extraction stopped early, if it did
+    """
+
+    record_count: int = 0
+    order_ids: list[str] = field(default_factory=list)
+    total_quantity: int = 0
+    fields: set[str] = field(default_factory=set)
+    event_count: int = 0
+    error: str | None = None
+
+    def track(self, records: Iterable[dict[str, Any]]) -> Iterator[dict[str, Any]]:
+        """Pass records through, counting them into the summary."""
+        for record in records:
+            self.record_count += 1
+            self.fields.update(record)
+            quantity = record.get("quantity")
+            if isinstance(quantity, int):
+                self.total_quantity += quantity
+            order_id = record.get("orderId")
+            if (
+                order_id is not None
+                and len(self.order_ids) < MAX_LISTED
+                and str(order_id) not in self.order_ids
+            ):
+                self.order_ids.append(str(order_id))
+            yield record
+
+    def as_detail(self) -> dict[str, Any]:
+        """The summary as event Detail fields."""
+        detail = {
+            "recordCount": self.record_count,
+            "orderIds": self.order_ids,
+            "totalQuantity": self.total_quantity,
+            "fields": sorted(self.fields),
+            "eventCount": self.event_count,
+        }
+        if self.error is not None:
+            detail["error"] = self.error
+        return detail
@@ -0,0 +1,136 @@
+"""Content sniffing of uploaded documents from the first few KB of the object."""
+
+import os
+import re
+from dataclasses import dataclass
+
+# Bytes read from the start of an object; a single ranged GET, whatever the object size
+SNIFF_BYTES = int(os.environ.get("DOCUMENT_SNIFF_BYTES", "4096"))
+
+# Document types that name a content format, so the content can contradict them
+# (BOL and POD are business documents in any format, usually scans)
+CONTENT_FORMATS = {"EDI", "CSV", "JSON", "XML"}
+
+_CSV_DELIMITERS = (",", ";", "\t", "|")
+_XML_NAME = re.compile(r"<([A-Za-z_][\w.:-]*)")
+_JSON_AFTER = {"{": '"}', "[": '{["-0123456789tfn]'}
+
+
+@dataclass(frozen=True)
+class Sniffed:
+    """
+    Result of sniffing a document.
+
+    Attributes:
+        format: "EDI", "XML", "JSON", "CSV", "PDF" or "UNKNOWN"
+        root: Root element name of an XML document, when it is within the sniffed bytes
+    """
+
+    format: str
+    root: str | None = None
+
+
+UNKNOWN = Sniffed("UNKNOWN")
+
+
+def sniff(data: bytes) -> Sniffed:
+    """
+    Detect the format of a document from its first bytes.
+
+    Recognizes X12 EDI interchange (ISA) and functional group (GS) envelopes,
+    XML (skipping the declaration, comments and DOCTYPE to find the root
+    element), JSON objects and arrays, delimited text whose first two lines
+    have the same number of delimiters (CSV), and PDF. Anything else,
+    including binary data, is UNKNOWN.
+
+    Args:
+        data: The first SNIFF_BYTES (or fewer) bytes of the object
+
+    Returns:
+        The detected format
+    """
+    if data.startswith(b"%PDF-"):
+        return Sniffed("PDF")
+    if b"\x00" in data:
+        return UNKNOWN
+    text = data.decode("utf-8", errors="replace").removeprefix("\ufeff").lstrip()
+    if not text:
+        return UNKNOWN
+
+    for tag in ("ISA", "GS"):
+        separator = text[len(tag) : len(tag) + 1]
+        if (
+            text.startswith(tag)
+            and separator
+            and not separator.isalnum()
+            and not separator.isspace()
+        ):
+            return Sniffed("EDI")
+    if text[0] == "<":
+        return _sniff_xml(text)
+    if text[0] in _JSON_AFTER:
+        rest = text[1:].lstrip()
+        if not rest or rest[0] in _JSON_AFTER[text[0]]:
+            return Sniffed("JSON")
+        return UNKNOWN
+    return _sniff_csv(text)
+
+
+def _sniff_xml(text: str) -> Sniffed:
+    """Find the root element after the XML prolog."""
+    position = 0
+    while True:
+        position = len(text) - len(text[position:].lstrip())
+        if text.startswith("<?", position):
+            end = text.find("?>", position)
+        elif text.startswith("<!--", position):
+            end = text.find("-->", position)
+        elif text.startswith("<!", position):
+            subset = text.find("[", position)
+            close = text.find(">", position)
+            end = text.find("]>", subset) if -1 < subset < close else close
+        else:
+            break
+        if end == -1:
+            # The prolog runs past the sniffed bytes
+            return Sniffed("XML") if text.startswith("<?xml") else UNKNOWN
+        position = text.index(">", end) + 1
+    match = _XML_NAME.match(text, position)
+    if match is None:
+        return UNKNOWN
+    return Sniffed("XML", match.group(1))
+
+
+def _sniff_csv(text: str) -> Sniffed:
+    """Detect delimited text from its first two lines."""
+    lines = text.splitlines()
+    if len(lines) < 2:
+        return UNKNOWN
+    header, row = lines[0], lines[1]
+    for delimiter in _CSV_DELIMITERS:
+        count = header.count(delimiter)
+        if count and row.count(delimiter) == count:
+            return Sniffed("CSV")
+    return UNKNOWN
+
+
+def resolve_document_type(extension_type: str, sniffed: Sniffed) -> str:
+    """
+    Reconcile the document type implied by the file extension with the content.
+
+    The content wins when the extension is unknown or names a different
+    content format (e.g. an X12 interchange uploaded as .csv); BOL and POD
+    keep their type whatever their format.
+
+    Args:
+        extension_type: Type from the extension ("EDI", "BOL", ..., or "UNKNOWN")
+        sniffed: Result of sniff()
+
+    Returns:
+        The document type to publish
+    """
+    if sniffed.format in CONTENT_FORMATS and (
+        extension_type == "UNKNOWN" or extension_type in CONTENT_FORMATS
+    ):
+        return sniffed.format
+    return extension_type
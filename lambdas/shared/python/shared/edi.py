@@ -0,0 +1,274 @@
+"""Streaming X12 EDI parsing with bounded memory."""
+
+import os
+from collections import Counter
+from collections.abc import Iterable, Iterator
+from dataclasses import dataclass, field
+from typing import Any
+
+# Bytes requested from the S3 body per read while parsing
+EDI_CHUNK_BYTES = int(os.environ.get("EDI_CHUNK_BYTES", str(64 * 1024)))
+
+# A segment longer than this means the delimiters are wrong; fail instead of
+# buffering the rest of the file looking for a terminator
+MAX_SEGMENT_BYTES = 64 * 1024
+
+# Control numbers, order IDs and errors listed in the summary; the counts cover all of them
+MAX_LISTED = 100
+
+# Transaction set -> (segment, element index) carrying the order (PO) number
+ORDER_ID_ELEMENTS = {
+    "850": ("BEG", 3),  # Purchase Order
+    "855": ("BAK", 3),  # Purchase Order Acknowledgment
+    "860": ("BCH", 3),  # Purchase Order Change
+    "810": ("BIG", 4),  # Invoice
+    "856": ("PRF", 1),  # Ship Notice
+}
+
+# Segments that start a line item
+LINE_SEGMENTS = {"PO1", "POC", "ACK", "IT1", "LIN"}
+
+_LINE_TAGS = frozenset(tag.encode() for tag in LINE_SEGMENTS)
+_ORDER_ID_TAGS: dict[str, tuple[bytes | None, int]] = {
+    set_type: (tag.encode(), index) for set_type, (tag, index) in ORDER_ID_ELEMENTS.items()
+}
+
+
+@dataclass(frozen=True)
+class Delimiters:
+    """Separators declared by an ISA segment."""
+
+    element: bytes
+    component: bytes
+    segment: bytes
+
+
+def read_delimiters(header: bytes) -> Delimiters:
+    """
+    Read the delimiters from the start of an interchange.
+
+    The element separator is the byte after "ISA", the component separator is
+    ISA16 and the segment terminator is the byte after it. They are located by
+    counting element separators rather than by fixed offsets, so an ISA whose
+    fields were not padded to their fixed widths still parses.
+
+    Args:
+        header: Start of the interchange (at least the whole ISA segment)
+
+    Returns:
+        The interchange's delimiters
+
+    Raises:
+        ValueError: If header does not start with a complete ISA segment
+    """
+    if not header.startswith(b"ISA") or len(header) < 4:
+        raise ValueError("Not an X12 interchange: missing ISA segment")
+    element = header[3:4]
+    position = 3
+    for _ in range(15):
+        position = header.find(element, position + 1)
+        if position == -1:
+            raise ValueError("Incomplete ISA segment")
+    if len(header) < position + 3:
+        raise ValueError("Incomplete ISA segment")
+    return Delimiters(
+        element, header[position + 1 : position + 2], header[position + 2 : position + 3]
+    )
+
+
+def iter_segments(chunks: Iterable[bytes]) -> Iterator[list[bytes]]:
+    """
+    Split a stream of X12 bytes into segments.
+
+    Only the current chunk and the unterminated tail of the previous one are
+    held in memory, so the file size does not matter. Whitespace around
+    segments (line breaks after terminators) is ignored.
+
+    Args:
+        chunks: The document in chunks of any size (e.g. from iter_body)
+
+    Yields:
+        Each segment as its list of elements; element 0 is the segment ID
+
+    Raises:
+        ValueError: If the stream is not X12 or a segment exceeds MAX_SEGMENT_BYTES
+    """
+    pending = b""
+    delimiters = None
+    for chunk in chunks:
+        pending += chunk
+        if delimiters is None:
+            pending = pending.lstrip(b"\xef\xbb\xbf \t\r\n")
+            if len(pending) >= 3 and not pending.startswith(b"ISA"):
+                raise ValueError("Not an X12 interchange: missing ISA segment")
+            try:
+                delimiters = read_delimiters(pending)
+            except ValueError:
+                # Wait for the rest of the ISA segment
+                if len(pending) > MAX_SEGMENT_BYTES:
+                    raise
+                continue
+        segments = pending.split(delimiters.segment)
+        pending = segments.pop()
+        if len(pending) > MAX_SEGMENT_BYTES:
+            raise ValueError(f"Segment exceeds {MAX_SEGMENT_BYTES} bytes; wrong terminator?")
+        element = delimiters.element
+        for segment in segments:
+            segment = segment.strip()
+            if segment:
+                yield segment.split(element)
+    if delimiters is None:
+        delimiters = read_delimiters(pending)
+    pending = pending.strip()
+    if pending:
+        yield pending.split(delimiters.element)
+
+
+def iter_body(body: Any, chunk_bytes: int = EDI_CHUNK_BYTES) -> Iterator[bytes]:
+    """Read a file-like object (e.g. an S3 StreamingBody) in chunks until it is exhausted."""
+    return iter(lambda: body.read(chunk_bytes), b"")
+
+
+@dataclass
+class EdiSummary:
+    """
+    What an X12 document contains, accumulated segment by segment.
+
+    Attributes:
+        interchanges: Interchange control numbers (ISA13), up to MAX_LISTED
+        interchange_count: Interchanges seen
+        groups: Functional group control numbers (GS06), up to MAX_LISTED
+        group_count: Functional groups seen
+        transaction_sets: Transaction sets per type (ST01)
+        order_ids: Order (PO) numbers, up to MAX_LISTED
+        order_count: Order numbers seen
+        line_count: Line item segments (PO1, IT1, LIN, ...)
+        segment_count: Segments parsed
+        errors: Control number and count mismatches, up to MAX_LISTED
+        error_count: Mismatches found
+    """
+
+    interchanges: list[str] = field(default_factory=list)
+    interchange_count: int = 0
+    groups: list[str] = field(default_factory=list)
+    group_count: int = 0
+    transaction_sets: Counter[str] = field(default_factory=Counter)
+    order_ids: list[str] = field(default_factory=list)
+    order_count: int = 0
+    line_count: int = 0
+    segment_count: int = 0
+    errors: list[str] = field(default_factory=list)
+    error_count: int = 0
+
+    def error(self, message: str) -> None:
+        """Record a control mismatch."""
+        self.error_count += 1
+        if len(self.errors) < MAX_LISTED:
+            self.errors.append(message)
+
+    def as_detail(self) -> dict[str, Any]:
+        """The summary as event Detail fields."""
+        return {
+            "interchangeControlNumbers": self.interchanges,
+            "interchangeCount": self.interchange_count,
+            "groupControlNumbers": self.groups,
+            "groupCount": self.group_count,
+            "transactionSets": dict(self.transaction_sets),
+            "orderIds": self.order_ids,
+            "orderCount": self.order_count,
+            "lineCount": self.line_count,
+            "segmentCount": self.segment_count,
+            "controlErrors": self.errors,
+            "controlErrorCount": self.error_count,
+        }
+
+
+def _element(segment: list[bytes], index: int) -> str:
+    return segment[index].decode("latin-1").strip() if index < len(segment) else ""
+
+
+def _count_matches(segment: list[bytes], index: int, count: int) -> bool:
+    """Return True if a trailer's count element equals count (leading zeros allowed)."""
+    value = _element(segment, index)
+    return value.isdigit() and int(value) == count
+
+
+def summarize_edi(segments: Iterable[list[bytes]]) -> EdiSummary:
+    """
+    Summarize a stream of X12 segments.
+
+    Collects control numbers and order numbers (see ORDER_ID_ELEMENTS), counts
+    line items, and checks the envelope trailers: SE01 against the segments in
+    the transaction set, GE01/IEA01 against the sets and groups they close, and
+    each trailer's control number against its header's.
+
+    Args:
+        segments: Segments from iter_segments
+
+    Returns:
+        The summary
+    """
+    summary = EdiSummary()
+    isa_control = gs_control = st_control = ""
+    groups_in_interchange = sets_in_group = segments_in_set = 0
+    # Segment ID and element of the order number in the current transaction set
+    order_tag: bytes | None = None
+    order_index = 0
+    for segment in segments:
+        summary.segment_count += 1
+        segments_in_set += 1
+        tag = segment[0]
+        if tag in _LINE_TAGS:
+            summary.line_count += 1
+        elif tag == order_tag:
+            order_id = _element(segment, order_index)
+            if order_id:
+                summary.order_count += 1
+                if len(summary.order_ids) < MAX_LISTED:
+                    summary.order_ids.append(order_id)
+            order_tag = None
+        elif tag == b"ST":
+            st_control = _element(segment, 2)
+            sets_in_group += 1
+            segments_in_set = 1
+            set_type = _element(segment, 1)
+            summary.transaction_sets[set_type] += 1
+            order_tag, order_index = _ORDER_ID_TAGS.get(set_type, (None, 0))
+        elif tag == b"SE":
+            if not _count_matches(segment, 1, segments_in_set):
+                summary.error(
+                    f"SE {st_control}: {_element(segment, 1)} segments declared, "
+                    f"{segments_in_set} found"
+                )
+            if _element(segment, 2) != st_control:
+                summary.error(f"SE {_element(segment, 2)} does not close ST {st_control}")
+            order_tag = None
+        elif tag == b"GS":
+            gs_control = _element(segment, 6)
+            summary.group_count += 1
+            if len(summary.groups) < MAX_LISTED:
+                summary.groups.append(gs_control)
+            groups_in_interchange += 1
+            sets_in_group = 0
+        elif tag == b"GE":
+            if not _count_matches(segment, 1, sets_in_group):
+                summary.error(
+                    f"GE {gs_control}: {_element(segment, 1)} sets declared, {sets_in_group} found"
+                )
+            if _element(segment, 2) != gs_control:
+                summary.error(f"GE {_element(segment, 2)} does not close GS {gs_control}")
+        elif tag == b"ISA":
+            isa_control = _element(segment, 13)
+            summary.interchange_count += 1
+            if len(summary.interchanges) < MAX_LISTED:
+                summary.interchanges.append(isa_control)
+            groups_in_interchange = 0
+        elif tag == b"IEA":
+            if not _count_matches(segment, 1, groups_in_interchange):
+                summary.error(
+                    f"IEA {isa_control}: {_element(segment, 1)} groups declared, "
+                    f"{groups_in_interchange} found"
+                )
+            if _element(segment, 2) != isa_control:
+                summary.error(f"IEA {_element(segment, 2)} does not close ISA {isa_control}")
+    return summary
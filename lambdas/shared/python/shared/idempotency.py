@@ -0,0 +1,228 @@
+"""Two-tier cache of API responses for deduplicating retried requests."""
+
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from collections.abc import Callable
+from typing import Any, Protocol
+
+# How long a response is replayed for retries of the same request; 0 disables
+IDEMPOTENCY_TTL_SECONDS = float(os.environ.get("IDEMPOTENCY_TTL_SECONDS", "3600"))
+
+# Responses kept in the warm-container tier
+IDEMPOTENCY_CACHE_SIZE = int(os.environ.get("IDEMPOTENCY_CACHE_SIZE", "10000"))
+
+# Request header carrying a client-chosen key (matched case-insensitively)
+IDEMPOTENCY_HEADER = "Idempotency-Key"
+
+# Response header marking a replayed response
+REPLAYED_HEADER = "Idempotent-Replayed"
+
+# (response, expires_at, request hash) as kept by both tiers
+Item = tuple[dict[str, Any], float, str | None]
+
+
+class IdempotencyKeyReusedError(ValueError):
+    """An idempotency key was sent again with a different request body."""
+
+
+class IdempotencyStore(Protocol):
+    """Shared tier: responses visible to every execution environment."""
+
+    def get(self, key: str) -> Item | None:
+        """Return (response, expires_at, request hash) for a key, or None if not stored."""
+        ...
+
+    def put(
+        self, key: str, response: dict[str, Any], expires_at: float, request_hash: str | None
+    ) -> None:
+        """Store a response and the hash of its request until expires_at (time.time() seconds)."""
+        ...
+
+
+class InMemoryIdempotencyStore:
+    """Process-local IdempotencyStore, used for tests and local runs in place of the backend."""
+
+    __slots__ = ("_items", "_lock", "reads", "writes")
+
+    def __init__(self) -> None:
+        self._items: dict[str, Item] = {}
+        self._lock = threading.Lock()
+        self.reads = 0
+        self.writes = 0
+
+    def get(self, key: str) -> Item | None:
+        """Return (response, expires_at, request hash) for a key, or None if not stored."""
+        with self._lock:
+            self.reads += 1
+            return self._items.get(key)
+
+    def put(
+        self, key: str, response: dict[str, Any], expires_at: float, request_hash: str | None
+    ) -> None:
+        """Store a response and the hash of its request until expires_at (time.time() seconds)."""
+        with self._lock:
+            self.writes += 1
+            self._items[key] = (response, expires_at, request_hash)
+
+
+class IdempotencyCache:
+    """
+    Responses to completed requests, keyed by idempotency key.
+
+    Lookups go to a bounded, LRU-evicting in-memory tier first, so retries
+    that land on the same warm container never leave the process, and then
+    to the optional shared store, whose hits are copied into the local tier.
+    Responses are written to both. Entries expire ttl seconds after they were
+    stored, in both tiers. Each response is stored with a hash of its request
+    body (request_hash), so a key reused for a different request is refused
+    rather than answered with the other request's response.
+
+    Only completed requests are recorded: a retry that arrives while the
+    original is still being processed is not recognized as a duplicate.
+    """
+
+    __slots__ = ("_store", "_ttl", "_capacity", "_clock", "_local", "_lock", "hits", "misses")
+
+    def __init__(
+        self,
+        store: IdempotencyStore | None = None,
+        ttl: float = IDEMPOTENCY_TTL_SECONDS,
+        capacity: int = IDEMPOTENCY_CACHE_SIZE,
+        clock: Callable[[], float] = time.time,
+    ) -> None:
+        """
+        Create a cache.
+
+        Args:
+            store: Shared tier; None keeps responses in this process only
+            ttl: Seconds a response is replayed; 0 disables the cache
+            capacity: Responses kept in the in-memory tier
+            clock: Wall-clock time source (seconds), shared with the store's expiry
+        """
+        self._store = store
+        self._ttl = ttl
+        self._capacity = capacity
+        self._clock = clock
+        self._local: OrderedDict[str, Item] = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def enabled(self) -> bool:
+        """Whether responses are recorded and replayed."""
+        return self._ttl > 0
+
+    def get(self, key: str, request_hash: str | None = None) -> dict[str, Any] | None:
+        """
+        Return the recorded response for a key.
+
+        Args:
+            key: Idempotency key (see idempotency_key)
+            request_hash: Hash of the request body (see request_hash), checked
+                against the hash recorded with the response
+
+        Returns:
+            The response, or None if none was recorded or it expired
+
+        Raises:
+            IdempotencyKeyReusedError: If the response was recorded for a request
+                with a different body
+        """
+        if not self.enabled:
+            return None
+        now = self._clock()
+        with self._lock:
+            item = self._local.get(key)
+            if item is not None:
+                if item[1] > now:
+                    self._local.move_to_end(key)
+                    self.hits += 1
+                    return _matching_response(item, request_hash)
+                del self._local[key]
+        item = self._store.get(key) if self._store is not None else None
+        with self._lock:
+            if item is None or item[1] <= now:
+                self.misses += 1
+                return None
+            self._put_local(key, item)
+            self.hits += 1
+        return _matching_response(item, request_hash)
+
+    def put(self, key: str, response: dict[str, Any], request_hash: str | None = None) -> None:
+        """
+        Record the response to a completed request.
+
+        Args:
+            key: Idempotency key (see idempotency_key)
+            response: Response to replay for retries
+            request_hash: Hash of the request body (see request_hash)
+        """
+        if not self.enabled:
+            return
+        item = (response, self._clock() + self._ttl, request_hash)
+        with self._lock:
+            self._put_local(key, item)
+        if self._store is not None:
+            self._store.put(key, *item)
+
+    def _put_local(self, key: str, item: Item) -> None:
+        self._local[key] = item
+        self._local.move_to_end(key)
+        while len(self._local) > self._capacity:
+            self._local.popitem(last=False)
+
+
+def _matching_response(item: Item, request_hash: str | None) -> dict[str, Any]:
+    """Return a recorded response, unless it answers a request with a different body."""
+    response, _, recorded_hash = item
+    if request_hash is not None and recorded_hash is not None and recorded_hash != request_hash:
+        raise IdempotencyKeyReusedError("Idempotency key was already used for a different request")
+    return response
+
+
+def request_hash(event: dict[str, Any]) -> str:
+    """
+    Hash the body of an API Gateway request.
+
+    Args:
+        event: API Gateway proxy event
+
+    Returns:
+        SHA-256 hex digest of the body
+    """
+    body = event.get("body")
+    text = body if isinstance(body, str) else json.dumps(body, sort_keys=True)
+    return hashlib.sha256(text.encode()).hexdigest()
+
+
+def idempotency_key(event: dict[str, Any], scope: str) -> str:
+    """
+    Derive the idempotency key of an API Gateway request.
+
+    The client's Idempotency-Key header is used when present; otherwise the
+    key is a SHA-256 of the request body, so byte-identical retries of the
+    same submission share a key.
+
+    Args:
+        event: API Gateway proxy event
+        scope: Namespace for the key (e.g. the route), so the same body sent
+            to different endpoints is not treated as a duplicate
+
+    Returns:
+        Key of the form "<scope>:key:<header>" or "<scope>:sha256:<hex digest>"
+    """
+    headers = event.get("headers") or {}
+    for name, value in headers.items():
+        if name.lower() == IDEMPOTENCY_HEADER.lower() and value:
+            return f"{scope}:key:{value}"
+    return f"{scope}:sha256:{request_hash(event)}"
+
+
+def replayed(response: dict[str, Any]) -> dict[str, Any]:
+    """Return a recorded response marked with the Idempotent-Replayed header."""
+    return {**response, "headers": {**response.get("headers", {}), REPLAYED_HEADER: "true"}}
@@ -0,0 +1,41 @@
+"""CloudWatch metrics emitted as Embedded Metric Format (EMF) log lines."""
+
+import json
+import os
+import time
+
+NAMESPACE = "OrderProcessing"
+
+
+def emit_metrics(metrics: dict[str, float], unit: str = "Count", **dimensions: str) -> None:
+    """
+    Emit metrics by printing an EMF document to stdout.
+
+    CloudWatch extracts the metrics from the log line asynchronously, so no
+    PutMetricData call is made on the request path. The Lambda function name
+    is always added as a dimension.
+
+    Args:
+        metrics: Metric name to value
+        unit: CloudWatch unit applied to every metric
+        **dimensions: Additional dimension name/value pairs
+    """
+    dimensions = {
+        "FunctionName": os.environ.get("AWS_LAMBDA_FUNCTION_NAME", "local"),
+        **dimensions,
+    }
+    document = {
+        "_aws": {
+            "Timestamp": int(time.time() * 1000),
+            "CloudWatchMetrics": [
+                {
+                    "Namespace": NAMESPACE,
+                    "Dimensions": [list(dimensions)],
+                    "Metrics": [{"Name": name, "Unit": unit} for name in metrics],
+                }
+            ],
+        },
+        **dimensions,
+        **metrics,
+    }
+    print(json.dumps(document))
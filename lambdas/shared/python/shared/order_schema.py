@@ -0,0 +1,250 @@
+"""Schema of order.received.v1 orders, compiled into a validator at import."""
+
+from collections.abc import Callable
+from typing import Any
+
+# (path relative to the checked value, message), or None when the value is valid
+Error = tuple[str, str] | None
+Check = Callable[[Any], Error]
+
+_SKU = {"type": "string", "minLength": 1}
+
+# JSON Schema subset: type, enum, properties, required, additionalProperties,
+# items, anyOf, minimum, minLength, and false for fields that must be absent.
+# Fields not listed are allowed and passed through unchecked.
+ORDER_SCHEMA: dict[str, Any] = {
+    "type": "object",
+    "properties": {
+        "orderId": {"type": "string", "minLength": 1},
+        "purpose": {"type": "string", "enum": ["create", "update", "cancel"]},
+        "price": {"type": "number", "minimum": 0},
+        "priority": {"type": "string"},
+        "region": {"type": "string"},
+        "items": {
+            "type": "array",
+            "items": {
+                "anyOf": [
+                    _SKU,
+                    {
+                        "type": "object",
+                        "properties": {
+                            "sku": _SKU,
+                            "quantity": {"type": "integer", "minimum": 1},
+                        },
+                        "required": ["sku"],
+                    },
+                ]
+            },
+        },
+        "stockVersions": {
+            "type": "object",
+            "additionalProperties": {"type": "integer", "minimum": 0},
+        },
+        "order": {
+            "type": "object",
+            "properties": {
+                "price": {"type": "number", "minimum": 0},
+                "referenceNumber": {"type": "string"},
+            },
+        },
+        # Set by order_receiver only; consumers act on them (S3 reads, decoding)
+        "claimCheck": False,
+        "compressed": False,
+    },
+}
+
+# Python types of decoded JSON per schema type; bool is not an integer or number
+_TYPES: dict[str, tuple[type, ...]] = {
+    "object": (dict,),
+    "array": (list,),
+    "string": (str,),
+    "integer": (int,),
+    "number": (int, float),
+    "boolean": (bool,),
+}
+
+_ARTICLES = {"object": "an", "array": "an", "integer": "an"}
+
+
+def _type_message(kinds: str) -> str:
+    return f"must be {_ARTICLES.get(kinds.split()[0], 'a')} {kinds}"
+
+
+def compile_schema(schema: dict[str, Any] | bool) -> Check:
+    """
+    Compile a schema into a check function.
+
+    Everything that does not depend on the value is worked out here, once:
+    keyword lookups, the required and declared property lists, and for anyOf
+    a table from Python type to the option that accepts it, so a value is
+    checked against one option instead of each in turn. Type tests of
+    properties and array items are done inline by the enclosing object or
+    array, so a valid value that only has to match a type costs no call.
+
+    Args:
+        schema: Schema in the subset used by ORDER_SCHEMA
+
+    Returns:
+        Function returning None for a valid value, or (path, message) for the
+        first violation found
+    """
+    node = _compile(schema)
+    types, check, type_error = node
+    if types is None:
+        return check or (lambda value: None)
+
+    def check_value(value: Any) -> Error:
+        if type(value) not in types:
+            return type_error
+        return None if check is None else check(value)
+
+    return check_value
+
+
+# A compiled schema: the accepted Python types (None for any), the check run
+# once the type matched (None when there is nothing more to check), and the
+# error for a value of the wrong type
+_Node = tuple[frozenset[type] | None, Check | None, Error]
+
+_NOT_ALLOWED: Error = ("", "is not allowed")
+
+# Marks a property absent from the checked object
+_MISSING = object()
+
+
+def _compile(schema: dict[str, Any] | bool) -> _Node:
+    if schema is True:
+        return None, None, None
+    if schema is False:
+        return frozenset(), None, _NOT_ALLOWED
+    if "anyOf" in schema:
+        return _compile_any_of(schema["anyOf"])
+
+    kind = schema["type"]
+    types = frozenset(_TYPES[kind])
+    type_error = ("", _type_message(kind))
+    if kind == "object":
+        return types, _compile_object(schema), type_error
+    if kind == "array":
+        return types, _compile_array(schema["items"]) if "items" in schema else None, type_error
+    return types, _compile_scalar(schema), type_error
+
+
+def _compile_scalar(schema: dict[str, Any]) -> Check | None:
+    """Compile enum, minLength and minimum into one check, or None if there are none."""
+    allowed = frozenset(schema["enum"]) if "enum" in schema else None
+    min_length = schema.get("minLength")
+    minimum = schema.get("minimum")
+    if allowed is None and min_length is None and minimum is None:
+        return None
+    enum_error = ("", f"must be one of: {', '.join(schema.get('enum', ()))}")
+    length_error = (
+        "",
+        "must not be empty" if min_length == 1 else f"must have at least {min_length} characters",
+    )
+    minimum_error = ("", f"must be at least {minimum}")
+
+    def check_scalar(value: Any) -> Error:
+        if allowed is not None and value not in allowed:
+            return enum_error
+        if min_length is not None and len(value) < min_length:
+            return length_error
+        if minimum is not None and value < minimum:
+            return minimum_error
+        return None
+
+    return check_scalar
+
+
+def _compile_any_of(options: list[dict[str, Any]]) -> _Node:
+    """Compile anyOf into a dispatch on the value's type."""
+    by_type: dict[type, Check | None] = {}
+    for option in options:
+        option_types, check, _ = _compile(option)
+        for python_type in option_types or ():
+            by_type.setdefault(python_type, check)
+    type_error = ("", _type_message(" or ".join(option["type"] for option in options)))
+
+    def check_any_of(value: Any) -> Error:
+        check = by_type[type(value)]
+        return None if check is None else check(value)
+
+    return frozenset(by_type), check_any_of, type_error
+
+
+def _compile_object(schema: dict[str, Any]) -> Check:
+    """Compile required, properties and additionalProperties into one check."""
+    required = tuple(schema.get("required", ()))
+    properties = tuple(
+        (key, *_compile(subschema)) for key, subschema in schema.get("properties", {}).items()
+    )
+    declared = frozenset(key for key, *_ in properties)
+    additional = schema.get("additionalProperties", True)
+    additional_types, check_additional, additional_error = _compile(additional)
+
+    def check_object(value: dict[str, Any]) -> Error:
+        for key in required:
+            if key not in value:
+                return f".{key}", "is required"
+        for key, types, check, type_error in properties:
+            item = value.get(key, _MISSING)
+            if item is _MISSING:
+                continue
+            if types is not None and type(item) not in types:
+                return f".{key}", type_error[1]
+            if check is not None:
+                error = check(item)
+                if error is not None:
+                    return f".{key}{error[0]}", error[1]
+        if additional is not True:
+            for key, item in value.items():
+                if key in declared:
+                    continue
+                if additional_types is not None and type(item) not in additional_types:
+                    return f".{key}", additional_error[1]
+                if check_additional is not None:
+                    error = check_additional(item)
+                    if error is not None:
+                        return f".{key}{error[0]}", error[1]
+        return None
+
+    return check_object
+
+
+def _compile_array(items: dict[str, Any] | bool) -> Check:
+    """Compile the items schema of an array into a check of every element."""
+    types, check, type_error = _compile(items)
+
+    def check_array(value: list[Any]) -> Error:
+        for index, item in enumerate(value):
+            if types is not None and type(item) not in types:
+                return f"[{index}]", type_error[1]
+            if check is not None:
+                error = check(item)
+                if error is not None:
+                    return f"[{index}]{error[0]}", error[1]
+        return None
+
+    return check_array
+
+
+# Compiled once per execution environment, during init
+_check_order = compile_schema(ORDER_SCHEMA)
+
+
+def validate_order(payload: Any) -> str | None:
+    """
+    Validate an order against ORDER_SCHEMA.
+
+    Args:
+        payload: Parsed order payload
+
+    Returns:
+        None if the order is valid, otherwise a message naming the offending
+        field, e.g. "items[3].quantity: must be an integer"
+    """
+    error = _check_order(payload)
+    if error is None:
+        return None
+    path, message = error
+    return f"{path.lstrip('.') or 'order'}: {message}"
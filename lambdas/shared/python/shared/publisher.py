@@ -0,0 +1,117 @@
+"""EventBridge PutEvents publishing with size-aware batching and partial-failure retries."""
+
+import time
+from collections.abc import Callable, Iterator
+from typing import Any
+
+from shared.batching import BatchResult, chunk_by_size, send_with_retries
+from shared.metrics import emit_metrics
+
+# PutEvents service limits: at most 10 entries and 256 KB per request
+PUT_EVENTS_MAX_ENTRIES = 10
+PUT_EVENTS_MAX_BYTES = 256 * 1024
+
+# Per-entry and whole-request error codes worth retrying; anything else is permanent
+RETRYABLE_ERROR_CODES = {
+    "ThrottlingException",
+    "InternalFailure",
+    "InternalException",
+    "ServiceUnavailable",
+}
+
+
+def entry_size(entry: dict[str, Any]) -> int:
+    """
+    Calculate the size of a PutEvents entry as EventBridge counts it.
+
+    Args:
+        entry: PutEvents request entry
+
+    Returns:
+        Entry size in bytes (Time, Source, DetailType, Detail and Resources)
+    """
+    size = 14 if entry.get("Time") else 0
+    for name in ("Source", "DetailType", "Detail"):
+        if entry.get(name):
+            size += len(entry[name].encode("utf-8"))
+    for resource in entry.get("Resources", []):
+        size += len(resource.encode("utf-8"))
+    return size
+
+
+def chunk_entries(
+    entries: list[tuple[int, dict[str, Any]]],
+) -> Iterator[list[tuple[int, dict[str, Any]]]]:
+    """
+    Pack indexed PutEvents entries into requests that respect the service limits.
+
+    Args:
+        entries: (index, entry) pairs, each entry no larger than PUT_EVENTS_MAX_BYTES
+
+    Yields:
+        Lists of (index, entry) pairs, one list per PutEvents request
+    """
+    return chunk_by_size(entries, entry_size, PUT_EVENTS_MAX_ENTRIES, PUT_EVENTS_MAX_BYTES)
+
+
+def publish_entries(
+    client: Any,
+    entries: list[dict[str, Any]],
+    *,
+    deadline: float | None = None,
+    max_attempts: int = 5,
+    base_delay: float = 0.05,
+    max_delay: float = 2.0,
+    sleep: Callable[[float], None] = time.sleep,
+) -> BatchResult:
+    """
+    Publish entries to EventBridge, retrying only the entries that failed.
+
+    Entries are packed into PutEvents requests with chunk_entries. Entries
+    that fail with a retryable error code (or whose whole request was
+    throttled) are re-sent with backoff until max_attempts or the deadline
+    is reached. Retry and permanent failure counts are emitted as
+    CloudWatch metrics.
+
+    Args:
+        client: boto3 EventBridge client
+        entries: PutEvents entries, each no larger than PUT_EVENTS_MAX_BYTES
+        deadline: time.monotonic() value after which no more retries are attempted
+        max_attempts: Maximum number of publish rounds per entry
+        base_delay: Backoff base in seconds
+        max_delay: Backoff cap in seconds
+        sleep: Sleep function (injectable for tests)
+
+    Returns:
+        BatchResult with per-entry PutEvents results aligned with the input entries
+        (containing "EventId" on success, "ErrorCode"/"ErrorMessage" on failure)
+    """
+
+    def send_chunk(
+        chunk: list[tuple[int, dict[str, Any]]],
+    ) -> list[tuple[int, dict[str, Any], bool]]:
+        response = client.put_events(Entries=[entry for _, entry in chunk])
+        return [
+            (index, entry_result, entry_result.get("ErrorCode") in RETRYABLE_ERROR_CODES)
+            for (index, _), entry_result in zip(chunk, response.get("Entries", []), strict=False)
+        ]
+
+    result = send_with_retries(
+        entries,
+        chunk_entries,
+        send_chunk,
+        RETRYABLE_ERROR_CODES,
+        deadline=deadline,
+        max_attempts=max_attempts,
+        base_delay=base_delay,
+        max_delay=max_delay,
+        sleep=sleep,
+    )
+    if result.retries or result.failed_indexes:
+        emit_metrics(
+            {
+                "PutEventsRetries": result.retries,
+                "PutEventsPermanentFailures": result.failed_count,
+            }
+        )
+    return result
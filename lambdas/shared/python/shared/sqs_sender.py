@@ -0,0 +1,117 @@
+"""SQS SendMessageBatch sending with size-aware batching and partial-failure retries."""
+
+import time
+from collections.abc import Callable, Iterator
+from typing import Any
+
+from shared.batching import BatchResult, chunk_by_size, send_with_retries
+from shared.metrics import emit_metrics
+
+# SendMessageBatch service limits: at most 10 messages and 256 KB per request
+SEND_MESSAGE_BATCH_MAX_ENTRIES = 10
+SEND_MESSAGE_BATCH_MAX_BYTES = 256 * 1024
+
+# Whole-request error codes worth retrying; per-entry failures are retried
+# unless SQS reports them as the sender's fault
+RETRYABLE_ERROR_CODES = {
+    "ThrottlingException",
+    "RequestThrottled",
+    "AWS.SimpleQueueService.RequestThrottled",
+    "InternalError",
+    "ServiceUnavailable",
+}
+
+
+def message_size(body: str) -> int:
+    """Size of a message body in bytes as SQS counts it."""
+    return len(body.encode("utf-8"))
+
+
+def chunk_messages(bodies: list[tuple[int, str]]) -> Iterator[list[tuple[int, str]]]:
+    """
+    Pack indexed message bodies into requests that respect the service limits.
+
+    Args:
+        bodies: (index, body) pairs, each body no larger than SEND_MESSAGE_BATCH_MAX_BYTES
+
+    Yields:
+        Lists of (index, body) pairs, one list per SendMessageBatch request
+    """
+    return chunk_by_size(
+        bodies, message_size, SEND_MESSAGE_BATCH_MAX_ENTRIES, SEND_MESSAGE_BATCH_MAX_BYTES
+    )
+
+
+def send_messages(
+    client: Any,
+    queue_url: str,
+    bodies: list[str],
+    *,
+    deadline: float | None = None,
+    max_attempts: int = 5,
+    base_delay: float = 0.05,
+    max_delay: float = 2.0,
+    sleep: Callable[[float], None] = time.sleep,
+) -> BatchResult:
+    """
+    Send message bodies to SQS with SendMessageBatch, retrying only failed entries.
+
+    Bodies are packed into SendMessageBatch requests with chunk_messages.
+    Entries that fail without being the sender's fault (or whose whole
+    request was throttled) are re-sent with backoff until max_attempts or
+    the deadline is reached. Retry and permanent failure counts are emitted
+    as CloudWatch metrics.
+
+    Args:
+        client: boto3 SQS client
+        queue_url: URL of the destination queue
+        bodies: Message bodies, each no larger than SEND_MESSAGE_BATCH_MAX_BYTES
+        deadline: time.monotonic() value after which no more retries are attempted
+        max_attempts: Maximum number of send rounds per message
+        base_delay: Backoff base in seconds
+        max_delay: Backoff cap in seconds
+        sleep: Sleep function (injectable for tests)
+
+    Returns:
+        BatchResult with per-message results aligned with the input bodies
+        (containing "MessageId" on success, "ErrorCode"/"ErrorMessage" on failure)
+    """
+
+    def send_chunk(chunk: list[tuple[int, str]]) -> list[tuple[int, dict[str, Any], bool]]:
+        response = client.send_message_batch(
+            QueueUrl=queue_url,
+            Entries=[{"Id": str(index), "MessageBody": body} for index, body in chunk],
+        )
+        outcomes = [
+            (int(entry["Id"]), {"MessageId": entry["MessageId"]}, False)
+            for entry in response.get("Successful", [])
+        ]
+        outcomes.extend(
+            (
+                int(entry["Id"]),
+                {"ErrorCode": entry.get("Code", "Unknown"), "ErrorMessage": entry.get("Message")},
+                not entry.get("SenderFault", False),
+            )
+            for entry in response.get("Failed", [])
+        )
+        return outcomes
+
+    result = send_with_retries(
+        bodies,
+        chunk_messages,
+        send_chunk,
+        RETRYABLE_ERROR_CODES,
+        deadline=deadline,
+        max_attempts=max_attempts,
+        base_delay=base_delay,
+        max_delay=max_delay,
+        sleep=sleep,
+    )
+    if result.retries or result.failed_indexes:
+        emit_metrics(
+            {
+                "SendMessageBatchRetries": result.retries,
+                "SendMessageBatchPermanentFailures": result.failed_count,
+            }
+        )
+    return result
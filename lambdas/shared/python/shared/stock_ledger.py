@@ -0,0 +1,266 @@
+"""Warm-container cache of stock levels with LRU eviction and write-through."""
+
+import threading
+from array import array
+from collections.abc import Mapping
+from typing import Protocol
+
+# Marks the end of the LRU list / an unused slot
+_NIL = -1
+
+
+class StockStore(Protocol):
+    """Backing store of stock levels. Every write bumps the SKU's version."""
+
+    def get_stock(self, sku: str) -> tuple[int, int]:
+        """Return (level, version) for a SKU."""
+        ...
+
+    def apply_change(self, sku: str, delta: int) -> tuple[int, int]:
+        """Apply a quantity change and return the new (level, version)."""
+        ...
+
+    def apply_changes(self, sku: str, changes: Mapping[str, int]) -> tuple[int, int]:
+        """
+        Apply identified quantity changes at most once each.
+
+        The changes whose IDs have not been applied to the SKU before are
+        summed and written, and their IDs recorded, in one conditional write
+        (e.g. a DynamoDB transaction conditioned on the IDs' marker items),
+        so replaying a change is a no-op.
+
+        Returns:
+            The new (level, version)
+        """
+        ...
+
+
+class InMemoryStockStore:
+    """Process-local StockStore, used for tests and local runs in place of the backend."""
+
+    __slots__ = ("_levels", "_versions", "_applied", "_lock", "reads", "writes")
+
+    def __init__(self, levels: dict[str, int] | None = None) -> None:
+        self._levels: dict[str, int] = dict(levels or {})
+        self._versions: dict[str, int] = {}
+        self._applied: dict[str, set[str]] = {}
+        self._lock = threading.Lock()
+        self.reads = 0
+        self.writes = 0
+
+    def get_stock(self, sku: str) -> tuple[int, int]:
+        """Return (level, version) for a SKU."""
+        with self._lock:
+            self.reads += 1
+            return self._levels.get(sku, 0), self._versions.get(sku, 0)
+
+    def apply_change(self, sku: str, delta: int) -> tuple[int, int]:
+        """Apply a quantity change and return the new (level, version)."""
+        with self._lock:
+            self.writes += 1
+            level = self._levels.get(sku, 0) + delta
+            version = self._versions.get(sku, 0) + 1
+            self._levels[sku] = level
+            self._versions[sku] = version
+            return level, version
+
+    def apply_changes(self, sku: str, changes: Mapping[str, int]) -> tuple[int, int]:
+        """Apply the changes not applied to the SKU before and return the new (level, version)."""
+        with self._lock:
+            applied = self._applied.setdefault(sku, set())
+            delta = sum(change for change_id, change in changes.items() if change_id not in applied)
+            applied.update(changes)
+            self.writes += 1
+            level = self._levels.get(sku, 0) + delta
+            version = self._versions.get(sku, 0) + 1
+            self._levels[sku] = level
+            self._versions[sku] = version
+            return level, version
+
+
+class StockLedger:
+    """
+    Bounded, LRU-evicting cache of stock levels keyed by SKU.
+
+    Levels, versions and the LRU links live in preallocated arrays indexed by
+    slot, and a single dict maps each SKU to its slot, so an entry costs a
+    few dozen bytes instead of a dict or object per SKU. Reads are served
+    from the cache; writes go through to the backing store and refresh the
+    cached entry. Entries are invalidated when the backing store reports a
+    newer version for the SKU than the cached one (e.g. in a stock-change
+    notification of its own; versions supplied by clients are not trusted).
+    """
+
+    __slots__ = (
+        "_store",
+        "_capacity",
+        "_slots",
+        "_keys",
+        "_levels",
+        "_versions",
+        "_prev",
+        "_next",
+        "_head",
+        "_tail",
+        "_free",
+        "_lock",
+        "hits",
+        "misses",
+        "evictions",
+    )
+
+    def __init__(self, store: StockStore, capacity: int = 10_000) -> None:
+        """
+        Create an empty ledger.
+
+        Args:
+            store: Backing store for reads on miss and write-through
+            capacity: Maximum number of SKUs held before the least recently used is evicted
+        """
+        if capacity < 1:
+            raise ValueError("capacity must be at least 1")
+        self._store = store
+        self._capacity = capacity
+        self._slots: dict[str, int] = {}
+        self._keys: list[str | None] = [None] * capacity
+        self._levels = array("q", bytes(8 * capacity))
+        self._versions = array("q", bytes(8 * capacity))
+        self._prev = array("i", [_NIL]) * capacity
+        self._next = array("i", [_NIL]) * capacity
+        self._head = _NIL  # most recently used
+        self._tail = _NIL  # least recently used
+        self._free = list(range(capacity - 1, -1, -1))
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def __len__(self) -> int:
+        return len(self._slots)
+
+    def __contains__(self, sku: object) -> bool:
+        return sku in self._slots
+
+    def get(self, sku: str) -> int:
+        """
+        Return the stock level for a SKU, reading the backing store only on a miss.
+
+        Args:
+            sku: SKU to look up
+
+        Returns:
+            Current stock level
+        """
+        with self._lock:
+            slot = self._slots.get(sku)
+            if slot is not None:
+                self.hits += 1
+                self._touch(slot)
+                return self._levels[slot]
+            self.misses += 1
+        level, version = self._store.get_stock(sku)
+        with self._lock:
+            self._put(sku, level, version)
+        return level
+
+    def apply(self, sku: str, delta: int) -> int:
+        """
+        Write a quantity change through to the backing store and cache the result.
+
+        Args:
+            sku: SKU whose stock changes
+            delta: Quantity change
+
+        Returns:
+            New stock level
+        """
+        level, version = self._store.apply_change(sku, delta)
+        with self._lock:
+            self._put(sku, level, version)
+        return level
+
+    def apply_changes(self, sku: str, changes: Mapping[str, int]) -> int:
+        """
+        Write identified quantity changes through, each at most once (see StockStore).
+
+        Args:
+            sku: SKU whose stock changes
+            changes: Quantity change per change ID (e.g. the SQS message it came from)
+
+        Returns:
+            New stock level
+        """
+        level, version = self._store.apply_changes(sku, changes)
+        with self._lock:
+            self._put(sku, level, version)
+        return level
+
+    def invalidate(self, sku: str, version: int) -> bool:
+        """
+        Drop a SKU's entry if it is older than the given version.
+
+        Args:
+            sku: SKU reported as changed
+            version: Version of the stock level carried by the event
+
+        Returns:
+            True if an entry was dropped
+        """
+        with self._lock:
+            slot = self._slots.get(sku)
+            if slot is None or self._versions[slot] >= version:
+                return False
+            self._remove(slot)
+            return True
+
+    def _put(self, sku: str, level: int, version: int) -> None:
+        """Insert or refresh an entry, keeping the newest version. Caller holds the lock."""
+        slot = self._slots.get(sku)
+        if slot is None:
+            if not self._free:
+                self._remove(self._tail)
+                self.evictions += 1
+            slot = self._free.pop()
+            self._slots[sku] = slot
+            self._keys[slot] = sku
+            self._push_front(slot)
+        else:
+            self._touch(slot)
+            if self._versions[slot] > version:
+                return
+        self._levels[slot] = level
+        self._versions[slot] = version
+
+    def _remove(self, slot: int) -> None:
+        """Unlink a slot and return it to the free list. Caller holds the lock."""
+        self._unlink(slot)
+        del self._slots[self._keys[slot]]  # type: ignore[arg-type]
+        self._keys[slot] = None
+        self._free.append(slot)
+
+    def _touch(self, slot: int) -> None:
+        """Mark a slot as most recently used."""
+        if slot != self._head:
+            self._unlink(slot)
+            self._push_front(slot)
+
+    def _unlink(self, slot: int) -> None:
+        prev, nxt = self._prev[slot], self._next[slot]
+        if prev != _NIL:
+            self._next[prev] = nxt
+        else:
+            self._head = nxt
+        if nxt != _NIL:
+            self._prev[nxt] = prev
+        else:
+            self._tail = prev
+        self._prev[slot] = self._next[slot] = _NIL
+
+    def _push_front(self, slot: int) -> None:
+        self._prev[slot] = _NIL
+        self._next[slot] = self._head
+        if self._head != _NIL:
+            self._prev[self._head] = slot
+        self._head = slot
+        if self._tail == _NIL:
+            self._tail = slot
@@ -0,0 +1,180 @@
+"""Level-gated structured JSON logging shared by all Lambdas."""
+
+import functools
+import json
+import logging
+import os
+import random
+import threading
+from collections.abc import Callable
+from typing import Any
+
+# Configure structured logging
+logger = logging.getLogger()
+logger.setLevel(os.environ.get("LOG_LEVEL", "INFO").upper())
+
+# Fraction of sampled (verbose) log lines that are emitted, set per environment
+LOG_SAMPLE_RATE = float(os.environ.get("LOG_SAMPLE_RATE", "1.0"))
+
+# Largest serialized size of a single field before it is truncated
+LOG_MAX_FIELD_BYTES = int(os.environ.get("LOG_MAX_FIELD_BYTES", "8192"))
+
+# Largest buffered batch before it is flushed early (CloudWatch caps events at 256 KB)
+LOG_BUFFER_MAX_BYTES = int(os.environ.get("LOG_BUFFER_MAX_BYTES", str(200 * 1024)))
+
+# Encoders are created once and reused; default=str keeps datetimes and other
+# non-JSON values in AWS responses from failing the log call
+_encode = json.JSONEncoder(default=str).encode
+
+_LEVELS = {
+    "debug": logging.DEBUG,
+    "info": logging.INFO,
+    "warning": logging.WARNING,
+    "error": logging.ERROR,
+    "critical": logging.CRITICAL,
+}
+
+Handler = Callable[[Any, Any], dict[str, Any]]
+
+# Per-invocation buffer of formatted entries; None when not buffering
+_buffer: list[str] | None = None
+_buffer_bytes = 0
+_buffer_levelno = logging.NOTSET
+_buffer_lock = threading.Lock()
+
+
+def _encode_field(value: Any) -> str:
+    """
+    Serialize a single log field, truncating it past LOG_MAX_FIELD_BYTES.
+
+    Truncated fields become a JSON string holding the start of the serialized
+    value followed by a marker with the number of characters dropped.
+    """
+    encoded = _encode(value)
+    if len(encoded) <= LOG_MAX_FIELD_BYTES:
+        return encoded
+    dropped = len(encoded) - LOG_MAX_FIELD_BYTES
+    return _encode(f"{encoded[:LOG_MAX_FIELD_BYTES]}...[truncated {dropped} chars]")
+
+
+def format_entry(level: str, message: str, **kwargs: Any) -> str:
+    """
+    Serialize a structured log entry to a JSON line.
+
+    Args:
+        level: Log level name
+        message: Log message
+        **kwargs: Additional fields, each capped at LOG_MAX_FIELD_BYTES
+
+    Returns:
+        JSON object text
+    """
+    fields = [f'"level": {_encode(level)}', f'"message": {_encode(message)}']
+    fields.extend(f"{_encode(key)}: {_encode_field(value)}" for key, value in kwargs.items())
+    return "{" + ", ".join(fields) + "}"
+
+
+def log_structured(level: str, message: str, **kwargs: Any) -> None:
+    """Log structured JSON messages for better CloudWatch querying."""
+    levelno = _LEVELS[level.lower()]
+    # Check the level before any serialization happens
+    if not logger.isEnabledFor(levelno):
+        return
+    line = format_entry(level, message, **kwargs)
+    if _buffer is None:
+        logger.log(levelno, line)
+        return
+    _buffer_entry(levelno, line)
+
+
+def log_sampled(level: str, message: str, **kwargs: Any) -> None:
+    """
+    Log a verbose structured message for a LOG_SAMPLE_RATE fraction of calls.
+
+    Intended for high-volume lines such as full "received event" dumps.
+    """
+    if LOG_SAMPLE_RATE < 1.0 and random.random() >= LOG_SAMPLE_RATE:
+        return
+    log_structured(level, message, **kwargs)
+
+
+def _buffer_entry(levelno: int, line: str) -> None:
+    """Add a formatted entry to the buffer, flushing on errors or when the size cap is hit."""
+    global _buffer_bytes, _buffer_levelno
+    with _buffer_lock:
+        if _buffer is None:
+            logger.log(levelno, line)
+            return
+        if _buffer and _buffer_bytes + len(line) > LOG_BUFFER_MAX_BYTES:
+            _flush_locked()
+        _buffer.append(line)
+        _buffer_bytes += len(line) + 1
+        _buffer_levelno = max(_buffer_levelno, levelno)
+        # Errors are written out straight away so they survive a crash or timeout
+        if levelno >= logging.ERROR:
+            _flush_locked()
+
+
+def _flush_locked() -> None:
+    """Write the buffered entries as a single log record. Caller holds _buffer_lock."""
+    global _buffer_bytes, _buffer_levelno
+    if not _buffer:
+        return
+    if len(_buffer) == 1:
+        logger.log(_buffer_levelno, _buffer[0])
+    else:
+        # The entries are already JSON; join them instead of re-serializing
+        level_name = logging.getLevelName(_buffer_levelno).lower()
+        logger.log(
+            _buffer_levelno,
+            f'{{"level": {_encode(level_name)}, "message": "Buffered log entries", '
+            f'"entry_count": {len(_buffer)}, "entries": [{", ".join(_buffer)}]}}',
+        )
+    _buffer.clear()
+    _buffer_bytes = 0
+    _buffer_levelno = logging.NOTSET
+
+
+def flush_logs() -> None:
+    """Write out any buffered log entries."""
+    with _buffer_lock:
+        _flush_locked()
+
+
+def buffered_logs(handler: Handler) -> Handler:
+    """
+    Buffer structured log entries for the duration of a handler invocation.
+
+    Entries logged during the invocation are collected and written as one log
+    record when the handler returns or raises, when an error is logged, or
+    when the buffer reaches LOG_BUFFER_MAX_BYTES. A record holding several
+    entries has "message": "Buffered log entries", the highest level among
+    them as "level", and the entries, unchanged, in an "entries" list (see
+    "Structured Logging" in docs/ARCHITECTURE.md for querying them). A
+    wrapped handler called while a buffer is active, e.g. one handler
+    delegating to another, adds to that buffer; only the outermost one
+    flushes it.
+
+    Args:
+        handler: Lambda handler function
+
+    Returns:
+        Wrapped handler
+    """
+
+    @functools.wraps(handler)
+    def wrapper(event: Any, context: Any) -> dict[str, Any]:
+        global _buffer
+        with _buffer_lock:
+            outermost = _buffer is None
+            if outermost:
+                _buffer = []
+        try:
+            return handler(event, context)
+        finally:
+            if outermost:
+                with _buffer_lock:
+                    _flush_locked()
+                    _buffer = None
+
+    return wrapper
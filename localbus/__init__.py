@@ -0,0 +1 @@
+"""Local, in-process stand-ins for the stack's EventBridge routing."""
@@ -0,0 +1,910 @@
+"""
+In-process stand-in for order-processing-bus that runs the real handlers.
+
+LocalBus wires the Lambda handlers together the way the synthesized
+OrderProcessingStack does: API Gateway routes invoke order_receiver,
+EventBridge rules (matched with localbus.event_patterns) invoke notifier
+and document asynchronously and buffer events into the inventory queue,
+and S3 uploads reach document_processor through the default bus. Handlers
+get in-memory EventBridge, SQS and S3 clients; queues honor visibility
+timeouts, SQS event source mappings (batch size, ReportBatchItemFailures)
+and redrive to dead-letter queues. Queue waits are skipped by advancing a
+simulated clock, so a run measures handler and routing cost, not idle time.
+
+Each API request or upload is followed through the fan-out as a Trace,
+from the request until the last handler it caused has finished.
+
+Usage:
+    python -m localbus.bus [--orders 1000] [--uploads 100] [--template template.json]
+"""
+
+import argparse
+import contextlib
+import importlib.util
+import io
+import json
+import os
+import statistics
+import sys
+import time
+import uuid
+from collections import Counter, deque
+from collections.abc import Callable, Iterator, Mapping
+from dataclasses import dataclass, field
+from datetime import UTC, datetime
+from pathlib import Path
+from types import ModuleType
+from typing import Any
+
+from localbus.event_patterns import RuleIndex, rules_from_template, synthesize_template
+
+ACCOUNT_ID = "123456789012"
+REGION = "us-east-1"
+PSEUDO_PARAMETERS = {
+    "AWS::AccountId": ACCOUNT_ID,
+    "AWS::Region": REGION,
+    "AWS::Partition": "aws",
+    "AWS::URLSuffix": "amazonaws.com",
+}
+DEFAULT_BUS = "default"
+
+# Lambda retries a failed asynchronous invocation twice before giving up
+ASYNC_RETRIES = 2
+
+LAMBDAS_DIR = Path(__file__).parent.parent / "lambdas"
+EXAMPLES_DIR = Path(__file__).parent.parent / "docs" / "examples"
+
+# Mirror the Lambda runtime, where the shared layer is on sys.path (/opt/python)
+_SHARED_LAYER = str(LAMBDAS_DIR / "shared" / "python")
+if _SHARED_LAYER not in sys.path:
+    sys.path.insert(0, _SHARED_LAYER)
+
+
+class SimClock:
+    """Monotonic clock that can jump ahead instead of waiting."""
+
+    def __init__(self) -> None:
+        self._offset = 0.0
+
+    def now(self) -> float:
+        """Current time in seconds."""
+        return time.monotonic() + self._offset
+
+    def advance_to(self, when: float) -> None:
+        """Skip ahead to a point in time (no-op if it has already passed)."""
+        self._offset += max(0.0, when - self.now())
+
+
+@dataclass
+class Trace:
+    """
+    One request followed through the pipeline.
+
+    Attributes:
+        start: Clock time the request entered the pipeline
+        end: Clock time the last piece of work it caused finished
+        outstanding: Invocations and queued messages still pending
+        hops: Handler invocations and deliveries it caused
+        failed: True if an invocation gave up or a message was dead-lettered
+    """
+
+    start: float
+    end: float | None = None
+    outstanding: int = 0
+    hops: int = 0
+    failed: bool = False
+
+    @property
+    def latency(self) -> float | None:
+        """End-to-end latency in seconds, once complete."""
+        return None if self.end is None else self.end - self.start
+
+
+@dataclass
+class Message:
+    """An SQS message held by a LocalQueue."""
+
+    message_id: str
+    body: str
+    sent_at: float
+    trace: Trace | None = None
+    receive_count: int = 0
+    visible_at: float = 0.0
+    receipt_handle: str = ""
+
+
+class LocalQueue:
+    """
+    In-memory SQS standard queue.
+
+    Received messages stay in flight until deleted or until their visibility
+    timeout expires, when they become receivable again. With a dead-letter
+    queue, a message received more than max_receive_count times is moved
+    there instead of being delivered.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        url: str,
+        clock: SimClock,
+        visibility_timeout: float = 30,
+        dead_letter: "LocalQueue | None" = None,
+        max_receive_count: int | None = None,
+    ) -> None:
+        self.name = name
+        self.url = url
+        self.visibility_timeout = visibility_timeout
+        self.dead_letter = dead_letter
+        self.max_receive_count = max_receive_count
+        self._clock = clock
+        self._available: deque[Message] = deque()
+        self._in_flight: dict[str, Message] = {}
+
+    def __len__(self) -> int:
+        return len(self._available) + len(self._in_flight)
+
+    def send(self, body: str, trace: Trace | None = None) -> Message:
+        """Enqueue a message body."""
+        message = Message(str(uuid.uuid4()), body, self._clock.now(), trace)
+        self._available.append(message)
+        return message
+
+    def receive(self, max_messages: int = 10) -> tuple[list[Message], list[Message]]:
+        """
+        Receive up to max_messages visible messages.
+
+        Returns:
+            (received messages, messages moved to the dead-letter queue)
+        """
+        now = self._clock.now()
+        for handle, message in list(self._in_flight.items()):
+            if message.visible_at <= now:
+                del self._in_flight[handle]
+                self._available.append(message)
+
+        received: list[Message] = []
+        dead_lettered: list[Message] = []
+        while self._available and len(received) < max_messages:
+            message = self._available.popleft()
+            if (
+                self.dead_letter is not None
+                and self.max_receive_count is not None
+                and message.receive_count >= self.max_receive_count
+            ):
+                self.dead_letter.send(message.body)
+                dead_lettered.append(message)
+                continue
+            message.receive_count += 1
+            message.visible_at = now + self.visibility_timeout
+            message.receipt_handle = str(uuid.uuid4())
+            self._in_flight[message.receipt_handle] = message
+            received.append(message)
+        return received, dead_lettered
+
+    def delete(self, receipt_handle: str) -> Message | None:
+        """Delete an in-flight message."""
+        return self._in_flight.pop(receipt_handle, None)
+
+    def next_visible_at(self) -> float | None:
+        """Clock time at which the next in-flight message becomes visible again."""
+        if self._available:
+            return self._clock.now()
+        return min((m.visible_at for m in self._in_flight.values()), default=None)
+
+
+@dataclass
+class LocalFunction:
+    """A Lambda function of the stack, loaded from lambdas/<name>/index.py."""
+
+    logical_id: str
+    name: str
+    module: ModuleType
+    environment: dict[str, str]
+    timeout: float
+
+    @property
+    def handler(self) -> Callable[[Any, Any], dict[str, Any]]:
+        """The function's handler."""
+        handler: Callable[[Any, Any], dict[str, Any]] = self.module.handler
+        return handler
+
+
+@dataclass
+class EventSourceMapping:
+    """An SQS event source mapping."""
+
+    queue: LocalQueue
+    function: LocalFunction
+    batch_size: int = 10
+    report_batch_item_failures: bool = False
+
+
+@dataclass
+class _LambdaContext:
+    """The parts of the Lambda context object the handlers use."""
+
+    function_name: str
+    deadline: float
+    clock: SimClock
+    request_id: str = field(default_factory=lambda: str(uuid.uuid4()))
+
+    @property
+    def aws_request_id(self) -> str:
+        return self.request_id
+
+    def get_remaining_time_in_millis(self) -> int:
+        return max(int((self.deadline - self.clock.now()) * 1000), 0)
+
+
+class _ClientError(Exception):
+    """Error shaped like botocore's ClientError (an AWS error code in .response)."""
+
+    def __init__(self, code: str, message: str) -> None:
+        super().__init__(f"An error occurred ({code}): {message}")
+        self.response = {"Error": {"Code": code, "Message": message}}
+
+
+class LocalEventsClient:
+    """EventBridge client that publishes to a LocalBus."""
+
+    def __init__(self, bus: "LocalBus") -> None:
+        self._bus = bus
+
+    def put_events(self, Entries: list[dict[str, Any]]) -> dict[str, Any]:
+        results = [self._bus.put_event(entry) for entry in Entries]
+        return {
+            "FailedEntryCount": sum(1 for r in results if "ErrorCode" in r),
+            "Entries": results,
+        }
+
+
+class LocalSqsClient:
+    """SQS client that sends to the LocalBus queues."""
+
+    def __init__(self, bus: "LocalBus") -> None:
+        self._bus = bus
+
+    def send_message(self, QueueUrl: str, MessageBody: str, **_: Any) -> dict[str, Any]:
+        message = self._bus.send_to_queue(QueueUrl, MessageBody)
+        return {"MessageId": message.message_id}
+
+    def send_message_batch(self, QueueUrl: str, Entries: list[dict[str, Any]]) -> dict[str, Any]:
+        successful = []
+        for entry in Entries:
+            message = self._bus.send_to_queue(QueueUrl, entry["MessageBody"])
+            successful.append({"Id": entry["Id"], "MessageId": message.message_id})
+        return {"Successful": successful, "Failed": []}
+
+
+class LocalS3Client:
+    """S3 client backed by the LocalBus object store."""
+
+    def __init__(self, bus: "LocalBus") -> None:
+        self._bus = bus
+
+    def _object(self, bucket: str, key: str) -> dict[str, Any]:
+        stored = self._bus.objects.get((bucket, key))
+        if stored is None:
+            raise _ClientError("404", "Not Found")
+        return stored
+
+    def head_object(self, Bucket: str, Key: str, **_: Any) -> dict[str, Any]:
+        stored = self._object(Bucket, Key)
+        return {k: v for k, v in stored.items() if k != "Body"}
+
+    def get_object(
+        self, Bucket: str, Key: str, Range: str | None = None, **_: Any
+    ) -> dict[str, Any]:
+        stored = self._object(Bucket, Key)
+        body: bytes = stored["Body"]
+        if Range:
+            start_text, _, end_text = Range.removeprefix("bytes=").partition("-")
+            start = int(start_text)
+            end = int(end_text) if end_text else len(body) - 1
+            body = body[start : end + 1]
+        response = {k: v for k, v in stored.items() if k != "Body"}
+        response.update(Body=io.BytesIO(body), ContentLength=len(body))
+        return response
+
+    def put_object(self, Bucket: str, Key: str, Body: bytes | str, **kwargs: Any) -> dict[str, Any]:
+        return self._bus.put_object(Bucket, Key, Body, **kwargs)
+
+
+# Module-level client globals of the handlers (see get_*_client in each index.py)
+_CLIENT_ATTRIBUTES = {
+    "_eventbridge_client": "events",
+    "_events_client": "events",
+    "_sqs_client": "sqs",
+    "_s3_client": "s3",
+}
+
+
+def latency_summary(latencies_ms: list[float]) -> dict[str, float]:
+    """Mean, p50, p95, p99 and max of a list of latencies."""
+    ordered = sorted(latencies_ms)
+    if not ordered:
+        return {"mean": 0.0, "p50": 0.0, "p95": 0.0, "p99": 0.0, "max": 0.0}
+
+    def percentile(p: float) -> float:
+        return ordered[min(int(len(ordered) * p), len(ordered) - 1)]
+
+    return {
+        "mean": statistics.fmean(ordered),
+        "p50": percentile(0.50),
+        "p95": percentile(0.95),
+        "p99": percentile(0.99),
+        "max": ordered[-1],
+    }
+
+
+def _physical_names(template: dict[str, Any]) -> dict[str, str]:
+    """What Ref returns locally for each resource: names, queue URLs and bucket names."""
+    names: dict[str, str] = {}
+    for logical_id, resource in template.get("Resources", {}).items():
+        properties = resource.get("Properties", {})
+        kind = resource.get("Type")
+        if kind == "AWS::SQS::Queue":
+            queue_name = properties.get("QueueName", logical_id)
+            names[logical_id] = f"https://sqs.{REGION}.amazonaws.com/{ACCOUNT_ID}/{queue_name}"
+        elif kind == "AWS::Events::EventBus":
+            names[logical_id] = properties.get("Name", logical_id)
+        elif kind == "AWS::Lambda::Function":
+            names[logical_id] = properties.get("FunctionName", logical_id)
+        elif kind == "AWS::S3::Bucket":
+            bucket_name = _resolve_value(properties.get("BucketName"), names)
+            names[logical_id] = bucket_name if isinstance(bucket_name, str) else logical_id.lower()
+    return names
+
+
+def _resolve_value(value: Any, names: dict[str, str]) -> Any:
+    """Resolve Ref, Fn::GetAtt and Fn::Join in a property value."""
+    if isinstance(value, dict):
+        if "Ref" in value:
+            ref = value["Ref"]
+            return PSEUDO_PARAMETERS.get(ref) or names.get(ref, ref)
+        if "Fn::GetAtt" in value:
+            return names.get(value["Fn::GetAtt"][0], value["Fn::GetAtt"][0])
+        if "Fn::Join" in value:
+            separator, parts = value["Fn::Join"]
+            return separator.join(str(_resolve_value(p, names)) for p in parts)
+    return value
+
+
+@contextlib.contextmanager
+def _environment(variables: Mapping[str, str]) -> Iterator[None]:
+    """Set environment variables for the duration of the block, then restore the old values."""
+    previous = {name: os.environ.get(name) for name in variables}
+    os.environ.update(variables)
+    try:
+        yield
+    finally:
+        for name, value in previous.items():
+            if value is None:
+                os.environ.pop(name, None)
+            else:
+                os.environ[name] = value
+
+
+def _load_handler_module(directory: str) -> ModuleType:
+    """Load lambdas/<directory>/index.py under a name that does not clash with the tests."""
+    module_name = f"localbus_{directory}_index"
+    spec = importlib.util.spec_from_file_location(module_name, LAMBDAS_DIR / directory / "index.py")
+    assert spec is not None and spec.loader is not None
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[module_name] = module
+    spec.loader.exec_module(module)
+    return module
+
+
+class LocalBus:
+    """
+    The stack's event routing, queues and handlers in one process.
+
+    Attributes:
+        clock: Simulated clock used for visibility timeouts and latencies
+        functions: Loaded functions by logical ID
+        queues: Queues by logical ID
+        mappings: SQS event source mappings
+        objects: S3 objects by (bucket, key)
+        deliveries: Events or messages delivered per target logical ID
+        invocations: Handler invocations per function name
+        errors: Failed handler invocations per function name
+        traces: Every request submitted, in submission order
+    """
+
+    def __init__(
+        self,
+        template: dict[str, Any] | None = None,
+        *,
+        quiet: bool = True,
+        environment: Mapping[str, str] | None = None,
+    ) -> None:
+        """
+        Build the pipeline from a synthesized template.
+
+        Each function's environment variables are set only while its module is
+        loaded and while its handler runs, and the previous values are
+        restored afterwards, so they do not leak into the rest of the process.
+
+        Args:
+            template: CloudFormation template of OrderProcessingStack (synthesized if omitted)
+            quiet: Discard the handlers' log and metric output
+            environment: Variables added to every function's environment, overriding
+                the template's (e.g. {"LOG_LEVEL": "DEBUG"})
+        """
+        template = template or synthesize_template()
+        resources: dict[str, Any] = template.get("Resources", {})
+        self.clock = SimClock()
+        self.quiet = quiet
+        self._environment = dict(environment or {})
+        self.objects: dict[tuple[str, str], dict[str, Any]] = {}
+        self.deliveries: Counter[str] = Counter()
+        self.invocations: Counter[str] = Counter()
+        self.errors: Counter[str] = Counter()
+        self.traces: list[Trace] = []
+        self._names = _physical_names(template)
+        self._tasks: deque[tuple[LocalFunction, dict[str, Any], Trace | None, int]] = deque()
+        self._current: Trace | None = None
+        self._clients = {
+            "events": LocalEventsClient(self),
+            "sqs": LocalSqsClient(self),
+            "s3": LocalS3Client(self),
+        }
+
+        self.queues = self._build_queues(resources)
+        self._queues_by_url = {queue.url: queue for queue in self.queues.values()}
+        self.functions = self._load_functions(resources)
+        self.mappings = self._build_mappings(resources)
+        self._consumed = {mapping.queue.url for mapping in self.mappings}
+        self._routes = self._build_routes(resources)
+        # Buckets with EventBridge notifications send Object Created to the default bus
+        self._buckets = {
+            str(_resolve_value(resource["Properties"]["BucketName"], self._names))
+            for resource in resources.values()
+            if resource.get("Type") == "Custom::S3BucketNotifications"
+            and "EventBridgeConfiguration"
+            in resource["Properties"].get("NotificationConfiguration", {})
+        }
+
+        rules = rules_from_template(template, refs=self._names)
+        self._indexes = {
+            bus: RuleIndex(r for r in rules if self._bus_name(r.event_bus) == bus)
+            for bus in {self._bus_name(r.event_bus) for r in rules}
+        }
+
+    def _bus_name(self, logical_id: str | None) -> str:
+        return self._names.get(logical_id, logical_id) if logical_id else DEFAULT_BUS
+
+    def _build_queues(self, resources: dict[str, Any]) -> dict[str, LocalQueue]:
+        queues: dict[str, LocalQueue] = {}
+        pending = [k for k, r in resources.items() if r.get("Type") == "AWS::SQS::Queue"]
+        # Create dead-letter queues before the queues that redrive to them
+        pending.sort(key=lambda k: "RedrivePolicy" in resources[k].get("Properties", {}))
+        for logical_id in pending:
+            properties = resources[logical_id].get("Properties", {})
+            redrive = properties.get("RedrivePolicy", {})
+            dead_letter_id = _resolve_value(redrive.get("deadLetterTargetArn"), {})
+            queues[logical_id] = LocalQueue(
+                name=properties.get("QueueName", logical_id),
+                url=self._names[logical_id],
+                clock=self.clock,
+                visibility_timeout=properties.get("VisibilityTimeout", 30),
+                dead_letter=queues.get(dead_letter_id) if dead_letter_id else None,
+                max_receive_count=redrive.get("maxReceiveCount"),
+            )
+        return queues
+
+    def _load_functions(self, resources: dict[str, Any]) -> dict[str, LocalFunction]:
+        functions: dict[str, LocalFunction] = {}
+        for logical_id, resource in resources.items():
+            properties = resource.get("Properties", {})
+            if resource.get("Type") != "AWS::Lambda::Function":
+                continue
+            # Functions are deployed from lambdas/<name> with "-" in the name as "_"
+            directory = str(properties.get("FunctionName", "")).replace("-", "_")
+            if not directory or not (LAMBDAS_DIR / directory / "index.py").exists():
+                continue  # CDK-provided custom resource handlers
+            variables = properties.get("Environment", {}).get("Variables", {})
+            environment = {k: str(_resolve_value(v, self._names)) for k, v in variables.items()}
+            # The AWS clients are replaced by the in-memory stand-ins below
+            environment["AWS_CLIENT_PREWARM"] = "false"
+            environment.update(self._environment)
+            with _environment(environment):
+                module = _load_handler_module(directory)
+            for attribute, client in _CLIENT_ATTRIBUTES.items():
+                if hasattr(module, attribute):
+                    setattr(module, attribute, self._clients[client])
+            functions[logical_id] = LocalFunction(
+                logical_id=logical_id,
+                name=properties["FunctionName"],
+                module=module,
+                environment=environment,
+                timeout=properties.get("Timeout", 3),
+            )
+        return functions
+
+    def _build_mappings(self, resources: dict[str, Any]) -> list[EventSourceMapping]:
+        mappings = []
+        for resource in resources.values():
+            properties = resource.get("Properties", {})
+            if resource.get("Type") != "AWS::Lambda::EventSourceMapping":
+                continue
+            queue = self.queues.get(_resolve_value(properties.get("EventSourceArn"), {}))
+            function = self.functions.get(_resolve_value(properties.get("FunctionName"), {}))
+            if queue is None or function is None:
+                continue
+            mappings.append(
+                EventSourceMapping(
+                    queue=queue,
+                    function=function,
+                    batch_size=properties.get("BatchSize", 10),
+                    report_batch_item_failures="ReportBatchItemFailures"
+                    in properties.get("FunctionResponseTypes", []),
+                )
+            )
+        return mappings
+
+    def _build_routes(self, resources: dict[str, Any]) -> dict[tuple[str, str], LocalFunction]:
+        """Map (HTTP method, resource path) of the API's Lambda integrations to functions."""
+
+        def path_of(resource_id: str) -> str:
+            resource = resources.get(resource_id)
+            if resource is None or resource.get("Type") != "AWS::ApiGateway::Resource":
+                return ""
+            properties = resource["Properties"]
+            parent = _resolve_value(properties.get("ParentId"), {})
+            return f"{path_of(parent)}/{properties['PathPart']}"
+
+        routes = {}
+        for resource in resources.values():
+            properties = resource.get("Properties", {})
+            if resource.get("Type") != "AWS::ApiGateway::Method":
+                continue
+            uri = properties.get("Integration", {}).get("Uri")
+            parts = uri.get("Fn::Join", ["", []])[1] if isinstance(uri, dict) else []
+            targets = [
+                p["Fn::GetAtt"][0] for p in parts if isinstance(p, dict) and "Fn::GetAtt" in p
+            ]
+            function = self.functions.get(targets[0]) if targets else None
+            if function is not None:
+                resource_id = _resolve_value(properties.get("ResourceId"), {})
+                routes[(properties["HttpMethod"], path_of(resource_id) or "/")] = function
+        return routes
+
+    # -- Entry points ---------------------------------------------------------
+
+    def submit_order(
+        self,
+        body: str | dict[str, Any] | list[Any],
+        path: str = "/orders",
+        headers: dict[str, str] | None = None,
+    ) -> dict[str, Any]:
+        """
+        POST a request body to the API, as API Gateway would invoke the integration.
+
+        Args:
+            body: Request body (dicts and lists are JSON-encoded)
+            path: Resource path, "/orders" or "/orders/bulk"
+            headers: Further request headers (e.g. Idempotency-Key)
+
+        Returns:
+            The handler's API Gateway proxy response
+        """
+        function = self._routes[("POST", path)]
+        text = body if isinstance(body, str) else json.dumps(body)
+        event = {
+            "resource": path,
+            "path": path,
+            "httpMethod": "POST",
+            "headers": {"Content-Type": "application/json", **(headers or {})},
+            "requestContext": {"requestId": str(uuid.uuid4()), "stage": "prod"},
+            "body": text,
+        }
+        trace = self._start_trace()
+        try:
+            response, _ = self._invoke(function, event, trace)
+        finally:
+            self._release(trace)
+        return response or {"statusCode": 502, "body": json.dumps({"message": "Internal error"})}
+
+    def put_object(
+        self,
+        bucket: str,
+        key: str,
+        body: bytes | str,
+        *,
+        ContentType: str = "application/octet-stream",
+        Metadata: dict[str, str] | None = None,
+        **_: Any,
+    ) -> dict[str, Any]:
+        """Store an object and send its Object Created event to the default bus."""
+        data = body.encode() if isinstance(body, str) else body
+        etag = uuid.uuid4().hex
+        self.objects[(bucket, key)] = {
+            "Body": data,
+            "ContentLength": len(data),
+            "ContentType": ContentType,
+            "Metadata": Metadata or {},
+            "ETag": f'"{etag}"',
+            "LastModified": datetime.now(UTC),
+        }
+        if bucket in self._buckets:
+            detail = {
+                "version": "0",
+                "bucket": {"name": bucket},
+                "object": {"key": key, "size": len(data), "etag": etag},
+                "request-id": uuid.uuid4().hex,
+                "requester": ACCOUNT_ID,
+                "reason": "PutObject",
+            }
+            trace = self._current or self._start_trace()
+            try:
+                self._route(DEFAULT_BUS, "aws.s3", "Object Created", detail, [], trace)
+            finally:
+                if trace is not self._current:
+                    self._release(trace)
+        return {"ETag": f'"{etag}"'}
+
+    def upload_document(self, key: str, body: bytes | str, content_type: str) -> dict[str, Any]:
+        """Upload to the stack's documents bucket (see put_object)."""
+        bucket = next(iter(self._buckets))
+        return self.put_object(bucket, key, body, ContentType=content_type)
+
+    def put_event(self, entry: dict[str, Any]) -> dict[str, Any]:
+        """Publish one PutEvents entry and route it; returns the PutEvents result entry."""
+        try:
+            detail = json.loads(entry["Detail"])
+            source, detail_type = entry["Source"], entry["DetailType"]
+        except (KeyError, TypeError, json.JSONDecodeError):
+            return {"ErrorCode": "MalformedDetail", "ErrorMessage": "Detail is not valid JSON"}
+        bus = str(entry.get("EventBusName") or DEFAULT_BUS).rsplit("/", 1)[-1]
+        trace = self._current or self._start_trace()
+        try:
+            event_id = self._route(
+                bus, source, detail_type, detail, entry.get("Resources", []), trace
+            )
+        finally:
+            if trace is not self._current:
+                self._release(trace)
+        return {"EventId": event_id}
+
+    def send_to_queue(self, queue_url: str, body: str) -> Message:
+        """Send a message to a queue by URL."""
+        queue = self._queues_by_url[queue_url]
+        trace = self._current
+        message = queue.send(body, trace)
+        self.deliveries[queue.name] += 1
+        if trace is not None and queue_url in self._consumed:
+            trace.outstanding += 1
+        return message
+
+    # -- Routing and execution ------------------------------------------------
+
+    def _route(
+        self,
+        bus: str,
+        source: str,
+        detail_type: str,
+        detail: dict[str, Any],
+        resources: list[str],
+        trace: Trace,
+    ) -> str:
+        event = {
+            "version": "0",
+            "id": str(uuid.uuid4()),
+            "detail-type": detail_type,
+            "source": source,
+            "account": ACCOUNT_ID,
+            "time": datetime.now(UTC).strftime("%Y-%m-%dT%H:%M:%SZ"),
+            "region": REGION,
+            "resources": resources,
+            "detail": detail,
+        }
+        index = self._indexes.get(bus)
+        for rule in index.match(event) if index else ():
+            for target in rule.targets:
+                self._deliver(target, event, trace)
+        return str(event["id"])
+
+    def _deliver(self, target: str, event: dict[str, Any], trace: Trace) -> None:
+        trace.hops += 1
+        self.deliveries[target] += 1
+        if target in self.functions:
+            # EventBridge invokes Lambda targets asynchronously
+            trace.outstanding += 1
+            self._tasks.append((self.functions[target], event, trace, 0))
+        elif target in self.queues:
+            queue = self.queues[target]
+            queue.send(json.dumps(event), trace)
+            if queue.url in self._consumed:
+                trace.outstanding += 1
+
+    def _start_trace(self) -> Trace:
+        trace = Trace(start=self.clock.now(), outstanding=1)
+        self.traces.append(trace)
+        return trace
+
+    def _release(self, trace: Trace | None) -> None:
+        if trace is None:
+            return
+        trace.outstanding -= 1
+        if trace.outstanding == 0:
+            trace.end = self.clock.now()
+
+    @contextlib.contextmanager
+    def _output(self) -> Iterator[None]:
+        if not self.quiet:
+            yield
+            return
+        sink = io.StringIO()
+        with contextlib.redirect_stdout(sink), contextlib.redirect_stderr(sink):
+            yield
+
+    def _invoke(
+        self, function: LocalFunction, event: Any, trace: Trace | None
+    ) -> tuple[dict[str, Any] | None, Exception | None]:
+        """Invoke a handler; returns (response, None) or (None, error)."""
+        context = _LambdaContext(function.name, self.clock.now() + function.timeout, self.clock)
+        self.invocations[function.name] += 1
+        previous, self._current = self._current, trace
+        try:
+            with _environment(function.environment), self._output():
+                return function.handler(event, context), None
+        except Exception as e:
+            self.errors[function.name] += 1
+            return None, e
+        finally:
+            self._current = previous
+
+    def _run_task(self) -> None:
+        function, event, trace, attempt = self._tasks.popleft()
+        _, error = self._invoke(function, event, trace)
+        if error is not None and attempt < ASYNC_RETRIES:
+            self._tasks.append((function, event, trace, attempt + 1))
+            return
+        if error is not None and trace is not None:
+            trace.failed = True
+        self._release(trace)
+
+    def _poll(self, mapping: EventSourceMapping) -> bool:
+        """Deliver one batch from a mapped queue; returns False if there was nothing to do."""
+        queue = mapping.queue
+        messages, dead_lettered = queue.receive(mapping.batch_size)
+        for message in dead_lettered:
+            if message.trace is not None:
+                message.trace.failed = True
+            self._release(message.trace)
+        if not messages:
+            return bool(dead_lettered)
+
+        arn = f"arn:aws:sqs:{REGION}:{ACCOUNT_ID}:{queue.name}"
+        records = [
+            {
+                "messageId": m.message_id,
+                "receiptHandle": m.receipt_handle,
+                "body": m.body,
+                "attributes": {
+                    "ApproximateReceiveCount": str(m.receive_count),
+                    "SentTimestamp": str(int(m.sent_at * 1000)),
+                },
+                "messageAttributes": {},
+                "eventSource": "aws:sqs",
+                "eventSourceARN": arn,
+                "awsRegion": REGION,
+            }
+            for m in messages
+        ]
+        # The batch may span traces; the first one is credited with the invocation
+        response, error = self._invoke(mapping.function, {"Records": records}, messages[0].trace)
+        if error is not None:
+            return True  # the whole batch becomes visible again after the timeout
+        failed: set[str] = set()
+        if mapping.report_batch_item_failures:
+            failed = {
+                f.get("itemIdentifier", "") for f in (response or {}).get("batchItemFailures", [])
+            }
+        for message in messages:
+            if message.message_id not in failed:
+                queue.delete(message.receipt_handle)
+                if message.trace is not None:
+                    message.trace.hops += 1
+                self._release(message.trace)
+        return True
+
+    def run(self) -> None:
+        """Process invocations and queue batches until no work is left."""
+        while True:
+            if self._tasks:
+                self._run_task()
+                continue
+            if any(self._poll(mapping) for mapping in self.mappings):
+                continue
+            waits = [
+                when
+                for mapping in self.mappings
+                if (when := mapping.queue.next_visible_at()) is not None
+            ]
+            if not waits:
+                return
+            self.clock.advance_to(min(waits))
+
+    # -- Reporting ------------------------------------------------------------
+
+    def queues_by_name(self) -> dict[str, LocalQueue]:
+        """Queues keyed by queue name."""
+        return {queue.name: queue for queue in self.queues.values()}
+
+    def report(self, elapsed: float) -> dict[str, Any]:
+        """
+        Summarize a run.
+
+        Args:
+            elapsed: Wall-clock seconds the run took
+
+        Returns:
+            Request counts, throughput, latency percentiles (ms), invocations,
+            deliveries and queue depths
+        """
+        latencies = [t.latency * 1000 for t in self.traces if t.latency is not None]
+        return {
+            "requests": len(self.traces),
+            "completed": len(latencies),
+            "failed": sum(1 for t in self.traces if t.failed),
+            "throughput_rps": len(self.traces) / elapsed if elapsed else 0.0,
+            "latency_ms": latency_summary(latencies),
+            "invocations": dict(self.invocations),
+            "errors": dict(self.errors),
+            "deliveries": dict(self.deliveries),
+            "queue_depths": {queue.name: len(queue) for queue in self.queues.values()},
+        }
+
+
+def demo_orders(count: int) -> Iterator[str]:
+    """
+    Yield count order bodies built from the demo_1 and demo_2 examples, alternating.
+
+    Each order gets its own orderId, so order_receiver does not replay an
+    identical earlier body from its idempotency cache.
+    """
+    examples = [
+        json.loads((EXAMPLES_DIR / name).read_text())
+        for name in ("demo_1_create_order.json", "demo_2_update_order.json")
+    ]
+    for i in range(count):
+        yield json.dumps({**examples[i % len(examples)], "orderId": f"ORD-{i:05d}"})
+
+
+def main() -> None:
+    """Push the example orders and uploads through the pipeline and print a report."""
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--orders", type=int, default=1000, help="Orders to submit")
+    parser.add_argument("--uploads", type=int, default=100, help="Documents to upload")
+    parser.add_argument(
+        "--in-flight", type=int, default=10, help="Requests submitted before the bus is drained"
+    )
+    parser.add_argument("--template", help="Synthesized template JSON (default: synthesize)")
+    args = parser.parse_args()
+
+    template = None
+    if args.template:
+        with open(args.template) as f:
+            template = json.load(f)
+    bus = LocalBus(template)
+    invoice = (EXAMPLES_DIR / "demo_3_invoice.edi").read_bytes()
+
+    start = time.perf_counter()
+    for i, order in enumerate(demo_orders(args.orders)):
+        bus.submit_order(order)
+        if (i + 1) % args.in_flight == 0:
+            bus.run()
+    for i in range(args.uploads):
+        bus.upload_document(f"inbound/ORD-{i:05d}/invoice.edi", invoice, "application/edi-x12")
+        if (i + 1) % args.in_flight == 0:
+            bus.run()
+    bus.run()
+    print(json.dumps(bus.report(time.perf_counter() - start), indent=2))
+
+
+if __name__ == "__main__":
+    main()
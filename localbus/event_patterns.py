@@ -0,0 +1,488 @@
+"""
+EventBridge event pattern matching against the rules of the synthesized stack.
+
+Rules are loaded from the CloudFormation template of OrderProcessingStack
+and compiled into a RuleIndex keyed by field path, so matching an event
+only touches the conditions on the fields the event actually carries
+instead of evaluating every rule in turn.
+
+Supported matchers: exact values (string sets, numbers, booleans, null),
+"prefix", "suffix", "equals-ignore-case", "anything-but" (values, "prefix"
+or "suffix"), "numeric" and "exists".
+
+Usage:
+    python -m localbus.event_patterns event.json [--template template.json]
+"""
+
+import argparse
+import json
+import sys
+from collections.abc import Callable, Iterable
+from dataclasses import dataclass
+from typing import Any
+
+Path = tuple[str, ...]
+Predicate = Callable[[Any], bool]
+
+_NUMERIC_OPS: dict[str, Callable[[float, float], bool]] = {
+    "=": lambda a, b: a == b,
+    "<": lambda a, b: a < b,
+    "<=": lambda a, b: a <= b,
+    ">": lambda a, b: a > b,
+    ">=": lambda a, b: a >= b,
+}
+
+
+@dataclass(frozen=True)
+class Rule:
+    """
+    An EventBridge rule.
+
+    Attributes:
+        name: Rule name (or logical ID when the rule has no name)
+        pattern: Event pattern with intrinsic functions resolved
+        targets: Logical IDs of the resources the rule targets
+        event_bus: Logical ID of the event bus the rule belongs to
+    """
+
+    name: str
+    pattern: dict[str, Any]
+    targets: tuple[str, ...] = ()
+    event_bus: str | None = None
+
+
+def _is_number(value: Any) -> bool:
+    return isinstance(value, int | float) and not isinstance(value, bool)
+
+
+def _value_key(value: Any) -> tuple[str, Any]:
+    """Hashable key for exact matching that keeps "5", 5 and true distinct."""
+    if isinstance(value, bool):
+        return ("b", value)
+    if _is_number(value):
+        return ("n", float(value))
+    if value is None:
+        return ("z", None)
+    return ("s", value)
+
+
+def _numeric_predicate(spec: list[Any]) -> Predicate:
+    if not spec or len(spec) % 2:
+        raise ValueError(f"Invalid numeric matcher: {spec!r}")
+    checks = []
+    for op, bound in zip(spec[::2], spec[1::2], strict=True):
+        if op not in _NUMERIC_OPS or not _is_number(bound):
+            raise ValueError(f"Invalid numeric matcher: {spec!r}")
+        checks.append((_NUMERIC_OPS[op], float(bound)))
+    return lambda value: _is_number(value) and all(check(value, b) for check, b in checks)
+
+
+def _string_predicate(kind: str, operand: Any) -> Predicate:
+    if not isinstance(operand, str):
+        raise ValueError(f"Invalid {kind} matcher: {operand!r}")
+    if kind == "prefix":
+        return lambda value: isinstance(value, str) and value.startswith(operand)
+    if kind == "suffix":
+        return lambda value: isinstance(value, str) and value.endswith(operand)
+    lowered = operand.lower()
+    return lambda value: isinstance(value, str) and value.lower() == lowered
+
+
+def _anything_but_predicate(operand: Any) -> Predicate:
+    if isinstance(operand, dict):
+        (kind, inner), *rest = operand.items()
+        if rest or kind not in ("prefix", "suffix"):
+            raise ValueError(f"Invalid anything-but matcher: {operand!r}")
+        matches = _string_predicate(kind, inner)
+        return lambda value: isinstance(value, str) and not matches(value)
+    excluded = {_value_key(v) for v in (operand if isinstance(operand, list) else [operand])}
+    return lambda value: _value_key(value) not in excluded
+
+
+def compile_matcher(matcher: Any) -> Predicate | bool | None:
+    """
+    Compile one element of a pattern's value array.
+
+    Args:
+        matcher: A literal value or a single-key matcher object
+
+    Returns:
+        None for a literal (matched by exact value), a bool for "exists",
+        otherwise a predicate over one event value
+
+    Raises:
+        ValueError: If the matcher is not supported or malformed
+    """
+    if not isinstance(matcher, dict):
+        return None
+    if len(matcher) != 1:
+        raise ValueError(f"Matcher must have exactly one key: {matcher!r}")
+    ((kind, operand),) = matcher.items()
+    if kind == "exists":
+        if not isinstance(operand, bool):
+            raise ValueError(f"Invalid exists matcher: {matcher!r}")
+        return operand
+    if kind == "numeric":
+        return _numeric_predicate(operand)
+    if kind == "anything-but":
+        return _anything_but_predicate(operand)
+    if kind in ("prefix", "suffix", "equals-ignore-case"):
+        return _string_predicate(kind, operand)
+    raise ValueError(f"Unsupported matcher: {kind}")
+
+
+def pattern_conditions(pattern: dict[str, Any], prefix: Path = ()) -> Iterable[tuple[Path, list]]:
+    """
+    Flatten a pattern into (field path, matcher array) leaf conditions.
+
+    Raises:
+        ValueError: If a leaf is not a non-empty array
+    """
+    for key, value in pattern.items():
+        if key.startswith("$"):
+            raise ValueError(f"Unsupported pattern operator: {key}")
+        path = (*prefix, key)
+        if isinstance(value, dict):
+            yield from pattern_conditions(value, path)
+        elif isinstance(value, list) and value:
+            yield path, value
+        else:
+            raise ValueError(f"Pattern field {'.'.join(path)} must be a non-empty array")
+
+
+def _event_values(event: Any, path: Path) -> list[Any] | None:
+    """Leaf values at a path (arrays are flattened), or None if the path is absent."""
+    nodes = [event]
+    for key in path:
+        next_nodes = []
+        for node in nodes:
+            if isinstance(node, list):
+                next_nodes.extend(n[key] for n in node if isinstance(n, dict) and key in n)
+            elif isinstance(node, dict) and key in node:
+                next_nodes.append(node[key])
+        nodes = next_nodes
+    values: list[Any] = []
+    for node in nodes:
+        if isinstance(node, list):
+            values.extend(v for v in node if not isinstance(v, dict | list))
+        elif not isinstance(node, dict):
+            values.append(node)
+    return values or None
+
+
+def compile_condition(matchers: list[Any]) -> Callable[[list[Any] | None], bool]:
+    """
+    Compile a leaf condition (a pattern's value array) into an evaluator.
+
+    Args:
+        matchers: The array of literals and matcher objects for one field
+
+    Returns:
+        Function taking the event's values at the field (None if absent) and
+        returning True if any matcher matches
+    """
+    literals: set[tuple[str, Any]] = set()
+    predicates: list[Predicate] = []
+    exists: set[bool] = set()
+    for matcher in matchers:
+        compiled = compile_matcher(matcher)
+        if compiled is None:
+            literals.add(_value_key(matcher))
+        elif isinstance(compiled, bool):
+            exists.add(compiled)
+        else:
+            predicates.append(compiled)
+
+    def evaluate(values: list[Any] | None) -> bool:
+        if values is None:
+            return False in exists
+        if True in exists:
+            return True
+        return any(
+            _value_key(value) in literals or any(p(value) for p in predicates) for value in values
+        )
+
+    return evaluate
+
+
+def compile_pattern(pattern: dict[str, Any]) -> Callable[[dict[str, Any]], bool]:
+    """
+    Compile one pattern for evaluation on its own, without an index.
+
+    This is the straightforward per-rule evaluation; RuleIndex returns the
+    same results for many rules at once.
+
+    Args:
+        pattern: EventBridge event pattern
+
+    Returns:
+        Function returning True if an event matches the pattern
+    """
+    conditions = [
+        (path, compile_condition(matchers)) for path, matchers in pattern_conditions(pattern)
+    ]
+    return lambda event: all(evaluate(_event_values(event, path)) for path, evaluate in conditions)
+
+
+def match_pattern(pattern: dict[str, Any], event: dict[str, Any]) -> bool:
+    """Return True if an event matches a pattern (see compile_pattern)."""
+    return compile_pattern(pattern)(event)
+
+
+class _PathIndex:
+    """The literal and prefix matchers of every indexed condition on one field path."""
+
+    __slots__ = ("exact", "prefixes", "max_prefix")
+
+    def __init__(self) -> None:
+        self.exact: dict[tuple[str, Any], list[int]] = {}
+        self.prefixes: dict[str, list[int]] = {}
+        self.max_prefix = -1
+
+
+class RuleIndex:
+    """
+    Rules compiled into per-field-path indexes.
+
+    Identical leaf conditions are shared between rules and each distinct
+    condition gets an ID. Conditions made only of literals and prefixes are
+    indexed per path: literals in a dict, prefixes in a dict looked up with
+    each prefix of the event value. Every rule is anchored on its most
+    selective indexed condition (the one shared by the fewest rules), and
+    only rules whose anchor is satisfied have their remaining conditions
+    checked; numeric, anything-but and other matchers are evaluated only for
+    those candidates. The work per event therefore depends on the event's
+    fields and the candidate rules, not on the total number of rules.
+    """
+
+    def __init__(self, rules: Iterable[Rule]) -> None:
+        """
+        Compile rules into the index.
+
+        Args:
+            rules: Rules to index
+
+        Raises:
+            ValueError: If a rule's pattern is empty or uses an unsupported matcher
+        """
+        self.rules: list[Rule] = list(rules)
+        self._paths: dict[Path, _PathIndex] = {}
+        self._prefixes: set[Path] = set()
+        self._conditions: list[tuple[Path, Callable[[list[Any] | None], bool]]] = []
+        self._indexed: list[bool] = []
+        self._rule_conditions: list[tuple[int, ...]] = []
+        self._anchored: dict[int, list[int]] = {}
+        # Anchors that could not be indexed; evaluated for every event
+        self._eager: list[int] = []
+
+        condition_ids: dict[tuple[Path, str], int] = {}
+        shared: list[int] = []
+        for rule in self.rules:
+            conditions = []
+            for path, matchers in pattern_conditions(rule.pattern):
+                key = (path, json.dumps(matchers, sort_keys=True))
+                condition = condition_ids.get(key)
+                if condition is None:
+                    condition = condition_ids[key] = len(self._conditions)
+                    self._add_condition(path, matchers)
+                    shared.append(0)
+                shared[condition] += 1
+                conditions.append(condition)
+            if not conditions:
+                raise ValueError(f"Rule {rule.name} has an empty event pattern")
+            self._rule_conditions.append(tuple(conditions))
+
+        for rule_id, conditions in enumerate(self._rule_conditions):
+            anchor = min(conditions, key=lambda c: (not self._indexed[c], shared[c]))
+            if anchor not in self._anchored and not self._indexed[anchor]:
+                self._eager.append(anchor)
+            self._anchored.setdefault(anchor, []).append(rule_id)
+
+    def _add_condition(self, path: Path, matchers: list[Any]) -> None:
+        """Register a distinct condition, indexing it if it has only literals and prefixes."""
+        condition = len(self._conditions)
+        self._conditions.append((path, compile_condition(matchers)))
+        self._prefixes.update(path[:i] for i in range(1, len(path) + 1))
+        indexable = all(
+            not isinstance(m, dict) or (list(m) == ["prefix"] and isinstance(m["prefix"], str))
+            for m in matchers
+        )
+        self._indexed.append(indexable)
+        if not indexable:
+            return
+        index = self._paths.setdefault(path, _PathIndex())
+        for matcher in matchers:
+            if isinstance(matcher, dict):
+                prefix = matcher["prefix"]
+                index.prefixes.setdefault(prefix, []).append(condition)
+                index.max_prefix = max(index.max_prefix, len(prefix))
+            else:
+                index.exact.setdefault(_value_key(matcher), []).append(condition)
+
+    def match(self, event: dict[str, Any]) -> list[Rule]:
+        """
+        Find the rules whose pattern matches an event.
+
+        Args:
+            event: Event as delivered by EventBridge
+
+        Returns:
+            Matching rules in the order they were indexed
+        """
+        satisfied: set[int] = set()
+        values: dict[Path, list[Any]] = {}
+        self._visit(event, (), satisfied, values)
+
+        failed: set[int] = set()
+
+        def holds(condition: int) -> bool:
+            if condition in satisfied:
+                return True
+            if self._indexed[condition] or condition in failed:
+                return False
+            path, evaluate = self._conditions[condition]
+            if evaluate(values.get(path)):
+                satisfied.add(condition)
+                return True
+            failed.add(condition)
+            return False
+
+        anchors = [c for c in satisfied if c in self._anchored]
+        anchors.extend(c for c in self._eager if holds(c))
+        matched = [
+            rule_id
+            for anchor in anchors
+            for rule_id in self._anchored[anchor]
+            if all(holds(c) for c in self._rule_conditions[rule_id])
+        ]
+        matched.sort()
+        return [self.rules[rule_id] for rule_id in matched]
+
+    def _visit(
+        self, node: Any, path: Path, satisfied: set[int], values: dict[Path, list[Any]]
+    ) -> None:
+        """Walk the parts of the event that lead to a condition's path, indexing leaf values."""
+        if isinstance(node, list):
+            for item in node:
+                self._visit(item, path, satisfied, values)
+            return
+        if isinstance(node, dict):
+            for key, value in node.items():
+                child = (*path, key)
+                if child in self._prefixes:
+                    self._visit(value, child, satisfied, values)
+            return
+        values.setdefault(path, []).append(node)
+        index = self._paths.get(path)
+        if index is None:
+            return
+        conditions = index.exact.get(_value_key(node))
+        if conditions:
+            satisfied.update(conditions)
+        if index.max_prefix >= 0 and isinstance(node, str):
+            for length in range(min(len(node), index.max_prefix) + 1):
+                conditions = index.prefixes.get(node[:length])
+                if conditions:
+                    satisfied.update(conditions)
+
+
+def _referenced_id(value: Any) -> str | None:
+    """Logical ID referenced by an intrinsic function (Ref, Fn::GetAtt or inside Fn::Join)."""
+    if isinstance(value, dict):
+        if "Ref" in value:
+            return str(value["Ref"])
+        if "Fn::GetAtt" in value:
+            return str(value["Fn::GetAtt"][0])
+        for inner in value.values():
+            found = _referenced_id(inner)
+            if found and not found.startswith("AWS::"):
+                return found
+    elif isinstance(value, list):
+        for inner in value:
+            found = _referenced_id(inner)
+            if found and not found.startswith("AWS::"):
+                return found
+    return None
+
+
+def _resolve(value: Any, refs: dict[str, str]) -> Any:
+    """Replace intrinsic functions in a pattern with concrete values."""
+    if isinstance(value, dict):
+        logical_id = _referenced_id(value) if ("Ref" in value or "Fn::GetAtt" in value) else None
+        if logical_id is not None:
+            return refs.get(logical_id, logical_id)
+        return {k: _resolve(v, refs) for k, v in value.items()}
+    if isinstance(value, list):
+        return [_resolve(v, refs) for v in value]
+    return value
+
+
+def rules_from_template(template: dict[str, Any], refs: dict[str, str] | None = None) -> list[Rule]:
+    """
+    Load the EventBridge rules of a CloudFormation template.
+
+    Args:
+        template: Synthesized CloudFormation template
+        refs: Concrete values for logical IDs referenced in patterns (e.g. the
+            documents bucket name); unresolved references become the logical ID
+
+    Returns:
+        One Rule per AWS::Events::Rule resource with an event pattern
+    """
+    rules = []
+    for logical_id, resource in template.get("Resources", {}).items():
+        properties = resource.get("Properties", {})
+        if resource.get("Type") != "AWS::Events::Rule" or "EventPattern" not in properties:
+            continue
+        targets = tuple(
+            target_id
+            for target in properties.get("Targets", [])
+            if (target_id := _referenced_id(target.get("Arn"))) is not None
+        )
+        rules.append(
+            Rule(
+                name=properties.get("Name", logical_id),
+                pattern=_resolve(properties["EventPattern"], refs or {}),
+                targets=targets,
+                event_bus=_referenced_id(properties.get("EventBusName")),
+            )
+        )
+    return rules
+
+
+def synthesize_template() -> dict[str, Any]:
+    """Synthesize OrderProcessingStack and return its CloudFormation template."""
+    import aws_cdk as cdk
+    from aws_cdk.assertions import Template
+
+    from infrastructure.order_processing_stack import OrderProcessingStack
+
+    stack = OrderProcessingStack(cdk.App(), "OrderProcessingStack")
+    template: dict[str, Any] = Template.from_stack(stack).to_json()
+    return template
+
+
+def main() -> None:
+    """Print the rules (and their targets) that an event matches."""
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("event", help="Event or order request body JSON file ('-' for stdin)")
+    parser.add_argument("--template", help="Synthesized template JSON (default: synthesize)")
+    args = parser.parse_args()
+
+    with open(args.event) if args.event != "-" else sys.stdin as f:
+        event = json.load(f)
+    if "detail-type" not in event:
+        # An API request body: match it as the order event order_receiver would publish
+        event = {"source": "public.api", "detail-type": "order.received.v1", "detail": event}
+    if args.template:
+        with open(args.template) as f:
+            template = json.load(f)
+    else:
+        template = synthesize_template()
+
+    for rule in RuleIndex(rules_from_template(template)).match(event):
+        print(f"{rule.name}: {', '.join(rule.targets)}")
+
+
+if __name__ == "__main__":
+    main()
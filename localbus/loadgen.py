@@ -0,0 +1,503 @@
+"""
+Load generator and replay harness for the order pipeline.
+
+Builds synthetic orders from docs/examples/demo_1_create_order.json and
+demo_2_update_order.json, and document uploads in the formats
+document_processor reads (valid X12 850s, CSV, JSON, XML and PDF), varying
+payload size, purpose, price, priority and region. Uploads reach
+document_processor through the Object Created event the bucket sends.
+Requests are sent at a target rate (uniform or Poisson arrivals) either
+straight into the handlers through an in-process LocalBus or over HTTP, to
+the local shim served by this module or to a deployed API.
+
+Latency is measured from each request's scheduled send time, so when the
+target cannot keep up the queueing delay shows up in the percentiles
+instead of silently lowering the offered rate.
+
+Usage:
+    python -m localbus.loadgen run --rate 200 --duration 10
+    python -m localbus.loadgen run --rate 50 --count 500 --url http://127.0.0.1:8080
+    python -m localbus.loadgen run --count 1000 --record workload.jsonl
+    python -m localbus.loadgen run --replay workload.jsonl --speed 2
+    python -m localbus.loadgen serve --port 8080
+"""
+
+import argparse
+import copy
+import json
+import random
+import threading
+import time
+import urllib.error
+import urllib.request
+import uuid
+from collections import Counter
+from collections.abc import Iterable, Iterator
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import asdict, dataclass
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Any, Protocol
+
+from localbus.bus import EXAMPLES_DIR, LocalBus, latency_summary
+
+PURPOSES = {"create": 0.7, "update": 0.2, "cancel": 0.1}
+PRIORITIES = {"low": 0.2, "normal": 0.6, "high": 0.15, "urgent": 0.05}
+REGIONS = {"us-east-1": 0.5, "us-west-2": 0.3, "eu-west-1": 0.15, "ap-southeast-2": 0.05}
+DOCUMENT_TYPES = {
+    "edi": ("text/plain", 0.4),
+    "csv": ("text/csv", 0.25),
+    "json": ("application/json", 0.15),
+    "xml": ("application/xml", 0.1),
+    "pdf": ("application/pdf", 0.1),
+}
+DEFAULT_MIX = {"order": 0.85, "bulk": 0.05, "upload": 0.1}
+
+
+@dataclass
+class Request:
+    """
+    One request of a workload.
+
+    Attributes:
+        kind: "order", "bulk" or "upload"
+        offset: Seconds after the start of the run at which it is sent
+        path: API resource path (orders) or object key (uploads)
+        body: Request body or object content
+        content_type: Content type of the body
+    """
+
+    kind: str
+    offset: float
+    path: str
+    body: str
+    content_type: str = "application/json"
+
+
+def _pick(rng: random.Random, weights: dict[str, float]) -> str:
+    return rng.choices(list(weights), weights=list(weights.values()))[0]
+
+
+def _load_example(name: str) -> dict[str, Any]:
+    with open(EXAMPLES_DIR / name) as f:
+        example: dict[str, Any] = json.load(f)
+    return example
+
+
+class WorkloadGenerator:
+    """Synthetic orders and document uploads built from the docs/examples payloads."""
+
+    def __init__(
+        self,
+        seed: int = 0,
+        sizes_kb: Iterable[float] = (1,),
+        mix: dict[str, float] | None = None,
+        bulk_size: int = 10,
+    ) -> None:
+        """
+        Create a generator.
+
+        Args:
+            seed: Random seed; the same seed yields the same workload
+            sizes_kb: Payload sizes to choose from (uniformly), in KB
+            mix: Relative weights of "order", "bulk" and "upload" requests
+            bulk_size: Orders per /orders/bulk request
+        """
+        self.rng = random.Random(seed)
+        self.sizes_kb = list(sizes_kb)
+        self.mix = mix or DEFAULT_MIX
+        self.bulk_size = bulk_size
+        self._orders = {
+            "create": _load_example("demo_1_create_order.json"),
+            "update": _load_example("demo_2_update_order.json"),
+        }
+        self._sequence = 0
+
+    def _size_bytes(self) -> int:
+        return int(self.rng.choice(self.sizes_kb) * 1024)
+
+    def order(self, size_bytes: int | None = None) -> dict[str, Any]:
+        """
+        Build one order request body.
+
+        The purpose, price, priority and region (the fields the stack's rules
+        filter on) are drawn from production-like distributions, and line
+        items are added until the encoded order reaches size_bytes.
+        """
+        self._sequence += 1
+        purpose = _pick(self.rng, PURPOSES)
+        order = copy.deepcopy(self._orders["update" if purpose == "update" else "create"])
+        # Prices are long-tailed: most orders are small, a few exceed the high-value threshold
+        price = round(min(self.rng.lognormvariate(6.5, 1.3), 250_000), 2)
+        order.update(
+            orderId=f"ORD-{self._sequence:08d}",
+            purpose=purpose,
+            price=price,
+            priority=_pick(self.rng, PRIORITIES),
+            region=_pick(self.rng, REGIONS),
+            items=[],
+        )
+        reference = uuid.UUID(int=self.rng.getrandbits(128)).hex[:12]
+        order["order"].update(price=price, referenceNumber=f"REF-{reference}")
+
+        target = size_bytes if size_bytes is not None else self._size_bytes()
+        size = len(json.dumps(order))
+        while size < target:
+            item = {
+                "sku": f"W-{self.rng.randint(0, 9999):04d}",
+                "quantity": self.rng.randint(1, 5),
+                "description": "Pallet of assorted widgets, shrink-wrapped",
+            }
+            # Items after the first are preceded by ", "
+            size += len(json.dumps(item)) + (2 if order["items"] else 0)
+            order["items"].append(item)
+        return order
+
+    def upload(self, size_bytes: int | None = None) -> tuple[str, str, str]:
+        """
+        Build one document upload.
+
+        Returns:
+            (object key "inbound/<orderId>/<file>", content, content type)
+        """
+        self._sequence += 1
+        extension = self.rng.choices(
+            list(DOCUMENT_TYPES), weights=[w for _, w in DOCUMENT_TYPES.values()]
+        )[0]
+        content_type = DOCUMENT_TYPES[extension][0]
+        order_id = f"ORD-{self._sequence:08d}"
+        target = size_bytes if size_bytes is not None else self._size_bytes()
+        header, row, footer = {
+            "edi": (
+                "ISA*00*          *00*          *ZZ*SENDER         *ZZ*RECEIVER       "
+                "*260318*1430*U*00401*000000001*0*P*>~GS*PO*SENDER*RECEIVER*20260318*1430*1*X"
+                f"*004010~ST*850*0001~BEG*00*SA*{order_id}**20260318~",
+                "PO1*1*10*EA*9.99**VP*W-0001~",
+                "CTT*{lines}~SE*{segments}*0001~GE*1*1~IEA*1*000000001~",
+            ),
+            "csv": ("orderId,sku,quantity,price\n", f"{order_id},W-0001,10,9.99\n", ""),
+            "json": (f'{{"orderId": "{order_id}", "lines": [', '{"sku": "W-0001"}, ', "{}]}"),
+            "xml": ("<?xml version='1.0'?><order>", "<line sku='W-0001' qty='10'/>", "</order>"),
+            "pdf": ("%PDF-1.4\n", "0 0 0 rg 0 0 612 792 re f\n", "%%EOF\n"),
+        }[extension]
+        repeats = max((target - len(header) - len(footer)) // len(row), 1)
+        footer = footer.replace("{lines}", str(repeats)).replace("{segments}", str(repeats + 4))
+        content = header + row * repeats + footer
+        return f"inbound/{order_id}/document.{extension}", content, content_type
+
+    def requests(self, count: int, rate: float, arrivals: str = "poisson") -> Iterator[Request]:
+        """
+        Generate a workload.
+
+        Args:
+            count: Number of requests
+            rate: Target requests per second
+            arrivals: "uniform" (fixed spacing) or "poisson" (exponential gaps)
+
+        Yields:
+            Requests in send order
+        """
+        offset = 0.0
+        for _ in range(count):
+            kind = _pick(self.rng, self.mix)
+            if kind == "upload":
+                key, body, content_type = self.upload()
+                yield Request(kind, offset, key, body, content_type)
+            elif kind == "bulk":
+                orders = [self.order() for _ in range(self.bulk_size)]
+                yield Request(kind, offset, "/orders/bulk", json.dumps(orders))
+            else:
+                yield Request(kind, offset, "/orders", json.dumps(self.order()))
+            offset += self.rng.expovariate(rate) if arrivals == "poisson" else 1 / rate
+
+
+def save_workload(requests: Iterable[Request], path: Path | str) -> None:
+    """Record a workload as JSON lines for later replay."""
+    with open(path, "w") as f:
+        for request in requests:
+            f.write(json.dumps(asdict(request)) + "\n")
+
+
+def load_workload(path: Path | str) -> list[Request]:
+    """Load a workload recorded with save_workload."""
+    with open(path) as f:
+        return [Request(**json.loads(line)) for line in f if line.strip()]
+
+
+class Driver(Protocol):
+    """Sends one request and returns its status code."""
+
+    def send(self, request: Request) -> int: ...
+
+
+class DirectDriver:
+    """Calls the handlers in-process through a LocalBus."""
+
+    def __init__(self, bus: LocalBus, in_flight: int = 10) -> None:
+        """
+        Create a driver.
+
+        Args:
+            bus: Pipeline to drive
+            in_flight: Requests accepted before the downstream fan-out is drained
+        """
+        self.bus = bus
+        self.in_flight = in_flight
+        self._undrained = 0
+
+    def send(self, request: Request) -> int:
+        """Invoke the API handler (or upload), draining the bus every in_flight requests."""
+        if request.kind == "upload":
+            self.bus.upload_document(request.path, request.body.encode(), request.content_type)
+            status = 200
+        else:
+            status = int(self.bus.submit_order(request.body, path=request.path)["statusCode"])
+        self._undrained += 1
+        if self._undrained >= self.in_flight:
+            self.drain()
+        return status
+
+    def drain(self) -> None:
+        """Run the downstream fan-out of the requests sent so far."""
+        self.bus.run()
+        self._undrained = 0
+
+
+class HttpDriver:
+    """Sends requests over HTTP to the local shim or a deployed API."""
+
+    def __init__(self, base_url: str, timeout: float = 30) -> None:
+        self.base_url = base_url.rstrip("/")
+        self.timeout = timeout
+
+    def send(self, request: Request) -> int:
+        """POST orders to the API path; PUT uploads to /documents/<key> (shim only)."""
+        if request.kind == "upload":
+            url, method = f"{self.base_url}/documents/{request.path}", "PUT"
+        else:
+            url, method = f"{self.base_url}{request.path}", "POST"
+        http_request = urllib.request.Request(
+            url,
+            data=request.body.encode(),
+            method=method,
+            headers={"Content-Type": request.content_type},
+        )
+        try:
+            with urllib.request.urlopen(http_request, timeout=self.timeout) as response:
+                response.read()
+                return int(response.status)
+        except urllib.error.HTTPError as e:
+            return int(e.code)
+
+
+def run_load(
+    requests: Iterable[Request],
+    driver: Driver,
+    *,
+    speed: float = 1.0,
+    concurrency: int = 1,
+) -> dict[str, Any]:
+    """
+    Send a workload at its scheduled offsets and measure the results.
+
+    Args:
+        requests: Requests with offsets (from WorkloadGenerator.requests or a recording)
+        driver: Where to send them
+        speed: Offset divisor; 2.0 replays twice as fast
+        concurrency: Requests that may be outstanding at once (HTTP drivers)
+
+    Returns:
+        Request and status counts, offered and achieved rates and latency percentiles (ms)
+    """
+    latencies: list[float] = []
+    statuses: Counter[str] = Counter()
+    kinds: Counter[str] = Counter()
+    lock = threading.Lock()
+    drain = getattr(driver, "drain", None)
+
+    def send(request: Request, scheduled: float) -> None:
+        try:
+            status = str(driver.send(request))
+        except Exception as e:
+            status = type(e).__name__
+        finished = time.perf_counter()
+        with lock:
+            latencies.append((finished - scheduled) * 1000)
+            statuses[status] += 1
+            kinds[request.kind] += 1
+
+    start = time.perf_counter()
+    first_offset: float | None = None
+    last_offset = 0.0
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        for request in requests:
+            last_offset = request.offset / speed
+            if first_offset is None:
+                first_offset = last_offset
+            scheduled = start + last_offset
+            delay = scheduled - time.perf_counter()
+            if delay > 0 and callable(drain):
+                # Use idle time to run the fan-out of the requests already sent
+                drain()
+                delay = scheduled - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+            if concurrency > 1:
+                executor.submit(send, request, scheduled)
+            else:
+                send(request, scheduled)
+    if callable(drain):
+        drain()
+    elapsed = time.perf_counter() - start
+
+    count = len(latencies)
+    # The schedule spans count - 1 gaps between the first and last send times
+    span = last_offset - first_offset if first_offset is not None else 0.0
+    return {
+        "requests": count,
+        "kinds": dict(kinds),
+        "statuses": dict(statuses),
+        "elapsed_s": elapsed,
+        "offered_rps": (count - 1) / span if span else 0.0,
+        "achieved_rps": count / elapsed if elapsed else 0.0,
+        "latency_ms": latency_summary(latencies),
+    }
+
+
+def make_shim(bus: LocalBus, host: str = "127.0.0.1", port: int = 8080) -> ThreadingHTTPServer:
+    """
+    Build an HTTP server that fronts a LocalBus like API Gateway fronts the stack.
+
+    POST /orders and /orders/bulk invoke the API routes; PUT /documents/<key>
+    uploads an object to the documents bucket. Each request's downstream
+    fan-out is run before responding. Requests are serialized because the
+    bus is single-threaded.
+    """
+    lock = threading.Lock()
+
+    class ShimHandler(BaseHTTPRequestHandler):
+        def _body(self) -> bytes:
+            return self.rfile.read(int(self.headers.get("Content-Length", 0)))
+
+        def _reply(self, status: int, body: str) -> None:
+            data = body.encode()
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+        def do_POST(self) -> None:  # noqa: N802
+            body = self._body().decode()
+            key = self.headers.get("Idempotency-Key")
+            headers = {"Idempotency-Key": key} if key else None
+            try:
+                with lock:
+                    response = bus.submit_order(body, path=self.path, headers=headers)
+                    bus.run()
+            except KeyError:
+                self._reply(404, json.dumps({"message": "Not Found"}))
+                return
+            self._reply(int(response["statusCode"]), response.get("body", ""))
+
+        def do_PUT(self) -> None:  # noqa: N802
+            if not self.path.startswith("/documents/"):
+                self._reply(404, json.dumps({"message": "Not Found"}))
+                return
+            key = self.path.removeprefix("/documents/")
+            content_type = self.headers.get("Content-Type", "application/octet-stream")
+            body = self._body()
+            with lock:
+                result = bus.upload_document(key, body, content_type)
+                bus.run()
+            self._reply(200, json.dumps({"key": key, "etag": result["ETag"]}))
+
+        def log_message(self, format: str, *args: Any) -> None:
+            pass  # keep the load generator's output readable
+
+    return ThreadingHTTPServer((host, port), ShimHandler)
+
+
+def _parse_mix(text: str) -> dict[str, float]:
+    mix = {}
+    for part in text.split(","):
+        kind, _, weight = part.partition("=")
+        if kind not in DEFAULT_MIX:
+            raise argparse.ArgumentTypeError(f"Unknown request kind: {kind}")
+        mix[kind] = float(weight)
+    return mix
+
+
+def _load_template(path: str | None) -> dict[str, Any] | None:
+    if not path:
+        return None
+    with open(path) as f:
+        template: dict[str, Any] = json.load(f)
+    return template
+
+
+def main() -> None:
+    """Run a load test, record or replay a workload, or serve the HTTP shim."""
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    run = commands.add_parser("run", help="Send a workload and report the results")
+    run.add_argument("--rate", type=float, default=100, help="Target requests per second")
+    run.add_argument("--duration", type=float, help="Seconds of traffic (sets --count)")
+    run.add_argument("--count", type=int, default=1000, help="Requests to send")
+    run.add_argument("--arrivals", choices=["poisson", "uniform"], default="poisson")
+    run.add_argument("--sizes-kb", default="1,4,16", help="Comma-separated payload sizes")
+    run.add_argument(
+        "--mix", type=_parse_mix, default=DEFAULT_MIX, help="e.g. order=0.9,upload=0.1"
+    )
+    run.add_argument("--seed", type=int, default=0)
+    run.add_argument("--url", help="Send over HTTP to this base URL instead of in-process")
+    run.add_argument("--concurrency", type=int, default=8, help="Outstanding HTTP requests")
+    run.add_argument("--record", help="Write the generated workload to this JSONL file")
+    run.add_argument("--replay", help="Send a recorded workload instead of generating one")
+    run.add_argument("--speed", type=float, default=1.0, help="Replay speed multiplier")
+    run.add_argument("--template", help="Synthesized template JSON (default: synthesize)")
+
+    serve = commands.add_parser("serve", help="Serve the local HTTP shim")
+    serve.add_argument("--host", default="127.0.0.1")
+    serve.add_argument("--port", type=int, default=8080)
+    serve.add_argument("--template", help="Synthesized template JSON (default: synthesize)")
+
+    args = parser.parse_args()
+    if args.command == "serve":
+        server = make_shim(LocalBus(_load_template(args.template)), args.host, args.port)
+        print(f"Serving the order pipeline on http://{args.host}:{server.server_port}")
+        server.serve_forever()
+        return
+
+    if args.replay:
+        requests = load_workload(args.replay)
+    else:
+        count = int(args.duration * args.rate) if args.duration else args.count
+        generator = WorkloadGenerator(
+            seed=args.seed,
+            sizes_kb=[float(s) for s in args.sizes_kb.split(",")],
+            mix=args.mix,
+        )
+        requests = list(generator.requests(count, args.rate, args.arrivals))
+    if args.record:
+        save_workload(requests, args.record)
+
+    bus = None
+    driver: Driver
+    if args.url:
+        driver = HttpDriver(args.url)
+    else:
+        bus = LocalBus(_load_template(args.template))
+        driver = DirectDriver(bus)
+    report = run_load(
+        requests, driver, speed=args.speed, concurrency=args.concurrency if args.url else 1
+    )
+    if bus is not None:
+        # End-to-end latency: from the API call until the last downstream handler finished
+        report["pipeline"] = bus.report(report["elapsed_s"])
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
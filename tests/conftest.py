@@ -0,0 +1,19 @@
+"""Shared pytest configuration."""
+
+import sys
+from pathlib import Path
+from typing import Any
+
+import pytest
+
+# The shared Lambda layer is mounted on sys.path (/opt/python) in the Lambda
+# runtime; mirror that so the handlers can import it under test.
+sys.path.insert(0, str(Path(__file__).parent.parent / "lambdas" / "shared" / "python"))
+
+
+@pytest.fixture(scope="session")
+def stack_template() -> dict[str, Any]:
+    """CloudFormation template of OrderProcessingStack, synthesized once per session."""
+    from localbus.event_patterns import synthesize_template
+
+    return synthesize_template()
@@ -0,0 +1,77 @@
+"""Unit tests for the shared batching and retry helpers."""
+
+import time
+from typing import Any
+from unittest.mock import MagicMock
+
+import pytest
+from shared import batching
+
+
+def _no_sleep(_: float) -> None:
+    """Skip backoff delays in tests."""
+
+
+def test_chunk_by_size_respects_limits() -> None:
+    """Test that chunks never exceed the entry count or byte limits."""
+    items = list(enumerate([40, 40, 40, 10, 10, 10, 10, 90]))
+
+    chunks = list(batching.chunk_by_size(items, lambda size: size, 4, 100))
+
+    assert [[size for _, size in chunk] for chunk in chunks] == [
+        [40, 40],
+        [40, 10, 10, 10],
+        [10, 90],
+    ]
+
+
+def test_send_with_retries_treats_missing_results_as_sent() -> None:
+    """Test that items without a per-entry result are not reported as failed."""
+
+    def send_chunk(chunk: list[tuple[int, Any]]) -> list[tuple[int, dict[str, Any], bool]]:
+        return []
+
+    result = batching.send_with_retries(
+        ["a", "b"], lambda items: iter([items]), send_chunk, set(), sleep=_no_sleep
+    )
+
+    assert result.failed_count == 0
+    assert result.requests == 1
+
+
+def test_send_with_retries_retries_marked_items() -> None:
+    """Test that only items marked retryable are sent again."""
+    sent: list[list[str]] = []
+
+    def send_chunk(chunk: list[tuple[int, str]]) -> list[tuple[int, dict[str, Any], bool]]:
+        sent.append([item for _, item in chunk])
+        busy = {"b"} if len(sent) == 1 else set()
+        return [
+            (index, {"ErrorCode": "Busy"} if item in busy else {}, item in busy)
+            for index, item in chunk
+        ]
+
+    result = batching.send_with_retries(
+        ["a", "b", "c"], lambda items: iter([items]), send_chunk, set(), sleep=_no_sleep
+    )
+
+    assert sent == [["a", "b", "c"], ["b"]]
+    assert result.retries == 1
+    assert result.failed_count == 0
+
+
+@pytest.mark.parametrize(("remaining", "expected"), [(30_000, 29.0), (500, 0.0)])
+def test_deadline_from_context(remaining: int, expected: float) -> None:
+    """Test that the deadline keeps back the reserve from the remaining time."""
+    context = MagicMock()
+    context.get_remaining_time_in_millis.return_value = remaining
+
+    deadline = batching.deadline_from_context(context)
+
+    assert deadline is not None
+    assert deadline - time.monotonic() == pytest.approx(expected, abs=0.1)
+
+
+def test_deadline_from_context_without_remaining_time() -> None:
+    """Test that contexts without remaining time produce no deadline."""
+    assert batching.deadline_from_context(object()) is None
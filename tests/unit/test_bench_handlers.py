@@ -0,0 +1,63 @@
+"""Unit tests for the handler benchmark regression gate."""
+
+from pathlib import Path
+
+from benchmarks.bench_handlers import compare, load, main, save
+
+BASELINE = {
+    "notifier/event/1KB": {"cpu_us": 60.0, "peak_alloc_kb": 12.0, "log_bytes": 2800},
+    "inventory/sqs/10x16KB": {"cpu_us": 55000.0, "peak_alloc_kb": 1400.0, "log_bytes": 677000},
+}
+
+
+def test_compare_flags_doubled_cpu_time() -> None:
+    """A case whose CPU time doubles is reported as a regression."""
+    current = {
+        **BASELINE,
+        "inventory/sqs/10x16KB": {**BASELINE["inventory/sqs/10x16KB"], "cpu_us": 110000.0},
+    }
+
+    regressions = compare(BASELINE, current)
+
+    assert len(regressions) == 1
+    assert regressions[0].startswith("inventory/sqs/10x16KB cpu_us")
+
+
+def test_compare_ignores_noise_and_new_cases() -> None:
+    """Small absolute changes, improvements and cases missing from the baseline pass."""
+    current = {
+        # +75% CPU but only +45us: below the absolute floor
+        "notifier/event/1KB": {"cpu_us": 105.0, "peak_alloc_kb": 12.5, "log_bytes": 2810},
+        "inventory/sqs/10x16KB": {"cpu_us": 30000.0, "peak_alloc_kb": 900.0, "log_bytes": 600000},
+        "document/event/1KB": {"cpu_us": 9999.0, "peak_alloc_kb": 999.0, "log_bytes": 99999},
+    }
+
+    assert compare(BASELINE, current) == []
+
+
+def test_compare_flags_log_volume_growth() -> None:
+    """Log bytes growing past the threshold are a regression even when CPU is unchanged."""
+    current = {
+        **BASELINE,
+        "notifier/event/1KB": {**BASELINE["notifier/event/1KB"], "log_bytes": 4000},
+    }
+
+    assert compare(BASELINE, current) == [
+        "notifier/event/1KB log_bytes: 2800 -> 4000 (limit x1.1, +64)"
+    ]
+
+
+def test_main_exits_nonzero_on_regression(tmp_path: Path) -> None:
+    """The comparison command fails on a regression and passes against itself."""
+    baseline_path = tmp_path / "baseline.json"
+    current_path = tmp_path / "current.json"
+    save(BASELINE, baseline_path)
+    regressed = {
+        **BASELINE,
+        "notifier/event/1KB": {**BASELINE["notifier/event/1KB"], "peak_alloc_kb": 64.0},
+    }
+    save(regressed, current_path)
+
+    assert load(baseline_path) == BASELINE
+    assert main(["--current", str(baseline_path), "--compare", str(baseline_path)]) == 0
+    assert main(["--current", str(current_path), "--compare", str(baseline_path)]) == 1
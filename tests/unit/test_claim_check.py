@@ -0,0 +1,100 @@
+"""Unit tests for the shared claim-check helpers."""
+
+import json
+from typing import Any
+
+import boto3
+from moto import mock_aws
+from shared import claim_check
+
+from localbus.event_patterns import rules_from_template
+
+ORDER = {
+    "orderId": "ORD-1",
+    "purpose": "create",
+    "price": 12000,
+    "priority": "high",
+    "region": "us-east-1",
+    "notes": "x" * 1000,
+    "items": [{"sku": f"SKU-{i}", "quantity": 1} for i in range(50)],
+}
+
+
+def test_summarize_keeps_small_fields_and_counts_items() -> None:
+    """Test that routing fields are kept and large fields are dropped."""
+    summary = claim_check.summarize(ORDER)
+
+    assert summary == {
+        "orderId": "ORD-1",
+        "purpose": "create",
+        "price": 12000,
+        "priority": "high",
+        "region": "us-east-1",
+        "itemCount": 50,
+    }
+    assert claim_check.summarize(["not", "an", "object"]) == {}
+
+
+def test_summarize_caps_fields_and_size() -> None:
+    """Test that a payload with many top-level fields yields a bounded summary."""
+    payload = {"orderId": "ORD-1", **{f"field{i:05d}": "y" * 200 for i in range(10_000)}}
+    payload["items"] = []
+
+    summary = claim_check.summarize(payload)
+
+    assert len(summary) <= claim_check.SUMMARY_MAX_FIELDS + 2
+    assert len(json.dumps(summary)) <= claim_check.SUMMARY_MAX_BYTES + 64
+    assert summary["orderId"] == "ORD-1"
+    assert summary["itemCount"] == 0
+
+    escaped = {f"f{i}": "\u2603" * 256 for i in range(200)}
+    assert len(json.dumps(claim_check.summarize(escaped))) <= claim_check.SUMMARY_MAX_BYTES
+
+
+@mock_aws
+def test_check_in_and_check_out_round_trip() -> None:
+    """Test that a checked-in payload is stored as-is and fetched back from the pointer."""
+    s3 = boto3.client("s3", region_name="us-east-1")
+    s3.create_bucket(Bucket="claims")
+    raw = json.dumps(ORDER, indent=2)
+
+    detail = claim_check.check_in(s3, "claims", ORDER, raw)
+
+    assert claim_check.is_claim_check(detail)
+    pointer = detail["claimCheck"]
+    assert pointer["bucket"] == "claims"
+    assert pointer["size"] == len(raw)
+    assert s3.get_object(Bucket="claims", Key=pointer["key"])["Body"].read().decode() == raw
+    assert detail["orderId"] == "ORD-1"
+    assert claim_check.check_out(s3, detail) == ORDER
+
+
+def test_check_out_passes_ordinary_details_through() -> None:
+    """Test that a Detail without a pointer is returned without touching S3."""
+    assert not claim_check.is_claim_check(ORDER)
+    assert claim_check.check_out(None, ORDER) is ORDER
+
+
+def test_summarize_keeps_routing_fields_past_the_caps() -> None:
+    """Test that the fields rules match on are kept however many fields precede them."""
+    payload: dict[str, Any] = {f"attribute{i:03d}": i for i in range(70)}
+    payload.update(ORDER)
+
+    summary = claim_check.summarize(payload)
+
+    for field in claim_check.ROUTING_FIELDS:
+        assert summary[field] == ORDER[field]
+    assert len(summary) == len(claim_check.ROUTING_FIELDS) + claim_check.SUMMARY_MAX_FIELDS + 1
+
+
+def test_routing_fields_cover_the_stack_rules(stack_template: dict[str, Any]) -> None:
+    """Test that every detail field an order rule matches on is a routing field."""
+    order_rules = [
+        rule
+        for rule in rules_from_template(stack_template)
+        if rule.pattern.get("source") != ["aws.s3"]
+    ]
+
+    assert order_rules
+    for rule in order_rules:
+        assert set(rule.pattern.get("detail", {})) <= set(claim_check.ROUTING_FIELDS), rule.name
@@ -0,0 +1,145 @@
+"""Unit tests for the shared AWS client factory."""
+
+import json
+import logging
+import threading
+from collections.abc import Iterator
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any
+from unittest.mock import MagicMock, patch
+
+import pytest
+from shared import clients
+
+
+@pytest.fixture
+def endpoint() -> Iterator[tuple[str, list[str]]]:
+    """Local keep-alive PutEvents endpoint; yields its URL and the client port of each request."""
+    seen: list[str] = []
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def _reply(self) -> None:
+            seen.append(str(self.client_address[1]))
+            self.rfile.read(int(self.headers.get("Content-Length") or 0))
+            body = b'{"FailedEntryCount": 0, "Entries": [{"EventId": "e-1"}]}'
+            self.send_response(200)
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            if self.command != "HEAD":
+                self.wfile.write(body)
+
+        do_POST = _reply
+        do_HEAD = _reply
+
+        def log_message(self, format: str, *args: Any) -> None:
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{server.server_address[1]}", seen
+    server.shutdown()
+
+
+def test_client_config_uses_profile() -> None:
+    """Test that clients get the profile's timeouts, retry mode and pool size."""
+    config = clients.client_config()
+
+    assert config.connect_timeout == clients.CLIENT_CONNECT_TIMEOUT
+    assert config.read_timeout == clients.CLIENT_READ_TIMEOUT
+    assert config.retries == {"mode": "adaptive", "max_attempts": clients.CLIENT_MAX_ATTEMPTS}
+    assert config.max_pool_connections == clients.CLIENT_MAX_POOL_CONNECTIONS
+    assert config.tcp_keepalive is True
+
+
+def test_open_connection_is_reused_by_first_request(
+    endpoint: tuple[str, list[str]], monkeypatch: pytest.MonkeyPatch
+) -> None:
+    """Test that the pre-opened connection serves the first real request."""
+    url, seen = endpoint
+    monkeypatch.setenv("AWS_ACCESS_KEY_ID", "testing")
+    monkeypatch.setenv("AWS_SECRET_ACCESS_KEY", "testing")
+    client = clients.create_client("events", endpoint_url=url, region_name="us-east-1")
+
+    assert clients.open_connection(client) is True
+    response = client.put_events(Entries=[{"Source": "s", "DetailType": "d", "Detail": "{}"}])
+
+    assert response["Entries"] == [{"EventId": "e-1"}]
+    assert len(seen) == 2
+    assert seen[0] == seen[1]
+
+
+def test_open_connection_skips_clients_without_http_session() -> None:
+    """Test that a client without the expected botocore internals is skipped, not failed."""
+    client = MagicMock(spec=["meta"])
+
+    assert clients.open_connection(client) is False
+
+
+def test_prewarm_client_disabled_by_default(monkeypatch: pytest.MonkeyPatch) -> None:
+    """Test that no client is created unless AWS_CLIENT_PREWARM is enabled."""
+    monkeypatch.delenv("AWS_CLIENT_PREWARM", raising=False)
+
+    with patch.object(clients, "create_client") as create:
+        assert clients.prewarm_client("events") is None
+
+    create.assert_not_called()
+
+
+def test_prewarm_client_emits_setup_metrics(
+    monkeypatch: pytest.MonkeyPatch, capsys: pytest.CaptureFixture[str]
+) -> None:
+    """Test that pre-warming opens a connection and emits the setup times."""
+    monkeypatch.setenv("AWS_CLIENT_PREWARM", "true")
+    client = MagicMock()
+
+    with (
+        patch.object(clients, "create_client", return_value=client),
+        patch.object(clients, "open_connection", return_value=True) as open_connection,
+    ):
+        assert clients.prewarm_client("sqs") is client
+        assert clients.prewarm_client("s3") is client
+
+    open_connection.assert_called_once_with(client)
+    sqs_metrics, s3_metrics = (json.loads(line) for line in capsys.readouterr().out.splitlines())
+    assert sqs_metrics["Service"] == "sqs"
+    assert {"ClientCreateTime", "ConnectionSetupTime"} <= sqs_metrics.keys()
+    assert s3_metrics["Service"] == "s3"
+    assert "ClientCreateTime" in s3_metrics
+    assert "ConnectionSetupTime" not in s3_metrics
+
+
+def test_prewarm_client_survives_connection_failure(monkeypatch: pytest.MonkeyPatch) -> None:
+    """Test that a connection that cannot be opened does not fail init."""
+    monkeypatch.setenv("AWS_CLIENT_PREWARM", "true")
+    client = MagicMock()
+
+    with (
+        patch.object(clients, "create_client", return_value=client),
+        patch.object(clients, "open_connection", side_effect=OSError("unreachable")),
+    ):
+        assert clients.prewarm_client("events") is client
+
+
+def test_prewarm_client_logs_skipped_connection(
+    monkeypatch: pytest.MonkeyPatch,
+    caplog: pytest.LogCaptureFixture,
+    capsys: pytest.CaptureFixture[str],
+) -> None:
+    """Test that a client whose pool cannot be reached is logged and gets no setup metric."""
+    monkeypatch.setenv("AWS_CLIENT_PREWARM", "true")
+    client = MagicMock(spec=["meta"])
+
+    with (
+        patch.object(clients, "create_client", return_value=client),
+        caplog.at_level(logging.INFO),
+    ):
+        assert clients.prewarm_client("events") is client
+
+    entry = json.loads(caplog.records[-1].getMessage())
+    assert entry["message"].startswith("Skipped pre-opening client connection")
+    assert entry["service"] == "events"
+    metrics = json.loads(capsys.readouterr().out)
+    assert "ConnectionSetupTime" not in metrics
@@ -0,0 +1,34 @@
+"""Unit tests for the cold-start import profiler."""
+
+from benchmarks.bench_cold_start import parse_importtime, profile_lambda, total_import_us
+
+
+def test_parse_importtime_reads_nesting() -> None:
+    """Records keep their timings and nesting depth; the header is skipped."""
+    records = parse_importtime(
+        [
+            "import time: self [us] | cumulative | imported package",
+            "import time:       120 |        120 |   _json",
+            "import time:       450 |        570 | json",
+            "import time:        80 |         80 | shared",
+        ]
+    )
+
+    assert [(r.name, r.depth, r.self_us, r.cumulative_us) for r in records] == [
+        ("_json", 1, 120, 120),
+        ("json", 0, 450, 570),
+        ("shared", 0, 80, 80),
+    ]
+    assert total_import_us(records) == 650
+    assert records[0].format() == "import time:       120 |        120 |   _json"
+
+
+def test_order_receiver_defers_botocore_to_first_use() -> None:
+    """Loading the handler does not import boto3 or botocore; creating its client does."""
+    profile = profile_lambda("order_receiver")
+
+    init_modules = {record.name.split(".")[0] for record in profile.init_imports}
+    first_use_modules = {record.name.split(".")[0] for record in profile.first_use_imports}
+    assert not init_modules & {"boto3", "botocore"}
+    assert "botocore" in first_use_modules
+    assert "get_eventbridge_client" in profile.clients
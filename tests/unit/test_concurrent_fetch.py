@@ -0,0 +1,163 @@
+"""Unit tests for the shared bounded-concurrency fetcher."""
+
+import random
+import threading
+import time
+from typing import Any
+
+from botocore.exceptions import ClientError
+from shared.concurrent_fetch import CallTimeoutError, fetch_all
+
+
+def _client_error(code: str) -> ClientError:
+    return ClientError({"Error": {"Code": code, "Message": code}}, "HeadObject")
+
+
+def test_fetch_all_matches_serial_results_within_bound() -> None:
+    """Test that results and errors come back in input order with bounded concurrency."""
+    lock = threading.Lock()
+    in_flight = [0]
+    peak = [0]
+
+    def fetch(item: int) -> int:
+        with lock:
+            in_flight[0] += 1
+            peak[0] = max(peak[0], in_flight[0])
+        time.sleep(random.uniform(0, 0.01))
+        with lock:
+            in_flight[0] -= 1
+        if item % 7 == 0:
+            raise KeyError(item)
+        return item * item
+
+    items = list(range(40))
+    result = fetch_all(fetch, items, max_workers=5)
+
+    assert result.values == [None if item % 7 == 0 else item * item for item in items]
+    assert result.failed_indexes == [0, 7, 14, 21, 28, 35]
+    assert isinstance(result.errors[7], KeyError)
+    assert result.retries == 0
+    assert 1 < peak[0] <= 5
+
+
+def test_fetch_all_retries_throttled_calls() -> None:
+    """Test that throttled calls are retried and other errors are not."""
+    calls: dict[str, int] = {}
+    lock = threading.Lock()
+
+    def fetch(key: str) -> str:
+        with lock:
+            calls[key] = calls.get(key, 0) + 1
+            attempt = calls[key]
+        if key == "slow" and attempt < 3:
+            raise _client_error("SlowDown")
+        if key == "busy":
+            raise _client_error("503")
+        if key == "missing":
+            raise _client_error("404")
+        return key.upper()
+
+    result = fetch_all(fetch, ["ok", "slow", "busy", "missing"], max_attempts=3, base_delay=0.001)
+
+    assert result.values == ["OK", "SLOW", None, None]
+    assert calls == {"ok": 1, "slow": 3, "busy": 3, "missing": 1}
+    assert result.retries == 4
+    assert result.failed_indexes == [2, 3]
+
+
+def test_fetch_all_abandons_calls_past_timeout() -> None:
+    """Test that a hung call is abandoned and retried without holding up the rest."""
+    hung = threading.Event()
+    calls: list[str] = []
+
+    def fetch(key: str) -> str:
+        calls.append(key)
+        if key == "hang" and calls.count(key) == 1:
+            hung.wait(2)
+        return key
+
+    start = time.monotonic()
+    result = fetch_all(fetch, ["a", "hang", "b"], timeout=0.05, base_delay=0.001)
+    hung.set()
+
+    assert time.monotonic() - start < 1
+    assert result.values == ["a", "hang", "b"]
+    assert result.timeouts == 1
+    assert result.retries == 1
+
+
+def test_fetch_all_reports_timeouts_when_attempts_run_out() -> None:
+    """Test that a call timing out on every attempt fails with CallTimeoutError."""
+    release = threading.Event()
+
+    def fetch(_: Any) -> None:
+        release.wait(2)
+
+    result = fetch_all(fetch, ["x"], timeout=0.02, max_attempts=2, base_delay=0.001)
+    release.set()
+
+    assert isinstance(result.errors[0], CallTimeoutError)
+    assert result.timeouts == 2
+
+
+def test_fetch_all_stops_retrying_at_deadline() -> None:
+    """Test that no retry is scheduled past the deadline."""
+    calls = []
+
+    def fetch(key: str) -> None:
+        calls.append(key)
+        raise _client_error("SlowDown")
+
+    result = fetch_all(fetch, ["a"], max_attempts=5, base_delay=10, deadline=time.monotonic())
+
+    assert calls == ["a"]
+    assert result.retries == 0
+    assert result.failed_indexes == [0]
+
+
+def test_fetch_all_blocks_while_abandoned_calls_hold_every_worker() -> None:
+    """Test that the loop waits, not spins, while hung calls hold every worker."""
+    release = threading.Event()
+    ticks = [0]
+
+    def clock() -> float:
+        ticks[0] += 1
+        return time.monotonic()
+
+    def fetch(key: str) -> str:
+        if key.startswith("hang"):
+            release.wait(0.3)
+        return key
+
+    result = fetch_all(
+        fetch,
+        ["hang-1", "hang-2", "a", "b"],
+        max_workers=2,
+        timeout=0.02,
+        max_attempts=1,
+        clock=clock,
+    )
+    release.set()
+
+    assert result.values == [None, None, "a", "b"]
+    assert result.timeouts == 2
+    assert ticks[0] < 100
+
+
+def test_fetch_all_fails_waiting_items_at_deadline() -> None:
+    """Test that items blocked behind abandoned calls fail once the deadline passes."""
+    release = threading.Event()
+
+    def fetch(key: str) -> str:
+        release.wait(2)
+        return key
+
+    start = time.monotonic()
+    result = fetch_all(
+        fetch, ["x", "y"], max_workers=1, timeout=0.02, max_attempts=1, deadline=start + 0.1
+    )
+    release.set()
+
+    assert time.monotonic() - start < 1
+    assert isinstance(result.errors[1], CallTimeoutError)
+    assert result.failed_indexes == [0, 1]
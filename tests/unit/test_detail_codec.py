@@ -0,0 +1,50 @@
+"""Unit tests for the shared compressed Detail encoding."""
+
+import json
+
+import pytest
+from shared import detail_codec
+
+ORDER = {
+    "orderId": "ORD-1",
+    "purpose": "create",
+    "price": 12000,
+    "priority": "high",
+    "region": "us-east-1",
+    "items": [{"sku": f"SKU-{i}", "quantity": 1} for i in range(500)],
+}
+
+
+def test_encode_keeps_routing_fields_plain() -> None:
+    """Test that rules still see purpose, price, priority and region."""
+    raw = json.dumps(ORDER, indent=2)
+
+    detail = detail_codec.encode_detail(ORDER, raw)
+
+    assert detail_codec.is_compressed(detail)
+    assert detail["compressed"]["encoding"] == "zlib+base64"
+    assert {key: detail[key] for key in ("purpose", "price", "priority", "region")} == {
+        "purpose": "create",
+        "price": 12000,
+        "priority": "high",
+        "region": "us-east-1",
+    }
+    assert "items" not in detail
+    assert len(json.dumps(detail)) < len(raw) // 4
+
+
+def test_decode_round_trip_and_passthrough() -> None:
+    """Test that encoded Details decode to the payload and others pass through."""
+    assert detail_codec.decode_detail(detail_codec.encode_detail(ORDER)) == ORDER
+    assert not detail_codec.is_compressed(ORDER)
+    assert detail_codec.decode_detail(ORDER) is ORDER
+
+
+def test_decode_rejects_unknown_or_corrupt_encoding() -> None:
+    """Test that undecodable Details raise ValueError."""
+    with pytest.raises(ValueError, match="Unsupported"):
+        detail_codec.decode_detail({"compressed": {"encoding": "brotli", "data": ""}})
+    with pytest.raises(ValueError, match="Invalid"):
+        detail_codec.decode_detail(
+            {"compressed": {"encoding": "zlib+base64", "data": "bm90IHpsaWI="}}
+        )
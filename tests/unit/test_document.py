@@ -1,6 +1,7 @@
 """Unit tests for document Lambda function."""
 
 import importlib.util
+import io
 import json
 import os
 import sys
@@ -78,3 +79,19 @@ def test_handler_missing_order_id(lambda_context: MagicMock) -> None:
 def test_log_structured() -> None:
     """Test structured logging function."""
     index.log_structured("info", "Test message", key="value")
+
+
+def test_handler_fetches_claim_checked_order(lambda_context: MagicMock, monkeypatch: Any) -> None:
+    """Test that a claim-checked order is fetched, and ordinary orders never touch S3."""
+    mock_s3 = MagicMock()
+    mock_s3.get_object.return_value = {"Body": io.BytesIO(b'{"orderId": "BIG", "items": []}')}
+    monkeypatch.setattr(index, "get_s3_client", lambda: mock_s3)
+    pointer = {"bucket": "claims", "key": "orders/big.json", "size": 31}
+
+    index.handler({"detail": {"orderId": "SMALL"}}, lambda_context)
+    mock_s3.get_object.assert_not_called()
+
+    response = index.handler({"detail": {"orderId": "BIG", "claimCheck": pointer}}, lambda_context)
+
+    assert response["statusCode"] == 200
+    mock_s3.get_object.assert_called_once_with(Bucket="claims", Key="orders/big.json")
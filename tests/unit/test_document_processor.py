@@ -1,16 +1,18 @@
 """Unit tests for document-processor Lambda function."""
 
 import importlib.util
+import io
 import json
 import os
 import sys
 from collections.abc import Generator
 from pathlib import Path
 from typing import Any
-from unittest.mock import MagicMock, patch
+from unittest.mock import MagicMock, call, patch
 
 import boto3
 import pytest
+from botocore.exceptions import ClientError
 from moto import mock_aws
 
 # Set environment variables before importing the handler
@@ -18,9 +20,7 @@ os.environ["AWS_DEFAULT_REGION"] = "us-east-1"
 os.environ["EVENT_BUS_NAME"] = "order-processing-bus"
 
 # Load the Lambda function module dynamically
-lambda_path = (
-    Path(__file__).parent.parent.parent / "lambdas" / "document_processor" / "index.py"
-)
+lambda_path = Path(__file__).parent.parent.parent / "lambdas" / "document_processor" / "index.py"
 spec = importlib.util.spec_from_file_location("document_processor_index", lambda_path)
 index = importlib.util.module_from_spec(spec)
 sys.modules["document_processor_index"] = index
@@ -176,13 +176,14 @@ def test_handler_publishes_downstream_event(aws_mocks: None, lambda_context: Mag
 
 
 def test_handler_s3_head_failure(lambda_context: MagicMock) -> None:
-    """Test graceful handling when S3 head_object fails."""
+    """Test graceful handling when reading the object from S3 fails."""
     mock_s3 = MagicMock()
-    mock_s3.head_object.side_effect = Exception("Access Denied")
+    mock_s3.get_object.side_effect = Exception("Access Denied")
     mock_eb = MagicMock()
 
-    with patch.object(index, "get_s3_client", return_value=mock_s3), patch.object(
-        index, "get_events_client", return_value=mock_eb
+    with (
+        patch.object(index, "get_s3_client", return_value=mock_s3),
+        patch.object(index, "get_events_client", return_value=mock_eb),
     ):
         event = _make_s3_eventbridge_event(key="inbound/ORD-500/data.csv")
         response = index.handler(event, lambda_context)
@@ -194,6 +195,313 @@ def test_handler_s3_head_failure(lambda_context: MagicMock) -> None:
     mock_eb.put_events.assert_called_once()
 
 
+def test_handler_sniffs_content_with_one_ranged_get(lambda_context: MagicMock) -> None:
+    """Test that a misnamed upload is typed by its content, read with one small ranged GET."""
+    mock_s3 = MagicMock()
+    mock_s3.get_object.return_value = {
+        "ContentType": "text/csv",
+        "Metadata": {},
+        "Body": io.BytesIO(b'{"orderId": "ORD-600", "items": [{"sku": "SKU-1"}]}'),
+    }
+    mock_eb = MagicMock()
+
+    with (
+        patch.object(index, "get_s3_client", return_value=mock_s3),
+        patch.object(index, "get_events_client", return_value=mock_eb),
+    ):
+        event = _make_s3_eventbridge_event(key="inbound/ORD-600/orders.csv", size=50_000_000)
+        response = index.handler(event, lambda_context)
+
+    assert json.loads(response["body"])["documentType"] == "JSON"
+    # The ranged GET that typed the document, then the read of its records
+    assert mock_s3.get_object.call_args_list == [
+        call(Bucket=BUCKET_NAME, Key="inbound/ORD-600/orders.csv", Range="bytes=0-4095"),
+        call(Bucket=BUCKET_NAME, Key="inbound/ORD-600/orders.csv"),
+    ]
+    mock_s3.head_object.assert_not_called()
+    detail = json.loads(mock_eb.put_events.call_args[1]["Entries"][0]["Detail"])
+    assert detail["documentType"] == "JSON"
+    assert detail["detectedType"] == "JSON"
+
+
+def test_handler_reports_xml_root(aws_mocks: None, lambda_context: MagicMock) -> None:
+    """Test that the XML root element travels in the downstream event."""
+    body = b'<?xml version="1.0"?>\n<!-- export -->\n<ShipNotice id="1"><Line/></ShipNotice>'
+    _setup_s3("inbound/ORD-700/asn.xml", body, "application/xml")
+
+    mock_eb = MagicMock()
+    with patch.object(index, "get_events_client", return_value=mock_eb):
+        event = _make_s3_eventbridge_event(key="inbound/ORD-700/asn.xml", size=len(body))
+        index.handler(event, lambda_context)
+
+    detail = json.loads(mock_eb.put_events.call_args[1]["Entries"][0]["Detail"])
+    assert detail["documentType"] == "XML"
+    assert detail["xmlRoot"] == "ShipNotice"
+
+
+def test_handler_summarizes_edi(aws_mocks: None, lambda_context: MagicMock) -> None:
+    """Test that an EDI upload is stream-parsed and summarized in the downstream event."""
+    body = (
+        b"ISA*00*          *00*          *ZZ*SENDER         *ZZ*RECEIVER       "
+        b"*260318*1430*U*00401*000000001*0*P*>~GS*PO*SENDER*RECEIVER*20260318*1430*1*X*004010~"
+        b"ST*850*0001~BEG*00*SA*ORD-800**20260318~PO1*1*10*EA*9.99**VP*W-0001~"
+        b"PO1*2*1*EA*1.00**VP*W-0002~SE*5*0001~GE*1*1~IEA*1*000000002~"
+    )
+    _setup_s3("inbound/ORD-800/po.edi", body, "text/plain")
+
+    mock_eb = MagicMock()
+    with patch.object(index, "get_events_client", return_value=mock_eb):
+        event = _make_s3_eventbridge_event(key="inbound/ORD-800/po.edi", size=len(body))
+        index.handler(event, lambda_context)
+
+    detail = json.loads(mock_eb.put_events.call_args[1]["Entries"][0]["Detail"])
+    assert detail["documentType"] == "EDI"
+    assert detail["edi"]["orderIds"] == ["ORD-800"]
+    assert detail["edi"]["lineCount"] == 2
+    assert detail["edi"]["interchangeControlNumbers"] == ["000000001"]
+    assert detail["edi"]["controlErrors"] == ["IEA 000000002 does not close ISA 000000001"]
+
+
+def test_handler_publishes_unparseable_edi(aws_mocks: None, lambda_context: MagicMock) -> None:
+    """Test that a broken EDI upload is still published, with the parse error."""
+    body = b"GS*PO*SENDER*RECEIVER*20260318*1430*1*X*004010~ST*850*0001~"
+    _setup_s3("inbound/ORD-801/po.edi", body, "text/plain")
+
+    mock_eb = MagicMock()
+    with patch.object(index, "get_events_client", return_value=mock_eb):
+        event = _make_s3_eventbridge_event(key="inbound/ORD-801/po.edi", size=len(body))
+        response = index.handler(event, lambda_context)
+
+    assert response["statusCode"] == 200
+    detail = json.loads(mock_eb.put_events.call_args[1]["Entries"][0]["Detail"])
+    assert detail["documentType"] == "EDI"
+    assert "edi" not in detail
+    assert "missing ISA" in detail["ediError"]
+
+
+def test_handler_summarizes_csv_records(aws_mocks: None, lambda_context: MagicMock) -> None:
+    """Test that CSV records are summarized in the document-uploaded event only, by default."""
+    body = b"orderId,sku,quantity,price\nORD-900,W-1,2,9.99\nORD-900,W-2,3,1.00\n"
+    _setup_s3("inbound/ORD-900/lines.csv", body, "text/csv")
+
+    mock_eb = MagicMock()
+    with patch.object(index, "get_events_client", return_value=mock_eb):
+        event = _make_s3_eventbridge_event(key="inbound/ORD-900/lines.csv", size=len(body))
+        index.handler(event, lambda_context)
+
+    mock_eb.put_events.assert_called_once()
+    detail = json.loads(mock_eb.put_events.call_args[1]["Entries"][0]["Detail"])
+    assert detail["records"] == {
+        "recordCount": 2,
+        "orderIds": ["ORD-900"],
+        "totalQuantity": 5,
+        "fields": ["orderId", "price", "quantity", "sku"],
+        "eventCount": 0,
+    }
+
+
+def test_handler_publishes_record_events(
+    aws_mocks: None, lambda_context: MagicMock, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    """Test that records are published in chunked events, batched, ahead of the summary."""
+    monkeypatch.setattr(index, "DOCUMENT_RECORD_EVENT_BYTES", 120)
+    lines = "".join(f'{{"sku": "W-{n:03d}", "qty": 1}},' for n in range(60))
+    body = f'{{"orderId": "ORD-901", "lines": [{lines.rstrip(",")}]}}'.encode()
+    _setup_s3("inbound/ORD-901/lines.json", body, "application/json")
+
+    mock_eb = MagicMock()
+    mock_eb.put_events.side_effect = lambda Entries: {
+        "FailedEntryCount": 0,
+        "Entries": [{"EventId": "id"} for _ in Entries],
+    }
+    with patch.object(index, "get_events_client", return_value=mock_eb):
+        event = _make_s3_eventbridge_event(key="inbound/ORD-901/lines.json", size=len(body))
+        index.handler(event, lambda_context)
+
+    batches = [c[1]["Entries"] for c in mock_eb.put_events.call_args_list]
+    assert [len(batch) for batch in batches] == [10, 10, 10, 1]
+    chunks = [json.loads(entry["Detail"]) for batch in batches[:-1] for entry in batch]
+    assert [chunk["chunk"] for chunk in chunks] == list(range(30))
+    assert chunks[0]["orderId"] == "ORD-901"
+    assert chunks[0]["key"] == "inbound/ORD-901/lines.json"
+    records = [record for chunk in chunks for record in chunk["records"]]
+    assert records[59] == {"orderId": "ORD-901", "sku": "W-059", "quantity": 1}
+    summary = json.loads(batches[-1][0]["Detail"])
+    assert summary["records"]["recordCount"] == 60
+    assert summary["records"]["eventCount"] == 30
+
+
+def test_handler_reports_unreadable_records(aws_mocks: None, lambda_context: MagicMock) -> None:
+    """Test that a document that fails to parse is still published with the error."""
+    body = b"<Order><Line sku='W-1'/><Line sku='W-2'></Order>"
+    _setup_s3("inbound/ORD-902/asn.xml", body, "application/xml")
+
+    mock_eb = MagicMock()
+    with patch.object(index, "get_events_client", return_value=mock_eb):
+        event = _make_s3_eventbridge_event(key="inbound/ORD-902/asn.xml", size=len(body))
+        response = index.handler(event, lambda_context)
+
+    assert response["statusCode"] == 200
+    detail = json.loads(mock_eb.put_events.call_args[1]["Entries"][0]["Detail"])
+    assert detail["records"]["recordCount"] == 1
+    assert detail["records"]["error"].startswith("Invalid XML")
+
+
+def _sqs_record(message_id: str, body: Any) -> dict[str, Any]:
+    """Wrap a message body in an SQS event source mapping record."""
+    return {"messageId": message_id, "body": body if isinstance(body, str) else json.dumps(body)}
+
+
+def test_handler_processes_sqs_batch(aws_mocks: None, lambda_context: MagicMock) -> None:
+    """Test that a batch of queued uploads is published in 10-entry PutEvents calls."""
+    for i in range(12):
+        _setup_s3(f"inbound/ORD-{i:03d}/scan.pod", b"%PDF-1.7\n", "application/pdf")
+    records = [
+        _sqs_record(f"msg-{i}", _make_s3_eventbridge_event(key=f"inbound/ORD-{i:03d}/scan.pod"))
+        for i in range(12)
+    ]
+
+    mock_eb = MagicMock()
+    mock_eb.put_events.side_effect = lambda Entries: {
+        "FailedEntryCount": 0,
+        "Entries": [{"EventId": "id"} for _ in Entries],
+    }
+    with patch.object(index, "get_events_client", return_value=mock_eb):
+        response = index.handler({"Records": records}, lambda_context)
+
+    assert response["batchItemFailures"] == []
+    batches = [c[1]["Entries"] for c in mock_eb.put_events.call_args_list]
+    assert [len(batch) for batch in batches] == [10, 2]
+    details = [json.loads(entry["Detail"]) for batch in batches for entry in batch]
+    assert [d["orderId"] for d in details] == [f"ORD-{i:03d}" for i in range(12)]
+    assert {d["documentType"] for d in details} == {"POD"}
+
+
+def test_handler_reports_batch_item_failures(aws_mocks: None, lambda_context: MagicMock) -> None:
+    """Test that unreadable messages and unpublished events fail only their own messages."""
+    _setup_s3("inbound/ORD-1/scan 1.bol", b"%PDF-1.7\n", "application/pdf")
+    _setup_s3("inbound/ORD-2/scan.bol", b"%PDF-1.7\n", "application/pdf")
+    s3_notification = {
+        "Records": [
+            {
+                "eventName": "ObjectCreated:Put",
+                "s3": {
+                    "bucket": {"name": BUCKET_NAME},
+                    "object": {"key": "inbound/ORD-1/scan+1.bol", "size": 9},
+                },
+            },
+            {
+                "eventName": "ObjectCreated:Put",
+                "s3": {
+                    "bucket": {"name": BUCKET_NAME},
+                    "object": {"key": "inbound/ORD-2/scan.bol"},
+                },
+            },
+        ]
+    }
+    records = [
+        _sqs_record("ok", _make_s3_eventbridge_event(key="inbound/ORD-2/scan.bol")),
+        _sqs_record("notification", s3_notification),
+        _sqs_record("test-event", {"Service": "Amazon S3", "Event": "s3:TestEvent"}),
+        _sqs_record("poison", "not json"),
+        _sqs_record("unpublished", _make_s3_eventbridge_event(key="inbound/ORD-3/scan.bol")),
+    ]
+
+    def put_events(Entries: list[dict[str, Any]]) -> dict[str, Any]:
+        results = [
+            (
+                {"ErrorCode": "AccessDeniedException", "ErrorMessage": "denied"}
+                if json.loads(entry["Detail"])["orderId"] == "ORD-3"
+                else {"EventId": "id"}
+            )
+            for entry in Entries
+        ]
+        return {"FailedEntryCount": 1, "Entries": results}
+
+    mock_eb = MagicMock()
+    mock_eb.put_events.side_effect = put_events
+    with patch.object(index, "get_events_client", return_value=mock_eb):
+        response = index.handler({"Records": records}, lambda_context)
+
+    assert response["batchItemFailures"] == [
+        {"itemIdentifier": "poison"},
+        {"itemIdentifier": "unpublished"},
+    ]
+    (entries,) = [c[1]["Entries"] for c in mock_eb.put_events.call_args_list]
+    keys = [json.loads(entry["Detail"])["key"] for entry in entries]
+    assert keys == [
+        "inbound/ORD-2/scan.bol",
+        "inbound/ORD-1/scan 1.bol",
+        "inbound/ORD-2/scan.bol",
+        "inbound/ORD-3/scan.bol",
+    ]
+
+
+def test_handler_accepts_pipes_batch(aws_mocks: None, lambda_context: MagicMock) -> None:
+    """Test that EventBridge Pipes' list of records is handled like an SQS batch."""
+    _setup_s3("inbound/ORD-5/scan.pod", b"%PDF-1.7\n", "application/pdf")
+    records = [_sqs_record("m1", _make_s3_eventbridge_event(key="inbound/ORD-5/scan.pod"))]
+
+    mock_eb = MagicMock()
+    mock_eb.put_events.return_value = {"FailedEntryCount": 0, "Entries": [{"EventId": "id"}]}
+    with patch.object(index, "get_events_client", return_value=mock_eb):
+        response = index.handler(records, lambda_context)
+
+    assert response["batchItemFailures"] == []
+    mock_eb.put_events.assert_called_once()
+
+
+def test_batch_matches_single_events_despite_throttling(
+    aws_mocks: None, lambda_context: MagicMock
+) -> None:
+    """Test that throttled concurrent metadata reads describe documents as single events do."""
+    documents = {
+        "inbound/ORD-1/po.edi": b"ISA*00*",
+        "inbound/ORD-2/lines.csv": b"sku,qty\nW-1,2\n",
+        "inbound/ORD-3/scan.pod": b"%PDF-1.7\n",
+        "inbound/ORD-4/notes.xml": b"<Notes/>",
+    }
+    for key, body in documents.items():
+        _setup_s3(key, body)
+    events = [_make_s3_eventbridge_event(key=key) for key in [*documents, "inbound/ORD-5/x.bol"]]
+
+    mock_eb = MagicMock()
+    mock_eb.put_events.side_effect = lambda Entries: {
+        "FailedEntryCount": 0,
+        "Entries": [{"EventId": "id"} for _ in Entries],
+    }
+    with patch.object(index, "get_events_client", return_value=mock_eb):
+        for event in events:
+            index.handler(event, lambda_context)
+        single = [
+            json.loads(c[1]["Entries"][0]["Detail"]) for c in mock_eb.put_events.call_args_list
+        ]
+        mock_eb.put_events.reset_mock()
+
+        s3 = index.get_s3_client()
+        throttled = MagicMock(wraps=s3)
+        ranged_gets = []
+
+        def get_object(**kwargs: Any) -> dict[str, Any]:
+            if "Range" in kwargs:
+                ranged_gets.append(kwargs["Key"])
+                if ranged_gets.count(kwargs["Key"]) == 1:
+                    raise ClientError({"Error": {"Code": "SlowDown"}}, "GetObject")
+            return s3.get_object(**kwargs)
+
+        throttled.get_object.side_effect = get_object
+        with patch.object(index, "get_s3_client", return_value=throttled):
+            response = index.handler(
+                {"Records": [_sqs_record(f"m{i}", event) for i, event in enumerate(events)]},
+                lambda_context,
+            )
+
+    assert response["batchItemFailures"] == []
+    assert sorted(ranged_gets) == sorted([*documents, "inbound/ORD-5/x.bol"] * 2)
+    batched = [json.loads(entry["Detail"]) for entry in mock_eb.put_events.call_args[1]["Entries"]]
+    assert batched == single
+
+
 def test_log_structured() -> None:
     """Test structured logging function."""
     index.log_structured("info", "Test message", key="value")
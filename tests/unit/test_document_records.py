@@ -0,0 +1,219 @@
+"""Unit tests for the shared streaming document record extraction."""
+
+import pytest
+from shared import document_records
+from shared.document_records import (
+    RecordSummary,
+    encode_chunks,
+    extract_records,
+    iter_json_objects,
+    normalize_record,
+)
+
+CSV = (
+    "\ufeffPO Number;Item;Qty;Unit Price;Notes\r\n"
+    'PO-1;W-1;10;9.99;"fragile;\r\nkeep upright"\r\n'
+    "\r\n"
+    "PO-1;W-2;2.0;1.50;\r\n"
+).encode()
+
+JSON = b"""{
+    "orderId": "PO-2",
+    "shipTo": {"name": "Acme"},
+    "lines": [{"sku": "W-1", "quantity": 3}, {"sku": "W-2", "quantity": 12345678901234567},
+              {}, "note"],
+    "carrier": "UPSN",
+    "packages": [{"trackingNumber": "1Z999", "qty": 15}]
+}"""
+
+XML = b"""<?xml version="1.0" encoding="UTF-8"?>
+<sn:ShipNotice xmlns:sn="urn:example:asn" po="PO-3">
+  <sn:Header><sn:Carrier>FDEG</sn:Carrier></sn:Header>
+  <sn:Line line="1"><sn:Item><sn:SKU>W-1</sn:SKU></sn:Item><sn:Qty>4</sn:Qty></sn:Line>
+  <sn:Line line="2" sku="W-2" qty="1"/>
+</sn:ShipNotice>"""
+
+
+def _chunks(data: bytes, size: int) -> list[bytes]:
+    return [data[start : start + size] for start in range(0, len(data), size)]
+
+
+@pytest.mark.parametrize(
+    ("doc_type", "data", "expected"),
+    [
+        (
+            "CSV",
+            CSV,
+            [
+                {"orderId": "PO-1", "sku": "W-1", "quantity": 10, "price": 9.99},
+                {"orderId": "PO-1", "sku": "W-2", "quantity": 2, "price": 1.5},
+            ],
+        ),
+        (
+            "JSON",
+            JSON,
+            [
+                {"orderId": "PO-2", "sku": "W-1", "quantity": 3},
+                {"orderId": "PO-2", "sku": "W-2", "quantity": 12345678901234567},
+                {"orderId": "PO-2", "carrier": "UPSN", "trackingNumber": "1Z999", "quantity": 15},
+            ],
+        ),
+        (
+            "XML",
+            XML,
+            [
+                {
+                    "orderId": "PO-3",
+                    "carrier": "FDEG",
+                    "lineNumber": 1,
+                    "sku": "W-1",
+                    "quantity": 4,
+                },
+                {
+                    "orderId": "PO-3",
+                    "carrier": "FDEG",
+                    "lineNumber": 2,
+                    "sku": "W-2",
+                    "quantity": 1,
+                },
+            ],
+        ),
+    ],
+)
+def test_extract_records_is_independent_of_chunk_size(
+    doc_type: str, data: bytes, expected: list[dict[str, object]]
+) -> None:
+    """Test that records come out the same however the body is split, even mid-character."""
+    for size in (1, 3, 64, len(data)):
+        assert list(extract_records(doc_type, _chunks(data, size))) == expected, size
+
+
+def test_extract_records_is_lazy() -> None:
+    """Test that records are produced before the rest of the body is read."""
+    read = []
+
+    def body() -> object:
+        for line in (b"sku,qty\n", b"W-1,1\n", b"W-2,2\n"):
+            read.append(line)
+            yield line
+
+    records = extract_records("CSV", body())
+    assert next(records) == {"sku": "W-1", "quantity": 1}
+    assert read == [b"sku,qty\n", b"W-1,1\n"]
+
+
+def test_normalize_record() -> None:
+    """Test alias matching, type coercion and dropped fields."""
+    raw = {
+        "Order_ID": " PO-9 ",
+        "order": "ignored duplicate",
+        "SKU": "W-9",
+        "Quantity": "many",
+        "price": "nan",
+        "description": "",
+        "dimensions": {"w": 1},
+        "color": "red",
+    }
+    assert normalize_record(raw) == {
+        "orderId": "PO-9",
+        "sku": "W-9",
+        "quantity": "many",
+        "price": "nan",
+    }
+
+
+@pytest.mark.parametrize(
+    "data",
+    [b'{"orderId": "PO-1", "lines": [{"sku": "W-1"}', b'{"lines": [1 2]}', b"orderId,sku", b""],
+)
+def test_iter_json_objects_rejects_invalid_json(data: bytes) -> None:
+    """Test that truncated or malformed JSON raises ValueError."""
+    with pytest.raises(ValueError):
+        list(iter_json_objects(_chunks(data, 4)))
+
+
+def test_extract_records_rejects_malformed_xml() -> None:
+    """Test that malformed XML raises ValueError after the records before the error."""
+    records = extract_records("XML", [b"<Order><Line sku='W-1'/><Line sku='W-2'></Order>"])
+    assert next(records) == {"sku": "W-1"}
+    with pytest.raises(ValueError, match="Invalid XML"):
+        next(records)
+
+
+def test_extract_records_from_nested_xml_containers(monkeypatch: pytest.MonkeyPatch) -> None:
+    """Test that repeating elements below the root's children are records, in flat memory."""
+    monkeypatch.setattr(document_records, "MAX_RECORD_BYTES", 1024)
+    line = "<Line><Item><SKU>W-{}</SKU><Desc>Bolt</Desc></Item><Qty>{}</Qty></Line>"
+    lines = "".join(line.format(i, i % 7 + 1) for i in range(5000)).encode()
+    data = (
+        b"<PurchaseOrder><Header><PONumber>PO-7</PONumber><Carrier>UPSN</Carrier></Header>"
+        b"<Lines>" + lines + b"</Lines><Trailer><LineCount>5000</LineCount></Trailer>"
+        b"</PurchaseOrder>"
+    )
+    assert len(data) > 100 * document_records.MAX_RECORD_BYTES
+
+    records = list(extract_records("XML", _chunks(data, 4096)))
+
+    assert len(records) == 5000
+    context = {"orderId": "PO-7", "carrier": "UPSN", "description": "Bolt"}
+    assert records[0] == {**context, "sku": "W-0", "quantity": 1}
+    assert records[4999] == {**context, "sku": "W-4999", "quantity": 2}
+
+
+def test_extract_records_applies_each_container_context() -> None:
+    """Test that each container's fields apply to the repeating elements inside it."""
+    data = (
+        b"<Orders>"
+        b"<Order OrderNumber='PO-1'><Lines><Line sku='W-1'/><Line sku='W-2'/></Lines></Order>"
+        b"<Order><OrderNumber>PO-2</OrderNumber><Line><SKU>W-3</SKU></Line><Line><SKU>W-4</SKU></Line>"
+        b"<Line><SKU>W-5</SKU></Line></Order>"
+        b"<Order OrderNumber='PO-3'><Line sku='W-6' qty='2'/></Order>"
+        b"</Orders>"
+    )
+
+    records = list(extract_records("XML", _chunks(data, 7)))
+
+    assert records == [
+        {"orderId": "PO-1", "sku": "W-1"},
+        {"orderId": "PO-1", "sku": "W-2"},
+        {"orderId": "PO-2", "sku": "W-3"},
+        {"orderId": "PO-2", "sku": "W-4"},
+        {"orderId": "PO-2", "sku": "W-5"},
+        {"orderId": "PO-3", "sku": "W-6", "quantity": 2},
+    ]
+
+
+def test_extract_records_rejects_oversized_xml_record(monkeypatch: pytest.MonkeyPatch) -> None:
+    """Test that an XML record larger than MAX_RECORD_BYTES raises ValueError."""
+    monkeypatch.setattr(document_records, "MAX_RECORD_BYTES", 256)
+    notes = b"".join(f"<Note{i}>{'x' * 40}</Note{i}>".encode() for i in range(10))
+    data = b"<Order><Line><SKU>W-1</SKU>" + notes + b"</Line></Order>"
+
+    with pytest.raises(ValueError, match="exceeds 256 bytes"):
+        list(extract_records("XML", [data]))
+
+
+def test_encode_chunks_respects_budget() -> None:
+    """Test that encoded records are grouped under the byte budget, in order."""
+    records = [{"sku": f"W-{index}"} for index in range(10)]
+    chunks = list(encode_chunks(records, 40))
+    assert [len(chunk) for chunk in chunks] == [2, 2, 2, 2, 2]
+    assert [record for chunk in chunks for record in chunk][0] == '{"sku": "W-0"}'
+
+
+def test_record_summary_tracks_records() -> None:
+    """Test that the summary counts records, quantities, fields and distinct order IDs."""
+    summary = RecordSummary()
+    records = [
+        {"orderId": "PO-1", "sku": "W-1", "quantity": 2},
+        {"orderId": "PO-1", "sku": "W-2", "quantity": "x"},
+        {"orderId": "PO-2", "trackingNumber": "1Z"},
+    ]
+    assert list(summary.track(records)) == records
+    assert summary.as_detail() == {
+        "recordCount": 3,
+        "orderIds": ["PO-1", "PO-2"],
+        "totalQuantity": 2,
+        "fields": ["orderId", "quantity", "sku", "trackingNumber"],
+        "eventCount": 0,
+    }
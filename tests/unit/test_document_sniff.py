@@ -0,0 +1,46 @@
+"""Unit tests for the shared document content sniffer."""
+
+from shared.document_sniff import Sniffed, resolve_document_type, sniff
+
+
+def test_sniff_detects_formats() -> None:
+    """Test detection of each supported format from the first bytes."""
+    cases = [
+        (b"ISA*00*          *00*          *ZZ*SENDER         ~", Sniffed("EDI")),
+        (b"GS|PO|SENDER|RECEIVER|20260318~", Sniffed("EDI")),
+        (
+            b"\xef\xbb\xbf<?xml version='1.0'?><!DOCTYPE po [<!ENTITY a 'b'>]><PO/>",
+            Sniffed("XML", "PO"),
+        ),
+        (b"  <Shipment xmlns='urn:x'>", Sniffed("XML", "Shipment")),
+        (b'{"orderId": "ORD-1"}', Sniffed("JSON")),
+        (b'[\n  {"sku": "W-1"}', Sniffed("JSON")),
+        (b"sku,quantity,description\r\nW-1,2,widgets\r\n", Sniffed("CSV")),
+        (b"sku;quantity\nW-1;2\n", Sniffed("CSV")),
+        (b"%PDF-1.7\n%\xe2\xe3\xcf\xd3", Sniffed("PDF")),
+    ]
+    for data, expected in cases:
+        assert sniff(data) == expected, data
+
+
+def test_sniff_rejects_lookalikes() -> None:
+    """Test that text, binary and truncated input that only looks like a format is UNKNOWN."""
+    for data in (
+        b"",
+        b"ISAAC was here",
+        b"Bill of lading, shipped today",
+        b"\x89PNG\r\n\x1a\n\x00\x00",
+        b"{not json",
+        b"<!-- a comment that runs past the window",
+        b"< 5 pallets",
+    ):
+        assert sniff(data).format == "UNKNOWN", data
+
+
+def test_resolve_document_type() -> None:
+    """Test that content overrides content-format extensions but not BOL/POD."""
+    assert resolve_document_type("CSV", Sniffed("EDI")) == "EDI"
+    assert resolve_document_type("UNKNOWN", Sniffed("JSON")) == "JSON"
+    assert resolve_document_type("BOL", Sniffed("CSV")) == "BOL"
+    assert resolve_document_type("EDI", Sniffed("UNKNOWN")) == "EDI"
+    assert resolve_document_type("UNKNOWN", Sniffed("PDF")) == "UNKNOWN"
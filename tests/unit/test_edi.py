@@ -0,0 +1,97 @@
+"""Unit tests for the shared streaming X12 parser."""
+
+import io
+
+import pytest
+from shared.edi import Delimiters, iter_body, iter_segments, read_delimiters, summarize_edi
+
+ISA = (
+    "ISA*00*          *00*          *ZZ*SENDER         *ZZ*RECEIVER       "
+    "*260318*1430*U*00401*000000007*0*P*>~"
+)
+
+PURCHASE_ORDERS = (
+    ISA + "\n"
+    "GS*PO*SENDER*RECEIVER*20260318*1430*12*X*004010~\n"
+    "ST*850*0001~\nBEG*00*SA*PO-1001**20260318~\nPO1*1*10*EA*9.99**VP*W-1~\n"
+    "PO1*2*5*EA*4.50**VP*W-2~\nCTT*2~\nSE*6*0001~\n"
+    "ST*850*0002~\nBEG*00*SA*PO-1002**20260318~\nPO1*1*1*EA*1.00**VP*W-3~\nSE*4*0002~\n"
+    "GE*2*12~\n"
+    "IEA*1*000000007~\n"
+)
+
+
+def _chunks(data: bytes, size: int) -> list[bytes]:
+    return [data[start : start + size] for start in range(0, len(data), size)]
+
+
+def test_read_delimiters_from_isa() -> None:
+    """Test that delimiters are read from ISA, including unpadded fields."""
+    assert read_delimiters(ISA.encode()) == Delimiters(b"*", b">", b"~")
+    unpadded = b"ISA|00||00||ZZ|S|ZZ|R|260318|1430|U|00401|1|0|P|:\n"
+    assert read_delimiters(unpadded) == Delimiters(b"|", b":", b"\n")
+
+
+def test_read_delimiters_rejects_incomplete_isa() -> None:
+    """Test that a header that is not a complete ISA segment raises ValueError."""
+    for header in (b"", b"GS*PO~", ISA[:60].encode()):
+        with pytest.raises(ValueError):
+            read_delimiters(header)
+
+
+def test_summary_is_independent_of_chunk_size() -> None:
+    """Test that splitting the stream anywhere, even inside ISA, gives the same summary."""
+    data = PURCHASE_ORDERS.encode()
+    expected = summarize_edi(iter_segments([data]))
+    assert expected.as_detail() == {
+        "interchangeControlNumbers": ["000000007"],
+        "interchangeCount": 1,
+        "groupControlNumbers": ["12"],
+        "groupCount": 1,
+        "transactionSets": {"850": 2},
+        "orderIds": ["PO-1001", "PO-1002"],
+        "orderCount": 2,
+        "lineCount": 3,
+        "segmentCount": 14,
+        "controlErrors": [],
+        "controlErrorCount": 0,
+    }
+    for size in (1, 7, 100):
+        assert summarize_edi(iter_segments(_chunks(data, size))) == expected
+
+
+def test_iter_segments_alternate_delimiters_and_bom() -> None:
+    """Test newline-terminated segments with a BOM and leading whitespace."""
+    data = b"\xef\xbb\xbf\r\n" + PURCHASE_ORDERS.replace("~\n", "\n").replace("*", "|").encode()
+    segments = list(iter_segments(iter_body(io.BytesIO(data), chunk_bytes=16)))
+    assert segments[0][0] == b"ISA"
+    assert segments[3] == [b"BEG", b"00", b"SA", b"PO-1001", b"", b"20260318"]
+    assert segments[-1] == [b"IEA", b"1", b"000000007"]
+
+
+def test_summary_reports_control_mismatches() -> None:
+    """Test that wrong trailer counts and control numbers are reported."""
+    data = (
+        PURCHASE_ORDERS.replace("SE*6*0001", "SE*5*0001")
+        .replace("GE*2*12", "GE*3*13")
+        .replace("IEA*1*000000007", "IEA*1*000000008")
+    )
+    summary = summarize_edi(iter_segments([data.encode()]))
+    assert summary.error_count == 4
+    assert summary.errors == [
+        "SE 0001: 5 segments declared, 6 found",
+        "GE 12: 3 sets declared, 2 found",
+        "GE 13 does not close GS 12",
+        "IEA 000000008 does not close ISA 000000007",
+    ]
+    assert summary.order_count == 2
+
+
+def test_iter_segments_rejects_non_x12() -> None:
+    """Test that non-X12 input and runaway segments raise ValueError."""
+    with pytest.raises(ValueError, match="missing ISA"):
+        list(iter_segments([b'{"orderId": "ORD-1"}']))
+    with pytest.raises(ValueError):
+        list(iter_segments([]))
+    with pytest.raises(ValueError, match="exceeds"):
+        list(iter_segments([ISA.encode(), b"PO1*" + b"9" * 70_000]))
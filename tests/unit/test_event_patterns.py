@@ -0,0 +1,141 @@
+"""Unit tests for the local EventBridge pattern matcher."""
+
+import random
+from typing import Any
+
+import pytest
+
+from localbus.event_patterns import (
+    Rule,
+    RuleIndex,
+    match_pattern,
+    rules_from_template,
+)
+
+
+def _order_event(**detail: Any) -> dict[str, Any]:
+    return {"source": "public.api", "detail-type": "order.received.v1", "detail": detail}
+
+
+@pytest.fixture(scope="module")
+def stack_index(stack_template: dict[str, Any]) -> RuleIndex:
+    """Index of the rules in the synthesized OrderProcessingStack."""
+    template = stack_template
+    bucket_id = next(
+        logical_id
+        for logical_id, resource in template["Resources"].items()
+        if resource["Type"] == "AWS::S3::Bucket" and logical_id.startswith("OrderDocumentsBucket")
+    )
+    return RuleIndex(rules_from_template(template, refs={bucket_id: "order-documents"}))
+
+
+def _names(rules: list[Rule]) -> set[str]:
+    return {rule.name for rule in rules}
+
+
+def test_stack_rules_route_create_order(stack_index: RuleIndex) -> None:
+    """Test which stack rules a high-value priority create order reaches."""
+    event = _order_event(
+        orderId="o-1", purpose="create", price=25000, priority="urgent", region="us-west-2"
+    )
+
+    assert _names(stack_index.match(event)) == {
+        "route-to-notifier",
+        "route-to-inventory",
+        "route-to-document",
+        "route-to-sns-direct",
+        "route-to-webhook",
+        "high-value-orders",
+        "priority-orders",
+    }
+
+
+def test_stack_rules_route_update_and_s3_events(stack_index: RuleIndex) -> None:
+    """Test anything-but, numeric and string sets, and the S3 bucket reference."""
+    update = _order_event(purpose="update", price="25000", priority="high", region="eu-west-1")
+    assert _names(stack_index.match(update)) == {
+        "route-to-notifier",
+        "route-to-document",
+        "route-to-sns-direct",
+    }
+
+    s3_event = {
+        "source": "aws.s3",
+        "detail-type": "Object Created",
+        "detail": {"bucket": {"name": "order-documents"}, "object": {"key": "a.csv"}},
+    }
+    (rule,) = stack_index.match(s3_event)
+    assert rule.name == "route-s3-to-processor"
+    assert rule.targets[0].startswith("DocumentUploadQueue")
+
+
+def test_matchers() -> None:
+    """Test each supported matcher through the index."""
+    patterns = {
+        "prefix": {"detail": {"sku": [{"prefix": "W-"}]}},
+        "suffix": {"detail": {"file": [{"suffix": ".csv"}]}},
+        "ignore-case": {"detail": {"region": [{"equals-ignore-case": "US-EAST-1"}]}},
+        "range": {"detail": {"price": [{"numeric": [">=", 10, "<", 20]}]}},
+        "not-prefix": {"detail": {"sku": [{"anything-but": {"prefix": "X-"}}]}},
+        "exists": {"detail": {"coupon": [{"exists": True}]}},
+        "missing": {"detail": {"coupon": [{"exists": False}]}},
+        "null": {"detail": {"note": [None]}},
+    }
+    index = RuleIndex(Rule(name, pattern) for name, pattern in patterns.items())
+
+    first = {"detail": {"sku": ["W-1", "Y-2"], "file": "a.csv", "price": 10, "note": None}}
+    assert _names(index.match(first)) == {
+        "prefix",
+        "suffix",
+        "range",
+        "not-prefix",
+        "missing",
+        "null",
+    }
+    second = {"detail": {"sku": "X-1", "region": "us-east-1", "price": 20, "coupon": "SAVE"}}
+    assert _names(index.match(second)) == {"ignore-case", "exists"}
+
+
+def test_index_agrees_with_per_rule_evaluation() -> None:
+    """Test that the index returns the same matches as evaluating every pattern."""
+    rng = random.Random(7)
+    purposes = ["create", "update", "cancel"]
+    regions = ["us-east-1", "us-west-2", "eu-west-1"]
+    rules = []
+    for i in range(300):
+        detail: dict[str, Any] = {}
+        if rng.random() < 0.5:
+            detail["purpose"] = rng.sample(purposes, 2)
+        if rng.random() < 0.3:
+            detail["region"] = [{"anything-but": rng.choice(regions)}]
+        if rng.random() < 0.4:
+            detail["price"] = [{"numeric": [">", rng.randint(0, 1000)]}]
+        if rng.random() < 0.2:
+            detail["items"] = {"sku": [{"prefix": f"W-{rng.randint(0, 9)}"}]}
+        rules.append(Rule(f"r{i}", {"source": ["public.api"], "detail": detail}))
+    index = RuleIndex(rules)
+
+    for _ in range(200):
+        detail = {
+            "purpose": rng.choice(purposes),
+            "price": rng.randint(0, 1000),
+            "items": [{"sku": f"W-{rng.randint(0, 99)}"} for _ in range(rng.randint(0, 3))],
+        }
+        if rng.random() < 0.7:
+            detail["region"] = rng.choice(regions)
+        event = {"source": "public.api", "detail": detail}
+        expected = [rule for rule in rules if match_pattern(rule.pattern, event)]
+        assert index.match(event) == expected
+
+
+def test_invalid_patterns_are_rejected() -> None:
+    """Test that malformed and unsupported patterns fail at compile time."""
+    for pattern in (
+        {},
+        {"detail": {"price": 5}},
+        {"detail": {"price": [{"numeric": [">"]}]}},
+        {"detail": {"ip": [{"cidr": "10.0.0.0/24"}]}},
+        {"$or": [{"source": ["a"]}, {"source": ["b"]}]},
+    ):
+        with pytest.raises(ValueError):
+            RuleIndex([Rule("bad", pattern)])
@@ -0,0 +1,84 @@
+"""Unit tests for the shared idempotency cache."""
+
+import pytest
+from shared import idempotency
+
+RESPONSE = {"statusCode": 202, "headers": {"Content-Type": "application/json"}, "body": "{}"}
+
+
+class FakeClock:
+    """Manually advanced wall clock."""
+
+    def __init__(self) -> None:
+        self.now = 1_000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def test_cache_expires_and_evicts() -> None:
+    """Test that responses expire after the TTL and the local tier is LRU-bounded."""
+    clock = FakeClock()
+    cache = idempotency.IdempotencyCache(ttl=60, capacity=2, clock=clock)
+
+    cache.put("a", RESPONSE)
+    cache.put("b", RESPONSE)
+    assert cache.get("a") is RESPONSE
+    cache.put("c", RESPONSE)  # evicts "b", the least recently used
+
+    assert cache.get("b") is None
+    clock.now += 61
+    assert cache.get("a") is None
+    assert (cache.hits, cache.misses) == (1, 2)
+
+
+def test_shared_store_serves_other_containers() -> None:
+    """Test that a response recorded by one container is replayed by another."""
+    store = idempotency.InMemoryIdempotencyStore()
+    clock = FakeClock()
+    idempotency.IdempotencyCache(store, ttl=60, clock=clock).put("a", RESPONSE)
+    other = idempotency.IdempotencyCache(store, ttl=60, clock=clock)
+
+    assert other.get("a") == RESPONSE
+    assert other.get("a") == RESPONSE
+    # The second hit was served from the local tier
+    assert store.reads == 1
+    clock.now += 61
+    assert idempotency.IdempotencyCache(store, ttl=60, clock=clock).get("a") is None
+
+
+def test_reused_key_with_different_request_is_refused() -> None:
+    """Test that a key recorded for one request body is not replayed for another."""
+    store = idempotency.InMemoryIdempotencyStore()
+    idempotency.IdempotencyCache(store, ttl=60).put("k", RESPONSE, "hash-1")
+    cache = idempotency.IdempotencyCache(store, ttl=60)
+
+    # Refused when read from the shared store, and again from the local tier
+    with pytest.raises(idempotency.IdempotencyKeyReusedError):
+        cache.get("k", "hash-2")
+    with pytest.raises(idempotency.IdempotencyKeyReusedError):
+        cache.get("k", "hash-2")
+    assert cache.get("k", "hash-1") == RESPONSE
+
+
+def test_disabled_cache_records_nothing() -> None:
+    """Test that a TTL of 0 disables the cache."""
+    cache = idempotency.IdempotencyCache(ttl=0)
+    cache.put("a", RESPONSE)
+
+    assert not cache.enabled
+    assert cache.get("a") is None
+
+
+def test_idempotency_key_prefers_header() -> None:
+    """Test that the header wins over the body hash and scopes keep routes apart."""
+    event = {"headers": {"IDEMPOTENCY-KEY": "k-1"}, "body": '{"orderId": "1"}'}
+    unkeyed = {"body": '{"orderId": "1"}'}
+
+    assert idempotency.idempotency_key(event, "order") == "order:key:k-1"
+    assert idempotency.idempotency_key(unkeyed, "order").startswith("order:sha256:")
+    assert idempotency.idempotency_key(unkeyed, "order") != idempotency.idempotency_key(
+        unkeyed, "bulk"
+    )
+    assert idempotency.replayed(RESPONSE)["headers"]["Idempotent-Replayed"] == "true"
+    assert "Idempotent-Replayed" not in RESPONSE["headers"]
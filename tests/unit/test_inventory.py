@@ -1,6 +1,7 @@
 """Unit tests for inventory Lambda function."""
 
 import importlib.util
+import io
 import json
 import os
 import sys
@@ -9,6 +10,7 @@ from typing import Any
 from unittest.mock import MagicMock
 
 import pytest
+from shared.detail_codec import encode_detail
 
 # Set environment variables before importing the handler
 os.environ["AWS_DEFAULT_REGION"] = "us-east-1"
@@ -132,3 +134,308 @@ def test_process_order() -> None:
 def test_log_structured() -> None:
     """Test structured logging function."""
     index.log_structured("info", "Test message", key="value")
+
+
+def test_handler_reports_poison_message(lambda_context: MagicMock) -> None:
+    """Test that an unparseable message only fails itself."""
+    sqs_event = _wrap_in_sqs_event(
+        *(_make_eventbridge_event({"orderId": f"order-{i}"}) for i in range(3))
+    )
+    sqs_event["Records"][1]["body"] = "not json{{{"
+
+    response = index.handler(sqs_event, lambda_context)
+
+    assert response["statusCode"] == 200
+    assert response["batchItemFailures"] == [{"itemIdentifier": "msg-1"}]
+    body = json.loads(response["body"])
+    assert body["message"] == "Processed 2 orders for inventory"
+
+
+def test_handler_reports_non_object_detail(lambda_context: MagicMock) -> None:
+    """Test that a message whose detail is not an object only fails itself."""
+    sqs_event = _wrap_in_sqs_event(_make_eventbridge_event({"orderId": "order-0"}), {"detail": "x"})
+
+    response = index.handler(sqs_event, lambda_context)
+
+    assert response["batchItemFailures"] == [{"itemIdentifier": "msg-1"}]
+    assert json.loads(response["body"])["message"] == "Processed 1 orders for inventory"
+
+
+def test_handler_reports_processing_failure(lambda_context: MagicMock, monkeypatch: Any) -> None:
+    """Test that a record whose processing raises is reported as a batch item failure."""
+    original = index.process_order
+
+    def flaky_process_order(detail: dict[str, Any], request_id: str) -> dict[str, int]:
+        if detail.get("orderId") == "order-2":
+            raise RuntimeError("inventory backend unavailable")
+        return original(detail, request_id)
+
+    monkeypatch.setattr(index, "process_order", flaky_process_order)
+    sqs_event = _wrap_in_sqs_event(
+        *(_make_eventbridge_event({"orderId": f"order-{i}"}) for i in range(3))
+    )
+
+    response = index.handler(sqs_event, lambda_context)
+
+    assert response["batchItemFailures"] == [{"itemIdentifier": "msg-2"}]
+
+
+def test_handler_keeps_order_within_order_id(lambda_context: MagicMock, monkeypatch: Any) -> None:
+    """Test that records sharing an orderId are processed in delivery order."""
+    seen: list[tuple[str, int]] = []
+
+    def recording_process_order(detail: dict[str, Any], request_id: str) -> dict[str, int]:
+        seen.append((detail["orderId"], detail["seq"]))
+        return {}
+
+    monkeypatch.setattr(index, "process_order", recording_process_order)
+    monkeypatch.setattr(index, "INVENTORY_MAX_WORKERS", 4)
+    details = [{"orderId": f"order-{i % 3}", "seq": i} for i in range(9)]
+    sqs_event = _wrap_in_sqs_event(*(_make_eventbridge_event(d) for d in details))
+
+    response = index.handler(sqs_event, lambda_context)
+
+    assert response["batchItemFailures"] == []
+    for order_id in ("order-0", "order-1", "order-2"):
+        sequence = [seq for seen_id, seq in seen if seen_id == order_id]
+        assert sequence == sorted(sequence)
+    assert len(seen) == 9
+
+
+def test_handler_failure_holds_back_later_records_of_same_order(
+    lambda_context: MagicMock, monkeypatch: Any
+) -> None:
+    """Test that a failed record also fails later records for the same order only."""
+
+    def failing_process_order(detail: dict[str, Any], request_id: str) -> dict[str, int]:
+        if detail["seq"] == 1:
+            raise RuntimeError("inventory backend unavailable")
+        return {}
+
+    monkeypatch.setattr(index, "process_order", failing_process_order)
+    details = [
+        {"orderId": "A", "seq": 0},
+        {"orderId": "A", "seq": 1},
+        {"orderId": "B", "seq": 2},
+        {"orderId": "A", "seq": 3},
+    ]
+    sqs_event = _wrap_in_sqs_event(*(_make_eventbridge_event(d) for d in details))
+
+    response = index.handler(sqs_event, lambda_context)
+
+    assert response["batchItemFailures"] == [
+        {"itemIdentifier": "msg-1"},
+        {"itemIdentifier": "msg-3"},
+    ]
+
+
+def test_handler_stops_starting_records_when_time_is_low(lambda_context: MagicMock) -> None:
+    """Test that no records are started once the remaining time is below the reserve."""
+    lambda_context.get_remaining_time_in_millis.return_value = 1000
+    sqs_event = _wrap_in_sqs_event(
+        *(_make_eventbridge_event({"orderId": f"order-{i}"}) for i in range(3))
+    )
+
+    response = index.handler(sqs_event, lambda_context)
+
+    assert len(response["batchItemFailures"]) == 3
+    assert json.loads(response["body"])["message"] == "Processed 0 orders for inventory"
+
+
+def _use_store(monkeypatch: Any, store: Any) -> Any:
+    """Use store as the configured inventory backend for one test."""
+    ledger = index.StockLedger(store, capacity=8)
+    monkeypatch.setattr(index, "STOCK_LEDGER", ledger)
+    monkeypatch.setattr(index, "STOCK_STORE_CONFIGURED", True)
+    return ledger
+
+
+def _record_backend_writes(monkeypatch: Any) -> list[tuple[str, list[str], int]]:
+    """Capture apply_inventory_change calls instead of writing to the backend."""
+    writes: list[tuple[str, list[str], int]] = []
+
+    def fake_apply(sku: str, changes: dict[str, int]) -> tuple[int, bool]:
+        writes.append((sku, sorted(changes), sum(changes.values())))
+        return 0, False
+
+    monkeypatch.setattr(index, "apply_inventory_change", fake_apply)
+    return writes
+
+
+def test_handler_coalesces_updates_per_order_and_sku(
+    lambda_context: MagicMock, monkeypatch: Any
+) -> None:
+    """Test that several events for one order produce one backend write per SKU."""
+    writes = _record_backend_writes(monkeypatch)
+    details = [
+        {"orderId": "A", "items": [{"sku": "W-1", "quantity": 2}, "W-2"]},
+        {"orderId": "B", "items": ["W-1"]},
+        {"orderId": "A", "items": [{"sku": "W-1", "quantity": 3}]},
+        {"orderId": "A", "purpose": "cancel", "items": ["W-2"]},
+    ]
+    sqs_event = _wrap_in_sqs_event(*(_make_eventbridge_event(d) for d in details))
+
+    response = index.handler(sqs_event, lambda_context)
+
+    assert response["batchItemFailures"] == []
+    # W-2 nets to zero for order A, so it is not written at all
+    assert sorted(writes) == [("W-1", ["msg-0", "msg-2"], 5), ("W-1", ["msg-1"], 1)]
+
+
+def test_handler_backend_failure_fails_coalesced_records(
+    lambda_context: MagicMock, monkeypatch: Any
+) -> None:
+    """Test that a failed coalesced write fails every record it covered."""
+
+    def failing_apply(sku: str, changes: dict[str, int]) -> tuple[int, bool]:
+        if "msg-0" in changes:
+            raise RuntimeError("inventory backend unavailable")
+        return 0, False
+
+    monkeypatch.setattr(index, "apply_inventory_change", failing_apply)
+    details = [
+        {"orderId": "A", "items": ["W-1"]},
+        {"orderId": "B", "items": ["W-1"]},
+        {"orderId": "A", "items": ["W-1"]},
+    ]
+    sqs_event = _wrap_in_sqs_event(*(_make_eventbridge_event(d) for d in details))
+
+    response = index.handler(sqs_event, lambda_context)
+
+    assert response["batchItemFailures"] == [
+        {"itemIdentifier": "msg-0"},
+        {"itemIdentifier": "msg-2"},
+    ]
+
+
+def test_handler_redelivery_after_partial_write_applies_each_change_once(
+    lambda_context: MagicMock, monkeypatch: Any
+) -> None:
+    """Test that SKUs written before a failed write are not changed again on redelivery."""
+
+    class FlakyStore(index.InMemoryStockStore):
+        outage = True
+
+        def apply_changes(self, sku: str, changes: dict[str, int]) -> tuple[int, int]:
+            if sku == "W-2" and self.outage:
+                raise RuntimeError("inventory backend unavailable")
+            return super().apply_changes(sku, changes)
+
+    store = FlakyStore({"W-1": 10, "W-2": 10})
+    _use_store(monkeypatch, store)
+    details = [
+        {"orderId": "A", "items": [{"sku": "W-1", "quantity": 2}, "W-2"]},
+        {"orderId": "A", "items": ["W-1", {"sku": "W-2", "quantity": 3}]},
+    ]
+    sqs_event = _wrap_in_sqs_event(*(_make_eventbridge_event(d) for d in details))
+
+    response = index.handler(sqs_event, lambda_context)
+
+    assert len(response["batchItemFailures"]) == 2
+    assert store.get_stock("W-1")[0] == 7
+    assert store.get_stock("W-2")[0] == 10
+
+    # SQS redelivers both messages (same message IDs) once the backend is back
+    store.outage = False
+    response = index.handler(sqs_event, lambda_context)
+
+    assert response["batchItemFailures"] == []
+    assert store.get_stock("W-1")[0] == 7
+    assert store.get_stock("W-2")[0] == 6
+
+
+def test_order_line_deltas_rejects_invalid_items() -> None:
+    """Test that line items without a SKU or with a bad quantity are rejected."""
+    with pytest.raises(ValueError):
+        index.order_line_deltas({"items": [{"quantity": 1}]})
+    with pytest.raises(ValueError):
+        index.order_line_deltas({"items": [{"sku": "W-1", "quantity": "2"}]})
+
+
+def test_handler_writes_through_stock_ledger(lambda_context: MagicMock, monkeypatch: Any) -> None:
+    """Test that stock levels are cached and refreshed from the backend's writes."""
+    store = index.InMemoryStockStore({"W-9": 10})
+    ledger = _use_store(monkeypatch, store)
+    details = [
+        {"orderId": "A", "items": [{"sku": "W-9", "quantity": 2}]},
+        {"orderId": "B", "items": ["W-9"]},
+    ]
+
+    index.handler(
+        _wrap_in_sqs_event(*(_make_eventbridge_event(d) for d in details)), lambda_context
+    )
+
+    assert store.reads == 1
+    assert store.get_stock("W-9") == (7, 2)
+
+    # Stock changes outside this pipeline; the versions in an order are not trusted
+    store.apply_change("W-9", 5)
+    stale = {"orderId": "C", "items": ["W-9"], "stockVersions": {"W-9": 0}}
+    stale_event = _wrap_in_sqs_event(_make_eventbridge_event(stale))
+    stale_event["Records"][0]["messageId"] = "msg-stale"
+    index.handler(stale_event, lambda_context)
+
+    # The write returned the backend's level and version, which replaced the cached ones
+    assert ledger.get("W-9") == 11
+    assert store.reads == 2
+    assert store.get_stock("W-9") == (11, 4)
+
+
+def test_handler_logs_one_inventory_summary_per_order(
+    lambda_context: MagicMock, monkeypatch: Any
+) -> None:
+    """Test that an order logs one summary, and stock warnings only against a real backend."""
+    entries: list[tuple[str, str, dict[str, Any]]] = []
+    monkeypatch.setattr(
+        index, "log_structured", lambda level, message, **kw: entries.append((level, message, kw))
+    )
+    detail = {"orderId": "A", "items": [f"W-{i}" for i in range(40)]}
+    sqs_event = _wrap_in_sqs_event(_make_eventbridge_event(detail))
+
+    index.handler(sqs_event, lambda_context)
+
+    assert [e for e in entries if e[0] == "warning"] == []
+    [summary] = [e[2] for e in entries if e[1] == "Inventory updated"]
+    assert (summary["sku_count"], summary["quantity"]) == (40, 40)
+
+    entries.clear()
+    _use_store(monkeypatch, index.InMemoryStockStore({"W-0": 5}))
+    sqs_event["Records"][0]["messageId"] = "msg-again"
+    index.handler(sqs_event, lambda_context)
+
+    [warning] = [e[2] for e in entries if e[0] == "warning"]
+    assert warning["sku_count"] == 39
+    assert len(warning["skus"]) == index.MAX_LOGGED_SKUS
+
+
+def test_handler_fetches_claim_checked_order(lambda_context: MagicMock, monkeypatch: Any) -> None:
+    """Test that a claim-checked order's line items are read from S3."""
+    store = index.InMemoryStockStore({"W-7": 10})
+    _use_store(monkeypatch, store)
+    full_order = {"orderId": "BIG", "items": [{"sku": "W-7", "quantity": 4}]}
+    mock_s3 = MagicMock()
+    mock_s3.get_object.return_value = {"Body": io.BytesIO(json.dumps(full_order).encode())}
+    monkeypatch.setattr(index, "get_s3_client", lambda: mock_s3)
+    detail = {
+        "orderId": "BIG",
+        "itemCount": 1,
+        "claimCheck": {"bucket": "claims", "key": "orders/big.json", "size": 60},
+    }
+
+    response = index.handler(_wrap_in_sqs_event(_make_eventbridge_event(detail)), lambda_context)
+
+    assert response["batchItemFailures"] == []
+    mock_s3.get_object.assert_called_once_with(Bucket="claims", Key="orders/big.json")
+    assert store.get_stock("W-7") == (6, 1)
+
+
+def test_handler_decodes_compressed_order(lambda_context: MagicMock, monkeypatch: Any) -> None:
+    """Test that a compressed order's line items are reserved."""
+    store = index.InMemoryStockStore({"W-5": 10})
+    _use_store(monkeypatch, store)
+    detail = encode_detail({"orderId": "Z", "items": [{"sku": "W-5", "quantity": 3}]})
+
+    response = index.handler(_wrap_in_sqs_event(_make_eventbridge_event(detail)), lambda_context)
+
+    assert response["batchItemFailures"] == []
+    assert store.get_stock("W-5") == (7, 1)
@@ -0,0 +1,124 @@
+"""Unit tests for the load generator and replay harness."""
+
+import json
+import threading
+from dataclasses import replace
+from pathlib import Path
+from typing import Any
+
+import pytest
+from shared.edi import iter_segments, summarize_edi
+
+from localbus.bus import LocalBus
+from localbus.loadgen import (
+    DirectDriver,
+    HttpDriver,
+    Request,
+    WorkloadGenerator,
+    load_workload,
+    make_shim,
+    run_load,
+    save_workload,
+)
+
+
+@pytest.fixture
+def bus(stack_template: dict[str, Any]) -> LocalBus:
+    """A LocalBus for the stack."""
+    return LocalBus(stack_template)
+
+
+def test_orders_vary_routing_fields_and_reach_target_size() -> None:
+    """Test that generated orders vary the fields the rules filter on and honor the size."""
+    generator = WorkloadGenerator(seed=3)
+    orders = [generator.order(size_bytes=4096) for _ in range(200)]
+
+    for order in orders:
+        assert 4096 <= len(json.dumps(order)) < 4096 + 200
+        assert order["order"]["price"] == order["price"]
+    assert {o["purpose"] for o in orders} == {"create", "update", "cancel"}
+    assert len({o["priority"] for o in orders}) == 4
+    assert len({o["region"] for o in orders}) == 4
+    assert any(o["price"] > 10000 for o in orders)
+
+
+def test_workload_is_reproducible_and_paced() -> None:
+    """Test that a seed reproduces a workload and offsets follow the target rate."""
+    first = list(WorkloadGenerator(seed=1).requests(50, rate=100, arrivals="uniform"))
+    second = list(WorkloadGenerator(seed=1).requests(50, rate=100, arrivals="uniform"))
+
+    assert first == second
+    assert first[-1].offset == pytest.approx(0.49)
+
+
+def test_run_load_reports_the_scheduled_rate() -> None:
+    """Test that offered_rps is the rate of the schedule sent, not count over last offset."""
+
+    class NullDriver:
+        def send(self, request: Request) -> int:
+            return 200
+
+    requests = list(WorkloadGenerator(seed=1).requests(20, rate=200, arrivals="uniform"))
+
+    report = run_load(requests, NullDriver())
+
+    assert report["offered_rps"] == pytest.approx(200)
+    replayed = run_load([replace(r, offset=r.offset + 1) for r in requests], NullDriver(), speed=20)
+    assert replayed["offered_rps"] == pytest.approx(4000)
+
+
+def test_uploads_follow_key_convention_and_edi_is_valid() -> None:
+    """Test that uploads follow the key convention and EDI uploads are valid X12."""
+    generator = WorkloadGenerator(seed=2)
+    uploads = [generator.upload(size_bytes=2048) for _ in range(20)]
+
+    for key, content, content_type in uploads:
+        assert key.startswith("inbound/ORD-") and len(key.split("/")) == 3
+        assert 1024 < len(content) <= 2048 and content_type
+    key, content, _ = next(u for u in uploads if u[0].endswith(".edi"))
+    summary = summarize_edi(iter_segments([content.encode()]))
+    assert summary.order_ids == [key.split("/")[1]]
+    assert summary.line_count > 1 and summary.error_count == 0
+
+
+def test_record_and_replay(tmp_path: Path) -> None:
+    """Test that a recorded workload loads back unchanged."""
+    requests = list(WorkloadGenerator(seed=4).requests(20, rate=10))
+    path = tmp_path / "workload.jsonl"
+
+    save_workload(requests, path)
+
+    assert load_workload(path) == requests
+
+
+def test_run_load_in_process(bus: LocalBus) -> None:
+    """Test a short direct run through the whole pipeline."""
+    generator = WorkloadGenerator(seed=5, mix={"order": 0.8, "upload": 0.2})
+    requests = list(generator.requests(40, rate=10_000))
+
+    report = run_load(requests, DirectDriver(bus))
+
+    assert report["requests"] == 40
+    assert set(report["statuses"]) <= {"200", "202"}
+    assert report["latency_ms"]["p99"] >= report["latency_ms"]["p50"] > 0
+    pipeline = bus.report(report["elapsed_s"])
+    assert pipeline["completed"] == 40 and pipeline["failed"] == 0
+
+
+def test_http_shim(bus: LocalBus) -> None:
+    """Test that the shim serves the API routes and document uploads."""
+    server = make_shim(bus, port=0)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    driver = HttpDriver(f"http://127.0.0.1:{server.server_port}")
+    try:
+        order = json.dumps(WorkloadGenerator(seed=6).order())
+        assert driver.send(Request("order", 0, "/orders", order)) == 202
+        assert driver.send(Request("order", 0, "/missing", order)) == 404
+        upload = Request("upload", 0, "inbound/ORD-1/po.csv", "orderId\nORD-1\n", "text/csv")
+        assert driver.send(upload) == 200
+    finally:
+        server.shutdown()
+        server.server_close()
+
+    assert bus.invocations["order-receiver"] == 1
+    assert bus.invocations["document-processor"] == 1
@@ -0,0 +1,223 @@
+"""Unit tests for the in-process event bus simulator."""
+
+import json
+import os
+import random
+from typing import Any
+from unittest.mock import patch
+
+import pytest
+from shared.detail_codec import decode_detail
+from shared.sqs_sender import SEND_MESSAGE_BATCH_MAX_BYTES
+
+from localbus.bus import (
+    EXAMPLES_DIR,
+    LocalBus,
+    LocalEventsClient,
+    LocalQueue,
+    SimClock,
+    demo_orders,
+)
+
+ORDER = {"orderId": "ORD-1", "purpose": "create", "items": ["W-1"], "price": 100}
+
+
+@pytest.fixture
+def bus(stack_template: dict[str, Any]) -> LocalBus:
+    """A LocalBus for the stack."""
+    return LocalBus(stack_template)
+
+
+def test_create_order_fans_out_to_every_consumer(bus: LocalBus) -> None:
+    """Test that a create order reaches notifier, document and the inventory queue."""
+    response = bus.submit_order(ORDER)
+    bus.run()
+
+    assert response["statusCode"] == 202
+    assert bus.invocations == {
+        "order-receiver": 1,
+        "notifier": 1,
+        "document": 1,
+        "inventory": 1,
+    }
+    assert len(bus.queues_by_name()["order-notifications-queue"]) == 1
+    assert len(bus.queues_by_name()["inventory-processing-queue"]) == 0
+    (trace,) = bus.traces
+    assert trace.latency is not None and not trace.failed
+
+
+def test_update_order_skips_inventory(bus: LocalBus) -> None:
+    """Test that the anything-but rule keeps update orders out of inventory."""
+    bus.submit_order({**ORDER, "purpose": "update"})
+    bus.run()
+
+    assert "inventory" not in bus.invocations
+    assert bus.invocations["notifier"] == 1
+
+
+def test_bulk_orders_are_routed(bus: LocalBus) -> None:
+    """Test that the /orders/bulk route publishes one event per order."""
+    response = bus.submit_order([ORDER, {**ORDER, "orderId": "ORD-2"}], path="/orders/bulk")
+    bus.run()
+
+    assert response["statusCode"] == 202
+    assert bus.invocations["notifier"] == 2
+
+
+def test_oversized_order_travels_by_claim_check(bus: LocalBus) -> None:
+    """Test that an order over the PutEvents limit is stored in S3 and fetched by consumers."""
+    # Random SKUs, so the order is still over the claim-check threshold compressed
+    rng = random.Random(0)
+    items = [{"sku": f"{rng.getrandbits(128):032x}", "quantity": 1} for _ in range(12_000)]
+    response = bus.submit_order({**ORDER, "orderId": "ORD-BIG", "items": items})
+    bus.run()
+
+    assert response["statusCode"] == 202
+    assert bus.errors == {}
+    assert bus.invocations == {
+        "order-receiver": 1,
+        "notifier": 1,
+        "document": 1,
+        "inventory": 1,
+    }
+    ((bucket, key),) = bus.objects
+    assert bucket.startswith("order-claim-check-") and key.startswith("orders/")
+    assert len(bus.queues_by_name()["order-notifications-queue"]) == 1
+
+
+def test_large_order_travels_compressed(bus: LocalBus) -> None:
+    """Test that a compressible large order is published compressed and decoded by consumers."""
+    items = [{"sku": f"SKU-{i:06d}", "quantity": 1} for i in range(12_000)]
+    response = bus.submit_order({**ORDER, "orderId": "ORD-BIG", "items": items})
+    bus.run()
+
+    assert response["statusCode"] == 202
+    assert bus.errors == {}
+    assert bus.invocations["inventory"] == 1
+    assert bus.objects == {}
+    (message,), _ = bus.queues_by_name()["order-notifications-queue"].receive()
+    # Decoded, the order would not fit in an SQS message, so the email keeps it compressed
+    assert len(message.body) <= SEND_MESSAGE_BATCH_MAX_BYTES
+    assert len(decode_detail(json.loads(message.body)["orderData"])["items"]) == 12_000
+
+
+def test_demo_orders_each_reach_every_consumer(bus: LocalBus) -> None:
+    """Test that the simulator's orders are processed, not replayed from the idempotency cache."""
+    for i, order in enumerate(demo_orders(20)):
+        bus.submit_order(order)
+        if (i + 1) % 10 == 0:
+            bus.run()
+
+    assert bus.invocations["order-receiver"] == 20
+    assert bus.invocations["notifier"] == 20
+    assert bus.invocations["document"] == 20
+    (inventory_queue,) = (
+        k for k, q in bus.queues.items() if q.name == "inventory-processing-queue"
+    )
+    # Only the demo_1 create orders are routed to inventory
+    assert bus.deliveries[inventory_queue] == 10
+    assert bus.errors == {}
+
+
+def test_handler_environment_is_scoped_to_invocations(stack_template: dict[str, Any]) -> None:
+    """Test that function variables are set only while a handler runs, with overrides applied."""
+    before = dict(os.environ)
+    bus = LocalBus(stack_template, environment={"LOG_LEVEL": "DEBUG"})
+    seen: dict[str, str] = {}
+    function = next(f for f in bus.functions.values() if f.name == "order-receiver")
+    handler = function.module.handler
+
+    def capturing_handler(event: Any, context: Any) -> dict[str, Any]:
+        seen.update(os.environ)
+        return handler(event, context)
+
+    with patch.object(function.module, "handler", capturing_handler):
+        assert bus.submit_order(ORDER)["statusCode"] == 202
+
+    assert dict(os.environ) == before
+    assert seen["LOG_LEVEL"] == "DEBUG"
+    assert seen["EVENT_BUS_NAME"] == function.environment["EVENT_BUS_NAME"]
+
+
+def test_upload_triggers_document_processor(bus: LocalBus) -> None:
+    """Test that a documents bucket upload reaches document_processor via the upload queue."""
+    entries: list[dict[str, Any]] = []
+    put_events = LocalEventsClient.put_events
+
+    def capturing_put_events(client: LocalEventsClient, Entries: list[Any]) -> dict[str, Any]:
+        entries.extend(Entries)
+        return put_events(client, Entries)
+
+    invoice = (EXAMPLES_DIR / "demo_3_invoice.edi").read_bytes()
+    with patch.object(LocalEventsClient, "put_events", capturing_put_events):
+        bus.upload_document("inbound/ORD-2501/invoice.edi", invoice, "application/edi-x12")
+        bus.run()
+
+    assert bus.invocations == {"document-processor": 1}
+    assert bus.errors == {}
+    (entry,) = entries
+    edi = json.loads(entry["Detail"])["edi"]
+    assert edi["orderIds"] == ["ORD-2501"] and edi["controlErrorCount"] == 0
+
+
+def test_bulk_upload_is_processed_in_batches(bus: LocalBus) -> None:
+    """Test that queued upload events reach document_processor in batches of 100."""
+    sizes: list[int] = []
+    put_events = LocalEventsClient.put_events
+
+    def counting_put_events(client: LocalEventsClient, Entries: list[Any]) -> dict[str, Any]:
+        sizes.append(len(Entries))
+        return put_events(client, Entries)
+
+    with patch.object(LocalEventsClient, "put_events", counting_put_events):
+        for i in range(150):
+            bus.upload_document(f"inbound/ORD-{i:05d}/scan.pod", b"%PDF-1.7\n", "application/pdf")
+        bus.run()
+
+    assert bus.invocations == {"document-processor": 2}
+    assert sizes == [10] * 15
+    assert len(bus.queues_by_name()["document-upload-queue"]) == 0
+    assert all(t.latency is not None and not t.failed for t in bus.traces)
+
+
+def test_failing_inventory_records_are_dead_lettered(bus: LocalBus) -> None:
+    """Test that a record failing every receive moves to the DLQ after maxReceiveCount."""
+    (inventory,) = (f for f in bus.functions.values() if f.name == "inventory")
+    with patch.object(inventory.module, "process_order", side_effect=RuntimeError("down")):
+        bus.submit_order(ORDER)
+        bus.run()
+
+    queues = bus.queues_by_name()
+    assert bus.invocations["inventory"] == 3
+    assert len(queues["inventory-processing-queue"]) == 0
+    assert len(queues["inventory-processing-dlq"]) == 1
+    assert bus.traces[0].failed
+
+
+def test_queue_redelivers_after_visibility_timeout() -> None:
+    """Test that an undeleted message becomes visible again once its timeout expires."""
+    clock = SimClock()
+    queue = LocalQueue("q", "url", clock, visibility_timeout=30)
+    queue.send(json.dumps({"n": 1}))
+
+    (message,), _ = queue.receive()
+    assert queue.receive() == ([], [])
+    clock.advance_to(clock.now() + 31)
+    (again,), _ = queue.receive()
+    assert again.message_id == message.message_id and again.receive_count == 2
+    assert queue.delete(again.receipt_handle) is not None
+    assert len(queue) == 0
+
+
+def test_retried_order_fans_out_once(bus: LocalBus) -> None:
+    """Test that a retry with the same Idempotency-Key is not published again."""
+    headers = {"Idempotency-Key": "retry-1"}
+    first = bus.submit_order(ORDER, headers=headers)
+    retry = bus.submit_order(ORDER, headers=headers)
+    bus.run()
+
+    assert first["statusCode"] == retry["statusCode"] == 202
+    assert retry["headers"]["Idempotent-Replayed"] == "true"
+    assert bus.invocations["order-receiver"] == 2
+    assert bus.invocations["inventory"] == 1
+    assert bus.invocations["notifier"] == 1
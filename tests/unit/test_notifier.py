@@ -7,6 +7,8 @@ from unittest.mock import MagicMock
 
 import pytest
 from moto import mock_aws
+from shared.detail_codec import decode_detail, encode_detail
+from shared.sqs_sender import SEND_MESSAGE_BATCH_MAX_BYTES
 
 # Set environment variables before importing the handler
 os.environ["AWS_DEFAULT_REGION"] = "us-east-1"
@@ -67,7 +69,6 @@ def test_handler_success(eventbridge_event: dict[str, Any], lambda_context: Magi
 
     # Update environment variable
     os.environ["QUEUE_URL"] = queue_url
-    index.QUEUE_URL = queue_url
 
     # Call the handler
     response = index.handler(eventbridge_event, lambda_context)
@@ -103,7 +104,6 @@ def test_handler_sqs_error(
     queue_url = queue["QueueUrl"]
 
     os.environ["QUEUE_URL"] = queue_url
-    index.QUEUE_URL = queue_url
 
     # Mock get_sqs_client to return a client with mocked send_message
     mock_sqs = boto3.client("sqs", region_name="us-east-1")
@@ -122,3 +122,110 @@ def test_handler_sqs_error(
 def test_log_structured() -> None:
     """Test structured logging function."""
     index.log_structured("info", "Test message", key="value")
+
+
+def _sqs_batch(*details: dict[str, Any]) -> dict[str, Any]:
+    """Wrap EventBridge events with the given details in an SQS batch event."""
+    return {
+        "Records": [
+            {
+                "messageId": f"msg-{i}",
+                "body": json.dumps({"detail-type": "order.received.v1", "detail": detail}),
+                "eventSource": "aws:sqs",
+            }
+            for i, detail in enumerate(details)
+        ]
+    }
+
+
+@mock_aws
+def test_handler_sqs_batch(lambda_context: MagicMock) -> None:
+    """Test that an SQS batch is coalesced into SendMessageBatch calls."""
+    index._sqs_client = None
+
+    import boto3
+
+    sqs = boto3.client("sqs", region_name="us-east-1")
+    queue_url = sqs.create_queue(QueueName="test-queue")["QueueUrl"]
+    os.environ["QUEUE_URL"] = queue_url
+
+    event = _sqs_batch(*({"orderId": f"order-{i}"} for i in range(12)))
+    response = index.handler(event, lambda_context)
+
+    assert response["statusCode"] == 200
+    assert response["batchItemFailures"] == []
+    attributes = sqs.get_queue_attributes(
+        QueueUrl=queue_url, AttributeNames=["ApproximateNumberOfMessages"]
+    )
+    assert attributes["Attributes"]["ApproximateNumberOfMessages"] == "12"
+
+
+def test_handler_pipes_batch_reports_failures(lambda_context: MagicMock, monkeypatch: Any) -> None:
+    """Test that a Pipes batch reports unparseable and unsendable records."""
+    mock_sqs = MagicMock()
+    mock_sqs.send_message_batch.return_value = {
+        "Successful": [{"Id": "0", "MessageId": "m-0"}],
+        "Failed": [{"Id": "1", "Code": "InvalidMessageContents", "SenderFault": True}],
+    }
+    monkeypatch.setattr(index, "get_sqs_client", lambda: mock_sqs)
+
+    event = [
+        {"messageId": "a", "body": json.dumps({"detail": {"orderId": "1"}})},
+        {"messageId": "b", "body": "not json"},
+        {"messageId": "c", "body": json.dumps({"detail": {"orderId": "2"}})},
+    ]
+    response = index.handler(event, lambda_context)
+
+    assert response["batchItemFailures"] == [{"itemIdentifier": "b"}, {"itemIdentifier": "c"}]
+    mock_sqs.send_message_batch.assert_called_once()
+    entries = mock_sqs.send_message_batch.call_args[1]["Entries"]
+    assert [json.loads(entry["MessageBody"])["orderData"]["orderId"] for entry in entries] == [
+        "1",
+        "2",
+    ]
+
+
+def test_handler_decodes_compressed_detail(lambda_context: MagicMock, monkeypatch: Any) -> None:
+    """Test that the email carries the decoded order, and undecodable records fail."""
+    mock_sqs = MagicMock()
+    mock_sqs.send_message_batch.return_value = {
+        "Successful": [{"Id": "0", "MessageId": "m-0"}],
+        "Failed": [],
+    }
+    monkeypatch.setattr(index, "get_sqs_client", lambda: mock_sqs)
+    order = {"orderId": "Z-1", "price": 10, "items": [{"sku": "W-1", "quantity": 3}]}
+    corrupt = {"orderId": "Z-2", "compressed": {"encoding": "zlib+base64", "data": "!!"}}
+
+    response = index.handler(_sqs_batch(encode_detail(order), corrupt), lambda_context)
+
+    assert response["batchItemFailures"] == [{"itemIdentifier": "msg-1"}]
+    entries = mock_sqs.send_message_batch.call_args[1]["Entries"]
+    assert json.loads(entries[0]["MessageBody"])["orderData"] == order
+
+
+def test_handler_keeps_large_compressed_order_compressed(
+    lambda_context: MagicMock, monkeypatch: Any
+) -> None:
+    """Test that an order too large for SQS once decoded is forwarded compressed."""
+    mock_sqs = MagicMock()
+    mock_sqs.send_message.return_value = {"MessageId": "m-0"}
+    mock_sqs.send_message_batch.return_value = {
+        "Successful": [{"Id": "0", "MessageId": "m-0"}],
+        "Failed": [],
+    }
+    monkeypatch.setattr(index, "get_sqs_client", lambda: mock_sqs)
+    items = [{"sku": f"W-{i:05d}", "quantity": 1, "note": "shrink-wrapped"} for i in range(12_000)]
+    order = {"orderId": "Z-3", "purpose": "create", "items": items}
+    detail = encode_detail(order)
+    assert len(json.dumps(order)) > SEND_MESSAGE_BATCH_MAX_BYTES > len(json.dumps(detail))
+
+    index.handler({"detail": detail}, lambda_context)
+    response = index.handler(_sqs_batch(detail), lambda_context)
+
+    assert response["batchItemFailures"] == []
+    single = mock_sqs.send_message.call_args[1]["MessageBody"]
+    (entry,) = mock_sqs.send_message_batch.call_args[1]["Entries"]
+    for body in (single, entry["MessageBody"]):
+        assert len(body) <= SEND_MESSAGE_BATCH_MAX_BYTES
+        assert json.loads(body)["orderData"] == detail
+        assert decode_detail(json.loads(body)["orderData"]) == order
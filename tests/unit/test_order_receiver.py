@@ -7,6 +7,7 @@ from unittest.mock import MagicMock
 
 import pytest
 from moto import mock_aws
+from shared.detail_codec import decode_detail
 
 # Set environment variables before importing the handler
 os.environ["AWS_DEFAULT_REGION"] = "us-east-1"
@@ -25,6 +26,14 @@ sys.modules["order_receiver_index"] = index
 spec.loader.exec_module(index)
 
 
+@pytest.fixture(autouse=True)
+def idempotency_cache(monkeypatch: Any) -> Any:
+    """Give each test an empty idempotency cache, so identical bodies are not replayed."""
+    cache = index.IdempotencyCache(ttl=60)
+    monkeypatch.setattr(index, "IDEMPOTENCY_CACHE", cache)
+    return cache
+
+
 @pytest.fixture
 def api_gateway_event() -> dict[str, Any]:
     """Create a sample API Gateway event."""
@@ -142,3 +151,261 @@ def test_log_structured() -> None:
     """Test structured logging function."""
     # Just verify it doesn't raise exceptions
     index.log_structured("info", "Test message", key="value", number=123)
+
+
+def _bulk_event(body: str) -> dict[str, Any]:
+    """Create an API Gateway event for the bulk endpoint."""
+    return {
+        "body": body,
+        "headers": {"Content-Type": "application/json"},
+        "httpMethod": "POST",
+        "resource": "/orders/bulk",
+        "path": "/orders/bulk",
+    }
+
+
+@mock_aws
+def test_handler_bulk_json_array(lambda_context: MagicMock) -> None:
+    """Test bulk submission of a JSON array packs orders into PutEvents chunks."""
+    index._eventbridge_client = None
+
+    import boto3
+
+    events = boto3.client("events", region_name="us-east-1")
+    events.create_event_bus(Name="test-event-bus")
+
+    orders = [{"orderId": f"order-{i}", "purpose": "create"} for i in range(25)]
+    response = index.handler(_bulk_event(json.dumps(orders)), lambda_context)
+
+    assert response["statusCode"] == 202
+    body = json.loads(response["body"])
+    assert body["accepted"] == 25
+    assert body["rejected"] == 0
+    assert [result["index"] for result in body["results"]] == list(range(25))
+    assert all(result["status"] == "accepted" for result in body["results"])
+
+
+def test_handler_bulk_ndjson_partial(lambda_context: MagicMock, monkeypatch: Any) -> None:
+    """Test NDJSON bulk submission reports per-order acceptance."""
+    mock_eventbridge = MagicMock()
+    mock_eventbridge.put_events.return_value = {
+        "FailedEntryCount": 1,
+        "Entries": [{"EventId": "evt-0"}, {"ErrorCode": "MalformedDetail"}],
+    }
+    monkeypatch.setattr(index, "get_eventbridge_client", lambda: mock_eventbridge)
+
+    body = '{"orderId": "a"}\n\nnot json\n{"orderId": "b"}\n[1, 2]\n'
+    response = index.handler(_bulk_event(body), lambda_context)
+
+    assert response["statusCode"] == 207
+    results = json.loads(response["body"])["results"]
+    assert [r["status"] for r in results] == ["accepted", "rejected", "rejected", "rejected"]
+    assert results[0]["eventId"] == "evt-0"
+    assert results[1]["error"] == "Invalid JSON"
+    assert results[2]["error"] == "MalformedDetail"
+    assert results[3]["error"] == "Order must be a JSON object"
+    mock_eventbridge.put_events.assert_called_once()
+
+
+def test_handler_bulk_invalid_array(lambda_context: MagicMock) -> None:
+    """Test that a malformed JSON array body is rejected with 400."""
+    response = index.handler(_bulk_event("[{"), lambda_context)
+
+    assert response["statusCode"] == 400
+
+
+def test_handler_forwards_original_body(lambda_context: MagicMock, monkeypatch: Any) -> None:
+    """Test that the request body is forwarded as the Detail without re-serializing."""
+    mock_eventbridge = MagicMock()
+    mock_eventbridge.put_events.return_value = {
+        "FailedEntryCount": 0,
+        "Entries": [{"EventId": "evt-0"}],
+    }
+    monkeypatch.setattr(index, "get_eventbridge_client", lambda: mock_eventbridge)
+
+    # Formatting that json.dumps would not reproduce
+    body = '{ "orderId":"12345",\n  "customer": "Zoë", "total": 1.50 }'
+    response = index.handler({"body": body, "path": "/orders"}, lambda_context)
+
+    assert response["statusCode"] == 202
+    entry = mock_eventbridge.put_events.call_args[1]["Entries"][0]
+    assert entry["Detail"] is body
+
+
+def _large_order(size_bytes: int) -> dict[str, Any]:
+    """Build an order whose JSON encoding is at least size_bytes long."""
+    items = [{"sku": f"SKU-{i:06d}", "quantity": 1} for i in range(size_bytes // 30)]
+    return {"orderId": "BIG-1", "purpose": "create", "price": 50000, "items": items}
+
+
+def test_handler_claim_checks_oversized_order(lambda_context: MagicMock, monkeypatch: Any) -> None:
+    """Test that an order over the threshold is stored in S3 and published as a pointer."""
+    mock_eventbridge = MagicMock()
+    mock_eventbridge.put_events.return_value = {
+        "FailedEntryCount": 0,
+        "Entries": [{"EventId": "evt-0"}],
+    }
+    mock_s3 = MagicMock()
+    monkeypatch.setattr(index, "get_eventbridge_client", lambda: mock_eventbridge)
+    monkeypatch.setattr(index, "get_s3_client", lambda: mock_s3)
+    monkeypatch.setenv("CLAIM_CHECK_BUCKET", "claims")
+
+    body = json.dumps(_large_order(300 * 1024))
+    response = index.handler({"body": body, "path": "/orders"}, lambda_context)
+
+    assert response["statusCode"] == 202
+    stored = mock_s3.put_object.call_args[1]
+    assert stored["Bucket"] == "claims"
+    assert stored["Body"] == body.encode()
+    detail = json.loads(mock_eventbridge.put_events.call_args[1]["Entries"][0]["Detail"])
+    assert detail["claimCheck"] == {"bucket": "claims", "key": stored["Key"], "size": len(body)}
+    assert detail["price"] == 50000
+    assert detail["itemCount"] == len(json.loads(body)["items"])
+
+
+def test_handler_rejects_oversized_order_without_bucket(
+    lambda_context: MagicMock, monkeypatch: Any
+) -> None:
+    """Test that an order over 256 KB gets 413 when claim check is not configured."""
+    mock_eventbridge = MagicMock()
+    monkeypatch.setattr(index, "get_eventbridge_client", lambda: mock_eventbridge)
+    monkeypatch.delenv("CLAIM_CHECK_BUCKET", raising=False)
+
+    body = json.dumps(_large_order(300 * 1024))
+    response = index.handler({"body": body, "path": "/orders"}, lambda_context)
+
+    assert response["statusCode"] == 413
+    mock_eventbridge.put_events.assert_not_called()
+
+
+def test_handler_bulk_rejects_order_when_claim_check_fails(
+    lambda_context: MagicMock, monkeypatch: Any
+) -> None:
+    """Test that a failed S3 write rejects only the oversized order in a bulk request."""
+    mock_eventbridge = MagicMock()
+    mock_eventbridge.put_events.return_value = {
+        "FailedEntryCount": 0,
+        "Entries": [{"EventId": "evt-0"}],
+    }
+    mock_s3 = MagicMock()
+    mock_s3.put_object.side_effect = RuntimeError("S3 unavailable")
+    monkeypatch.setattr(index, "get_eventbridge_client", lambda: mock_eventbridge)
+    monkeypatch.setattr(index, "get_s3_client", lambda: mock_s3)
+    monkeypatch.setenv("CLAIM_CHECK_BUCKET", "claims")
+
+    body = json.dumps([{"orderId": "small"}, _large_order(300 * 1024)])
+    response = index.handler(_bulk_event(body), lambda_context)
+
+    assert response["statusCode"] == 207
+    results = json.loads(response["body"])["results"]
+    assert [r["status"] for r in results] == ["accepted", "rejected"]
+    assert results[1]["error"] == "Claim check failed"
+
+
+def test_handler_compresses_large_order(lambda_context: MagicMock, monkeypatch: Any) -> None:
+    """Test that a large order is published compressed instead of claim-checked."""
+    mock_eventbridge = MagicMock()
+    mock_eventbridge.put_events.return_value = {
+        "FailedEntryCount": 0,
+        "Entries": [{"EventId": "evt-0"}],
+    }
+    mock_s3 = MagicMock()
+    monkeypatch.setattr(index, "get_eventbridge_client", lambda: mock_eventbridge)
+    monkeypatch.setattr(index, "get_s3_client", lambda: mock_s3)
+    monkeypatch.setattr(index, "DETAIL_COMPRESSION_MIN_BYTES", 64 * 1024)
+    monkeypatch.setenv("CLAIM_CHECK_BUCKET", "claims")
+
+    order = _large_order(220 * 1024)
+    response = index.handler({"body": json.dumps(order), "path": "/orders"}, lambda_context)
+
+    assert response["statusCode"] == 202
+    mock_s3.put_object.assert_not_called()
+    detail = json.loads(mock_eventbridge.put_events.call_args[1]["Entries"][0]["Detail"])
+    assert detail["price"] == 50000
+    assert decode_detail(detail) == order
+
+
+def test_handler_replays_response_to_retry(
+    api_gateway_event: dict[str, Any], lambda_context: MagicMock, monkeypatch: Any
+) -> None:
+    """Test that retries get the original 202 without publishing again."""
+    mock_eventbridge = MagicMock()
+    mock_eventbridge.put_events.return_value = {
+        "FailedEntryCount": 0,
+        "Entries": [{"EventId": "evt-0"}],
+    }
+    monkeypatch.setattr(index, "get_eventbridge_client", lambda: mock_eventbridge)
+
+    first = index.handler(api_gateway_event, lambda_context)
+    retry = index.handler(dict(api_gateway_event), lambda_context)
+    bulk = index.handler(
+        {**api_gateway_event, "path": "/orders/bulk", "body": "[{}]"}, lambda_context
+    )
+    keyed = {**api_gateway_event, "headers": {"idempotency-key": "abc"}}
+    index.handler(keyed, lambda_context)
+    keyed_retry = index.handler(dict(keyed), lambda_context)
+    reused = index.handler({**keyed, "body": '{"orderId": "changed"}'}, lambda_context)
+
+    assert first["statusCode"] == retry["statusCode"] == 202
+    assert retry["body"] == first["body"]
+    assert retry["headers"]["Idempotent-Replayed"] == "true"
+    assert "Idempotent-Replayed" not in first["headers"]
+    assert bulk["statusCode"] == 202
+    assert keyed_retry["headers"]["Idempotent-Replayed"] == "true"
+    # A reused key with a different body is refused, not answered with the earlier order
+    assert reused["statusCode"] == 422
+    assert "Idempotent-Replayed" not in reused["headers"]
+    # The original, the bulk request and the keyed request
+    assert mock_eventbridge.put_events.call_count == 3
+
+
+def test_handler_does_not_replay_failures(
+    api_gateway_event: dict[str, Any], lambda_context: MagicMock, monkeypatch: Any
+) -> None:
+    """Test that a retry of a failed submission is published."""
+    mock_eventbridge = MagicMock()
+    mock_eventbridge.put_events.side_effect = [
+        RuntimeError("unavailable"),
+        {"FailedEntryCount": 0, "Entries": [{"EventId": "evt-0"}]},
+    ]
+    monkeypatch.setattr(index, "get_eventbridge_client", lambda: mock_eventbridge)
+    monkeypatch.setattr(index, "deadline_from_context", lambda context: None)
+
+    assert index.handler(api_gateway_event, lambda_context)["statusCode"] == 500
+    assert index.handler(api_gateway_event, lambda_context)["statusCode"] == 202
+
+
+def test_handler_rejects_invalid_order(lambda_context: MagicMock, monkeypatch: Any) -> None:
+    """Test that an order failing schema validation gets 400 and is not published."""
+    mock_eventbridge = MagicMock()
+    monkeypatch.setattr(index, "get_eventbridge_client", lambda: mock_eventbridge)
+
+    body = json.dumps({"orderId": "X", "items": [{"sku": "W-1", "quantity": "2"}]})
+    response = index.handler({"body": body, "path": "/orders"}, lambda_context)
+
+    assert response["statusCode"] == 400
+    assert json.loads(response["body"]) == {
+        "message": "Invalid order: items[0].quantity: must be an integer"
+    }
+    mock_eventbridge.put_events.assert_not_called()
+
+
+def test_handler_bulk_rejects_invalid_orders_only(
+    lambda_context: MagicMock, monkeypatch: Any
+) -> None:
+    """Test that invalid orders in a bulk request are rejected and the rest published."""
+    mock_eventbridge = MagicMock()
+    mock_eventbridge.put_events.return_value = {
+        "FailedEntryCount": 0,
+        "Entries": [{"EventId": "evt-0"}],
+    }
+    monkeypatch.setattr(index, "get_eventbridge_client", lambda: mock_eventbridge)
+
+    body = json.dumps([{"orderId": "ok", "price": 10}, {"orderId": "bad", "price": "ten"}])
+    response = index.handler(_bulk_event(body), lambda_context)
+
+    assert response["statusCode"] == 207
+    results = json.loads(response["body"])["results"]
+    assert [r["status"] for r in results] == ["accepted", "rejected"]
+    assert results[1]["error"] == "Invalid order: price: must be a number"
+    assert len(mock_eventbridge.put_events.call_args[1]["Entries"]) == 1
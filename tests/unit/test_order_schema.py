@@ -0,0 +1,58 @@
+"""Unit tests for the order.received.v1 schema validator."""
+
+from shared import order_schema
+
+VALID = {
+    "orderId": "ORD-1",
+    "purpose": "cancel",
+    "price": 12.5,
+    "priority": "high",
+    "region": "us-east-1",
+    "items": ["W-1", {"sku": "W-2", "quantity": 3}, {"sku": "W-3"}],
+    "stockVersions": {"W-1": 4},
+    "order": {"price": 12.5, "referenceNumber": "REF-1"},
+    "customer": {"anything": ["goes"]},
+}
+
+
+def test_valid_orders_pass() -> None:
+    """Test that the example orders and a fully populated order are accepted."""
+    assert order_schema.validate_order(VALID) is None
+    assert order_schema.validate_order({}) is None
+
+
+def test_errors_name_the_offending_field() -> None:
+    """Test that violations are reported with the path of the field."""
+    cases = [
+        ([VALID], "order: must be an object"),
+        ({**VALID, "price": "100"}, "price: must be a number"),
+        ({**VALID, "price": True}, "price: must be a number"),
+        ({**VALID, "price": -1}, "price: must be at least 0"),
+        ({**VALID, "purpose": "creat"}, "purpose: must be one of: create, update, cancel"),
+        ({**VALID, "orderId": ""}, "orderId: must not be empty"),
+        ({**VALID, "items": "W-1"}, "items: must be an array"),
+        ({**VALID, "items": ["W-1", 7]}, "items[1]: must be a string or object"),
+        ({**VALID, "items": [{"quantity": 2}]}, "items[0].sku: is required"),
+        (
+            {**VALID, "items": [{"sku": "W", "quantity": 1.5}]},
+            "items[0].quantity: must be an integer",
+        ),
+        ({**VALID, "stockVersions": {"W-1": "4"}}, "stockVersions.W-1: must be an integer"),
+        ({**VALID, "order": {"price": None}}, "order.price: must be a number"),
+        ({**VALID, "claimCheck": {"bucket": "b", "key": "k"}}, "claimCheck: is not allowed"),
+    ]
+    for payload, expected in cases:
+        assert order_schema.validate_order(payload) == expected
+
+
+def test_compile_schema_any_of_dispatches_by_type() -> None:
+    """Test that anyOf reports the error of the option matching the value's type."""
+    check = order_schema.compile_schema(
+        {"anyOf": [{"type": "integer", "minimum": 1}, {"type": "string", "minLength": 2}]}
+    )
+
+    assert check(3) is None
+    assert check("ab") is None
+    assert check(0) == ("", "must be at least 1")
+    assert check("a") == ("", "must have at least 2 characters")
+    assert check(False) == ("", "must be an integer or string")
@@ -0,0 +1,106 @@
+"""Unit tests for the shared EventBridge publisher."""
+
+import json
+import time
+from typing import Any
+from unittest.mock import MagicMock
+
+from shared import publisher
+
+
+def _entry(payload: dict[str, Any]) -> dict[str, Any]:
+    """Create a PutEvents entry for the given payload."""
+    return {
+        "Source": "public.api",
+        "DetailType": "order.received.v1",
+        "Detail": json.dumps(payload),
+        "EventBusName": "test-event-bus",
+    }
+
+
+def _no_sleep(_: float) -> None:
+    """Skip backoff delays in tests."""
+
+
+def test_chunk_entries_respects_limits() -> None:
+    """Test that chunking respects both the entry count and request size limits."""
+    small = [(i, _entry({"orderId": i})) for i in range(23)]
+    assert [len(chunk) for chunk in publisher.chunk_entries(small)] == [10, 10, 3]
+
+    big = [(i, _entry({"data": "x" * 100_000})) for i in range(5)]
+    chunks = list(publisher.chunk_entries(big))
+    assert [len(chunk) for chunk in chunks] == [2, 2, 1]
+    for chunk in chunks:
+        total = sum(publisher.entry_size(entry) for _, entry in chunk)
+        assert total <= publisher.PUT_EVENTS_MAX_BYTES
+
+
+def test_publish_retries_only_failed_entries() -> None:
+    """Test that only throttled entries are re-sent."""
+    client = MagicMock()
+    client.put_events.side_effect = [
+        {
+            "FailedEntryCount": 1,
+            "Entries": [
+                {"EventId": "evt-0"},
+                {"ErrorCode": "ThrottlingException", "ErrorMessage": "Rate exceeded"},
+                {"EventId": "evt-2"},
+            ],
+        },
+        {"FailedEntryCount": 0, "Entries": [{"EventId": "evt-1"}]},
+    ]
+    entries = [_entry({"orderId": i}) for i in range(3)]
+
+    result = publisher.publish_entries(client, entries, sleep=_no_sleep)
+
+    assert result.failed_count == 0
+    assert result.retries == 1
+    assert [r["EventId"] for r in result.results] == ["evt-0", "evt-1", "evt-2"]
+    retried = client.put_events.call_args_list[1][1]["Entries"]
+    assert retried == [entries[1]]
+
+
+def test_publish_does_not_retry_permanent_errors() -> None:
+    """Test that non-retryable entry errors are reported without retrying."""
+    client = MagicMock()
+    client.put_events.return_value = {
+        "FailedEntryCount": 1,
+        "Entries": [{"ErrorCode": "MalformedDetail", "ErrorMessage": "Bad detail"}],
+    }
+
+    result = publisher.publish_entries(client, [_entry({})], sleep=_no_sleep)
+
+    assert result.failed_indexes == [0]
+    assert result.retries == 0
+    client.put_events.assert_called_once()
+
+
+def test_publish_retries_throttled_request() -> None:
+    """Test that a throttled PutEvents call is retried, up to max_attempts."""
+    error = Exception("Rate exceeded")
+    error.response = {"Error": {"Code": "ThrottlingException"}}  # type: ignore[attr-defined]
+    client = MagicMock()
+    client.put_events.side_effect = error
+
+    result = publisher.publish_entries(client, [_entry({})], max_attempts=3, sleep=_no_sleep)
+
+    assert client.put_events.call_count == 3
+    assert result.retries == 2
+    assert result.results[0]["ErrorCode"] == "ThrottlingException"
+    assert result.failed_count == 1
+
+
+def test_publish_stops_retrying_at_deadline() -> None:
+    """Test that no retry is attempted once the deadline has passed."""
+    client = MagicMock()
+    client.put_events.return_value = {
+        "FailedEntryCount": 1,
+        "Entries": [{"ErrorCode": "ThrottlingException"}],
+    }
+
+    result = publisher.publish_entries(
+        client, [_entry({})], deadline=time.monotonic(), sleep=_no_sleep
+    )
+
+    client.put_events.assert_called_once()
+    assert result.failed_count == 1
@@ -0,0 +1,41 @@
+"""Unit tests for the shared SQS batch sender."""
+
+from unittest.mock import MagicMock
+
+from shared import sqs_sender
+
+
+def _no_sleep(_: float) -> None:
+    """Skip backoff delays in tests."""
+
+
+def test_chunk_messages_respects_limits() -> None:
+    """Test that message chunks respect the entry count and request size limits."""
+    small = list(enumerate(["x"] * 25))
+    assert [len(chunk) for chunk in sqs_sender.chunk_messages(small)] == [10, 10, 5]
+
+    large = list(enumerate(["x" * 100_000] * 5))
+    assert [len(chunk) for chunk in sqs_sender.chunk_messages(large)] == [2, 2, 1]
+
+
+def test_send_messages_retries_only_server_faults() -> None:
+    """Test that failed entries are retried unless they are the sender's fault."""
+    client = MagicMock()
+    client.send_message_batch.side_effect = [
+        {
+            "Successful": [{"Id": "0", "MessageId": "m-0"}],
+            "Failed": [
+                {"Id": "1", "Code": "InternalError", "SenderFault": False},
+                {"Id": "2", "Code": "InvalidMessageContents", "SenderFault": True},
+            ],
+        },
+        {"Successful": [{"Id": "1", "MessageId": "m-1"}], "Failed": []},
+    ]
+
+    result = sqs_sender.send_messages(client, "queue-url", ["a", "b", "c"], sleep=_no_sleep)
+
+    assert result.retries == 1
+    assert result.failed_indexes == [2]
+    assert [r.get("MessageId") for r in result.results] == ["m-0", "m-1", None]
+    retried = client.send_message_batch.call_args_list[1][1]["Entries"]
+    assert retried == [{"Id": "1", "MessageBody": "b"}]
@@ -0,0 +1,71 @@
+"""Unit tests for the shared stock ledger."""
+
+import pytest
+from shared.stock_ledger import InMemoryStockStore, StockLedger
+
+
+def test_get_reads_backend_only_on_miss() -> None:
+    """Test that repeated reads of a SKU are served from the cache."""
+    store = InMemoryStockStore({"W-1": 7})
+    ledger = StockLedger(store, capacity=4)
+
+    assert ledger.get("W-1") == 7
+    assert ledger.get("W-1") == 7
+    assert store.reads == 1
+    assert (ledger.hits, ledger.misses) == (1, 1)
+
+
+def test_apply_writes_through_and_refreshes_cache() -> None:
+    """Test that changes reach the backend and later reads see them without a read."""
+    store = InMemoryStockStore({"W-1": 10})
+    ledger = StockLedger(store, capacity=4)
+    ledger.get("W-1")
+
+    assert ledger.apply("W-1", -3) == 7
+    assert store.get_stock("W-1") == (7, 1)
+    assert ledger.get("W-1") == 7
+    assert ledger.misses == 1
+
+
+def test_least_recently_used_sku_is_evicted() -> None:
+    """Test that the ledger stays within capacity by evicting the least recently used SKU."""
+    ledger = StockLedger(InMemoryStockStore(), capacity=2)
+    ledger.get("A")
+    ledger.get("B")
+    ledger.get("A")
+    ledger.get("C")
+
+    assert len(ledger) == 2
+    assert "A" in ledger and "C" in ledger and "B" not in ledger
+    assert ledger.evictions == 1
+
+
+def test_invalidate_drops_only_older_versions() -> None:
+    """Test that an event with a newer stock version forces a reread from the backend."""
+    store = InMemoryStockStore()
+    ledger = StockLedger(store, capacity=4)
+    ledger.apply("W-1", 5)  # version 1
+
+    assert not ledger.invalidate("W-1", 1)
+    # Stock changed elsewhere (version 2); the cached level is now stale
+    store.apply_change("W-1", 20)
+    assert ledger.invalidate("W-1", 2)
+    assert "W-1" not in ledger
+    assert ledger.get("W-1") == 25
+
+
+def test_apply_changes_applies_each_change_once() -> None:
+    """Test that replayed change IDs are skipped while new ones are applied."""
+    store = InMemoryStockStore({"W-1": 10})
+    ledger = StockLedger(store, capacity=4)
+
+    assert ledger.apply_changes("W-1", {"m1": -2, "m2": -3}) == 5
+    assert ledger.apply_changes("W-1", {"m2": -3, "m3": -1}) == 4
+    assert ledger.apply_changes("W-2", {"m1": 4}) == 4
+    assert store.get_stock("W-1") == (4, 2)
+
+
+def test_capacity_must_be_positive() -> None:
+    """Test that an empty ledger cannot be created."""
+    with pytest.raises(ValueError):
+        StockLedger(InMemoryStockStore(), capacity=0)
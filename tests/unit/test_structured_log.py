@@ -0,0 +1,162 @@
+"""Unit tests for the shared structured logger."""
+
+import json
+import logging
+from datetime import UTC, datetime
+from typing import Any
+
+import pytest
+from shared import structured_log
+
+
+class _Unserializable:
+    """Value that fails if the logger ever tries to serialize it."""
+
+    def __str__(self) -> str:
+        raise AssertionError("value was serialized")
+
+
+def test_format_entry_is_valid_json() -> None:
+    """Test that formatted entries match the previous json.dumps layout."""
+    line = structured_log.format_entry("info", "Test message", key="value", number=123)
+
+    assert json.loads(line) == {
+        "level": "info",
+        "message": "Test message",
+        "key": "value",
+        "number": 123,
+    }
+
+
+def test_format_entry_handles_non_json_values() -> None:
+    """Test that values such as datetimes in AWS responses are stringified."""
+    when = datetime(2025, 1, 1, tzinfo=UTC)
+
+    line = structured_log.format_entry("info", "Test message", when=when)
+
+    assert json.loads(line)["when"] == str(when)
+
+
+def test_format_entry_truncates_large_fields(monkeypatch: pytest.MonkeyPatch) -> None:
+    """Test that oversized fields are truncated with a marker."""
+    monkeypatch.setattr(structured_log, "LOG_MAX_FIELD_BYTES", 100)
+
+    line = structured_log.format_entry("info", "Test message", detail={"data": "x" * 1000})
+
+    entry = json.loads(line)
+    assert entry["detail"].startswith('{"data": "xxx')
+    assert entry["detail"].endswith("...[truncated 912 chars]")
+
+
+def test_log_structured_skips_serialization_below_level(
+    caplog: pytest.LogCaptureFixture,
+) -> None:
+    """Test that disabled levels return before serializing any field."""
+    with caplog.at_level(logging.WARNING):
+        structured_log.log_structured("info", "Test message", value=_Unserializable())
+
+    assert caplog.records == []
+
+
+def test_log_structured_emits_enabled_level(caplog: pytest.LogCaptureFixture) -> None:
+    """Test that enabled levels are logged as JSON."""
+    with caplog.at_level(logging.INFO):
+        structured_log.log_structured("warning", "Test message", key="value")
+
+    assert json.loads(caplog.records[-1].getMessage())["key"] == "value"
+    assert caplog.records[-1].levelno == logging.WARNING
+
+
+@pytest.mark.parametrize(("rate", "expected"), [(0.0, 0), (1.0, 1)])
+def test_log_sampled_respects_rate(
+    rate: float, expected: int, monkeypatch: pytest.MonkeyPatch, caplog: pytest.LogCaptureFixture
+) -> None:
+    """Test that sampled logs are dropped or kept according to the sample rate."""
+    monkeypatch.setattr(structured_log, "LOG_SAMPLE_RATE", rate)
+
+    with caplog.at_level(logging.INFO):
+        structured_log.log_sampled("info", "Received event", event={"id": 1})
+
+    assert len(caplog.records) == expected
+
+
+def test_buffered_logs_flush_once_per_invocation(caplog: pytest.LogCaptureFixture) -> None:
+    """Test that entries logged during an invocation are written as one record."""
+
+    @structured_log.buffered_logs
+    def handler(event: dict[str, Any], context: Any) -> dict[str, Any]:
+        for i in range(5):
+            structured_log.log_structured("info", "Processing record", index=i)
+        return {"statusCode": 200}
+
+    with caplog.at_level(logging.INFO):
+        assert handler({}, None) == {"statusCode": 200}
+
+    assert len(caplog.records) == 1
+    batch = json.loads(caplog.records[0].getMessage())
+    assert batch["entry_count"] == 5
+    assert [entry["index"] for entry in batch["entries"]] == list(range(5))
+
+
+def test_nested_buffered_logs_share_the_outer_buffer(caplog: pytest.LogCaptureFixture) -> None:
+    """Test that a wrapped handler called from another keeps the outer entries."""
+
+    @structured_log.buffered_logs
+    def inner(event: dict[str, Any], context: Any) -> dict[str, Any]:
+        structured_log.log_structured("warning", "Inner")
+        return {}
+
+    @structured_log.buffered_logs
+    def outer(event: dict[str, Any], context: Any) -> dict[str, Any]:
+        structured_log.log_structured("info", "Before")
+        inner(event, context)
+        assert caplog.records == []
+        structured_log.log_structured("info", "After")
+        return {}
+
+    with caplog.at_level(logging.INFO):
+        outer({}, None)
+
+    (record,) = caplog.records
+    batch = json.loads(record.getMessage())
+    assert batch["level"] == "warning" and record.levelno == logging.WARNING
+    assert [entry["message"] for entry in batch["entries"]] == ["Before", "Inner", "After"]
+    assert structured_log._buffer is None
+
+
+def test_buffered_logs_flush_on_error_and_exception(caplog: pytest.LogCaptureFixture) -> None:
+    """Test that errors flush immediately and a raising handler still flushes."""
+
+    @structured_log.buffered_logs
+    def handler(event: dict[str, Any], context: Any) -> dict[str, Any]:
+        structured_log.log_structured("info", "Before error")
+        structured_log.log_structured("error", "Something failed")
+        assert len(caplog.records) == 1
+        structured_log.log_structured("info", "After error")
+        raise RuntimeError("boom")
+
+    with caplog.at_level(logging.INFO), pytest.raises(RuntimeError):
+        handler({}, None)
+
+    assert len(caplog.records) == 2
+    assert caplog.records[0].levelno == logging.ERROR
+    assert json.loads(caplog.records[1].getMessage())["message"] == "After error"
+
+
+def test_buffered_logs_respects_size_cap(
+    monkeypatch: pytest.MonkeyPatch, caplog: pytest.LogCaptureFixture
+) -> None:
+    """Test that the buffer is flushed early when it reaches its size cap."""
+    monkeypatch.setattr(structured_log, "LOG_BUFFER_MAX_BYTES", 500)
+
+    @structured_log.buffered_logs
+    def handler(event: dict[str, Any], context: Any) -> dict[str, Any]:
+        for _ in range(10):
+            structured_log.log_structured("info", "Record", data="x" * 100)
+        return {}
+
+    with caplog.at_level(logging.INFO):
+        handler({}, None)
+
+    assert len(caplog.records) > 1
+    assert all(len(record.getMessage()) <= 700 for record in caplog.records)